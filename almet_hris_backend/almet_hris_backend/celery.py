@@ -52,6 +52,18 @@ app.conf.beat_schedule = {
         'task': 'api.tasks.send_daily_celebration_notifications',
         'schedule': crontab(hour=9, minute=0),  # Daily at 9 AM
     },
+    
+    # ==================== BACKGROUND EXPORTS ====================
+    'cleanup-export-files': {
+        'task': 'api.tasks.cleanup_export_files',
+        'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM
+    },
+    
+    # ==================== VIEW / DOWNLOAD COUNTERS ====================
+    'flush-counter-increments': {
+        'task': 'api.tasks.flush_counter_increments',
+        'schedule': crontab(minute='*'),  # Every minute
+    },
 }
 
 @app.task(bind=True)
@@ -0,0 +1,165 @@
+# api/access_scope.py - Shared, memoized access scope for permission modules
+
+from django.core.cache import cache
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Random token, replaced on every invalidation. Tokens never repeat, so a key
+# culled from the cache can not bring back scopes cached under an old version.
+SCOPE_VERSION_KEY = 'access_scope:version'
+SCOPE_CACHE_TIMEOUT = 300  # 5 minutes - safety net on top of version invalidation
+
+
+class AccessScope:
+    """
+    Who the user is in the org and what they can reach:
+    employee record, Admin role, direct reports and their business functions.
+
+    Computed once per request (memoized on the request's user object) and
+    cached across requests under a version token that is replaced whenever roles
+    or the line-manager hierarchy change.
+    """
+
+    def __init__(self, employee_id=None, business_function_id=None, is_admin=False,
+                 direct_report_ids=None, direct_report_business_function_ids=None):
+        self.employee_id = employee_id
+        self.business_function_id = business_function_id
+        self.is_admin = is_admin
+        self.direct_report_ids = list(direct_report_ids or [])
+        self.direct_report_business_function_ids = list(direct_report_business_function_ids or [])
+        self._employee = None
+
+    @property
+    def has_employee(self):
+        return self.employee_id is not None
+
+    @property
+    def is_manager(self):
+        return bool(self.direct_report_ids)
+
+    @property
+    def employee(self):
+        """Employee instance, loaded lazily (only when a caller needs the object)"""
+        if self._employee is None and self.employee_id is not None:
+            from .models import Employee
+            self._employee = Employee.objects.filter(pk=self.employee_id).first()
+        return self._employee
+
+    @property
+    def team_employee_ids(self):
+        """Self + direct reports"""
+        if self.employee_id is None:
+            return []
+        return [self.employee_id] + self.direct_report_ids
+
+    @property
+    def team_business_function_ids(self):
+        """Business functions of self + direct reports"""
+        ids = set(self.direct_report_business_function_ids)
+        if self.business_function_id:
+            ids.add(self.business_function_id)
+        return list(ids)
+
+    def to_cache(self):
+        return {
+            'employee_id': self.employee_id,
+            'business_function_id': self.business_function_id,
+            'is_admin': self.is_admin,
+            'direct_report_ids': self.direct_report_ids,
+            'direct_report_business_function_ids': self.direct_report_business_function_ids,
+        }
+
+    @classmethod
+    def from_cache(cls, data):
+        return cls(**data)
+
+    @classmethod
+    def compute(cls, user):
+        """Resolve the scope from the database (3 queries at most)"""
+        from .models import Employee
+        from .role_models import EmployeeRole
+
+        employee_row = Employee.objects.filter(
+            user=user, is_deleted=False
+        ).values('id', 'business_function_id').first()
+
+        if not employee_row:
+            return cls()
+
+        is_admin = EmployeeRole.objects.filter(
+            employee_id=employee_row['id'],
+            role__name__icontains='Admin',
+            role__is_active=True,
+            is_active=True
+        ).exists()
+
+        direct_reports = list(
+            Employee.objects.filter(
+                line_manager_id=employee_row['id'],
+                is_deleted=False
+            ).values_list('id', 'business_function_id')
+        )
+
+        return cls(
+            employee_id=employee_row['id'],
+            business_function_id=employee_row['business_function_id'],
+            is_admin=is_admin,
+            direct_report_ids=[report_id for report_id, _ in direct_reports],
+            direct_report_business_function_ids=list({bf_id for _, bf_id in direct_reports if bf_id}),
+        )
+
+
+def get_scope_version():
+    version = cache.get(SCOPE_VERSION_KEY)
+    if version is None:
+        token = uuid.uuid4().hex
+        cache.add(SCOPE_VERSION_KEY, token, None)
+        # Culled again right away - a one-off token only misses the cache
+        version = cache.get(SCOPE_VERSION_KEY) or token
+    return version
+
+
+def invalidate_access_scopes():
+    """Drop every cached scope (roles or hierarchy changed)"""
+    try:
+        cache.set(SCOPE_VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f"Could not invalidate access scope cache: {e}")
+
+
+def get_access_scope(user):
+    """
+    Access scope for user.
+
+    The result is memoized on the user object, which DRF keeps for the whole
+    request, so repeated permission checks in one request never hit the
+    database twice.
+    """
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return AccessScope()
+
+    scope = getattr(user, '_access_scope', None)
+    if scope is not None:
+        return scope
+
+    cache_key = None
+    try:
+        cache_key = f'access_scope:v{get_scope_version()}:user:{user.pk}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            scope = AccessScope.from_cache(cached)
+    except Exception as e:
+        logger.warning(f"Access scope cache unavailable: {e}")
+
+    if scope is None:
+        scope = AccessScope.compute(user)
+        if cache_key:
+            try:
+                cache.set(cache_key, scope.to_cache(), SCOPE_CACHE_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Could not cache access scope: {e}")
+
+    user._access_scope = scope
+    return scope
@@ -0,0 +1,732 @@
+# api/assessment_documents.py - Styled XLSX documents for assessments and performance reviews
+
+"""
+Workbook builder shared by the single-record export endpoints and the bulk
+export job.
+
+Cell styles are openpyxl NamedStyles registered once per workbook, so a cell
+only stores a style name and the file holds each style once, however many rows
+or sheets use it. Font / fill / border objects are created once per process.
+
+Bulk exports load ratings (and objectives / development needs) for all
+records with one prefetch query each. Each record then becomes either one
+sheet of a shared workbook or its own file inside a ZIP.
+"""
+
+from datetime import datetime
+import io
+import logging
+import re
+import tempfile
+import uuid
+import zipfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.urls import reverse
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
+from rest_framework import status
+from rest_framework.response import Response
+
+from .export_service import BACKGROUND_EXPORT_DIR, XLSX_CONTENT_TYPE
+
+logger = logging.getLogger(__name__)
+
+# Records loaded per prefetch round trip
+DOCUMENT_CHUNK_SIZE = 100
+
+DOCUMENT_FORMATS = ('workbook', 'zip')
+
+
+def _fill(color):
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+_THIN_BORDER = Border(
+    left=Side(style='thin'), right=Side(style='thin'),
+    top=Side(style='thin'), bottom=Side(style='thin')
+)
+_SECTION_FILL = _fill('D3D3D3')
+
+# Named style -> cell attributes
+STYLE_DEFINITIONS = {
+    'doc_title': {'font': Font(bold=True, size=16, color='FFFFFF'), 'fill': _fill('366092'),
+                  'alignment': Alignment(horizontal='center')},
+    'doc_section': {'font': Font(bold=True, size=12), 'fill': _SECTION_FILL},
+    'doc_table_header': {'font': Font(bold=True), 'fill': _SECTION_FILL, 'border': _THIN_BORDER},
+    'doc_label': {'font': Font(bold=True)},
+    'doc_cell': {'border': _THIN_BORDER},
+    'doc_cell_green': {'border': _THIN_BORDER, 'fill': _fill('90EE90')},
+    'doc_cell_yellow': {'border': _THIN_BORDER, 'fill': _fill('FFFF99')},
+    'doc_cell_orange': {'border': _THIN_BORDER, 'fill': _fill('FFE4B5')},
+    'doc_cell_red': {'border': _THIN_BORDER, 'fill': _fill('FFB6C1')},
+    'doc_meets': {'border': _THIN_BORDER, 'fill': _fill('90EE90'), 'font': Font(color='006400')},
+    'doc_below': {'border': _THIN_BORDER, 'fill': _fill('FFB6C1'), 'font': Font(color='8B0000')},
+    'doc_grade_a': {'font': Font(bold=True, size=14), 'fill': _fill('00FF00')},
+    'doc_grade_b': {'font': Font(bold=True, size=14), 'fill': _fill('FFFF00')},
+    'doc_grade_c': {'font': Font(bold=True, size=14), 'fill': _fill('FFA500')},
+    'doc_grade_d': {'font': Font(bold=True, size=14), 'fill': _fill('FF0000')},
+    'doc_success_note': {'font': Font(bold=True, color='006400')},
+    # Performance review layout
+    'doc_sheet_title': {'font': Font(bold=True, size=14)},
+    'doc_subtitle': {'font': Font(bold=True, size=12)},
+    'doc_column_header': {'font': Font(bold=True, color='FFFFFF', size=11), 'fill': _fill('366092'),
+                          'border': _THIN_BORDER},
+}
+
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+class DocumentWorkbook:
+    """Workbook with the document named styles registered"""
+
+    def __init__(self):
+        self.workbook = Workbook()
+        self._default_sheet = self.workbook.active
+        self._titles = set()
+
+        for name, attributes in STYLE_DEFINITIONS.items():
+            self.workbook.add_named_style(NamedStyle(name=name, **{'font': DEFAULT_FONT, **attributes}))
+
+    def add_sheet(self, title):
+        """New sheet with a valid, unique title (max 31 characters)"""
+        base = _INVALID_SHEET_CHARS.sub('', str(title)).strip()[:31] or 'Sheet'
+        title, counter = base, 2
+        while title.lower() in self._titles:
+            suffix = f" ({counter})"
+            title = f"{base[:31 - len(suffix)]}{suffix}"
+            counter += 1
+        self._titles.add(title.lower())
+
+        if self._default_sheet is not None:
+            sheet = self._default_sheet
+            sheet.title = title
+            self._default_sheet = None
+            return sheet
+        return self.workbook.create_sheet(title)
+
+    def save(self, fileobj):
+        self.workbook.save(fileobj)
+
+
+# ==================== HELPERS ====================
+
+def _put(ws, ref, value, style=None):
+    cell = ws[ref]
+    cell.value = value
+    if style:
+        cell.style = style
+    return cell
+
+
+def _cell(ws, row, column, value, style='doc_cell'):
+    cell = ws.cell(row=row, column=column, value=value)
+    if style:
+        cell.style = style
+    return cell
+
+
+def _section(ws, row, title, last_column):
+    _put(ws, f'A{row}', title, 'doc_section')
+    ws.merge_cells(f'A{row}:{last_column}{row}')
+
+
+def _table_header(ws, row, headers, style='doc_table_header'):
+    for column, header in enumerate(headers, start=1):
+        _cell(ws, row, column, header, style)
+
+
+def _labels(ws, row, pairs):
+    for label, value in pairs:
+        _put(ws, f'A{row}', label, 'doc_label')
+        ws[f'B{row}'] = value
+        row += 1
+    return row
+
+
+def _grade_style(letter_grade):
+    if letter_grade in ['A+', 'A', 'A-']:
+        return 'doc_grade_a'
+    if letter_grade in ['B+', 'B', 'B-']:
+        return 'doc_grade_b'
+    if letter_grade in ['C+', 'C', 'C-']:
+        return 'doc_grade_c'
+    return 'doc_grade_d'
+
+
+def _percentage_style(percentage):
+    if percentage >= 90:
+        return 'doc_cell_green'
+    if percentage >= 80:
+        return 'doc_cell_yellow'
+    if percentage >= 70:
+        return 'doc_cell_orange'
+    return 'doc_cell_red'
+
+
+def fit_columns(ws, column_count, max_width):
+    """Width of each column from its longest value"""
+    widths = [0] * column_count
+    for row_cells in ws.iter_rows(max_col=column_count):
+        for index, cell in enumerate(row_cells):
+            if cell.value:
+                widths[index] = max(widths[index], len(str(cell.value)))
+
+    for index, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(index)].width = min(width + 2, max_width)
+
+
+def _title(ws, text):
+    _put(ws, 'A1', text, 'doc_title')
+    ws.merge_cells('A1:F1')
+
+
+def _overall_grade(ws, row, title, assessment):
+    _section(ws, row, title, 'D')
+    row += 1
+
+    _put(ws, f'A{row}', "Overall Grade:", 'doc_label')
+    _put(
+        ws, f'B{row}',
+        f"{assessment.overall_letter_grade} ({assessment.overall_percentage}%)",
+        _grade_style(assessment.overall_letter_grade)
+    )
+    return row + 2
+
+
+def _group_scores(ws, row, title, first_header, scores_by_group):
+    _section(ws, row, title, 'E')
+    row += 1
+
+    _table_header(ws, row, [first_header, 'Required Score', 'Actual Score', 'Percentage', 'Grade'])
+    row += 1
+
+    for group_name, scores in scores_by_group.items():
+        style = _percentage_style(scores['percentage'])
+        _cell(ws, row, 1, group_name)
+        _cell(ws, row, 2, scores['position_total'])
+        _cell(ws, row, 3, scores['employee_total'])
+        _cell(ws, row, 4, f"{scores['percentage']}%", style)
+        _cell(ws, row, 5, scores['letter_grade'], style)
+        row += 1
+    return row
+
+
+def _performance_cell(ws, row, column, rating):
+    meets = rating.actual_level >= rating.required_level
+    _cell(ws, row, column, "Meets" if meets else "Below", 'doc_meets' if meets else 'doc_below')
+
+
+# ==================== DOCUMENT WRITERS ====================
+
+def _ratings(assessment, default_queryset):
+    """Prefetched export ratings when loaded in bulk, else the given query"""
+    prefetched = getattr(assessment, 'export_ratings', None)
+    return prefetched if prefetched is not None else list(default_queryset)
+
+
+def write_core_assessment(ws, assessment):
+    _title(ws, "CORE COMPETENCY ASSESSMENT REPORT")
+
+    row = 3
+    _section(ws, row, "Employee Information", 'B')
+    row = _labels(ws, row + 1, [
+        ("Employee ID:", assessment.employee.employee_id),
+        ("Name:", assessment.employee.full_name),
+        ("Job Title:", assessment.employee.job_title),
+        ("Assessment Date:", assessment.assessment_date.strftime('%Y-%m-%d')),
+        ("Status:", assessment.get_status_display())
+    ])
+
+    # Summary scores
+    row += 2
+    _section(ws, row, "ASSESSMENT SUMMARY", 'B')
+    row = _labels(ws, row + 1, [
+        ("Total Position Score:", assessment.total_position_score),
+        ("Total Employee Score:", assessment.total_employee_score),
+        ("Gap Score:", assessment.gap_score),
+        ("Completion Percentage:", f"{assessment.completion_percentage}%")
+    ])
+
+    # Detailed ratings
+    row += 2
+    _section(ws, row, "DETAILED COMPETENCY RATINGS", 'F')
+    row += 1
+    _table_header(ws, row, ['Skill Group', 'Skill Name', 'Required Level', 'Actual Level', 'Gap', 'Notes'])
+    row += 1
+
+    ratings = _ratings(assessment, assessment.competency_ratings.select_related('skill__group'))
+    for rating in ratings:
+        _cell(ws, row, 1, rating.skill.group.name)
+        _cell(ws, row, 2, rating.skill.name)
+        _cell(ws, row, 3, rating.required_level)
+        _cell(ws, row, 4, rating.actual_level)
+
+        # Gap with color coding
+        gap_style = 'doc_cell_green' if rating.gap > 0 else 'doc_cell_red' if rating.gap < 0 else 'doc_cell'
+        _cell(ws, row, 5, rating.gap, gap_style)
+        _cell(ws, row, 6, rating.notes or '')
+        row += 1
+
+    fit_columns(ws, 6, 50)
+
+
+def write_behavioral_assessment(ws, assessment):
+    _title(ws, "BEHAVIORAL COMPETENCY ASSESSMENT REPORT")
+
+    row = 3
+    _section(ws, row, "Employee Information", 'B')
+    row = _labels(ws, row + 1, [
+        ("Employee ID:", assessment.employee.employee_id),
+        ("Name:", assessment.employee.full_name),
+        ("Job Title:", assessment.employee.job_title),
+        ("Department:", getattr(assessment.employee.department, 'name', 'N/A')),
+        ("Assessment Date:", assessment.assessment_date.strftime('%Y-%m-%d')),
+        ("Status:", assessment.get_status_display())
+    ])
+
+    row = _overall_grade(ws, row + 2, "OVERALL PERFORMANCE SUMMARY", assessment)
+    row = _group_scores(ws, row, "COMPETENCY GROUP PERFORMANCE", 'Competency Group', assessment.group_scores)
+
+    # Detailed Competency Ratings
+    row += 2
+    _section(ws, row, "DETAILED COMPETENCY RATINGS", 'F')
+    row += 1
+    _table_header(ws, row, ['Competency Group', 'Competency Name', 'Required Level', 'Actual Level', 'Performance', 'Notes'])
+    row += 1
+
+    ratings = _ratings(
+        assessment,
+        assessment.competency_ratings.select_related('behavioral_competency__group').order_by(
+            'behavioral_competency__group__name', 'behavioral_competency__name'
+        )
+    )
+
+    current_group = None
+    for rating in ratings:
+        group_name = rating.behavioral_competency.group.name
+        # Group separator
+        if current_group != group_name:
+            if current_group is not None:
+                row += 1  # Add space between groups
+            current_group = group_name
+
+        _cell(ws, row, 1, group_name)
+        _cell(ws, row, 2, rating.behavioral_competency.name)
+        _cell(ws, row, 3, rating.required_level)
+        _cell(ws, row, 4, rating.actual_level)
+        _performance_cell(ws, row, 5, rating)
+        _cell(ws, row, 6, rating.notes or '')
+        row += 1
+
+    # Development recommendations
+    row += 2
+    _section(ws, row, "DEVELOPMENT RECOMMENDATIONS", 'F')
+    row += 1
+
+    # Find competencies needing improvement
+    improvement_areas = [
+        {
+            'competency': rating.behavioral_competency.name,
+            'current': rating.actual_level,
+            'target': rating.required_level,
+            'gap': rating.required_level - rating.actual_level
+        }
+        for rating in ratings
+        if rating.actual_level < rating.required_level
+    ]
+
+    if improvement_areas:
+        _put(ws, f'A{row}', "Priority areas for development:", 'doc_label')
+        row += 1
+
+        for area in sorted(improvement_areas, key=lambda x: x['gap'], reverse=True):
+            ws[f'A{row}'] = f"• {area['competency']}: Current {area['current']} → Target {area['target']} (Gap: {area['gap']})"
+            row += 1
+    else:
+        _put(ws, f'A{row}', "All competencies meet or exceed required levels!", 'doc_success_note')
+
+    fit_columns(ws, 6, 50)
+
+
+def write_leadership_assessment(ws, assessment):
+    _title(ws, "LEADERSHIP COMPETENCY ASSESSMENT REPORT")
+
+    row = 3
+    _section(ws, row, "Employee Information", 'B')
+    row = _labels(ws, row + 1, [
+        ("Employee ID:", assessment.employee.employee_id),
+        ("Name:", assessment.employee.full_name),
+        ("Job Title:", assessment.employee.job_title),
+        ("Position Group:", assessment.employee.position_group.get_name_display()),
+        ("Assessment Date:", assessment.assessment_date.strftime('%Y-%m-%d')),
+        ("Status:", assessment.get_status_display())
+    ])
+
+    row = _overall_grade(ws, row + 2, "OVERALL LEADERSHIP PERFORMANCE", assessment)
+    row = _group_scores(ws, row, "MAIN COMPETENCY GROUP PERFORMANCE", 'Main Group', assessment.main_group_scores)
+
+    # Detailed Competency Ratings
+    row += 2
+    _section(ws, row, "DETAILED LEADERSHIP COMPETENCY RATINGS", 'G')
+    row += 1
+    _table_header(ws, row, ['Main Group', 'Child Group', 'Competency Item', 'Required', 'Actual', 'Performance', 'Notes'])
+    row += 1
+
+    # Rating data grouped by main and child groups
+    ratings = _ratings(
+        assessment,
+        assessment.competency_ratings.select_related(
+            'leadership_item__child_group__main_group'
+        ).order_by(
+            'leadership_item__child_group__main_group__name',
+            'leadership_item__child_group__name'
+        )
+    )
+
+    current_main_group = None
+    for rating in ratings:
+        main_group = rating.leadership_item.child_group.main_group.name
+        child_group = rating.leadership_item.child_group.name
+
+        # Add space between main groups
+        if current_main_group != main_group:
+            if current_main_group is not None:
+                row += 1
+            current_main_group = main_group
+
+        _cell(ws, row, 1, main_group)
+        _cell(ws, row, 2, child_group)
+        _cell(ws, row, 3, rating.leadership_item.name[:100])
+        _cell(ws, row, 4, rating.required_level)
+        _cell(ws, row, 5, rating.actual_level)
+        _performance_cell(ws, row, 6, rating)
+        _cell(ws, row, 7, rating.notes or '')
+        row += 1
+
+    fit_columns(ws, 7, 60)
+
+
+def _sheet_table(ws, headers, rows):
+    _table_header(ws, 1, headers, 'doc_column_header')
+    for row_number, values in enumerate(rows, start=2):
+        for column, value in enumerate(values, start=1):
+            ws.cell(row=row_number, column=column, value=value)
+
+
+def write_performance(book, performance):
+    """Performance review: Summary, Objectives, Competencies and Development Needs sheets"""
+    employee = performance.employee
+
+    ws_summary = book.add_sheet('Summary')
+    _put(ws_summary, 'A1', 'PERFORMANCE REVIEW SUMMARY', 'doc_sheet_title')
+
+    row = _labels(ws_summary, 3, [
+        ['Employee Name:', employee.full_name],
+        ['Employee ID:', employee.employee_id],
+        ['Department:', employee.department.name if employee.department else 'N/A'],
+        ['Position:', str(employee.position_group) if employee.position_group else 'N/A'],
+        ['Manager:', employee.line_manager.full_name if employee.line_manager else 'N/A'],
+        ['Performance Year:', str(performance.performance_year.year)],
+        ['Status:', performance.get_approval_status_display()],
+    ])
+
+    row += 2
+    _put(ws_summary, f'A{row}', 'PERFORMANCE SCORES', 'doc_subtitle')
+    _labels(ws_summary, row + 1, [
+        ['Objectives Score:', f"{performance.total_objectives_score}"],
+        ['Objectives Percentage:', f"{performance.objectives_percentage}%"],
+        ['Competencies Score:', f"{performance.total_competencies_actual_score} / {performance.total_competencies_required_score}"],
+        ['Competencies Percentage:', f"{performance.competencies_percentage}%"],
+        ['Competencies Letter Grade:', performance.competencies_letter_grade or 'N/A'],
+        ['Overall Percentage:', f"{performance.overall_weighted_percentage}%"],
+        ['Final Rating:', performance.final_rating or 'N/A'],
+    ])
+
+    # OBJECTIVES SHEET
+    objectives = getattr(performance, 'export_objectives', None)
+    if objectives is None:
+        objectives = performance.objectives.filter(is_cancelled=False).select_related(
+            'status', 'end_year_rating'
+        ).order_by('display_order')
+
+    ws_obj = book.add_sheet('Objectives')
+    _sheet_table(ws_obj, ['#', 'Title', 'Description', 'Weight %', 'Status', 'End-Year Rating', 'Score'], (
+        [
+            idx, obj.title, obj.description, obj.weight,
+            obj.status.label if obj.status else 'N/A',
+            obj.end_year_rating.name if obj.end_year_rating else 'N/A',
+            float(obj.calculated_score)
+        ]
+        for idx, obj in enumerate(objectives, 1)
+    ))
+
+    # COMPETENCIES SHEET
+    competencies = getattr(performance, 'export_competencies', None)
+    if competencies is None:
+        competencies = performance.competency_ratings.select_related(*PERFORMANCE_COMPETENCY_RELATED)
+
+    def competency_row(comp):
+        if comp.behavioral_competency:
+            group_name = comp.behavioral_competency.group.name
+            comp_name = comp.behavioral_competency.name
+        elif comp.leadership_item:
+            group_name = comp.leadership_item.child_group.main_group.name if comp.leadership_item.child_group else 'Leadership'
+            comp_name = comp.leadership_item.name
+        else:
+            group_name = 'N/A'
+            comp_name = 'N/A'
+
+        return [
+            group_name, comp_name, comp.required_level or 0,
+            comp.end_year_rating.name if comp.end_year_rating else 'N/A',
+            comp.actual_value, comp.gap, comp.notes or ''
+        ]
+
+    ws_comp = book.add_sheet('Competencies')
+    _sheet_table(
+        ws_comp,
+        ['Group', 'Competency', 'Required Level', 'End-Year Rating', 'Actual Value', 'Gap', 'Notes'],
+        (competency_row(comp) for comp in competencies)
+    )
+
+    # DEVELOPMENT NEEDS SHEET
+    ws_dev = book.add_sheet('Development Needs')
+    _sheet_table(ws_dev, ['Competency Gap', 'Development Activity', 'Progress %', 'Comment'], (
+        [need.competency_gap, need.development_activity, need.progress, need.comment or '']
+        for need in performance.development_needs.all()
+    ))
+
+    for ws in (ws_summary, ws_obj, ws_comp, ws_dev):
+        fit_columns(ws, ws.max_column, 50)
+
+
+PERFORMANCE_COMPETENCY_RELATED = (
+    'behavioral_competency',
+    'behavioral_competency__group',
+    'leadership_item__child_group__main_group',
+    'end_year_rating'
+)
+
+
+# ==================== DOCUMENT KINDS ====================
+
+def _kinds():
+    from .competency_assessment_models import (
+        EmployeeCoreAssessment, EmployeeCoreCompetencyRating,
+        EmployeeBehavioralAssessment, EmployeeBehavioralCompetencyRating,
+        EmployeeLeadershipAssessment, EmployeeLeadershipCompetencyRating,
+    )
+    from .performance_models import EmployeePerformance, EmployeeObjective, EmployeeCompetencyRating
+
+    return {
+        'core': {
+            'model': EmployeeCoreAssessment,
+            'related': ('employee', 'position_assessment'),
+            'prefetch': [Prefetch(
+                'competency_ratings',
+                queryset=EmployeeCoreCompetencyRating.objects.select_related('skill__group'),
+                to_attr='export_ratings'
+            )],
+            'sheet_title': 'Core Competency Assessment',
+            'writer': write_core_assessment,
+            'filename': lambda obj: f"core_assessment_{obj.employee.employee_id}_{obj.assessment_date}.xlsx",
+            'archive_name': lambda obj: f"core_assessment_{obj.employee.employee_id}_{obj.assessment_date:%Y-%m-%d}.xlsx",
+        },
+        'behavioral': {
+            'model': EmployeeBehavioralAssessment,
+            'related': ('employee', 'employee__department', 'position_assessment'),
+            'prefetch': [Prefetch(
+                'competency_ratings',
+                queryset=EmployeeBehavioralCompetencyRating.objects.select_related(
+                    'behavioral_competency__group'
+                ).order_by('behavioral_competency__group__name', 'behavioral_competency__name'),
+                to_attr='export_ratings'
+            )],
+            'sheet_title': 'Behavioral Assessment',
+            'writer': write_behavioral_assessment,
+            'filename': lambda obj: f"behavioral_assessment_{obj.employee.employee_id}_{obj.assessment_date}.xlsx",
+            'archive_name': lambda obj: f"behavioral_assessment_{obj.employee.employee_id}_{obj.assessment_date:%Y-%m-%d}.xlsx",
+        },
+        'leadership': {
+            'model': EmployeeLeadershipAssessment,
+            'related': ('employee', 'employee__position_group', 'position_assessment'),
+            'prefetch': [Prefetch(
+                'competency_ratings',
+                queryset=EmployeeLeadershipCompetencyRating.objects.select_related(
+                    'leadership_item__child_group__main_group'
+                ).order_by(
+                    'leadership_item__child_group__main_group__name',
+                    'leadership_item__child_group__name'
+                ),
+                to_attr='export_ratings'
+            )],
+            'sheet_title': 'Leadership Assessment',
+            'writer': write_leadership_assessment,
+            'filename': lambda obj: f"leadership_assessment_{obj.employee.employee_id}_{obj.assessment_date}.xlsx",
+            'archive_name': lambda obj: f"leadership_assessment_{obj.employee.employee_id}_{obj.assessment_date:%Y-%m-%d}.xlsx",
+        },
+        'performance': {
+            'model': EmployeePerformance,
+            'related': (
+                'employee', 'employee__department', 'employee__position_group',
+                'employee__line_manager', 'performance_year'
+            ),
+            'prefetch': [
+                Prefetch(
+                    'objectives',
+                    queryset=EmployeeObjective.objects.filter(is_cancelled=False).select_related(
+                        'status', 'end_year_rating'
+                    ).order_by('display_order'),
+                    to_attr='export_objectives'
+                ),
+                Prefetch(
+                    'competency_ratings',
+                    queryset=EmployeeCompetencyRating.objects.select_related(*PERFORMANCE_COMPETENCY_RELATED),
+                    to_attr='export_competencies'
+                ),
+                'development_needs',
+            ],
+            # Four sheets per review - ZIP only
+            'formats': ('zip',),
+            'book_writer': write_performance,
+            'filename': lambda obj: f"Performance_{obj.employee.employee_id}_{obj.performance_year.year}.xlsx",
+        },
+    }
+
+
+def document_kinds():
+    return list(_kinds())
+
+
+def document_formats(kind):
+    return _kinds()[kind].get('formats', DOCUMENT_FORMATS)
+
+
+def _write_record(book, config, obj, sheet_title=None):
+    if 'book_writer' in config:
+        config['book_writer'](book, obj)
+    else:
+        config['writer'](book.add_sheet(sheet_title or config['sheet_title']), obj)
+
+
+def build_document(kind, obj):
+    """Workbook of one assessment / performance review"""
+    book = DocumentWorkbook()
+    _write_record(book, _kinds()[kind], obj)
+    return book
+
+
+def document_filename(kind, obj):
+    return _kinds()[kind]['filename'](obj)
+
+
+def _iter_records(config, ids):
+    queryset = config['model'].objects.filter(pk__in=ids).select_related(
+        *config['related']
+    ).prefetch_related(*config['prefetch']).order_by('employee__employee_id', 'pk')
+    return queryset.iterator(chunk_size=DOCUMENT_CHUNK_SIZE)
+
+
+def run_document_export_job(kind, ids, user_id, export_format='workbook'):
+    """
+    Render many records into default_storage:
+    'workbook' - one sheet per record in a single XLSX, 'zip' - one XLSX per record
+    """
+    config = _kinds()[kind]
+    if export_format not in document_formats(kind):
+        raise ValueError(f"{kind} documents cannot be exported as {export_format}")
+
+    stamp = datetime.now().strftime('%Y%m%d_%H%M')
+    count = 0
+
+    with tempfile.TemporaryFile() as tmp:
+        if export_format == 'workbook':
+            filename = f"{kind}_assessments_{stamp}.xlsx"
+            book = DocumentWorkbook()
+            for obj in _iter_records(config, ids):
+                _write_record(book, config, obj, f"{obj.employee.employee_id} {obj.employee.full_name}")
+                count += 1
+            if not count:
+                book.add_sheet(config['sheet_title'])
+            book.save(tmp)
+        else:
+            filename = f"{kind}_documents_{stamp}.zip"
+            with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED) as archive:
+                used_names = set()
+                for obj in _iter_records(config, ids):
+                    name = config.get('archive_name', config['filename'])(obj)
+                    if name in used_names:
+                        name = f"{name[:-5]}_{str(obj.pk)[:8]}.xlsx"
+                    used_names.add(name)
+
+                    with archive.open(name, 'w') as entry:
+                        build_document(kind, obj).save(entry)
+                    count += 1
+
+        tmp.seek(0)
+        file_path = default_storage.save(
+            f"{BACKGROUND_EXPORT_DIR}/{uuid.uuid4().hex}/{filename}", File(tmp)
+        )
+
+    logger.info(f"✅ Exported {count} {kind} documents as {export_format}")
+    return {
+        'file_path': file_path,
+        'filename': filename,
+        'user_id': user_id,
+        'export_name': f'{kind}_documents',
+        'count': count,
+    }
+
+
+def start_document_export(request, kind, queryset):
+    """
+    Queue a bulk export of the records in queryset (already access filtered).
+    Optional body: ids (list), department (id), format ('workbook' | 'zip')
+    """
+    from .tasks import export_assessment_documents
+
+    data = request.data if isinstance(request.data, dict) else {}
+    # Body only - ?format= is DRF's renderer override
+    export_format = data.get('format') or document_formats(kind)[0]
+    if export_format not in document_formats(kind):
+        return Response({
+            'error': f"format must be one of: {', '.join(document_formats(kind))}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    ids = data.get('ids')
+    if ids:
+        queryset = queryset.filter(pk__in=ids)
+
+    department = data.get('department') or request.query_params.get('department')
+    if department:
+        queryset = queryset.filter(employee__department_id=department)
+
+    record_ids = [str(pk) for pk in queryset.order_by().values_list('pk', flat=True).distinct()]
+    if not record_ids:
+        return Response({'error': 'Nothing to export'}, status=status.HTTP_400_BAD_REQUEST)
+
+    task = export_assessment_documents.delay(kind, record_ids, request.user.id, export_format)
+
+    return Response({
+        'message': f'Exporting {len(record_ids)} documents in the background.',
+        'count': len(record_ids),
+        'task_id': task.id,
+        'status_url': reverse('export-job-status', args=[task.id]),
+        'download_url': reverse('export-job-download', args=[task.id])
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+def document_response(kind, obj):
+    """Single document as an HTTP download"""
+    output = io.BytesIO()
+    build_document(kind, obj).save(output)
+
+    response = HttpResponse(output.getvalue(), content_type=XLSX_CONTENT_TYPE)
+    response['Content-Disposition'] = f'attachment; filename="{document_filename(kind, obj)}"'
+    return response
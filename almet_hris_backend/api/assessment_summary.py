@@ -0,0 +1,158 @@
+# api/assessment_summary.py - Per-employee assessment summary (EmployeeAssessmentSummary)
+
+"""
+One EmployeeAssessmentSummary row per employee and assessment type, rebuilt
+from that employee's assessments when the transaction that saved, submitted,
+reopened, recalculated or deleted one of them commits.
+Dashboards read these rows instead of counting the assessment tables.
+"""
+
+import logging
+
+from django.db import transaction
+
+from .commit_batch import CommitBatch
+
+logger = logging.getLogger(__name__)
+
+# Employees rebuilt per query (backfill)
+SUMMARY_CHUNK_SIZE = 500
+
+
+def _assessment_types():
+    from .competency_assessment_models import (
+        EmployeeCoreAssessment, EmployeeBehavioralAssessment, EmployeeLeadershipAssessment
+    )
+
+    # type -> (model, percentage field, letter grade field)
+    return {
+        'CORE': (EmployeeCoreAssessment, 'completion_percentage', None),
+        'BEHAVIORAL': (EmployeeBehavioralAssessment, 'overall_percentage', 'overall_letter_grade'),
+        'LEADERSHIP': (EmployeeLeadershipAssessment, 'overall_percentage', 'overall_letter_grade'),
+    }
+
+
+def assessment_type_of(model):
+    for assessment_type, (assessment_model, _, _) in _assessment_types().items():
+        if assessment_model is model:
+            return assessment_type
+    return None
+
+
+def rebuild_assessment_summaries(assessment_type, employee_ids):
+    """Rebuild the summary rows of one type for employee_ids - one read, one delete, one insert"""
+    from .models import Employee
+
+    employee_ids = sorted(set(employee_ids))
+    with transaction.atomic():
+        # Rebuilds touching the same employees run one after another, each
+        # reading what the previous one committed
+        list(
+            Employee._base_manager.select_for_update().filter(pk__in=employee_ids)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        return _rebuild_summary_rows(assessment_type, employee_ids)
+
+
+def _rebuild_summary_rows(assessment_type, employee_ids):
+    from .competency_assessment_models import EmployeeAssessmentSummary
+
+    model, percentage_field, grade_field = _assessment_types()[assessment_type]
+
+    rows = model.objects.filter(employee_id__in=employee_ids).order_by(
+        'employee_id', '-assessment_date', '-created_at'
+    ).values_list(
+        'employee_id', 'id', 'status', percentage_field,
+        grade_field or percentage_field, 'assessment_date'
+    )
+
+    summaries = {}
+    for employee_id, assessment_id, status, percentage, grade, assessment_date in rows:
+        grade = grade if grade_field else ''
+
+        summary = summaries.get(employee_id)
+        if summary is None:
+            # First row is the latest one
+            summary = summaries[employee_id] = EmployeeAssessmentSummary(
+                employee_id=employee_id,
+                assessment_type=assessment_type,
+                latest_assessment_id=assessment_id,
+                latest_status=status,
+                latest_percentage=percentage,
+                latest_letter_grade=grade,
+                latest_assessment_date=assessment_date,
+            )
+
+        summary.total_count += 1
+        if status == 'COMPLETED':
+            summary.completed_count += 1
+            if summary.best_percentage is None or percentage > summary.best_percentage:
+                summary.best_assessment_id = assessment_id
+                summary.best_percentage = percentage
+                summary.best_letter_grade = grade
+                summary.best_assessment_date = assessment_date
+
+    EmployeeAssessmentSummary.objects.filter(
+        assessment_type=assessment_type,
+        employee_id__in=employee_ids
+    ).delete()
+    EmployeeAssessmentSummary.objects.bulk_create(summaries.values())
+    return len(summaries)
+
+
+def backfill_assessment_summaries(assessment_types=None, progress_callback=None):
+    """Rebuild every summary row from the assessment tables"""
+    types = assessment_types or list(_assessment_types())
+    totals = {}
+
+    for assessment_type in types:
+        model = _assessment_types()[assessment_type][0]
+        employee_ids = list(
+            model.objects.order_by('employee_id').values_list('employee_id', flat=True).distinct()
+        )
+
+        from .competency_assessment_models import EmployeeAssessmentSummary
+        # Employees whose assessments are all gone
+        EmployeeAssessmentSummary.objects.filter(assessment_type=assessment_type).exclude(
+            employee_id__in=employee_ids
+        ).delete()
+
+        built = 0
+        for start in range(0, len(employee_ids), SUMMARY_CHUNK_SIZE):
+            built += rebuild_assessment_summaries(
+                assessment_type, employee_ids[start:start + SUMMARY_CHUNK_SIZE]
+            )
+            if progress_callback:
+                progress_callback(assessment_type, min(start + SUMMARY_CHUNK_SIZE, len(employee_ids)), len(employee_ids))
+        totals[assessment_type] = built
+
+    return totals
+
+
+# ==================== CHANGE TRACKING ====================
+
+class AssessmentSummaryRefresh(CommitBatch):
+    """
+    Employees whose assessments changed in one transaction, rebuilt once on commit
+    (right away in autocommit mode)
+    """
+
+    CONNECTION_ATTR = '_assessment_summary_refresh'
+
+    def __init__(self):
+        super().__init__()
+        # assessment type -> employee ids
+        self.employee_ids = {}
+
+    def run(self):
+        for assessment_type, employee_ids in self.employee_ids.items():
+            try:
+                rebuild_assessment_summaries(assessment_type, employee_ids)
+            except Exception as e:
+                logger.error(f"❌ Assessment summary refresh failed ({assessment_type}): {e}", exc_info=True)
+
+
+def mark_assessments_changed(assessment_type, employee_ids):
+    pending = AssessmentSummaryRefresh.current()
+    pending.employee_ids.setdefault(assessment_type, set()).update(employee_ids)
+    pending.flush_if_autocommit()
@@ -12,6 +12,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Q
 import logging
+from .access_scope import get_access_scope
 
 logger = logging.getLogger(__name__)
 
@@ -27,22 +28,7 @@ def get_employee_from_user(user):
 
 def is_admin(user):
     """Check if user is Admin"""
-    try:
-        from .models import Employee
-        from .role_models import EmployeeRole
-        
-        employee = get_employee_from_user(user)
-        if not employee:
-            return False
-        
-        return EmployeeRole.objects.filter(
-            employee=employee,
-            role__name__icontains='Admin',
-            role__is_active=True,
-            is_active=True
-        ).exists()
-    except:
-        return False
+    return get_access_scope(user).is_admin
 
 
 def is_it_role(user):
@@ -0,0 +1,392 @@
+# api/balance_ledger.py - Time off / vacation balance ledger
+
+"""
+TimeOffBalance and EmployeeVacationBalance columns are the running total of
+append-only movement rows (TimeOffBalanceMovement, VacationBalanceMovement).
+
+Every change locks the balance row (select_for_update), checks limits against
+the locked values, writes column = column + delta with F() and appends the
+movement in the same transaction - concurrent approvals queue on the row lock
+instead of overwriting each other's save().
+
+Month rollover (time off) and year reset (vacation) are one UPDATE over every
+due balance plus one bulk insert of movements. reconcile_balances rebuilds the
+columns from the ledger sums (manage.py reconcile_balances).
+"""
+
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0')
+
+# Movements inserted per query
+MOVEMENT_CHUNK_SIZE = 1000
+
+# balance column -> movement delta field
+TIMEOFF_COLUMNS = {
+    'current_balance_hours': 'balance_delta',
+    'used_hours_this_month': 'used_delta',
+}
+
+VACATION_COLUMNS = {
+    'start_balance': 'start_delta',
+    'yearly_balance': 'yearly_delta',
+    'used_days': 'used_delta',
+    'scheduled_days': 'scheduled_delta',
+}
+
+
+def _decimal(value):
+    if value is None:
+        return ZERO
+    return Decimal(str(value))
+
+
+def _apply(balance, columns, deltas, extra=None):
+    """column = column + delta (F) for the locked row, copied back onto balance"""
+    changes = {
+        column: F(column) + deltas[field]
+        for column, field in columns.items()
+        if deltas.get(field)
+    }
+    changes.update(extra or {})
+    changes['updated_at'] = timezone.now()
+    type(balance)._base_manager.filter(pk=balance.pk).update(**changes)
+    balance.refresh_from_db(fields=[*columns, *(extra or {}), 'updated_at'])
+
+
+def _opening_deltas(columns, values):
+    return {field: _decimal(values[column]) for column, field in columns.items()}
+
+
+# ==================== TIME OFF ====================
+
+def _lock_timeoff(balance):
+    from .timeoff_models import TimeOffBalance
+    return TimeOffBalance.objects.select_for_update().get(pk=balance.pk)
+
+
+def record_timeoff_opening(balance):
+    """OPENING movement of a newly created balance (post_save signal)"""
+    from .timeoff_models import TimeOffBalanceMovement
+
+    deltas = _opening_deltas(TIMEOFF_COLUMNS, {column: getattr(balance, column) for column in TIMEOFF_COLUMNS})
+    return TimeOffBalanceMovement.objects.create(
+        balance=balance,
+        movement_type='OPENING',
+        description='Opening balance',
+        **deltas
+    )
+
+
+def deduct_timeoff_hours(balance, hours, request=None, user=None):
+    """Deduct hours - raises ValueError if the locked balance is not enough"""
+    from .timeoff_models import TimeOffBalanceMovement
+
+    hours = _decimal(hours)
+    with transaction.atomic():
+        locked = _lock_timeoff(balance)
+        if locked.current_balance_hours < hours:
+            balance.current_balance_hours = locked.current_balance_hours
+            raise ValueError(
+                f"Insufficient balance. Available: {locked.current_balance_hours}h, "
+                f"Requested: {hours}h"
+            )
+
+        deltas = {'balance_delta': -hours, 'used_delta': hours}
+        _apply(balance, TIMEOFF_COLUMNS, deltas)
+        return TimeOffBalanceMovement.objects.create(
+            balance=balance,
+            movement_type='DEDUCT',
+            request=request,
+            created_by=user,
+            description=f"Deducted {hours}h",
+            **deltas
+        )
+
+
+def refund_timeoff_hours(balance, hours, request=None, user=None):
+    """Give hours back - used hours never go below 0"""
+    from .timeoff_models import TimeOffBalanceMovement
+
+    hours = _decimal(hours)
+    with transaction.atomic():
+        locked = _lock_timeoff(balance)
+        deltas = {
+            'balance_delta': hours,
+            'used_delta': -min(hours, locked.used_hours_this_month),
+        }
+        _apply(balance, TIMEOFF_COLUMNS, deltas)
+        return TimeOffBalanceMovement.objects.create(
+            balance=balance,
+            movement_type='REFUND',
+            request=request,
+            created_by=user,
+            description=f"Refunded {hours}h",
+            **deltas
+        )
+
+
+def set_timeoff_balance(balance, new_balance, user=None, reason=''):
+    """Admin adjustment to an absolute balance - also marks the balance initialized"""
+    from .timeoff_models import TimeOffBalanceMovement
+
+    new_balance = _decimal(new_balance)
+    with transaction.atomic():
+        locked = _lock_timeoff(balance)
+        deltas = {'balance_delta': new_balance - locked.current_balance_hours}
+        _apply(balance, TIMEOFF_COLUMNS, deltas, extra={
+            'is_initialized': True,
+            'last_reset_date': timezone.now().date(),
+        })
+        return TimeOffBalanceMovement.objects.create(
+            balance=balance,
+            movement_type='ADJUSTMENT',
+            created_by=user,
+            description=(reason or 'Manual adjustment')[:255],
+            **deltas
+        )
+
+
+def timeoff_reset_due_q(today=None):
+    """Initialized balances not yet reset in today's month"""
+    today = today or timezone.now().date()
+    return Q(is_initialized=True, last_reset_date__lt=today.replace(day=1))
+
+
+def roll_over_timeoff_month(balance_ids=None, today=None):
+    """
+    Add the monthly allowance and clear used hours of every due balance
+    (or only balance_ids): one UPDATE plus bulk-inserted MONTHLY_ACCRUAL
+    movements. Returns the ids that were rolled over.
+    """
+    from .timeoff_models import TimeOffBalance, TimeOffBalanceMovement
+
+    today = today or timezone.now().date()
+    due = TimeOffBalance.objects.filter(timeoff_reset_due_q(today))
+    if balance_ids is not None:
+        due = due.filter(pk__in=list(balance_ids))
+
+    with transaction.atomic():
+        rows = list(
+            due.select_for_update()
+            .order_by('pk')
+            .values_list('pk', 'monthly_allowance_hours', 'used_hours_this_month')
+        )
+        if not rows:
+            return []
+
+        ids = [row[0] for row in rows]
+        TimeOffBalanceMovement.objects.bulk_create(
+            [
+                TimeOffBalanceMovement(
+                    balance_id=pk,
+                    movement_type='MONTHLY_ACCRUAL',
+                    balance_delta=allowance,
+                    used_delta=-used,
+                    description=f"Monthly allowance {today:%Y-%m}"
+                )
+                for pk, allowance, used in rows
+            ],
+            batch_size=MOVEMENT_CHUNK_SIZE
+        )
+        # Rows are locked - the due set cannot change before this UPDATE
+        due.update(
+            current_balance_hours=F('current_balance_hours') + F('monthly_allowance_hours'),
+            used_hours_this_month=ZERO,
+            last_reset_date=today,
+            updated_at=timezone.now()
+        )
+
+    logger.info(f"✅ Monthly time off rollover: {len(ids)} balances")
+    return ids
+
+
+# ==================== VACATION ====================
+
+def record_vacation_opening(balance):
+    """OPENING movement of a newly created balance (post_save signal)"""
+    from .vacation_models import VacationBalanceMovement
+
+    deltas = _opening_deltas(VACATION_COLUMNS, {column: getattr(balance, column) for column in VACATION_COLUMNS})
+    return VacationBalanceMovement.objects.create(
+        balance=balance,
+        movement_type='OPENING',
+        created_by=balance.updated_by,
+        description='Opening balance',
+        **deltas
+    )
+
+
+def move_vacation_balance(balance, movement_type, used=0, scheduled=0, user=None,
+                          vacation_request=None, schedule=None, description=''):
+    """
+    Add used / scheduled days (negative to remove). Scheduled days never go
+    below 0.
+    """
+    from .vacation_models import EmployeeVacationBalance, VacationBalanceMovement
+
+    used = _decimal(used)
+    scheduled = _decimal(scheduled)
+    with transaction.atomic():
+        locked = EmployeeVacationBalance._base_manager.select_for_update().get(pk=balance.pk)
+        deltas = {
+            'used_delta': used,
+            'scheduled_delta': max(scheduled, -locked.scheduled_days),
+        }
+        extra = {'updated_by': user} if user else None
+        _apply(balance, VACATION_COLUMNS, deltas, extra=extra)
+        return VacationBalanceMovement.objects.create(
+            balance=balance,
+            movement_type=movement_type,
+            vacation_request=vacation_request,
+            schedule=schedule,
+            created_by=user,
+            description=description,
+            **deltas
+        )
+
+
+def set_vacation_balance(balance, values, user=None, reason='Manual adjustment'):
+    """Admin adjustment - values maps balance columns to their new values"""
+    from .vacation_models import EmployeeVacationBalance, VacationBalanceMovement
+
+    with transaction.atomic():
+        locked = EmployeeVacationBalance._base_manager.select_for_update().get(pk=balance.pk)
+        deltas = {
+            field: _decimal(values[column]) - getattr(locked, column)
+            for column, field in VACATION_COLUMNS.items()
+            if column in values
+        }
+        _apply(balance, VACATION_COLUMNS, deltas, extra={'updated_by': user})
+        return VacationBalanceMovement.objects.create(
+            balance=balance,
+            movement_type='ADJUSTMENT',
+            created_by=user,
+            description=reason[:255],
+            **deltas
+        )
+
+
+def reset_vacation_balances(queryset, user=None, description='Year reset'):
+    """
+    Clear used and scheduled days of every balance in queryset: one UPDATE
+    plus bulk-inserted RESET movements. Returns the number of balances reset.
+    """
+    from .vacation_models import VacationBalanceMovement
+
+    with transaction.atomic():
+        rows = list(
+            queryset.select_for_update(of=('self',))
+            .order_by('pk')
+            .values_list('pk', 'used_days', 'scheduled_days')
+        )
+        if not rows:
+            return 0
+
+        VacationBalanceMovement.objects.bulk_create(
+            [
+                VacationBalanceMovement(
+                    balance_id=pk,
+                    movement_type='RESET',
+                    used_delta=-used,
+                    scheduled_delta=-scheduled,
+                    created_by=user,
+                    description=description
+                )
+                for pk, used, scheduled in rows
+                if used or scheduled
+            ],
+            batch_size=MOVEMENT_CHUNK_SIZE
+        )
+        return queryset.model._base_manager.filter(pk__in=[row[0] for row in rows]).update(
+            used_days=ZERO,
+            scheduled_days=ZERO,
+            updated_by=user,
+            updated_at=timezone.now()
+        )
+
+
+# ==================== RECONCILIATION ====================
+
+def _reconcile(balance_model, movement_model, columns, apply=False):
+    """
+    Compare balance columns with their ledger sums. apply=True rewrites
+    mismatched columns (bulk_update) and records an OPENING movement for
+    balances that have none.
+    """
+    mismatched = []
+    missing = []
+    with transaction.atomic():
+        balances = balance_model._base_manager.order_by('pk')
+        if apply:
+            balances = balances.select_for_update()
+        # Locked before summing - a movement committed meanwhile is in the sums,
+        # later ones wait for this transaction
+        balances = list(balances.values('pk', *columns))
+
+        sums = {
+            row['balance_id']: row
+            for row in movement_model.objects.order_by().values('balance_id').annotate(
+                **{field: Sum(field) for field in columns.values()}
+            )
+        }
+
+        for values in balances:
+            ledger = sums.get(values['pk'])
+            if ledger is None:
+                missing.append(values)
+                continue
+
+            diff = {
+                column: _decimal(ledger[field])
+                for column, field in columns.items()
+                if _decimal(ledger[field]) != values[column]
+            }
+            if diff:
+                mismatched.append({
+                    'balance_id': values['pk'],
+                    'stored': {column: values[column] for column in diff},
+                    'ledger': diff,
+                })
+
+        if apply:
+            if mismatched:
+                fixed = [balance_model(pk=entry['balance_id'], **entry['ledger']) for entry in mismatched]
+                changed = sorted({column for entry in mismatched for column in entry['ledger']})
+                balance_model._base_manager.bulk_update(fixed, changed, batch_size=MOVEMENT_CHUNK_SIZE)
+
+            movement_model.objects.bulk_create(
+                [
+                    movement_model(
+                        balance_id=values['pk'],
+                        movement_type='OPENING',
+                        description='Opening balance (reconciliation)',
+                        **_opening_deltas(columns, values)
+                    )
+                    for values in missing
+                ],
+                batch_size=MOVEMENT_CHUNK_SIZE
+            )
+
+    return {
+        'mismatched': mismatched,
+        'missing_opening': len(missing),
+    }
+
+
+def reconcile_balances(apply=False):
+    """Reconcile time off and vacation balances with their ledgers"""
+    from .timeoff_models import TimeOffBalance, TimeOffBalanceMovement
+    from .vacation_models import EmployeeVacationBalance, VacationBalanceMovement
+
+    return {
+        'timeoff': _reconcile(TimeOffBalance, TimeOffBalanceMovement, TIMEOFF_COLUMNS, apply),
+        'vacation': _reconcile(EmployeeVacationBalance, VacationBalanceMovement, VACATION_COLUMNS, apply),
+    }
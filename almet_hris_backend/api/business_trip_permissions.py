@@ -4,24 +4,11 @@ from functools import wraps
 from rest_framework.response import Response
 from rest_framework import status
 from .role_models import Permission, EmployeeRole, Role
+from .access_scope import get_access_scope
 
 def is_admin_user(user):
     """Check if user has Admin role"""
-    try:
-        from .models import Employee
-        employee = Employee.objects.get(user=user, is_deleted=False)
-        
-        # Admin role-u yoxla (case-insensitive)
-        has_admin_role = EmployeeRole.objects.filter(
-            employee=employee,
-            role__name__icontains='Admin',
-            role__is_active=True,
-            is_active=True
-        ).exists()
-        
-        return has_admin_role
-    except Employee.DoesNotExist:
-        return False
+    return get_access_scope(user).is_admin
 
 
 def has_business_trip_permission(permission_codename):
@@ -17,6 +17,10 @@ from openpyxl.utils import get_column_letter
 from .business_trip_models import *
 from .business_trip_serializers import *
 from .models import Employee, UserGraphToken
+from .export_service import (
+    ExportDocument, ExportSheet, iter_values, choice_labels, format_datetime,
+    export_response, wants_background, start_background_export
+)
 from .business_trip_permissions import (
     has_business_trip_permission,
     has_any_business_trip_permission,
@@ -47,32 +51,7 @@ from .business_trip_serializers import (
 
 logger = logging.getLogger(__name__)
 
-# ✅ FIXED: Helper function to get Microsoft Graph token
-def get_graph_access_token(user):
-    """
-    Get Microsoft Graph access token for the authenticated user
-    
-    This is the Microsoft Graph token, NOT the JWT token!
-    Used for sending emails via Microsoft Graph API.
-    
-    Args:
-        user: Django User object
-    
-    Returns:
-        str: Graph access token or None
-    """
-    try:
-        token = UserGraphToken.get_valid_token(user)
-        if token:
-            logger.info(f"✅ Valid Graph token found for user {user.username}")
-            return token
-        else:
-            logger.warning(f"⚠️ No valid Graph token found for user {user.username}")
-  
-            return None
-    except Exception as e:
-        logger.error(f"❌ Error getting Graph token: {e}")
-        return None
+from .graph_client import get_graph_access_token
 
 
 # ✅ NEW: Helper to get notification context
@@ -451,32 +430,7 @@ import logging
 logger = logging.getLogger(__name__)
 from .business_trip_notifications import notification_manager
 
-# ✅ FIXED: Helper function to get Microsoft Graph token
-def get_graph_access_token(user):
-    """
-    Get Microsoft Graph access token for the authenticated user
-    
-    This is the Microsoft Graph token, NOT the JWT token!
-    Used for sending emails via Microsoft Graph API.
-    
-    Args:
-        user: Django User object
-    
-    Returns:
-        str: Graph access token or None
-    """
-    try:
-        token = UserGraphToken.get_valid_token(user)
-        if token:
-            logger.info(f"✅ Valid Graph token found for user {user.username}")
-            return token
-        else:
-            logger.warning(f"⚠️ No valid Graph token found for user {user.username}")
-
-            return None
-    except Exception as e:
-        logger.error(f"❌ Error getting Graph token: {e}")
-        return None
+from .graph_client import get_graph_access_token
 
 
 # ✅ NEW: Helper to get notification context
@@ -2137,14 +2091,127 @@ def get_trip_request_detail(request, pk):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
+def build_business_trips_export(user, query_params, data=None):
+    """Business trips export with title, applied filters and status colors"""
+    requests_qs = BusinessTripRequest.objects.filter(is_deleted=False)
+    
+    # Apply filters
+    status_filter = query_params.get('status')
+    if status_filter:
+        requests_qs = requests_qs.filter(status=status_filter)
+    
+    year = query_params.get('year')
+    if year:
+        requests_qs = requests_qs.filter(start_date__year=year)
+    
+    department_id = query_params.get('department_id')
+    if department_id:
+        requests_qs = requests_qs.filter(employee__department_id=department_id)
+    
+    requests_qs = requests_qs.order_by('-created_at')
+    
+    status_labels = choice_labels(BusinessTripRequest, 'status')
+    
+    def rows():
+        for req in iter_values(
+            requests_qs,
+            'request_id', 'employee__full_name', 'employee__employee_id',
+            'employee__department__name', 'employee__business_function__name',
+            'travel_type__name', 'transport_type__name', 'purpose__name',
+            'start_date', 'end_date', 'number_of_days', 'status', 'finance_amount', 'created_at'
+        ):
+            yield [
+                req['request_id'],
+                req['employee__full_name'],
+                req['employee__employee_id'] or '',
+                req['employee__department__name'] or '',
+                req['employee__business_function__name'] or '',
+                req['travel_type__name'] or '',
+                req['transport_type__name'] or '',
+                req['purpose__name'] or '',
+                req['start_date'].strftime('%Y-%m-%d'),
+                req['end_date'].strftime('%Y-%m-%d'),
+                float(req['number_of_days']),
+                status_labels.get(req['status'], req['status']),
+                float(req['finance_amount']) if req['finance_amount'] else '',
+                format_datetime(req['created_at'])
+            ]
+    
+    # Status colors
+    status_colors = {
+        'APPROVED': 'C6EFCE',
+        'PENDING_LINE_MANAGER': 'FFEB9C',
+        'PENDING_FINANCE': 'E6E6FA',
+        'PENDING_HR': 'FFE6E6',
+        'REJECTED_LINE_MANAGER': 'FFC7CE',
+        'REJECTED_FINANCE': 'FFC7CE',
+        'REJECTED_HR': 'FFC7CE',
+    }
+    # Rows carry the status label - color by label
+    status_fills = {
+        status_labels.get(code, code): {
+            'fill': PatternFill(start_color=color, end_color=color, fill_type="solid")
+        }
+        for code, color in status_colors.items()
+    }
+    
+    def status_style(row):
+        fill = status_fills.get(row[11])
+        return {11: fill} if fill else None
+    
+    # Applied filters
+    filters = []
+    if status_filter:
+        filters.append(f"Status: {status_filter}")
+    if year:
+        filters.append(f"Year: {year}")
+    if department_id:
+        filters.append(f"Department ID: {department_id}")
+    
+    preamble = [
+        ('BUSINESS TRIPS EXPORT', Font(size=18, bold=True, color="1F4E79")),
+        (f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}', Font(size=10)),
+        (f'Filters: {", ".join(filters)}', Font(size=10, italic=True)) if filters else None,
+        None
+    ]
+    
+    headers = [
+        'Request ID', 'Employee Name', 'Employee ID', 'Department', 'Business Function',
+        'Travel Type', 'Transport', 'Purpose', 'Start Date', 'End Date', 'Days',
+        'Status', 'Amount', 'Created At'
+    ]
+    
+    thin = Side(style='thin')
+    header_style = {
+        'fill': PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+        'font': Font(color="FFFFFF", bold=True, size=11),
+        'border': Border(left=thin, right=thin, top=thin, bottom=thin)
+    }
+    
+    # Numbers aligned right
+    right_aligned = {'alignment': Alignment(horizontal='right')}
+    
+    return ExportDocument(f'business_trips_export_{date.today().strftime("%Y%m%d")}', [
+        ExportSheet(
+            'Business Trips', headers, rows(),
+            preamble=preamble,
+            header_style=header_style,
+            column_styles={10: right_aligned, 12: right_aligned},
+            row_styler=status_style
+        )
+    ])
+
+
 @swagger_auto_schema(
     method='get',
-    operation_description="Export all trips to Excel with enhanced formatting",
+    operation_description="Export all trips to Excel (or CSV with export_format=csv) with enhanced formatting",
     tags=['Business Trip'],
     manual_parameters=[
         openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING),
         openapi.Parameter('year', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
         openapi.Parameter('department_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter('export_format', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['excel', 'csv']),
+        openapi.Parameter('background', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
     ],
     responses={200: openapi.Response(description='Excel file')}
 )
@@ -2154,134 +2221,13 @@ def get_trip_request_detail(request, pk):
 def export_all_trips(request):
     """Export all trips to Excel with enhanced formatting"""
     try:
-        requests_qs = BusinessTripRequest.objects.filter(is_deleted=False).select_related(
-            'employee', 'employee__department', 'employee__business_function',
-            'travel_type', 'transport_type', 'purpose',
-            'line_manager', 'finance_approver', 'hr_representative'
-        )
-        
-        # Apply filters
-        status_filter = request.GET.get('status')
-        if status_filter:
-            requests_qs = requests_qs.filter(status=status_filter)
-        
-        year = request.GET.get('year')
-        if year:
-            requests_qs = requests_qs.filter(start_date__year=year)
-        
-        department_id = request.GET.get('department_id')
-        if department_id:
-            requests_qs = requests_qs.filter(employee__department_id=department_id)
-        
-        requests_qs = requests_qs.order_by('-created_at')
-        
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Business Trips"
-        
-        # Styles
-        title_font = Font(size=18, bold=True, color="1F4E79")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(color="FFFFFF", bold=True, size=11)
-        
-        # Title
-        ws['A1'] = 'BUSINESS TRIPS EXPORT'
-        ws['A1'].font = title_font
-        ws.merge_cells('A1:N1')
-        
-        ws['A2'] = f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}'
-        ws['A2'].font = Font(size=10)
-        
-        # Applied filters
-        filters = []
-        if status_filter:
-            filters.append(f"Status: {status_filter}")
-        if year:
-            filters.append(f"Year: {year}")
-        if department_id:
-            filters.append(f"Department ID: {department_id}")
-        
-        if filters:
-            ws['A3'] = f'Filters: {", ".join(filters)}'
-            ws['A3'].font = Font(size=10, italic=True)
-        
-        # Headers
-        headers = [
-            'Request ID', 'Employee Name', 'Employee ID', 'Department', 'Business Function',
-            'Travel Type', 'Transport', 'Purpose', 'Start Date', 'End Date', 'Days',
-            'Status', 'Amount', 'Created At'
-        ]
-        
-        header_row = 5
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=header_row, column=col, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.border = Border(
-                left=Side(style='thin'), right=Side(style='thin'),
-                top=Side(style='thin'), bottom=Side(style='thin')
-            )
-        
-        # Status colors
-        status_colors = {
-            'APPROVED': PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),
-            'PENDING_LINE_MANAGER': PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid"),
-            'PENDING_FINANCE': PatternFill(start_color="E6E6FA", end_color="E6E6FA", fill_type="solid"),
-            'PENDING_HR': PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid"),
-            'REJECTED_LINE_MANAGER': PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),
-            'REJECTED_FINANCE': PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),
-            'REJECTED_HR': PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),
-        }
-        
-        # Data
-        for row, req in enumerate(requests_qs, header_row + 1):
-            data = [
-                req.request_id,
-                req.employee.full_name,
-                getattr(req.employee, 'employee_id', ''),
-                req.employee.department.name if req.employee.department else '',
-                req.employee.business_function.name if req.employee.business_function else '',
-                req.travel_type.name,
-                req.transport_type.name,
-                req.purpose.name,
-                req.start_date.strftime('%Y-%m-%d'),
-                req.end_date.strftime('%Y-%m-%d'),
-                float(req.number_of_days),
-                req.get_status_display(),
-                float(req.finance_amount) if req.finance_amount else '',
-                req.created_at.strftime('%Y-%m-%d %H:%M')
-            ]
-            
-            for col, value in enumerate(data, 1):
-                cell = ws.cell(row=row, column=col, value=value)
-                
-                # Apply status color
-                if col == 12:  # Status column
-                    cell.fill = status_colors.get(req.status, PatternFill())
-                
-                # Alignment
-                if col in [11, 13]:  # Numbers
-                    cell.alignment = Alignment(horizontal='right')
-        
-        # Auto-adjust columns
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
+        export_format = request.GET.get('export_format', 'excel')
         
-        filename = f'business_trips_export_{date.today().strftime("%Y%m%d")}.xlsx'
+        if wants_background(request):
+            return start_background_export(request, 'business_trips', export_format)
         
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        wb.save(response)
-        
-        return response
+        document = build_business_trips_export(request.user, request.GET)
+        return export_response(document, export_format)
     
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -0,0 +1,71 @@
+# api/celebration_calendar.py - Month/day lookups for birthdays and work anniversaries
+
+from datetime import date, timedelta
+
+from django.db.models import Count
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+# Birthday feed: from 10 days before until the birthday
+BIRTHDAY_WINDOW = (0, 10)
+# Work anniversary feed: from 10 days before until 5 days after
+ANNIVERSARY_WINDOW = (5, 10)
+
+
+def month_day_expression(field_name):
+    """
+    month * 100 + day of a date column, e.g. 1231 for December 31.
+    Employee has expression indexes on this for date_of_birth and start_date,
+    so "who celebrates between two days" is a single index range scan.
+    """
+    return ExtractMonth(field_name) * 100 + ExtractDay(field_name)
+
+
+def month_day(value):
+    """Python side of month_day_expression"""
+    return value.month * 100 + value.day
+
+
+def date_in_year(value, year):
+    """value moved to year, None for February 29 outside leap years"""
+    try:
+        return value.replace(year=year)
+    except ValueError:
+        return None
+
+
+def celebration_window(today, days_before=0, days_after=0):
+    """
+    Celebration dates whose feed window contains today: [today - days_before, today + days_after].
+    Dates are matched in the current year only, so the window is clipped to it.
+    """
+    start = max(today - timedelta(days=days_before), date(today.year, 1, 1))
+    end = min(today + timedelta(days=days_after), date(today.year, 12, 31))
+    return start, end
+
+
+def celebrating_between(queryset, field_name, start, end):
+    """Rows of queryset whose field_name month/day falls between start and end (same year)"""
+    return queryset.alias(
+        **{f'{field_name}_md': month_day_expression(field_name)}
+    ).filter(**{f'{field_name}_md__range': (month_day(start), month_day(end))})
+
+
+def celebrating_on(queryset, field_name, day):
+    return celebrating_between(queryset, field_name, day, day)
+
+
+def auto_wish_counts(employee_ids, celebration_type):
+    """employee id -> number of auto wishes of celebration_type, one query"""
+    from .celebration_models import CelebrationWish
+
+    if not employee_ids:
+        return {}
+
+    return dict(
+        CelebrationWish.objects.filter(
+            employee_id__in=employee_ids,
+            celebration_type=celebration_type
+        ).order_by().values('employee_id').annotate(
+            count=Count('id')
+        ).values_list('employee_id', 'count')
+    )
@@ -59,6 +59,9 @@ class CelebrationWish(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['employee', 'celebration_type']),
+        ]
         
     def __str__(self):
         if self.celebration:
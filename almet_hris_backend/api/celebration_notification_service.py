@@ -3,6 +3,7 @@
 import logging
 from datetime import date
 from .models import Employee
+from .celebration_calendar import celebrating_on
 from .system_email_service import system_email_service
 
 logger = logging.getLogger(__name__)
@@ -622,34 +623,30 @@ class CelebrationNotificationService:
         }
         
         try:
-            employees = Employee.objects.filter(is_deleted=False)
+            # Only today's celebrants are loaded (month/day index lookup)
+            employees = Employee.objects.filter(is_deleted=False).select_related('business_function')
             
-            for emp in employees:
-                # Check birthdays
-                if emp.date_of_birth:
-                    if emp.date_of_birth.month == today.month and emp.date_of_birth.day == today.day:
-                    
-                        
-                        if self.should_send_email(emp):
-                            if self.send_birthday_notification(emp):
-                                results['birthdays_sent'] += 1
-                        else:
-                            results['skipped'] += 1
+            # Check birthdays
+            for emp in celebrating_on(employees.filter(date_of_birth__isnull=False), 'date_of_birth', today):
+                if self.should_send_email(emp):
+                    if self.send_birthday_notification(emp):
+                        results['birthdays_sent'] += 1
+                else:
+                    results['skipped'] += 1
+            
+            # Check work anniversaries - at least 1 year
+            anniversaries = celebrating_on(
+                employees.filter(start_date__lt=date(today.year, 1, 1)), 'start_date', today
+            )
+            for emp in anniversaries:
+                years = today.year - emp.start_date.year
                 
-                # Check work anniversaries
-                if emp.start_date:
-                    if emp.start_date.month == today.month and emp.start_date.day == today.day:
-                        years = today.year - emp.start_date.year
-                        if years > 0:  # At least 1 year
-                    
-                            
-                            if self.should_send_email(emp):
-                                if self.send_work_anniversary_notification(emp, years):
-                                    results['anniversaries_sent'] += 1
-                            else:
-                                results['skipped'] += 1
+                if self.should_send_email(emp):
+                    if self.send_work_anniversary_notification(emp, years):
+                        results['anniversaries_sent'] += 1
+                else:
+                    results['skipped'] += 1
             
-     
             return results
             
         except Exception as e:
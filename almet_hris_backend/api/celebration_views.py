@@ -12,6 +12,10 @@ from .celebration_serializers  import (
 
 )
 from .models import Employee
+from .celebration_calendar import (
+    ANNIVERSARY_WINDOW, BIRTHDAY_WINDOW, auto_wish_counts, celebrating_between, celebration_window,
+    date_in_year
+)
 
 
 class CelebrationViewSet(viewsets.ModelViewSet):
@@ -60,11 +64,13 @@ class CelebrationViewSet(viewsets.ModelViewSet):
         promotion_celebrations = self.get_promotion_celebrations()
         
         # Get manual celebrations
-        manual_celebrations = Celebration.objects.exclude(type='promotion')
+        manual_celebrations = Celebration.objects.exclude(type='promotion').annotate(
+            wish_total=Count('wishes')
+        ).prefetch_related('images')
         manual_data = []
         
         for celebration in manual_celebrations:
-            wishes_count = CelebrationWish.objects.filter(celebration=celebration).count()
+            wishes_count = celebration.wish_total
             
             images_data = CelebrationImageSerializer(
                 celebration.images.all(), 
@@ -93,72 +99,68 @@ class CelebrationViewSet(viewsets.ModelViewSet):
     
     def get_auto_celebrations(self, today):
         """
-        Generate auto celebrations for birthdays and work anniversaries
+        Generate auto celebrations for birthdays and work anniversaries.
+        Only employees celebrating inside the feed window are loaded (month/day index range).
         """
         auto_celebrations = []
-        employees = Employee.objects.filter(is_deleted=False)
-        
-        for emp in employees:
-            # Check for birthdays (10 days before until birthday)
-            if emp.date_of_birth:
-                birth_date = emp.date_of_birth
-                this_year_birthday = date(today.year, birth_date.month, birth_date.day)
-                
-                ten_days_before = this_year_birthday - timedelta(days=10)
-                
-                # Show from 10 days before until birthday, then hide
-                if ten_days_before <= today <= this_year_birthday:
-                    age = today.year - birth_date.year
-                    wishes_count = CelebrationWish.objects.filter(
-                        employee=emp,
-                        celebration_type='birthday'
-                    ).count()
-                    position = str(emp.position_group) if emp.position_group else 'Employee'
-                    auto_celebrations.append({
-                        'id': f'birthday-{emp.id}',
-                        'type': 'birthday',
-                        'employee_name': f'{emp.first_name} {emp.last_name}',
-                        'employee_id': emp.id,
-                        'position': position,
-                        'date': this_year_birthday.isoformat(),
-                        'images': ['https://www.sugar.org/wp-content/uploads/Birthday-Cake-1.png'],
-                        'message': f"Wishing you a wonderful {age}th birthday filled with joy and happiness! Thank you for all your contributions to the team.",
-                        'wishes': wishes_count,
-                        'is_auto': True
-                    })
-            
-            # Check for work anniversaries (10 days before until 5 days after)
-            if emp.start_date:
-                start_date = emp.start_date
-                this_year_anniversary = date(today.year, start_date.month, start_date.day)
-                
-                ten_days_before = this_year_anniversary - timedelta(days=10)
-                five_days_after = this_year_anniversary + timedelta(days=5)
-                
-                # Show from 10 days before until 5 days after anniversary
-                if ten_days_before <= today <= five_days_after:
-                    years = today.year - start_date.year
-                    
-                    # Only show if at least 1 year
-                    if years > 0:
-                        wishes_count = CelebrationWish.objects.filter(
-                            employee=emp,
-                            celebration_type='work_anniversary'
-                        ).count()
-                        position = str(emp.position_group) if emp.position_group else 'Employee'
-                        auto_celebrations.append({
-                            'id': f'anniversary-{emp.id}',
-                            'type': 'work_anniversary',
-                            'employee_name': f'{emp.first_name} {emp.last_name}',
-                            'employee_id': emp.id,
-                            'position': position,
-                            'date': this_year_anniversary.isoformat(),
-                            'years': years,
-                            'images': ['https://media.istockphoto.com/id/2219719967/vector/happy-work-anniversary-clipart-design-company-office-celebration-greeting-text-clip-art-with.jpg?s=612x612&w=0&k=20&c=tLT5yhtCjLw2gSsUNElBOOPHBFeVjCtSzcJTQzuPY1M='],
-                            'message': f"Congratulations on {years} {'year' if years == 1 else 'years'} with Almet Holding! Thank you for your dedication and valuable contributions to our team.",
-                            'wishes': wishes_count,
-                            'is_auto': True
-                        })
+        employees = Employee.objects.filter(is_deleted=False).select_related('position_group')
+        
+        # Birthdays: show from 10 days before until birthday, then hide
+        start, end = celebration_window(today, *BIRTHDAY_WINDOW)
+        birthday_employees = list(
+            celebrating_between(employees.filter(date_of_birth__isnull=False), 'date_of_birth', start, end)
+        )
+        birthday_wishes = auto_wish_counts([emp.id for emp in birthday_employees], 'birthday')
+        
+        for emp in birthday_employees:
+            birth_date = emp.date_of_birth
+            this_year_birthday = date_in_year(birth_date, today.year)
+            if not this_year_birthday:
+                continue
+            age = today.year - birth_date.year
+            position = str(emp.position_group) if emp.position_group else 'Employee'
+            auto_celebrations.append({
+                'id': f'birthday-{emp.id}',
+                'type': 'birthday',
+                'employee_name': f'{emp.first_name} {emp.last_name}',
+                'employee_id': emp.id,
+                'position': position,
+                'date': this_year_birthday.isoformat(),
+                'images': ['https://www.sugar.org/wp-content/uploads/Birthday-Cake-1.png'],
+                'message': f"Wishing you a wonderful {age}th birthday filled with joy and happiness! Thank you for all your contributions to the team.",
+                'wishes': birthday_wishes.get(emp.id, 0),
+                'is_auto': True
+            })
+        
+        # Work anniversaries: show from 10 days before until 5 days after, only if at least 1 year
+        start, end = celebration_window(today, *ANNIVERSARY_WINDOW)
+        anniversary_employees = list(
+            celebrating_between(
+                employees.filter(start_date__lt=date(today.year, 1, 1)), 'start_date', start, end
+            )
+        )
+        anniversary_wishes = auto_wish_counts([emp.id for emp in anniversary_employees], 'work_anniversary')
+        
+        for emp in anniversary_employees:
+            start_date = emp.start_date
+            this_year_anniversary = date_in_year(start_date, today.year)
+            if not this_year_anniversary:
+                continue
+            years = today.year - start_date.year
+            position = str(emp.position_group) if emp.position_group else 'Employee'
+            auto_celebrations.append({
+                'id': f'anniversary-{emp.id}',
+                'type': 'work_anniversary',
+                'employee_name': f'{emp.first_name} {emp.last_name}',
+                'employee_id': emp.id,
+                'position': position,
+                'date': this_year_anniversary.isoformat(),
+                'years': years,
+                'images': ['https://media.istockphoto.com/id/2219719967/vector/happy-work-anniversary-clipart-design-company-office-celebration-greeting-text-clip-art-with.jpg?s=612x612&w=0&k=20&c=tLT5yhtCjLw2gSsUNElBOOPHBFeVjCtSzcJTQzuPY1M='],
+                'message': f"Congratulations on {years} {'year' if years == 1 else 'years'} with Almet Holding! Thank you for your dedication and valuable contributions to our team.",
+                'wishes': anniversary_wishes.get(emp.id, 0),
+                'is_auto': True
+            })
         
         return auto_celebrations
     
@@ -169,33 +171,30 @@ class CelebrationViewSet(viewsets.ModelViewSet):
         thirty_days_ago = date.today() - timedelta(days=30)
         promotion_celebrations = []
         
-        promotions = Celebration.objects.filter(
+        promotions = list(Celebration.objects.filter(
             type='promotion',
-            date__gte=thirty_days_ago
-        ).select_related('employee')
+            date__gte=thirty_days_ago,
+            employee__isnull=False
+        ).select_related('employee', 'employee__position_group'))
+        
+        promotion_wishes = auto_wish_counts({promo.employee_id for promo in promotions}, 'promotion')
         
         for promo in promotions:
-            if promo.employee:
-                wishes_count = CelebrationWish.objects.filter(
-                    employee=promo.employee,
-                    celebration_type='promotion'
-                ).count()
-                
-                position = str(promo.employee.position_group) if promo.employee.position_group else 'Employee'
-                
-                promotion_celebrations.append({
-                    'id': f'promotion-{promo.id}',
-                    'type': 'promotion',
-                    'employee_name': f'{promo.employee.first_name} {promo.employee.last_name}',
-                    'employee_id': promo.employee.id,
-                    'position': position,
-                    'new_job_title': promo.new_job_title,
-                    'date': promo.date.isoformat(),
-                    'images': ['https://cdn-icons-png.flaticon.com/512/3176/3176366.png'],
-                    'message': promo.message,
-                    'wishes': wishes_count,
-                    'is_auto': True
-                })
+            position = str(promo.employee.position_group) if promo.employee.position_group else 'Employee'
+            
+            promotion_celebrations.append({
+                'id': f'promotion-{promo.id}',
+                'type': 'promotion',
+                'employee_name': f'{promo.employee.first_name} {promo.employee.last_name}',
+                'employee_id': promo.employee.id,
+                'position': position,
+                'new_job_title': promo.new_job_title,
+                'date': promo.date.isoformat(),
+                'images': ['https://cdn-icons-png.flaticon.com/512/3176/3176366.png'],
+                'message': promo.message,
+                'wishes': promotion_wishes.get(promo.employee_id, 0),
+                'is_auto': True
+            })
         
         return promotion_celebrations
     
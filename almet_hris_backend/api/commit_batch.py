@@ -0,0 +1,63 @@
+# api/commit_batch.py - Work collected during one transaction, run once on commit
+
+"""
+Signal receivers and mark_* helpers record what changed on a CommitBatch; the
+batch does the work once, when the outermost transaction commits:
+
+    batch = SomeRefresh.current()
+    batch.ids.update(ids)
+    batch.flush_if_autocommit()
+
+Outside transaction.atomic() current() returns a fresh batch and
+flush_if_autocommit() runs it right away. A batch whose on_commit callback
+was dropped by a rollback is replaced on the next current() call.
+"""
+
+from django.db import transaction
+
+
+class CommitBatch:
+    """
+    Base of the per-transaction collectors - subclasses set CONNECTION_ATTR
+    (where the pending batch is kept on the connection) and implement run()
+    """
+
+    CONNECTION_ATTR = None
+
+    def __init__(self):
+        # on_commit keeps this exact object, so it identifies our pending callback
+        self._callback = self.flush
+
+    @classmethod
+    def current(cls):
+        """Batch of the running transaction - registered with on_commit on first use"""
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            return cls()
+
+        batch = getattr(connection, cls.CONNECTION_ATTR, None)
+        if batch is None or not _is_pending(connection, batch._callback):
+            # First change in this transaction, or the previous batch was rolled back
+            batch = cls()
+            setattr(connection, cls.CONNECTION_ATTR, batch)
+            transaction.on_commit(batch._callback)
+        return batch
+
+    def flush_if_autocommit(self):
+        if not transaction.get_connection().in_atomic_block:
+            self.flush()
+
+    def flush(self):
+        connection = transaction.get_connection()
+        if getattr(connection, self.CONNECTION_ATTR, None) is self:
+            delattr(connection, self.CONNECTION_ATTR)
+        self.run()
+
+    def run(self):
+        raise NotImplementedError
+
+
+def _is_pending(connection, callback):
+    # Django has no public way to ask whether an on_commit callback survived a
+    # (savepoint) rollback - run_on_commit holds (savepoint ids, callback, robust)
+    return any(entry[1] is callback for entry in connection.run_on_commit)
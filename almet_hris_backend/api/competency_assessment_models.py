@@ -157,14 +157,26 @@ class EmployeeLeadershipAssessment(models.Model):
         db_table = 'employee_leadership_assessments'
         ordering = ['-created_at']
     
+    # Rating columns read by apply_scores
+    RATING_SCORE_FIELDS = (
+        'leadership_item__child_group__main_group__name',
+        'leadership_item__child_group__name',
+        'required_level',
+        'actual_level',
+    )
+    
+    # Fields written by apply_scores
+    SCORE_FIELDS = ['main_group_scores', 'child_group_scores', 'overall_percentage', 'overall_letter_grade']
+    
     def calculate_scores(self):
         """Calculate leadership assessment scores by main and child groups"""
+        self.apply_scores(self.competency_ratings.values_list(*self.RATING_SCORE_FIELDS))
+        self.save()
+    
+    def apply_scores(self, rating_rows):
+        """Set score fields from preloaded rating rows (RATING_SCORE_FIELDS) without saving"""
         from collections import defaultdict
         
-        ratings = self.competency_ratings.select_related(
-            'leadership_item__child_group__main_group'
-        ).all()
-        
         # Group ratings by main group and child group
         main_group_data = defaultdict(lambda: {
             'position_total': 0, 
@@ -175,23 +187,20 @@ class EmployeeLeadershipAssessment(models.Model):
         
         child_group_data = defaultdict(lambda: {'position_total': 0, 'employee_total': 0, 'count': 0})
         
-        for rating in ratings:
-            main_group_name = rating.leadership_item.child_group.main_group.name
-            child_group_name = rating.leadership_item.child_group.name
-            
+        for main_group_name, child_group_name, required_level, actual_level in rating_rows:
             # Main group totals
-            main_group_data[main_group_name]['position_total'] += rating.required_level
-            main_group_data[main_group_name]['employee_total'] += rating.actual_level
+            main_group_data[main_group_name]['position_total'] += required_level
+            main_group_data[main_group_name]['employee_total'] += actual_level
             main_group_data[main_group_name]['count'] += 1
             
             # Child group totals within main group
-            main_group_data[main_group_name]['child_groups'][child_group_name]['position_total'] += rating.required_level
-            main_group_data[main_group_name]['child_groups'][child_group_name]['employee_total'] += rating.actual_level
+            main_group_data[main_group_name]['child_groups'][child_group_name]['position_total'] += required_level
+            main_group_data[main_group_name]['child_groups'][child_group_name]['employee_total'] += actual_level
             main_group_data[main_group_name]['child_groups'][child_group_name]['count'] += 1
             
             # Child group totals overall
-            child_group_data[child_group_name]['position_total'] += rating.required_level
-            child_group_data[child_group_name]['employee_total'] += rating.actual_level
+            child_group_data[child_group_name]['position_total'] += required_level
+            child_group_data[child_group_name]['employee_total'] += actual_level
             child_group_data[child_group_name]['count'] += 1
         
         # Calculate main group scores with nested child groups
@@ -255,8 +264,6 @@ class EmployeeLeadershipAssessment(models.Model):
         self.overall_letter_grade = LetterGradeMapping.get_letter_grade(self.overall_percentage)
         self.main_group_scores = main_group_scores
         self.child_group_scores = child_group_scores
-        
-        self.save()
     
     def can_edit(self):
         """Check if assessment can be edited"""
@@ -358,36 +365,15 @@ class LetterGradeMapping(models.Model):
     
     @classmethod
     def get_letter_grade(cls, percentage):
-        """Get letter grade for given percentage"""
-        try:
-            # Round percentage to 2 decimal places to avoid floating point issues
-            percentage = round(float(percentage), 2)
-            
-            # Find grade where percentage falls within range
-            grade = cls.objects.filter(
-                min_percentage__lte=percentage,
-                max_percentage__gte=percentage,
-                is_active=True
-            ).first()
-            
-            if grade:
-                return grade.letter_grade
-            
-            # If no exact match, find closest grade
-            # Check if percentage is above highest grade
-            highest_grade = cls.objects.filter(is_active=True).order_by('-max_percentage').first()
-            if highest_grade and percentage > highest_grade.max_percentage:
-                return highest_grade.letter_grade
-            
-            # Check if percentage is below lowest grade
-            lowest_grade = cls.objects.filter(is_active=True).order_by('min_percentage').first()
-            if lowest_grade and percentage < lowest_grade.min_percentage:
-                return lowest_grade.letter_grade
-            
-            return 'N/A'
-            
-        except (ValueError, TypeError):
-            return 'N/A'
+        """Get letter grade for given percentage (compiled, cached table - no query per call)"""
+        from .grade_tables import get_letter_grade_table
+        return get_letter_grade_table().grade_for(percentage)
+    
+    @classmethod
+    def grades_for(cls, percentages):
+        """Letter grades for many percentages, in the same order"""
+        from .grade_tables import get_letter_grade_table
+        return get_letter_grade_table().grades_for(percentages)
     
     def clean(self):
         """Validate that min_percentage <= max_percentage"""
@@ -554,15 +540,26 @@ class EmployeeCoreAssessment(models.Model):
         db_table = 'employee_core_assessments'
         ordering = ['-created_at']
     
+    # Rating columns read by apply_scores
+    RATING_SCORE_FIELDS = ('skill__group__name', 'required_level', 'actual_level')
+    
+    # Fields written by apply_scores
+    SCORE_FIELDS = ['total_position_score', 'total_employee_score', 'gap_score', 'completion_percentage', 'group_scores']
+    
     def calculate_scores(self):
         """Calculate assessment scores and gaps - ✅ UPDATED"""
+        self.apply_scores(self.competency_ratings.values_list(*self.RATING_SCORE_FIELDS))
+        self.save()
+    
+    def apply_scores(self, rating_rows):
+        """Set score fields from preloaded rating rows (RATING_SCORE_FIELDS) without saving"""
         from collections import defaultdict
         
-        ratings = self.competency_ratings.all()
+        rating_rows = list(rating_rows)
         
         # Overall totals
-        total_position = sum(r.required_level for r in ratings)
-        total_employee = sum(r.actual_level for r in ratings)
+        total_position = sum(required_level for _, required_level, _ in rating_rows)
+        total_employee = sum(actual_level for _, _, actual_level in rating_rows)
         gap = total_employee - total_position
         
         self.total_position_score = total_position
@@ -575,12 +572,9 @@ class EmployeeCoreAssessment(models.Model):
         # ✅ NEW: Calculate scores by skill group
         group_data = defaultdict(lambda: {'position_total': 0, 'employee_total': 0, 'count': 0})
         
-        ratings_with_group = self.competency_ratings.select_related('skill__group').all()
-        
-        for rating in ratings_with_group:
-            group_name = rating.skill.group.name
-            group_data[group_name]['position_total'] += rating.required_level
-            group_data[group_name]['employee_total'] += rating.actual_level
+        for group_name, required_level, actual_level in rating_rows:
+            group_data[group_name]['position_total'] += required_level
+            group_data[group_name]['employee_total'] += actual_level
             group_data[group_name]['count'] += 1
         
         # Calculate group scores
@@ -602,7 +596,6 @@ class EmployeeCoreAssessment(models.Model):
             }
         
         self.group_scores = group_scores
-        self.save()
     
     def can_edit(self):
         """Check if assessment can be edited"""
@@ -692,20 +685,27 @@ class EmployeeBehavioralAssessment(models.Model):
         db_table = 'employee_behavioral_assessments'
         ordering = ['-created_at']
     
+    # Rating columns read by apply_scores
+    RATING_SCORE_FIELDS = ('behavioral_competency__group__name', 'required_level', 'actual_level')
+    
+    # Fields written by apply_scores
+    SCORE_FIELDS = ['group_scores', 'overall_percentage', 'overall_letter_grade']
+    
     def calculate_scores(self):
         """Calculate behavioral assessment scores by group"""
-        from django.db.models import Sum
+        self.apply_scores(self.competency_ratings.values_list(*self.RATING_SCORE_FIELDS))
+        self.save()
+    
+    def apply_scores(self, rating_rows):
+        """Set score fields from preloaded rating rows (RATING_SCORE_FIELDS) without saving"""
         from collections import defaultdict
         
-        ratings = self.competency_ratings.select_related('behavioral_competency__group').all()
-        
         # Group ratings by competency group
         group_data = defaultdict(lambda: {'position_total': 0, 'employee_total': 0, 'count': 0})
         
-        for rating in ratings:
-            group_name = rating.behavioral_competency.group.name
-            group_data[group_name]['position_total'] += rating.required_level
-            group_data[group_name]['employee_total'] += rating.actual_level
+        for group_name, required_level, actual_level in rating_rows:
+            group_data[group_name]['position_total'] += required_level
+            group_data[group_name]['employee_total'] += actual_level
             group_data[group_name]['count'] += 1
         
         # Calculate percentages and letter grades
@@ -738,8 +738,6 @@ class EmployeeBehavioralAssessment(models.Model):
         
         self.overall_letter_grade = LetterGradeMapping.get_letter_grade(self.overall_percentage)
         self.group_scores = group_scores
-        
-        self.save()
     
     def can_edit(self):
         """Check if assessment can be edited"""
@@ -785,4 +783,47 @@ class EmployeeBehavioralCompetencyRating(models.Model):
         unique_together = ['assessment', 'behavioral_competency']
     
     def __str__(self):
-        return f"{self.assessment.employee.full_name} - {self.behavioral_competency.name}: {self.actual_level}/{self.required_level}"
\ No newline at end of file
+        return f"{self.assessment.employee.full_name} - {self.behavioral_competency.name}: {self.actual_level}/{self.required_level}"
+
+class EmployeeAssessmentSummary(models.Model):
+    """
+    Denormalized assessment state per employee and assessment type
+    (counts, latest assessment, best completed score) for dashboards.
+    Maintained by assessment_summary.py - never edit by hand.
+    """
+    ASSESSMENT_TYPE_CHOICES = [
+        ('CORE', 'Core'),
+        ('BEHAVIORAL', 'Behavioral'),
+        ('LEADERSHIP', 'Leadership'),
+    ]
+    
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='assessment_summaries')
+    assessment_type = models.CharField(max_length=20, choices=ASSESSMENT_TYPE_CHOICES)
+    
+    total_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    
+    # Latest assessment by assessment date
+    latest_assessment_id = models.UUIDField(null=True, blank=True)
+    latest_status = models.CharField(max_length=20, blank=True)
+    latest_percentage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    latest_letter_grade = models.CharField(max_length=10, blank=True)
+    latest_assessment_date = models.DateTimeField(null=True, blank=True)
+    
+    # Best completed assessment (top performers)
+    best_assessment_id = models.UUIDField(null=True, blank=True)
+    best_percentage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    best_letter_grade = models.CharField(max_length=10, blank=True)
+    best_assessment_date = models.DateTimeField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'employee_assessment_summaries'
+        unique_together = ['employee', 'assessment_type']
+        indexes = [
+            models.Index(fields=['assessment_type', '-best_percentage'], name='assess_summary_best_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.employee.full_name} - {self.get_assessment_type_display()}"
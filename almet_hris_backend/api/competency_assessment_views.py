@@ -4,15 +4,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Avg
+from django.db.models import Q, Count, Avg, Sum, F, Window
+from django.db.models.functions import RowNumber
 from django.db import transaction
-from django.http import HttpResponse
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-import io
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
 
 from .assessment_permissions import (
     get_assessment_access,
@@ -22,10 +18,11 @@ from .assessment_permissions import (
     can_user_edit_assessment,
     can_user_delete_assessment
 )
+from .assessment_documents import document_response, start_document_export
 from .competency_assessment_models import (
     CoreCompetencyScale, BehavioralScale, LetterGradeMapping,
     PositionCoreAssessment, PositionBehavioralAssessment,
-    EmployeeCoreAssessment, EmployeeBehavioralAssessment
+    EmployeeCoreAssessment, EmployeeBehavioralAssessment, EmployeeAssessmentSummary
 )
 from .competency_assessment_serializers import (
     CoreCompetencyScaleSerializer, BehavioralScaleSerializer, LetterGradeMappingSerializer,
@@ -473,222 +470,21 @@ class EmployeeLeadershipAssessmentViewSet(viewsets.ModelViewSet):
         assessment = self.get_object()
         
         try:
-            # Create Excel workbook
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Leadership Assessment"
-            
-            # Define styles
-            header_font = Font(bold=True, size=16, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            section_font = Font(bold=True, size=12)
-            section_fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
-            table_header_font = Font(bold=True)
-            border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                          top=Side(style='thin'), bottom=Side(style='thin'))
-            
-            # Header information
-            ws['A1'] = "LEADERSHIP COMPETENCY ASSESSMENT REPORT"
-            ws['A1'].font = header_font
-            ws['A1'].fill = header_fill
-            ws.merge_cells('A1:F1')
-            ws['A1'].alignment = Alignment(horizontal='center')
-            
-            # Employee information
-            row = 3
-            ws[f'A{row}'] = "Employee Information"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:B{row}')
-            row += 1
-            
-            employee_info = [
-                ("Employee ID:", assessment.employee.employee_id),
-                ("Name:", assessment.employee.full_name),
-                ("Job Title:", assessment.employee.job_title),
-                ("Position Group:", assessment.employee.position_group.get_name_display()),
-                ("Assessment Date:", assessment.assessment_date.strftime('%Y-%m-%d')),
-                ("Status:", assessment.get_status_display())
-            ]
-            
-            for label, value in employee_info:
-                ws[f'A{row}'] = label
-                ws[f'A{row}'].font = Font(bold=True)
-                ws[f'B{row}'] = value
-                row += 1
-            
-            # Overall Summary
-            row += 2
-            ws[f'A{row}'] = "OVERALL LEADERSHIP PERFORMANCE"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:D{row}')
-            row += 1
-            
-            # Overall grade with color coding
-            ws[f'A{row}'] = "Overall Grade:"
-            ws[f'A{row}'].font = Font(bold=True)
-            
-            grade_cell = ws[f'B{row}']
-            grade_cell.value = f"{assessment.overall_letter_grade} ({assessment.overall_percentage}%)"
-            grade_cell.font = Font(bold=True, size=14)
-            
-            # Color code based on grade
-            if assessment.overall_letter_grade in ['A+', 'A', 'A-']:
-                grade_cell.fill = PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid")
-            elif assessment.overall_letter_grade in ['B+', 'B', 'B-']:
-                grade_cell.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-            elif assessment.overall_letter_grade in ['C+', 'C', 'C-']:
-                grade_cell.fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
-            else:
-                grade_cell.fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
-            
-            row += 2
-            
-            # Main Group Performance Summary
-            ws[f'A{row}'] = "MAIN COMPETENCY GROUP PERFORMANCE"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:E{row}')
-            row += 1
-            
-            # Group headers
-            group_headers = ['Main Group', 'Required Score', 'Actual Score', 'Percentage', 'Grade']
-            for col, header in enumerate(group_headers, start=1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = table_header_font
-                cell.fill = section_fill
-                cell.border = border
-            row += 1
-            
-            # Main group scores
-            for main_group_name, scores in assessment.main_group_scores.items():
-                ws.cell(row=row, column=1, value=main_group_name).border = border
-                ws.cell(row=row, column=2, value=scores['position_total']).border = border
-                ws.cell(row=row, column=3, value=scores['employee_total']).border = border
-                
-                # Percentage with color coding
-                pct_cell = ws.cell(row=row, column=4, value=f"{scores['percentage']}%")
-                pct_cell.border = border
-                grade_cell = ws.cell(row=row, column=5, value=scores['letter_grade'])
-                grade_cell.border = border
-                
-                # Color code based on percentage
-                if scores['percentage'] >= 90:
-                    pct_cell.fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
-                    grade_cell.fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
-                elif scores['percentage'] >= 80:
-                    pct_cell.fill = PatternFill(start_color="FFFF99", end_color="FFFF99", fill_type="solid")
-                    grade_cell.fill = PatternFill(start_color="FFFF99", end_color="FFFF99", fill_type="solid")
-                elif scores['percentage'] >= 70:
-                    pct_cell.fill = PatternFill(start_color="FFE4B5", end_color="FFE4B5", fill_type="solid")
-                    grade_cell.fill = PatternFill(start_color="FFE4B5", end_color="FFE4B5", fill_type="solid")
-                else:
-                    pct_cell.fill = PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
-                    grade_cell.fill = PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
-                
-                row += 1
-            
-            # Detailed Competency Ratings
-            row += 2
-            ws[f'A{row}'] = "DETAILED LEADERSHIP COMPETENCY RATINGS"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:G{row}')
-            row += 1
-            
-            # Detail headers
-            headers = ['Main Group', 'Child Group', 'Competency Item', 'Required', 'Actual', 'Performance', 'Notes']
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = table_header_font
-                cell.fill = section_fill
-                cell.border = border
-            row += 1
-            
-            # Rating data grouped by main and child groups
-            ratings = assessment.competency_ratings.select_related(
-                'leadership_item__child_group__main_group'
-            ).order_by(
-                'leadership_item__child_group__main_group__name',
-                'leadership_item__child_group__name'
-            )
-            
-            current_main_group = None
-            current_child_group = None
-            
-            for rating in ratings:
-                main_group = rating.leadership_item.child_group.main_group.name
-                child_group = rating.leadership_item.child_group.name
-                
-                # Add space between main groups
-                if current_main_group != main_group:
-                    if current_main_group is not None:
-                        row += 1
-                    current_main_group = main_group
-                    current_child_group = None
-                
-                # Add space between child groups within same main group
-                if current_child_group != child_group:
-                    current_child_group = child_group
-                
-                ws.cell(row=row, column=1, value=main_group).border = border
-                ws.cell(row=row, column=2, value=child_group).border = border
-                ws.cell(row=row, column=3, value=rating.leadership_item.name[:100]).border = border
-                ws.cell(row=row, column=4, value=rating.required_level).border = border
-                ws.cell(row=row, column=5, value=rating.actual_level).border = border
-                
-                # Performance indicator
-                performance = "Meets" if rating.actual_level >= rating.required_level else "Below"
-                performance_cell = ws.cell(row=row, column=6, value=performance)
-                performance_cell.border = border
-                
-                if performance == "Meets":
-                    performance_cell.fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
-                    performance_cell.font = Font(color="006400")
-                else:
-                    performance_cell.fill = PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
-                    performance_cell.font = Font(color="8B0000")
-                
-                notes_cell = ws.cell(row=row, column=7, value=rating.notes or '')
-                notes_cell.border = border
-                row += 1
-            
-            # Auto-adjust column widths
-            for col_num in range(1, 8):
-                column_letter = get_column_letter(col_num)
-                max_length = 0
-                
-                for row_cells in ws[f'{column_letter}1:{column_letter}{ws.max_row}']:
-                    for cell in row_cells:
-                        try:
-                            if cell.value and len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                
-                adjusted_width = min(max_length + 2, 60)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Save to BytesIO
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
-            
-            response = HttpResponse(
-                output.getvalue(),
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            filename = f"leadership_assessment_{assessment.employee.employee_id}_{assessment.assessment_date}.xlsx"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            return response
+            return document_response('leadership', assessment)
             
         except Exception as e:
             logger.error(f"Error exporting leadership assessment: {str(e)}")
             return Response({
                 'error': f'Failed to export leadership assessment: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_export(self, request):
+        """
+        Export the assessments visible to the user (same filters as the list) in the background.
+        Body: ids (optional), department (optional), format: 'workbook' (one sheet per employee) | 'zip'
+        """
+        return start_document_export(request, 'leadership', self.get_queryset())
 
 class CoreCompetencyScaleViewSet(viewsets.ModelViewSet):
     """Core Competency Scale Management"""
@@ -1226,142 +1022,21 @@ class EmployeeCoreAssessmentViewSet(viewsets.ModelViewSet):
         assessment = self.get_object()
         
         try:
-            # Create Excel workbook
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Core Competency Assessment"
-            
-            # Define styles
-            header_font = Font(bold=True, size=16, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            section_font = Font(bold=True, size=12)
-            section_fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
-            table_header_font = Font(bold=True)
-            border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                          top=Side(style='thin'), bottom=Side(style='thin'))
-            
-            # Header information
-            ws['A1'] = "CORE COMPETENCY ASSESSMENT REPORT"
-            ws['A1'].font = header_font
-            ws['A1'].fill = header_fill
-            ws.merge_cells('A1:F1')
-            ws['A1'].alignment = Alignment(horizontal='center')
-            
-            # Employee information
-            row = 3
-            ws[f'A{row}'] = "Employee Information"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:B{row}')
-            row += 1
-            
-            employee_info = [
-                ("Employee ID:", assessment.employee.employee_id),
-                ("Name:", assessment.employee.full_name),
-                ("Job Title:", assessment.employee.job_title),
-                ("Assessment Date:", assessment.assessment_date.strftime('%Y-%m-%d')),
-               
-                ("Status:", assessment.get_status_display())
-            ]
-            
-            for label, value in employee_info:
-                ws[f'A{row}'] = label
-                ws[f'A{row}'].font = Font(bold=True)
-                ws[f'B{row}'] = value
-                row += 1
-            
-            # Summary scores
-            row += 2
-            ws[f'A{row}'] = "ASSESSMENT SUMMARY"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:B{row}')
-            row += 1
-            
-            summary_data = [
-                ("Total Position Score:", assessment.total_position_score),
-                ("Total Employee Score:", assessment.total_employee_score),
-                ("Gap Score:", assessment.gap_score),
-                ("Completion Percentage:", f"{assessment.completion_percentage}%")
-            ]
-            
-            for label, value in summary_data:
-                ws[f'A{row}'] = label
-                ws[f'A{row}'].font = Font(bold=True)
-                ws[f'B{row}'] = value
-                row += 1
-            
-            # Detailed ratings
-            row += 2
-            ws[f'A{row}'] = "DETAILED COMPETENCY RATINGS"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:F{row}')
-            row += 1
-            
-            # Headers
-            headers = ['Skill Group', 'Skill Name', 'Required Level', 'Actual Level', 'Gap', 'Notes']
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = table_header_font
-                cell.fill = section_fill
-                cell.border = border
-            row += 1
-            
-            # Rating data
-            for rating in assessment.competency_ratings.select_related('skill__group').all():
-                ws.cell(row=row, column=1, value=rating.skill.group.name).border = border
-                ws.cell(row=row, column=2, value=rating.skill.name).border = border
-                ws.cell(row=row, column=3, value=rating.required_level).border = border
-                ws.cell(row=row, column=4, value=rating.actual_level).border = border
-                
-                # Gap with color coding
-                gap_cell = ws.cell(row=row, column=5, value=rating.gap)
-                gap_cell.border = border
-                if rating.gap > 0:
-                    gap_cell.fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
-                elif rating.gap < 0:
-                    gap_cell.fill = PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
-                
-                notes_cell = ws.cell(row=row, column=6, value=rating.notes or '')
-                notes_cell.border = border
-                row += 1
-            
-            # Auto-adjust column widths
-            for col_num in range(1, 7):
-                column_letter = get_column_letter(col_num)
-                max_length = 0
-                
-                for row_cells in ws[f'{column_letter}1:{column_letter}{ws.max_row}']:
-                    for cell in row_cells:
-                        try:
-                            if cell.value and len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Save to BytesIO
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
-            
-            response = HttpResponse(
-                output.getvalue(),
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            filename = f"core_assessment_{assessment.employee.employee_id}_{assessment.assessment_date}.xlsx"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            return response
+            return document_response('core', assessment)
             
         except Exception as e:
             logger.error(f"Error exporting core assessment: {str(e)}")
             return Response({
                 'error': f'Failed to export assessment: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_export(self, request):
+        """
+        Export the assessments visible to the user (same filters as the list) in the background.
+        Body: ids (optional), department (optional), format: 'workbook' (one sheet per employee) | 'zip'
+        """
+        return start_document_export(request, 'core', self.get_queryset())
 
 class EmployeeBehavioralAssessmentViewSet(viewsets.ModelViewSet):
     """Employee Behavioral Assessments - With Permission Control"""
@@ -1514,234 +1189,7 @@ class EmployeeBehavioralAssessmentViewSet(viewsets.ModelViewSet):
         assessment = self.get_object()
         
         try:
-            # Create Excel workbook
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Behavioral Assessment"
-            
-            # Define styles
-            header_font = Font(bold=True, size=16, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            section_font = Font(bold=True, size=12)
-            section_fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
-            table_header_font = Font(bold=True)
-            border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                          top=Side(style='thin'), bottom=Side(style='thin'))
-            
-            # Header information
-            ws['A1'] = "BEHAVIORAL COMPETENCY ASSESSMENT REPORT"
-            ws['A1'].font = header_font
-            ws['A1'].fill = header_fill
-            ws.merge_cells('A1:F1')
-            ws['A1'].alignment = Alignment(horizontal='center')
-            
-            # Employee information
-            row = 3
-            ws[f'A{row}'] = "Employee Information"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:B{row}')
-            row += 1
-            
-            employee_info = [
-                ("Employee ID:", assessment.employee.employee_id),
-                ("Name:", assessment.employee.full_name),
-                ("Job Title:", assessment.employee.job_title),
-                ("Department:", getattr(assessment.employee.department, 'name', 'N/A')),
-                ("Assessment Date:", assessment.assessment_date.strftime('%Y-%m-%d')),
-     
-                ("Status:", assessment.get_status_display())
-            ]
-            
-            for label, value in employee_info:
-                ws[f'A{row}'] = label
-                ws[f'A{row}'].font = Font(bold=True)
-                ws[f'B{row}'] = value
-                row += 1
-            
-            # Overall Summary
-            row += 2
-            ws[f'A{row}'] = "OVERALL PERFORMANCE SUMMARY"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:D{row}')
-            row += 1
-            
-            # Overall grade with color coding
-            ws[f'A{row}'] = "Overall Grade:"
-            ws[f'A{row}'].font = Font(bold=True)
-            
-            grade_cell = ws[f'B{row}']
-            grade_cell.value = f"{assessment.overall_letter_grade} ({assessment.overall_percentage}%)"
-            grade_cell.font = Font(bold=True, size=14)
-            
-            # Color code based on grade
-            if assessment.overall_letter_grade in ['A+', 'A', 'A-']:
-                grade_cell.fill = PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid")
-            elif assessment.overall_letter_grade in ['B+', 'B', 'B-']:
-                grade_cell.fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-            elif assessment.overall_letter_grade in ['C+', 'C', 'C-']:
-                grade_cell.fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
-            else:
-                grade_cell.fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
-            
-            row += 2
-            
-            # Group Performance Summary
-            ws[f'A{row}'] = "COMPETENCY GROUP PERFORMANCE"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:E{row}')
-            row += 1
-            
-            # Group headers
-            group_headers = ['Competency Group', 'Required Score', 'Actual Score', 'Percentage', 'Grade']
-            for col, header in enumerate(group_headers, start=1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = table_header_font
-                cell.fill = section_fill
-                cell.border = border
-            row += 1
-            
-            # Group scores
-            for group_name, scores in assessment.group_scores.items():
-                ws.cell(row=row, column=1, value=group_name).border = border
-                ws.cell(row=row, column=2, value=scores['position_total']).border = border
-                ws.cell(row=row, column=3, value=scores['employee_total']).border = border
-                
-                # Percentage with color coding
-                pct_cell = ws.cell(row=row, column=4, value=f"{scores['percentage']}%")
-                pct_cell.border = border
-                grade_cell = ws.cell(row=row, column=5, value=scores['letter_grade'])
-                grade_cell.border = border
-                
-                # Color code based on percentage
-                if scores['percentage'] >= 90:
-                    pct_cell.fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
-                    grade_cell.fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
-                elif scores['percentage'] >= 80:
-                    pct_cell.fill = PatternFill(start_color="FFFF99", end_color="FFFF99", fill_type="solid")
-                    grade_cell.fill = PatternFill(start_color="FFFF99", end_color="FFFF99", fill_type="solid")
-                elif scores['percentage'] >= 70:
-                    pct_cell.fill = PatternFill(start_color="FFE4B5", end_color="FFE4B5", fill_type="solid")
-                    grade_cell.fill = PatternFill(start_color="FFE4B5", end_color="FFE4B5", fill_type="solid")
-                else:
-                    pct_cell.fill = PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
-                    grade_cell.fill = PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
-                
-                row += 1
-            
-            # Detailed Competency Ratings
-            row += 2
-            ws[f'A{row}'] = "DETAILED COMPETENCY RATINGS"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:F{row}')
-            row += 1
-            
-            # Detail headers
-            headers = ['Competency Group', 'Competency Name', 'Required Level', 'Actual Level', 'Performance', 'Notes']
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=row, column=col, value=header)
-                cell.font = table_header_font
-                cell.fill = section_fill
-                cell.border = border
-            row += 1
-            
-            # Rating data grouped by competency group
-            ratings = assessment.competency_ratings.select_related(
-                'behavioral_competency__group'
-            ).order_by('behavioral_competency__group__name', 'behavioral_competency__name')
-            
-            current_group = None
-            for rating in ratings:
-                # Group separator
-                if current_group != rating.behavioral_competency.group.name:
-                    if current_group is not None:
-                        row += 1  # Add space between groups
-                    current_group = rating.behavioral_competency.group.name
-                
-                ws.cell(row=row, column=1, value=rating.behavioral_competency.group.name).border = border
-                ws.cell(row=row, column=2, value=rating.behavioral_competency.name).border = border
-                ws.cell(row=row, column=3, value=rating.required_level).border = border
-                ws.cell(row=row, column=4, value=rating.actual_level).border = border
-                
-                # Performance indicator
-                performance = "Meets" if rating.actual_level >= rating.required_level else "Below"
-                performance_cell = ws.cell(row=row, column=5, value=performance)
-                performance_cell.border = border
-                
-                if performance == "Meets":
-                    performance_cell.fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
-                    performance_cell.font = Font(color="006400")  # Dark green
-                else:
-                    performance_cell.fill = PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
-                    performance_cell.font = Font(color="8B0000")  # Dark red
-                
-                notes_cell = ws.cell(row=row, column=6, value=rating.notes or '')
-                notes_cell.border = border
-                row += 1
-            
-            # Development recommendations
-            row += 2
-            ws[f'A{row}'] = "DEVELOPMENT RECOMMENDATIONS"
-            ws[f'A{row}'].font = section_font
-            ws[f'A{row}'].fill = section_fill
-            ws.merge_cells(f'A{row}:F{row}')
-            row += 1
-            
-            # Find competencies needing improvement
-            improvement_areas = []
-            for rating in assessment.competency_ratings.select_related('behavioral_competency').all():
-                if rating.actual_level < rating.required_level:
-                    improvement_areas.append({
-                        'competency': rating.behavioral_competency.name,
-                        'current': rating.actual_level,
-                        'target': rating.required_level,
-                        'gap': rating.required_level - rating.actual_level
-                    })
-            
-            if improvement_areas:
-                ws[f'A{row}'] = "Priority areas for development:"
-                ws[f'A{row}'].font = Font(bold=True)
-                row += 1
-                
-                for area in sorted(improvement_areas, key=lambda x: x['gap'], reverse=True):
-                    ws[f'A{row}'] = f"• {area['competency']}: Current {area['current']} → Target {area['target']} (Gap: {area['gap']})"
-                    row += 1
-            else:
-                ws[f'A{row}'] = "All competencies meet or exceed required levels!"
-                ws[f'A{row}'].font = Font(bold=True, color="006400")
-            
-            # Auto-adjust column widths
-            for col_num in range(1, 7):
-                column_letter = get_column_letter(col_num)
-                max_length = 0
-                
-                for row_cells in ws[f'{column_letter}1:{column_letter}{ws.max_row}']:
-                    for cell in row_cells:
-                        try:
-                            if cell.value and len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Save to BytesIO
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
-            
-            response = HttpResponse(
-                output.getvalue(),
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            filename = f"behavioral_assessment_{assessment.employee.employee_id}_{assessment.assessment_date}.xlsx"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            return response
+            return document_response('behavioral', assessment)
             
         except Exception as e:
             logger.error(f"Error exporting behavioral assessment: {str(e)}")
@@ -1749,6 +1197,14 @@ class EmployeeBehavioralAssessmentViewSet(viewsets.ModelViewSet):
                 'error': f'Failed to export behavioral assessment: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['post'])
+    def bulk_export(self, request):
+        """
+        Export the assessments visible to the user (same filters as the list) in the background.
+        Body: ids (optional), department (optional), format: 'workbook' (one sheet per employee) | 'zip'
+        """
+        return start_document_export(request, 'behavioral', self.get_queryset())
+    
     @action(detail=True, methods=['post'])
     def recalculate_scores(self, request, pk=None):
         """Recalculate behavioral assessment scores"""
@@ -1771,17 +1227,24 @@ class AssessmentDashboardViewSet(viewsets.ViewSet):
     def summary(self, request):
         """Get assessment summary statistics including leadership"""
         access = get_assessment_access(request.user)
-        core_qs = filter_assessment_queryset(request.user, EmployeeCoreAssessment.objects.all())
-        behavioral_qs = filter_assessment_queryset(request.user, EmployeeBehavioralAssessment.objects.all())
-        leadership_qs = filter_assessment_queryset(request.user, EmployeeLeadershipAssessment.objects.all())
-        # Basic counts
-        total_core = core_qs.count()
-        total_behavioral = behavioral_qs.count()
-        total_leadership = leadership_qs.count()
-        
-        completed_core = core_qs.filter(status='COMPLETED').count()
-        completed_behavioral = behavioral_qs.filter(status='COMPLETED').count()
-        completed_leadership = leadership_qs.filter(status='COMPLETED').count()
+        
+        # ✅ Counts from the per-employee summary rows - one grouped query
+        summaries = filter_assessment_queryset(request.user, EmployeeAssessmentSummary.objects.all())
+        counts = {
+            row['assessment_type']: row
+            for row in summaries.order_by().values('assessment_type').annotate(
+                total=Sum('total_count'),
+                completed=Sum('completed_count')
+            )
+        }
+        
+        def type_counts(assessment_type):
+            row = counts.get(assessment_type) or {}
+            return row.get('total') or 0, row.get('completed') or 0
+        
+        total_core, completed_core = type_counts('CORE')
+        total_behavioral, completed_behavioral = type_counts('BEHAVIORAL')
+        total_leadership, completed_leadership = type_counts('LEADERSHIP')
         
         # Recent assessments
         recent_core = EmployeeCoreAssessment.objects.select_related(
@@ -1796,20 +1259,21 @@ class AssessmentDashboardViewSet(viewsets.ViewSet):
             'employee', 'position_assessment'
         ).order_by('-created_at')[:5]
         
-        # Top performers (core competency)
-        top_core = EmployeeCoreAssessment.objects.filter(
-            status='COMPLETED'
-        ).select_related('employee').order_by('-completion_percentage')[:5]
-        
-        # Top performers (behavioral)
-        top_behavioral = EmployeeBehavioralAssessment.objects.filter(
-            status='COMPLETED'
-        ).select_related('employee').order_by('-overall_percentage')[:5]
-        
-        # Top performers (leadership) - NEW
-        top_leadership = EmployeeLeadershipAssessment.objects.filter(
-            status='COMPLETED'
-        ).select_related('employee').order_by('-overall_percentage')[:5]
+        # ✅ Top performers per type (best completed assessment per employee) - one query
+        top_by_type = {'CORE': [], 'BEHAVIORAL': [], 'LEADERSHIP': []}
+        top_summaries = EmployeeAssessmentSummary.objects.filter(
+            best_percentage__isnull=False
+        ).annotate(
+            rank=Window(
+                expression=RowNumber(),
+                partition_by=[F('assessment_type')],
+                order_by=F('best_percentage').desc()
+            )
+        ).filter(rank__lte=5).select_related('employee', 'employee__position_group').order_by(
+            'assessment_type', 'rank'
+        )
+        for summary in top_summaries:
+            top_by_type[summary.assessment_type].append(summary)
         
         # Serialize data
         core_serializer = EmployeeCoreAssessmentSerializer(recent_core, many=True)
@@ -1818,37 +1282,37 @@ class AssessmentDashboardViewSet(viewsets.ViewSet):
         
         top_core_data = [
             {
-                'employee_name': assessment.employee.full_name,
-                'employee_id': assessment.employee.employee_id,
-                'completion_percentage': assessment.completion_percentage,
-                'assessment_date': assessment.assessment_date
+                'employee_name': summary.employee.full_name,
+                'employee_id': summary.employee.employee_id,
+                'completion_percentage': summary.best_percentage,
+                'assessment_date': summary.best_assessment_date
             }
-            for assessment in top_core
+            for summary in top_by_type['CORE']
         ]
         
         top_behavioral_data = [
             {
-                'employee_name': assessment.employee.full_name,
-                'employee_id': assessment.employee.employee_id,
-                'overall_percentage': assessment.overall_percentage,
-                'overall_letter_grade': assessment.overall_letter_grade,
-                'assessment_date': assessment.assessment_date
+                'employee_name': summary.employee.full_name,
+                'employee_id': summary.employee.employee_id,
+                'overall_percentage': summary.best_percentage,
+                'overall_letter_grade': summary.best_letter_grade,
+                'assessment_date': summary.best_assessment_date
             }
-            for assessment in top_behavioral
+            for summary in top_by_type['BEHAVIORAL']
         ]
         
         # NEW - Leadership top performers
         top_leadership_data = [
             {
-                'employee_name': assessment.employee.full_name,
-                'employee_id': assessment.employee.employee_id,
-                'job_title': assessment.employee.job_title,
-                'position_group': assessment.employee.position_group.get_name_display(),
-                'overall_percentage': assessment.overall_percentage,
-                'overall_letter_grade': assessment.overall_letter_grade,
-                'assessment_date': assessment.assessment_date
+                'employee_name': summary.employee.full_name,
+                'employee_id': summary.employee.employee_id,
+                'job_title': summary.employee.job_title,
+                'position_group': summary.employee.position_group.get_name_display(),
+                'overall_percentage': summary.best_percentage,
+                'overall_letter_grade': summary.best_letter_grade,
+                'assessment_date': summary.best_assessment_date
             }
-            for assessment in top_leadership
+            for summary in top_by_type['LEADERSHIP']
         ]
         
         return Response({
@@ -1922,31 +1386,37 @@ class AssessmentDashboardViewSet(viewsets.ViewSet):
             
 
             
-            # Get all assessments for employee
-            core_assessments = EmployeeCoreAssessment.objects.filter(
+            # ✅ Latest state per assessment type - one indexed read of the summary rows
+            summaries = {
+                summary.assessment_type: summary
+                for summary in EmployeeAssessmentSummary.objects.filter(employee=employee)
+            }
+            
+            # Get all assessments for employee (lists loaded once, latest = first)
+            core_assessments = list(EmployeeCoreAssessment.objects.filter(
                 employee=employee
-            ).select_related('position_assessment').order_by('-assessment_date')
+            ).select_related('position_assessment').order_by('-assessment_date'))
             
             # Get behavioral OR leadership assessments based on position
             if is_leadership_position:
-                leadership_assessments = EmployeeLeadershipAssessment.objects.filter(
+                leadership_assessments = list(EmployeeLeadershipAssessment.objects.filter(
                     employee=employee
-                ).select_related('position_assessment').order_by('-assessment_date')
+                ).select_related('position_assessment').order_by('-assessment_date'))
                 
                 behavioral_assessments = []
                 latest_behavioral = None
-                latest_leadership = leadership_assessments.first()
+                latest_leadership = leadership_assessments[0] if leadership_assessments else None
             else:
-                behavioral_assessments = EmployeeBehavioralAssessment.objects.filter(
+                behavioral_assessments = list(EmployeeBehavioralAssessment.objects.filter(
                     employee=employee
-                ).select_related('position_assessment').order_by('-assessment_date')
+                ).select_related('position_assessment').order_by('-assessment_date'))
                 
                 leadership_assessments = []
-                latest_behavioral = behavioral_assessments.first()
+                latest_behavioral = behavioral_assessments[0] if behavioral_assessments else None
                 latest_leadership = None
             
             # Get latest assessments
-            latest_core = core_assessments.first()
+            latest_core = core_assessments[0] if core_assessments else None
             
             # Development areas (skills with negative gaps from core assessment)
             development_areas = []
@@ -2003,7 +1473,18 @@ class AssessmentDashboardViewSet(viewsets.ViewSet):
                 'core_assessments': core_serializer.data,
                 'latest_core_assessment': latest_core_serializer.data if latest_core_serializer else None,
                 'development_areas': development_areas,
-                'strengths': strengths
+                'strengths': strengths,
+                'assessment_summary': {
+                    assessment_type.lower(): {
+                        'total_count': summary.total_count,
+                        'completed_count': summary.completed_count,
+                        'latest_status': summary.latest_status,
+                        'latest_percentage': summary.latest_percentage,
+                        'latest_letter_grade': summary.latest_letter_grade,
+                        'latest_assessment_date': summary.latest_assessment_date
+                    }
+                    for assessment_type, summary in summaries.items()
+                }
             }
             
             # Add appropriate behavioral or leadership data
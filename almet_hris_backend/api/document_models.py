@@ -228,12 +228,12 @@ class Document(models.Model):
         return None
     
     def increment_view_count(self):
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        from .view_counters import record_increment
+        record_increment(self, 'view_count')
     
     def increment_download_count(self):
-        self.download_count += 1
-        self.save(update_fields=['download_count'])
+        from .view_counters import record_increment
+        record_increment(self, 'download_count')
     
 
     
@@ -4,7 +4,7 @@ from rest_framework import viewsets, status, filters, parsers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Sum
 from django_filters.rest_framework import DjangoFilterBackend
 import logging
 
@@ -386,21 +386,22 @@ class DocumentStatisticsViewSet(viewsets.ViewSet):
         total_folders = DocumentFolder.objects.filter(is_active=True).count()
         total_documents = Document.objects.filter(is_active=True, is_archived=False).count()
         
+        documents = Document.objects.filter(is_active=True, is_archived=False)
+        
         # Documents by type
+        type_counts = dict(
+            documents.order_by().values_list('document_type').annotate(count=Count('id'))
+        )
         documents_by_type = {}
         for doc_type, label in Document.DOCUMENT_TYPES:
-            count = Document.objects.filter(
-                document_type=doc_type,
-                is_active=True,
-                is_archived=False
-            ).count()
+            count = type_counts.get(doc_type, 0)
             if count > 0:
                 documents_by_type[label] = count
         
         # Total views and downloads
-        documents = Document.objects.filter(is_active=True, is_archived=False)
-        total_views = sum(d.view_count for d in documents)
-        total_downloads = sum(d.download_count for d in documents)
+        totals = documents.aggregate(views=Sum('view_count'), downloads=Sum('download_count'))
+        total_views = totals['views'] or 0
+        total_downloads = totals['downloads'] or 0
         
         # Recent documents
         recent_docs = documents.order_by('-updated_at')[:5]
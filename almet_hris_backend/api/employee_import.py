@@ -0,0 +1,550 @@
+# api/employee_import.py - Streaming, batched bulk employee import
+
+from collections import defaultdict
+from datetime import date, datetime
+import logging
+
+from django.contrib.auth.models import User
+from django.db import transaction
+import pandas as pd
+
+from .employee_signal_batch import EmployeeSaveBatch
+from .models import (
+    Employee, BusinessFunction, Department, Unit, JobFunction, PositionGroup,
+    EmployeeTag, EmployeeStatus, EmployeeActivity, ContractTypeConfig, IdSequence
+)
+
+logger = logging.getLogger(__name__)
+
+# Excel header -> field (first matching header wins)
+COLUMN_MAPPINGS = {
+    'employee_id': ['Employee ID (optional - auto-generated)', 'Employee ID', 'employee_id'],
+    'first_name': ['First Name*', 'First Name', 'first_name'],
+    'last_name': ['Last Name*', 'Last Name', 'last_name'],
+    'email': ['Email*', 'Email', 'email'],
+    'date_of_birth': ['Date of Birth', 'date_of_birth'],
+    'gender': ['Gender', 'gender'],
+    'father_name': ['Father Name', 'father_name'],
+    'phone': ['Phone', 'phone'],
+    'address': ['Address', 'address'],
+    'emergency_contact': ['Emergency Contact', 'emergency_contact'],
+    'business_function': ['Business Function*', 'Business Function', 'business_function'],
+    'department': ['Department*', 'Department', 'department'],
+    'unit': ['Unit', 'unit'],
+    'job_function': ['Job Function*', 'Job Function', 'job_function'],
+    'job_title': ['Job Title*', 'Job Title', 'job_title'],
+    'position_group': ['Position Group*', 'Position Group', 'position_group'],
+    'grading_level': ['Grading Level', 'grading_level'],
+    'start_date': ['Start Date*', 'Start Date', 'start_date'],
+    'contract_duration': ['Contract Duration*', 'Contract Duration', 'contract_duration'],
+    'contract_start_date': ['Contract Start Date', 'contract_start_date'],
+    'line_manager_id': ['Line Manager Employee ID', 'Line Manager ID', 'line_manager_id'],
+    'is_visible_in_org_chart': ['Is Visible in Org Chart', 'Org Chart Visible'],
+    'tags': ['Tag Names (comma separated)', 'Tags', 'tags'],
+    'notes': ['Notes', 'notes']
+}
+
+# employee_id is optional - auto-generated when empty
+REQUIRED_COLUMNS = [
+    'first_name', 'last_name', 'email',
+    'business_function', 'department', 'job_function',
+    'job_title', 'position_group', 'start_date', 'contract_duration'
+]
+
+REQUIRED_VALUES = [
+    'first_name', 'last_name', 'email', 'business_function',
+    'department', 'job_function', 'job_title', 'position_group', 'start_date'
+]
+
+SAMPLE_IDS = {'HC001', 'HC002', 'EMP001', 'TEST001'}
+SAMPLE_NAMES = {'John', 'Jane', 'Test', 'Sample'}
+EMPTY_VALUES = {'nan', 'none', 'nat', '', 'null'}
+DEFAULT_CONTRACT_DURATIONS = ['3_MONTHS', '6_MONTHS', '1_YEAR', '2_YEARS', '3_YEARS', 'PERMANENT']
+
+
+def clean_cell(value):
+    """Cell value -> stripped string ('' for empty markers)"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    str_value = str(value).strip()
+    if str_value.lower() in EMPTY_VALUES:
+        return ''
+    return str_value
+
+
+def parse_date(value):
+    return pd.to_datetime(value).date()
+
+
+def iter_workbook_rows(file):
+    """
+    Stream (row_number, header, values) from the first sheet.
+    .xlsx is read with openpyxl in read-only mode; legacy .xls falls back to pandas.
+    """
+    try:
+        from openpyxl import load_workbook
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception:
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        df = pd.read_excel(file, sheet_name=0)
+        yield from iter_dataframe_rows(df)
+        return
+
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [clean_cell(col) for col in header]
+        for row_number, values in enumerate(rows, start=2):
+            yield row_number, header, values
+    finally:
+        workbook.close()
+
+
+def iter_dataframe_rows(df):
+    """Same row stream for an already loaded DataFrame"""
+    header = [str(col).strip() for col in df.columns]
+    for index, values in zip(df.index, df.itertuples(index=False, name=None)):
+        row_number = int(index) + 2
+        yield row_number, header, [None if pd.isna(v) else v for v in values]
+
+
+def estimate_row_count(file):
+    """Data rows in the first sheet, from the sheet dimension (no full read)"""
+    try:
+        from openpyxl import load_workbook
+        workbook = load_workbook(file, read_only=True)
+        try:
+            max_row = workbook.worksheets[0].max_row or 0
+        finally:
+            workbook.close()
+        return max(max_row - 1, 0)
+    except Exception:
+        return 0
+    finally:
+        if hasattr(file, 'seek'):
+            file.seek(0)
+
+
+class EmployeeImportEngine:
+    """
+    Bulk employee import.
+
+    Rows are streamed, every reference name (business function, department,
+    unit, job function, position group, line manager, tag, contract type) is
+    resolved from dictionaries loaded once, rows are validated per chunk with
+    set-based duplicate checks and written with bulk_create. Work normally done
+    by Employee post_save signals goes through EmployeeSaveBatch and runs after commit.
+    """
+
+    CHUNK_SIZE = 500
+
+    def __init__(self, user, progress_callback=None):
+        self.user = user
+        self.progress_callback = progress_callback
+        self.results = {
+            'total_rows': 0,
+            'successful': 0,
+            'failed': 0,
+            'errors': [],
+            'created_employees': []
+        }
+
+    # ---------- entry points ----------
+
+    def run_file(self, file, total_estimate=0):
+        return self.run(iter_workbook_rows(file), total_estimate)
+
+    def run_dataframe(self, df):
+        return self.run(iter_dataframe_rows(df), len(df))
+
+    def run(self, rows, total_estimate=0):
+        self.total_estimate = total_estimate
+        columns = None
+        chunk = []
+
+        try:
+            for row_number, header, values in rows:
+                if columns is None:
+                    columns = self._map_columns(header)
+                    missing_required = [f for f in REQUIRED_COLUMNS if f not in columns]
+                    if missing_required:
+                        error_msg = f"Missing required columns: {', '.join(missing_required)}"
+                        logger.error(error_msg)
+                        self.results['errors'].append(error_msg)
+                        self.results['failed'] = total_estimate
+                        return self.results
+                    self._load_references()
+                    if not self.default_status:
+                        self.results['errors'].append("No employee status found. Please create default status first.")
+                        self.results['failed'] = total_estimate
+                        return self.results
+
+                row = self._extract_row(columns, values)
+                if row is None:
+                    continue
+
+                row['row_number'] = row_number
+                self.results['total_rows'] += 1
+                chunk.append(row)
+
+                if len(chunk) >= self.CHUNK_SIZE:
+                    self._process_chunk(chunk)
+                    chunk = []
+
+            if chunk:
+                self._process_chunk(chunk)
+
+            if columns is not None and self.results['total_rows'] == 0:
+                self.results['errors'].append(
+                    "No valid data rows found. Please add employee data after removing sample rows."
+                )
+
+            return self.results
+
+        except Exception as e:
+            logger.error(f"❌ Bulk processing failed: {str(e)}", exc_info=True)
+            self.results['errors'].append(f"Processing failed: {str(e)}")
+            self.results['failed'] = self.results['total_rows']
+            return self.results
+
+    # ---------- setup ----------
+
+    def _map_columns(self, header):
+        columns = {}
+        for field, possible_names in COLUMN_MAPPINGS.items():
+            for possible_name in possible_names:
+                if possible_name in header:
+                    columns[field] = header.index(possible_name)
+                    break
+        return columns
+
+    def _load_references(self):
+        """All lookups for the import in a handful of queries"""
+        self.business_functions = {
+            bf.name.lower(): bf for bf in BusinessFunction.objects.filter(is_active=True)
+        }
+        self.departments = {
+            dept.name.lower(): dept
+            for dept in Department.objects.select_related('business_function').filter(is_active=True)
+        }
+        self.job_functions = {
+            jf.name.lower(): jf for jf in JobFunction.objects.filter(is_active=True)
+        }
+        self.position_groups = {
+            pg.get_name_display().lower(): pg for pg in PositionGroup.objects.filter(is_active=True)
+        }
+
+        # (department_id, unit name) -> first unit, like .filter(...).first()
+        self.units = {}
+        for unit in Unit.objects.order_by('pk'):
+            self.units.setdefault((unit.department_id, unit.name.lower()), unit)
+
+        self.line_managers = dict(Employee.objects.values_list('employee_id', 'id'))
+        self.tags = {tag.name: tag for tag in EmployeeTag.objects.all()}
+
+        active_contract_types = list(
+            ContractTypeConfig.objects.filter(is_active=True).values_list('contract_type', flat=True)
+        )
+        self.contract_types = active_contract_types or DEFAULT_CONTRACT_DURATIONS
+
+        self.default_status = EmployeeStatus.objects.filter(is_default_for_new_employees=True).first()
+        if not self.default_status:
+            self.default_status = EmployeeStatus.objects.filter(is_active=True).first()
+
+        self.seen_employee_ids = set()
+
+    def _extract_row(self, columns, values):
+        """Cleaned field dict, or None for empty / sample rows"""
+        row = {}
+        for field, position in columns.items():
+            row[field] = clean_cell(values[position]) if position < len(values) else ''
+
+        if not any(row.values()):
+            return None
+        if row.get('employee_id') in SAMPLE_IDS:
+            return None
+        if not row['first_name'] or row['first_name'] in SAMPLE_NAMES:
+            return None
+
+        row.setdefault('contract_duration', '')
+        if not row['contract_duration']:
+            row['contract_duration'] = 'PERMANENT'
+        return row
+
+    # ---------- chunk processing ----------
+
+    def _fail(self, row, message):
+        self.results['errors'].append(f"Row {row['row_number']}: {message}")
+        self.results['failed'] += 1
+
+    def _process_chunk(self, chunk):
+        provided_ids = [row['employee_id'] for row in chunk if row.get('employee_id')]
+        existing_ids = set(
+            Employee.all_objects.filter(employee_id__in=provided_ids).values_list('employee_id', flat=True)
+        ) if provided_ids else set()
+        existing_emails = set(
+            User.objects.filter(email__in=[row['email'] for row in chunk if row.get('email')])
+            .values_list('email', flat=True)
+        )
+
+        valid = []
+        for row in chunk:
+            employee = self._build_employee(row, existing_ids, existing_emails)
+            if employee is not None:
+                valid.append((row, employee))
+
+        if valid:
+            self._write(valid)
+
+        if self.progress_callback:
+            processed = self.results['successful'] + self.results['failed']
+            self.progress_callback(processed, max(self.total_estimate, processed), self.results)
+
+    def _build_employee(self, row, existing_ids, existing_emails):
+        """Validate one row against preloaded lookups; unsaved Employee or None"""
+        if not all(row.get(field) for field in REQUIRED_VALUES):
+            self._fail(row, "Missing required data")
+            return None
+
+        business_function = self.business_functions.get(row['business_function'].lower())
+        if not business_function:
+            self._fail(row, f"Business Function '{row['business_function']}' not found")
+            return None
+
+        employee_id = row.get('employee_id') or None
+        if employee_id and (employee_id in existing_ids or employee_id in self.seen_employee_ids):
+            self._fail(row, f"Employee ID {employee_id} already exists")
+            return None
+
+        if row['email'] in existing_emails:
+            self._fail(row, f"Email {row['email']} already exists")
+            return None
+
+        department = self.departments.get(row['department'].lower())
+        if not department:
+            self._fail(row, f"Department '{row['department']}' not found")
+            return None
+
+        job_function = self.job_functions.get(row['job_function'].lower())
+        if not job_function:
+            self._fail(row, f"Job Function '{row['job_function']}' not found")
+            return None
+
+        position_group = self.position_groups.get(row['position_group'].lower())
+        if not position_group:
+            self._fail(row, f"Position Group '{row['position_group']}' not found")
+            return None
+
+        try:
+            start_date = parse_date(row['start_date'])
+        except Exception:
+            self._fail(row, f"Invalid start date '{row['start_date']}'")
+            return None
+
+        contract_duration = row['contract_duration']
+        if contract_duration not in self.contract_types:
+            self._fail(
+                row,
+                f"Invalid contract duration '{contract_duration}'. Available: {', '.join(self.contract_types)}"
+            )
+            return None
+
+        # Optional fields
+        date_of_birth = None
+        if row.get('date_of_birth'):
+            try:
+                date_of_birth = parse_date(row['date_of_birth'])
+            except Exception:
+                pass
+
+        gender = row.get('gender', '').upper()
+        if gender not in ['MALE', 'FEMALE']:
+            gender = None
+
+        phone = row.get('phone', '')
+        if phone and len(phone) > 15:
+            phone = phone[:15]
+            logger.warning(f"Row {row['row_number']}: Phone number truncated to 15 characters")
+
+        unit = None
+        if row.get('unit'):
+            unit = self.units.get((department.id, row['unit'].lower()))
+
+        contract_start_date = start_date
+        if row.get('contract_start_date'):
+            try:
+                contract_start_date = parse_date(row['contract_start_date'])
+            except Exception:
+                pass
+
+        line_manager_id = None
+        if row.get('line_manager_id'):
+            line_manager_id = self.line_managers.get(row['line_manager_id'])
+
+        is_visible_str = (row.get('is_visible_in_org_chart') or 'TRUE').upper()
+
+        if employee_id:
+            self.seen_employee_ids.add(employee_id)
+
+        employee = Employee(
+            employee_id=employee_id,
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            email=row['email'],
+            date_of_birth=date_of_birth,
+            gender=gender,
+            father_name=row.get('father_name', ''),
+            address=row.get('address', ''),
+            phone=phone,
+            emergency_contact=row.get('emergency_contact', ''),
+            business_function=business_function,
+            department=department,
+            unit=unit,
+            job_function=job_function,
+            job_title=row['job_title'],
+            position_group=position_group,
+            grading_level=row.get('grading_level') or f"{position_group.grading_shorthand}_M",
+            start_date=start_date,
+            contract_duration=contract_duration,
+            contract_start_date=contract_start_date,
+            line_manager_id=line_manager_id,
+            status=self.default_status,
+            is_visible_in_org_chart=is_visible_str in ['TRUE', '1', 'YES'],
+            notes=row.get('notes', ''),
+            created_by=self.user
+        )
+        employee.populate_derived_fields()
+        return employee
+
+    def _write(self, valid):
+        """bulk_create the chunk; on failure fall back to row-by-row saves"""
+        try:
+            with transaction.atomic():
+                self._assign_employee_ids([employee for _, employee in valid])
+                created = Employee.objects.bulk_create([employee for _, employee in valid])
+                self._create_related(list(zip([row for row, _ in valid], created)))
+        except Exception as e:
+            logger.warning(f"Bulk insert failed, retrying chunk row by row: {e}")
+            created_pairs = []
+            for row, employee in valid:
+                employee.pk = None
+                if not row.get('employee_id'):
+                    employee.employee_id = None
+                try:
+                    with transaction.atomic():
+                        # Regular save - post_save signals run for this row
+                        employee.save()
+                        self._create_related([(row, employee)], log_creation=False)
+                    created_pairs.append((row, employee))
+                except Exception as row_error:
+                    self._fail(row, str(row_error))
+                    logger.error(f"❌ Error creating employee from row {row['row_number']}: {row_error}")
+            valid = created_pairs
+            # save() already fired post_save for these rows
+            created = []
+
+        for row, employee in valid:
+            auto_generated = not bool(row.get('employee_id'))
+            self.results['successful'] += 1
+            self.results['created_employees'].append({
+                'employee_id': employee.employee_id,
+                'name': employee.full_name,
+                'email': employee.email,
+                'id_auto_generated': auto_generated
+            })
+
+        self._run_deferred_signal_work(created)
+
+    def _assign_employee_ids(self, employees):
+        """One sequence reservation per business function for the whole chunk"""
+        pending = defaultdict(list)
+        for employee in employees:
+            if not employee.employee_id:
+                pending[employee.business_function.code].append(employee)
+
+        for code, group in pending.items():
+            for employee, employee_id in zip(group, IdSequence.reserve(IdSequence.EMPLOYEE, code, len(group))):
+                employee.employee_id = employee_id
+
+    def _create_related(self, pairs, log_creation=True):
+        """Tags and activity log rows for created employees"""
+        tag_links = []
+        activities = []
+        TagLink = Employee.tags.through
+
+        for row, employee in pairs:
+            for tag in self._resolve_tags(row.get('tags', '')):
+                tag_links.append(TagLink(employee_id=employee.pk, employeetag_id=tag.pk))
+
+            auto_generated = not bool(row.get('employee_id'))
+            if log_creation:
+                # What employee_post_save_handler logs for a single create
+                activities.append(EmployeeActivity(
+                    employee=employee,
+                    activity_type='CREATED',
+                    description=f"Employee {employee.full_name} was created",
+                    performed_by=None,
+                    metadata={
+                        'employee_id': employee.employee_id,
+                        'contract_type': employee.contract_duration,
+                        'initial_status': employee.status.name if employee.status else None
+                    }
+                ))
+            activities.append(EmployeeActivity(
+                employee=employee,
+                activity_type='BULK_CREATED',
+                description=f"Employee {employee.full_name} created via bulk upload" +
+                            (f" with provided ID {employee.employee_id}" if not auto_generated else " with auto-generated ID"),
+                performed_by=self.user,
+                metadata={
+                    'bulk_creation': True,
+                    'row_number': row['row_number'],
+                    'employee_id_auto_generated': auto_generated
+                }
+            ))
+
+        if tag_links:
+            TagLink.objects.bulk_create(tag_links, ignore_conflicts=True)
+        EmployeeActivity.objects.bulk_create(activities)
+
+    def _resolve_tags(self, tags_str):
+        tags = []
+        for tag_spec in (tags_str or '').split(','):
+            tag_spec = tag_spec.strip()
+            tag_name = tag_spec.split(':', 1)[1].strip() if ':' in tag_spec else tag_spec
+            if not tag_name:
+                continue
+            tag = self.tags.get(tag_name)
+            if tag is None:
+                tag, _ = EmployeeTag.objects.get_or_create(name=tag_name, defaults={'is_active': True})
+                self.tags[tag_name] = tag
+            tags.append(tag)
+        return tags
+
+    # ---------- deferred post_save work ----------
+
+    def _run_deferred_signal_work(self, employees):
+        """
+        Employee post_save work skipped by bulk_create, handed to the
+        transaction's save batch: job description auto-assignment, access
+        scope and headcount statistics invalidation, search documents.
+        """
+        if not employees:
+            return
+
+        with EmployeeSaveBatch.collect() as batch:
+            batch.add_job_description_checks(employee.id for employee in employees)
+            batch.invalidate_statistics = True
+            batch.search_ids.update(employee.id for employee in employees)
+            if any(employee.line_manager_id for employee in employees):
+                batch.invalidate_access = True
@@ -0,0 +1,256 @@
+# api/employee_signal_batch.py - Transaction-scoped batching of Employee post_save work
+
+from contextlib import contextmanager
+import logging
+
+from .commit_batch import CommitBatch
+
+logger = logging.getLogger(__name__)
+
+
+class EmployeeSaveBatch(CommitBatch):
+    """
+    Employee post_save work collected for one transaction.
+
+    Signal receivers only record which employees changed and how; the work
+    itself runs once, for all of them, when the outermost transaction commits
+    (right away in autocommit mode):
+    - status recalculation: one BulkStatusEngine pass
+    - job description auto-assignment: one Celery task
+    - position change emails: Celery tasks (welcome triggers are only logged)
+    - access scope invalidation: at most once
+    - performance dashboard summary refresh for moved / (un)deleted employees
+    - headcount statistics invalidation and search document rebuild
+    So a bulk tag / line manager / restore operation inside transaction.atomic()
+    pays for the handlers once instead of once per saved employee.
+    """
+
+    CONNECTION_ATTR = '_employee_save_batch'
+
+    def __init__(self):
+        super().__init__()
+        self.status_ids = set()
+        self.job_description_ids = set()
+        # employee id -> [position group id before the transaction, latest position group id]
+        self.position_changes = {}
+        # employee id -> trigger reason
+        self.welcome = {}
+        self.invalidate_access = False
+        self.invalidate_statistics = False
+        self.dashboard_employee_ids = set()
+        self.search_ids = set()
+
+    @classmethod
+    @contextmanager
+    def collect(cls):
+        """Batch of the current transaction - flushed on commit, or on exit in autocommit mode"""
+        batch = cls.current()
+        yield batch
+        batch.flush_if_autocommit()
+
+    # ---------- recording ----------
+
+    def add_save(self, instance, created, snapshot=None):
+        """Record one Employee post_save; snapshot is the row as it was before save()"""
+        employee_id = instance.pk
+        self.invalidate_statistics = True
+        self.search_ids.add(employee_id)
+
+        if self._access_fields_changed(instance, created, snapshot):
+            self.invalidate_access = True
+
+        if not created and (
+            snapshot is None
+            or (snapshot['department_id'], snapshot['is_deleted']) != (instance.department_id, instance.is_deleted)
+        ):
+            self.dashboard_employee_ids.add(employee_id)
+
+        if instance.is_deleted:
+            return
+
+        self.job_description_ids.add(employee_id)
+
+        if created:
+            if instance.start_date:
+                self.welcome.setdefault(employee_id, "New employee created with start_date")
+            return
+
+        if not getattr(instance, '_skip_auto_status_update', False):
+            self.status_ids.add(employee_id)
+
+        if snapshot is not None:
+            self._record_position_change(employee_id, snapshot['position_group_id'], instance.position_group_id)
+
+            reason = self._welcome_reason(instance, snapshot)
+            if reason:
+                self.welcome.setdefault(employee_id, reason)
+
+    def add_job_description_checks(self, employee_ids):
+        self.job_description_ids.update(employee_ids)
+
+    def _record_position_change(self, employee_id, old_position_id, new_position_id):
+        if employee_id in self.position_changes:
+            # Saved again in the same transaction - compare against the first state
+            self.position_changes[employee_id][1] = new_position_id
+        elif old_position_id != new_position_id:
+            self.position_changes[employee_id] = [old_position_id, new_position_id]
+
+    @staticmethod
+    def _access_fields_changed(instance, created, snapshot):
+        """Roles-and-hierarchy scopes depend on user, line_manager, business_function and is_deleted"""
+        if created:
+            return bool(instance.user_id or instance.line_manager_id)
+        if snapshot is None:
+            return True
+        return (
+            snapshot['user_id'], snapshot['line_manager_id'],
+            snapshot['business_function_id'], snapshot['is_deleted']
+        ) != (
+            instance.user_id, instance.line_manager_id,
+            instance.business_function_id, instance.is_deleted
+        )
+
+    @staticmethod
+    def _welcome_reason(instance, snapshot):
+        # Status: Vacant → Not Vacant
+        if snapshot['status__name'] == 'Vacant':
+            reason = "Status changed from Vacant to {status}"
+        # Start date added (was None, now has value)
+        elif not snapshot['start_date']:
+            reason = "Start date added to existing employee"
+        # Was deleted, now active
+        elif snapshot['is_deleted']:
+            reason = "Employee reactivated from deleted state"
+        else:
+            return None
+
+        # All triggers need a start date and a non-vacant status now
+        if not instance.start_date or not instance.status or instance.status.name == 'Vacant':
+            return None
+        return reason.format(status=instance.status.name)
+
+    # ---------- flushing ----------
+
+    def run(self):
+        # Each step is independent - one failing must not block the rest
+        for step in (
+            self._flush_statuses,
+            self._flush_job_descriptions,
+            self._flush_position_changes,
+            self._flush_welcome_emails,
+            self._flush_access_scopes,
+            self._flush_dashboard_summary,
+            self._flush_headcount_statistics,
+            self._flush_search_documents,
+        ):
+            try:
+                step()
+            except Exception as e:
+                logger.error(f"❌ Employee save batch step {step.__name__} failed: {e}", exc_info=True)
+
+    def _flush_statuses(self):
+        if not self.status_ids:
+            return
+
+        from .status_management import BulkStatusEngine
+
+        engine = BulkStatusEngine(employee_ids=list(self.status_ids))
+        _, changes = engine.compute_changes()
+        if not changes:
+            return
+
+        for change in changes:
+            logger.info(
+                f"🔄 Auto-updating status for {change['employee_id']}: "
+                f"{change['old_status']} -> {change['new_status']} ({change['reason']})"
+            )
+        engine.apply_changes(changes, extra_metadata={'trigger': 'post_save_signal'})
+
+    def _flush_job_descriptions(self):
+        if not self.job_description_ids:
+            return
+
+        employee_ids = sorted(self.job_description_ids)
+        try:
+            from .tasks import auto_assign_job_descriptions
+            auto_assign_job_descriptions.delay(employee_ids)
+        except Exception as e:
+            logger.error(f"❌ Failed to queue job description auto-assignment: {e}")
+
+            # Fallback: assign synchronously if Celery fails
+            from .signals import assign_job_descriptions
+            assign_job_descriptions(employee_ids)
+
+    def _flush_position_changes(self):
+        changes = {
+            employee_id: (old_id, new_id)
+            for employee_id, (old_id, new_id) in self.position_changes.items()
+            if old_id and new_id and old_id != new_id
+        }
+        if not changes:
+            return
+
+        from .models import PositionGroup
+
+        position_ids = {position_id for pair in changes.values() for position_id in pair}
+        positions = {
+            position.id: str(position)
+            for position in PositionGroup.all_objects.filter(id__in=position_ids)
+        }
+
+        change_type = 'promotion'  # or 'transfer' based on your logic
+
+        for employee_id, (old_id, new_id) in changes.items():
+            old_position, new_position = positions.get(old_id), positions.get(new_id)
+
+            # Send notification asynchronously using Celery
+            try:
+                from .tasks import send_position_change_email
+                send_position_change_email.delay(
+                    employee_id=employee_id,
+                    old_position=old_position,
+                    new_position=new_position,
+                    change_type=change_type
+                )
+            except Exception as e:
+                logger.error(f"❌ Failed to queue position change notification: {e}")
+
+                # Fallback: Send synchronously if Celery fails
+                try:
+                    from .models import Employee
+                    from .celebration_notification_service import celebration_notification_service
+                    celebration_notification_service.send_position_change_notification(
+                        employee=Employee.objects.get(id=employee_id),
+                        old_position=old_position,
+                        new_position=new_position,
+                        change_type=change_type
+                    )
+                except Exception as fallback_error:
+                    logger.error(f"❌ Fallback notification also failed: {fallback_error}")
+
+    def _flush_welcome_emails(self):
+        # Welcome triggers are only logged - automatic welcome emails are not
+        # sent on employee save (send_welcome_email_task is not queued here)
+        for employee_id, reason in self.welcome.items():
+            logger.info(f"👋 Welcome trigger for employee {employee_id}: {reason}")
+
+    def _flush_access_scopes(self):
+        if self.invalidate_access:
+            from .access_scope import invalidate_access_scopes
+            invalidate_access_scopes()
+
+    def _flush_dashboard_summary(self):
+        if self.dashboard_employee_ids:
+            from .performance_dashboard import mark_employees_changed
+            mark_employees_changed(self.dashboard_employee_ids)
+
+    def _flush_headcount_statistics(self):
+        if self.invalidate_statistics:
+            from .headcount_statistics import invalidate_headcount_statistics
+            invalidate_headcount_statistics()
+
+    def _flush_search_documents(self):
+        if self.search_ids:
+            from .models import Employee
+            from .search_index import refresh_search_documents
+            refresh_search_documents(Employee, self.search_ids)
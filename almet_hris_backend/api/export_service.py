@@ -0,0 +1,412 @@
+# api/export_service.py - Streaming CSV / constant-memory XLSX exports
+
+import csv
+from datetime import timedelta
+from itertools import chain, islice
+import logging
+import os
+import tempfile
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, QueryDict, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per database round trip
+EXPORT_CHUNK_SIZE = 2000
+
+# Rows looked at before the first write to size XLSX columns
+WIDTH_SAMPLE_ROWS = 200
+
+# XLSX files bigger than this spill from memory to disk before being sent
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+BACKGROUND_EXPORT_DIR = 'exports'
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+ZIP_CONTENT_TYPE = 'application/zip'
+
+# Background job file extension -> content type
+DOWNLOAD_CONTENT_TYPES = {
+    '.csv': CSV_CONTENT_TYPE,
+    '.xlsx': XLSX_CONTENT_TYPE,
+    '.zip': ZIP_CONTENT_TYPE,
+}
+
+HEADER_STYLE = {
+    'font': Font(bold=True, color='FFFFFF'),
+    'fill': PatternFill(start_color='366092', end_color='366092', fill_type='solid'),
+    'alignment': Alignment(horizontal='center', vertical='center'),
+}
+
+# Export name -> builder(user, query_params, data) returning an ExportDocument.
+# Builders are looked up by path so background workers can rebuild any export.
+EXPORT_BUILDERS = {
+    'employees': 'api.views.build_employee_export',
+    'vacation_balances': 'api.vacation_views.build_vacation_balances_export',
+    'vacation_records': 'api.vacation_views.build_vacation_records_export',
+    'business_trips': 'api.business_trip_views.build_business_trips_export',
+}
+
+
+class ExportSheet:
+    """
+    One worksheet of an export.
+
+    rows is any iterable of value lists and is consumed exactly once, so it
+    can be a generator over queryset.iterator(). Styles are dicts of cell
+    attributes (font, fill, alignment, border); they only apply to XLSX.
+    """
+
+    def __init__(self, title, headers, rows, preamble=None, header_style=None,
+                 column_styles=None, row_styler=None, max_width=50):
+        self.title = title
+        self.headers = list(headers)
+        self.rows = rows
+        # Lines above the header: (value, font) tuples, None for an empty line
+        self.preamble = preamble or []
+        self.header_style = HEADER_STYLE if header_style is None else header_style
+        # {column index: style} applied to every data cell of that column
+        self.column_styles = column_styles or {}
+        # callable(row values) -> {column index: style} for per-row styling
+        self.row_styler = row_styler
+        self.max_width = max_width
+
+
+class ExportDocument:
+    """Export result: a file name (without extension) and its sheets"""
+
+    def __init__(self, filename, sheets):
+        self.filename = filename
+        self.sheets = sheets
+
+    def get_filename(self, export_format):
+        return f"{self.filename}.{'csv' if export_format == 'csv' else 'xlsx'}"
+
+
+def iter_values(queryset, *fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """values() projection streamed from the database chunk by chunk"""
+    return queryset.values(*fields).iterator(chunk_size=chunk_size)
+
+
+def iter_chunks(iterable, size=EXPORT_CHUNK_SIZE):
+    """Yield lists of up to size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def choice_labels(model, field_name):
+    """value -> label for a choices field, like get_FOO_display without an instance"""
+    return {
+        str(value): str(label)
+        for value, label in model._meta.get_field(field_name).flatchoices
+    }
+
+
+def format_datetime(value, fmt='%Y-%m-%d %H:%M'):
+    return value.strftime(fmt) if value else ''
+
+
+def user_full_name(first_name, last_name):
+    """Same as User.get_full_name() for a values() row"""
+    return f"{first_name or ''} {last_name or ''}".strip()
+
+
+# ==================== WRITERS ====================
+
+class _Echo:
+    """File-like object that hands csv.writer output straight back"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(document):
+    """CSV lines for every sheet; sheets after the first get a title line"""
+    writer = csv.writer(_Echo())
+
+    # BOM for proper UTF-8 handling in Excel
+    yield '\ufeff'
+
+    for index, sheet in enumerate(document.sheets):
+        if index:
+            yield writer.writerow([])
+            yield writer.writerow([sheet.title])
+        yield writer.writerow(sheet.headers)
+        for row in sheet.rows:
+            yield writer.writerow(row)
+
+
+def _styled_cell(ws, value, style):
+    cell = WriteOnlyCell(ws, value=value)
+    for attribute, attribute_value in style.items():
+        setattr(cell, attribute, attribute_value)
+    return cell
+
+
+def _column_widths(headers, sample_rows, max_width):
+    widths = [len(str(header)) for header in headers]
+    for row in sample_rows:
+        for i, value in enumerate(row[:len(widths)]):
+            if value is not None:
+                widths[i] = max(widths[i], len(str(value)))
+    return [min(width + 2, max_width) for width in widths]
+
+
+def write_xlsx(document, fileobj):
+    """
+    Write the document with a write-only workbook.
+    Rows go to disk as they are appended, so memory stays flat.
+    """
+    wb = Workbook(write_only=True)
+
+    for sheet in document.sheets:
+        ws = wb.create_sheet(title=sheet.title[:31])
+
+        rows = iter(sheet.rows)
+        # Column widths must be set before the first row is written
+        sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+        for i, width in enumerate(_column_widths(sheet.headers, sample, sheet.max_width), 1):
+            ws.column_dimensions[get_column_letter(i)].width = width
+
+        for line in sheet.preamble:
+            if line is None:
+                ws.append([])
+            else:
+                value, font = line
+                ws.append([_styled_cell(ws, value, {'font': font})])
+
+        if sheet.header_style:
+            ws.append([_styled_cell(ws, header, sheet.header_style) for header in sheet.headers])
+        else:
+            ws.append(sheet.headers)
+
+        column_styles = sheet.column_styles
+        row_styler = sheet.row_styler
+
+        for row in chain(sample, rows):
+            if not column_styles and not row_styler:
+                ws.append(row)
+                continue
+
+            styles = dict(column_styles)
+            if row_styler:
+                for i, style in (row_styler(row) or {}).items():
+                    styles[i] = {**styles.get(i, {}), **style}
+
+            ws.append([
+                _styled_cell(ws, value, styles[i]) if i in styles else value
+                for i, value in enumerate(row)
+            ])
+
+    wb.save(fileobj)
+
+
+def write_csv(document, fileobj):
+    """Write the CSV export to a binary file object"""
+    for line in iter_csv(document):
+        fileobj.write(line.encode('utf-8'))
+
+
+# ==================== RESPONSES ====================
+
+def stream_csv_response(document):
+    response = StreamingHttpResponse(iter_csv(document), content_type=CSV_CONTENT_TYPE)
+    response['Content-Disposition'] = f'attachment; filename="{document.get_filename("csv")}"'
+    return response
+
+
+def xlsx_response(document):
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    write_xlsx(document, spool)
+    spool.seek(0)
+    return FileResponse(
+        spool,
+        as_attachment=True,
+        filename=document.get_filename('excel'),
+        content_type=XLSX_CONTENT_TYPE
+    )
+
+
+def export_response(document, export_format='excel'):
+    """CSV is streamed row by row, XLSX is spooled to a temp file first"""
+    if export_format == 'csv':
+        return stream_csv_response(document)
+    return xlsx_response(document)
+
+
+# ==================== BACKGROUND JOBS ====================
+
+def wants_background(request):
+    value = request.query_params.get('background')
+    if value is None and isinstance(request.data, dict):
+        value = request.data.get('background')
+    return str(value or '').lower() in ['true', '1', 'yes']
+
+
+def build_export(export_name, user, query_params, data=None):
+    if export_name not in EXPORT_BUILDERS:
+        raise ValueError(f"Unknown export: {export_name}")
+    builder = import_string(EXPORT_BUILDERS[export_name])
+    return builder(user, query_params, data or {})
+
+
+def start_background_export(request, export_name, export_format='excel', data=None):
+    """Queue the export and answer 202 with the task id to poll"""
+    from .tasks import generate_export_file
+
+    query_params = {key: values for key, values in request.query_params.lists()}
+    task = generate_export_file.delay(
+        export_name, request.user.id, query_params, data or {}, export_format
+    )
+
+    return Response({
+        'message': 'Export is running in the background.',
+        'task_id': task.id,
+        'status_url': reverse('export-job-status', args=[task.id]),
+        'download_url': reverse('export-job-download', args=[task.id])
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+def run_export_job(export_name, user_id, query_params, data=None, export_format='excel'):
+    """Build the export into default_storage and describe where it is"""
+    from django.contrib.auth.models import User
+
+    user = User.objects.get(id=user_id)
+
+    params = QueryDict(mutable=True)
+    for key, values in (query_params or {}).items():
+        params.setlist(key, values if isinstance(values, list) else [values])
+
+    document = build_export(export_name, user, params, data)
+    filename = document.get_filename(export_format)
+
+    with tempfile.TemporaryFile() as tmp:
+        if export_format == 'csv':
+            write_csv(document, tmp)
+        else:
+            write_xlsx(document, tmp)
+        tmp.seek(0)
+        file_path = default_storage.save(
+            f"{BACKGROUND_EXPORT_DIR}/{uuid.uuid4().hex}/{filename}", File(tmp)
+        )
+
+    return {
+        'file_path': file_path,
+        'filename': filename,
+        'user_id': user_id,
+        'export_name': export_name,
+    }
+
+
+def cleanup_export_files(max_age_hours=24):
+    """Delete background export files older than max_age_hours"""
+    cutoff = timezone.now() - timedelta(hours=max_age_hours)
+    deleted = 0
+
+    try:
+        job_dirs, _ = default_storage.listdir(BACKGROUND_EXPORT_DIR)
+    except (FileNotFoundError, NotImplementedError):
+        return 0
+
+    for job_dir in job_dirs:
+        dir_path = f"{BACKGROUND_EXPORT_DIR}/{job_dir}"
+        _, files = default_storage.listdir(dir_path)
+        for name in files:
+            path = f"{dir_path}/{name}"
+            try:
+                if default_storage.get_modified_time(path) < cutoff:
+                    default_storage.delete(path)
+                    deleted += 1
+            except Exception as e:
+                logger.warning(f"Could not delete export file {path}: {e}")
+
+    return deleted
+
+
+def _get_export_job(task_id, user):
+    """Finished job result owned by user, None while still running"""
+    from celery.result import AsyncResult
+
+    task = AsyncResult(task_id)
+    if task.state != 'SUCCESS':
+        return task, None
+
+    result = task.result or {}
+    if result.get('user_id') != user.id:
+        raise Http404('Export not found')
+    return task, result
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="State of a background export",
+    tags=['Exports'],
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_job_status(request, task_id):
+    """Background export state"""
+    task, result = _get_export_job(task_id, request.user)
+    response = {'task_id': task_id, 'state': task.state}
+
+    if result is not None:
+        if result.get('success'):
+            response['filename'] = result['filename']
+            response['download_url'] = reverse('export-job-download', args=[task_id])
+        else:
+            response['error'] = result.get('error')
+    elif task.state == 'FAILURE':
+        response['error'] = str(task.result)
+
+    return Response(response)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Download the file of a finished background export",
+    tags=['Exports'],
+    responses={200: openapi.Response(description='Export file')}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_job_download(request, task_id):
+    """Download a finished background export"""
+    task, result = _get_export_job(task_id, request.user)
+
+    if result is None or not result.get('success'):
+        return Response(
+            {'error': 'Export is not ready', 'state': task.state},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    if not default_storage.exists(result['file_path']):
+        return Response({'error': 'Export file has expired'}, status=status.HTTP_410_GONE)
+
+    filename = result['filename']
+    return FileResponse(
+        default_storage.open(result['file_path'], 'rb'),
+        as_attachment=True,
+        filename=filename,
+        content_type=DOWNLOAD_CONTENT_TYPES.get(os.path.splitext(filename)[1], XLSX_CONTENT_TYPE)
+    )
@@ -0,0 +1,171 @@
+# api/grade_tables.py - Compiled LetterGradeMapping / EvaluationScale lookup tables
+
+from bisect import bisect_right
+import logging
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Replaced by a new random token on every save/delete of LetterGradeMapping or
+# EvaluationScale. Tokens never repeat, so a key culled from the cache and
+# added again can not bring back a version some process compiled before.
+GRADE_TABLE_VERSION_KEY = 'grade_tables:version'
+
+# How often a process re-reads the shared version (seconds)
+VERSION_CHECK_INTERVAL = 5
+
+_tables = {}
+_tables_lock = threading.Lock()
+# Last version seen by this process and when it was read
+_version_state = {'version': None, 'checked_at': 0.0}
+
+
+def _shared_version():
+    now = time.monotonic()
+    if _version_state['version'] is not None and now - _version_state['checked_at'] < VERSION_CHECK_INTERVAL:
+        return _version_state['version']
+
+    try:
+        version = cache.get(GRADE_TABLE_VERSION_KEY)
+        if version is None:
+            # Missing or culled - every process rebuilds once and agrees on the first token added
+            cache.add(GRADE_TABLE_VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(GRADE_TABLE_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Grade table version unavailable: {e}")
+        version = _version_state['version']
+    if version is None:
+        version = uuid.uuid4().hex
+
+    _version_state['version'] = version
+    _version_state['checked_at'] = now
+    return version
+
+
+def invalidate_grade_tables():
+    """Drop compiled tables here and, through the shared version, in every other process"""
+    try:
+        cache.set(GRADE_TABLE_VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f"Could not invalidate grade tables: {e}")
+
+    with _tables_lock:
+        _tables.clear()
+    _version_state['version'] = None
+
+
+def _get_table(name, compile_table):
+    version = _shared_version()
+    cached = _tables.get(name)
+    if cached is None or cached[0] != version:
+        with _tables_lock:
+            cached = _tables.get(name)
+            if cached is None or cached[0] != version:
+                cached = (version, compile_table())
+                _tables[name] = cached
+    return cached[1]
+
+
+class LetterGradeTable:
+    """
+    Active LetterGradeMapping rows compiled to sorted boundaries.
+
+    Same answers as the old per-call queries:
+    - the grade whose range contains the percentage (highest minimum wins)
+    - above every range: grade with the highest maximum
+    - below every range: grade with the lowest minimum
+    - in a gap between ranges: 'N/A'
+    """
+
+    def __init__(self, grades):
+        # (min, max, letter) ordered by min ascending
+        self.grades = sorted(grades, key=lambda grade: grade[0])
+        self.mins = [grade[0] for grade in self.grades]
+        self.highest = max(self.grades, key=lambda grade: grade[1]) if self.grades else None
+        self.lowest = self.grades[0] if self.grades else None
+
+    @classmethod
+    def compile(cls):
+        from .competency_assessment_models import LetterGradeMapping
+
+        return cls(LetterGradeMapping.objects.filter(is_active=True).values_list(
+            'min_percentage', 'max_percentage', 'letter_grade'
+        ))
+
+    def grade_for(self, percentage):
+        try:
+            # Round percentage to 2 decimal places to avoid floating point issues
+            percentage = round(float(percentage), 2)
+        except (ValueError, TypeError):
+            return 'N/A'
+
+        # Ranges starting at or below the percentage, highest minimum first
+        index = bisect_right(self.mins, percentage)
+        for min_percentage, max_percentage, letter_grade in reversed(self.grades[:index]):
+            if percentage <= max_percentage:
+                return letter_grade
+
+        if self.highest and percentage > self.highest[1]:
+            return self.highest[2]
+        if self.lowest and percentage < self.lowest[0]:
+            return self.lowest[2]
+        return 'N/A'
+
+    def grades_for(self, percentages):
+        return [self.grade_for(percentage) for percentage in percentages]
+
+
+class EvaluationScaleTable:
+    """
+    Active EvaluationScale rows compiled to sorted boundaries.
+
+    Same answers as the old per-call queries:
+    - the scale whose range contains the percentage (lowest minimum wins)
+    - otherwise below 1%: scale with the lowest minimum
+    - otherwise: scale with the highest maximum
+    """
+
+    def __init__(self, scales):
+        # ordered by range_min ascending
+        self.scales = sorted(scales, key=lambda scale: scale.range_min)
+        self.mins = [scale.range_min for scale in self.scales]
+        self.highest = max(self.scales, key=lambda scale: scale.range_max) if self.scales else None
+        self.lowest = self.scales[0] if self.scales else None
+
+    @classmethod
+    def compile(cls):
+        from .performance_models import EvaluationScale
+
+        return cls(list(EvaluationScale.objects.filter(is_active=True)))
+
+    def rating_for(self, percentage):
+        try:
+            percentage = float(percentage)
+        except (ValueError, TypeError) as e:
+            logger.error(f"❌ Error getting rating for {percentage}%: {e}")
+            return None
+
+        index = bisect_right(self.mins, percentage)
+        for scale in self.scales[:index]:
+            if percentage <= scale.range_max:
+                return scale
+
+        # ✅ Fallback for edge cases
+        if percentage < 1:
+            return self.lowest
+        return self.highest
+
+    def ratings_for(self, percentages):
+        return [self.rating_for(percentage) for percentage in percentages]
+
+
+def get_letter_grade_table():
+    return _get_table('letter_grades', LetterGradeTable.compile)
+
+
+def get_evaluation_scale_table():
+    return _get_table('evaluation_scales', EvaluationScaleTable.compile)
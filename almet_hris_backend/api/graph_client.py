@@ -0,0 +1,346 @@
+# api/graph_client.py - Shared Microsoft Graph HTTP client
+
+"""
+One pooled, retrying client for every Microsoft Graph call.
+
+- Keep-alive connections are reused through a requests.Session / HTTPAdapter
+  instead of opening a new TLS connection per request.
+- 429 and transient 5xx responses are retried, honouring Retry-After.
+  Non-idempotent calls (POST sendMail, PATCH) are retried only when Graph
+  cannot have processed them: 429 or a failure to connect. A read timeout
+  or gateway 5xx may come after the mail was accepted.
+- Sleeping between retries is capped per call (RETRY_TIME_BUDGET), since
+  most calls run inside a web request.
+- batch() sends many requests through the JSON $batch endpoint, 20 per call,
+  so mass sends take a few round trips instead of one per recipient.
+
+The endpoint comes from settings.MICROSOFT_GRAPH_ENDPOINT (default: Graph v1.0),
+so the client can be pointed at a local stub server.
+"""
+
+import logging
+import threading
+import time
+from itertools import islice
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRAPH_ENDPOINT = "https://graph.microsoft.com/v1.0"
+
+# Graph accepts at most 20 requests per $batch call
+GRAPH_BATCH_LIMIT = 20
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (5, 30)
+
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1
+# Never sleep longer than this, whatever Retry-After says
+MAX_RETRY_AFTER = 30
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+# Safe to send twice
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+# Graph rejected the request without processing it
+NON_IDEMPOTENT_RETRY_STATUS_CODES = {429}
+
+# Seconds one call may spend sleeping between retries, in total
+RETRY_TIME_BUDGET = 20
+
+POOL_SIZE = 20
+
+
+def retry_status_codes(method):
+    """Status codes worth retrying for method"""
+    if (method or 'GET').upper() in IDEMPOTENT_METHODS:
+        return RETRY_STATUS_CODES
+    return NON_IDEMPOTENT_RETRY_STATUS_CODES
+
+
+def is_connect_error(error):
+    """The connection was never established, so the request was not sent"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.Timeout):
+        # Read timeout - Graph may already have processed the request
+        return False
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def get_graph_access_token(user):
+    """
+    Microsoft Graph access token stored for the user at login (UserGraphToken)
+
+    This is the Microsoft Graph token, NOT the JWT token!
+
+    Returns:
+        str: Graph access token or None
+    """
+    from .models import UserGraphToken
+
+    try:
+        token = UserGraphToken.get_valid_token(user)
+        if token:
+            logger.info(f"✅ Valid Graph token found for user {user.username}")
+            return token
+
+        logger.warning(f"⚠️ No valid Graph token found for user {user.username}")
+        return None
+    except Exception as e:
+        logger.error(f"❌ Error getting Graph token: {e}")
+        return None
+
+
+class GraphBatchResponse:
+    """One sub-response of a $batch call, shaped like the parts of requests.Response we use"""
+
+    def __init__(self, status_code, headers=None, body=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 300
+
+    @property
+    def text(self):
+        return str(self.body) if self.body is not None else ''
+
+    def json(self):
+        return self.body
+
+
+class GraphClient:
+    """Thin wrapper around a pooled requests.Session for Microsoft Graph"""
+
+    def __init__(self, base_url=None, max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS,
+                 timeout=DEFAULT_TIMEOUT, retry_time_budget=RETRY_TIME_BUDGET):
+        self._base_url = base_url
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.retry_time_budget = retry_time_budget
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return (
+            self._base_url
+            or getattr(settings, 'MICROSOFT_GRAPH_ENDPOINT', None)
+            or DEFAULT_GRAPH_ENDPOINT
+        ).rstrip('/')
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    def url(self, path):
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    @staticmethod
+    def headers(access_token, extra=None):
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        }
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def _retry_delay(self, attempt, headers=None):
+        retry_after = (headers or {}).get('Retry-After') or (headers or {}).get('retry-after')
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = self.backoff * (2 ** attempt)
+        return max(0, min(delay, MAX_RETRY_AFTER))
+
+    def request(self, method, path, access_token, params=None, json=None, headers=None, timeout=None):
+        """
+        Send one request, retrying throttled (429), transient 5xx and connection errors.
+        Non-idempotent methods are retried only on 429 and connect errors.
+        Returns the last requests.Response; raises if the last attempt failed to connect.
+        """
+        url = self.url(path)
+        request_headers = self.headers(access_token, headers)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        status_codes = retry_status_codes(method)
+        slept = 0
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.request(
+                    method, url,
+                    headers=request_headers,
+                    params=params,
+                    json=json,
+                    timeout=timeout or self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries or not (idempotent or is_connect_error(e)):
+                    raise
+                delay = self._retry_delay(attempt)
+                if slept + delay > self.retry_time_budget:
+                    raise
+                logger.warning(f"⚠️ Graph {method} {path} failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+                slept += delay
+                continue
+
+            if response.status_code not in status_codes or attempt >= self.max_retries:
+                return response
+
+            delay = self._retry_delay(attempt, response.headers)
+            if slept + delay > self.retry_time_budget:
+                return response
+            logger.warning(f"⚠️ Graph {method} {path} returned {response.status_code}, retrying in {delay}s")
+            time.sleep(delay)
+            slept += delay
+
+        return response
+
+    def get(self, path, access_token, **kwargs):
+        return self.request('GET', path, access_token, **kwargs)
+
+    def post(self, path, access_token, **kwargs):
+        return self.request('POST', path, access_token, **kwargs)
+
+    def patch(self, path, access_token, **kwargs):
+        return self.request('PATCH', path, access_token, **kwargs)
+
+    def delete(self, path, access_token, **kwargs):
+        return self.request('DELETE', path, access_token, **kwargs)
+
+    def batch(self, access_token, batch_requests):
+        """
+        Send requests through $batch, GRAPH_BATCH_LIMIT per call.
+
+        Args:
+            batch_requests: list of dicts with 'method', 'url' (relative to the
+                            Graph version root, e.g. '/me/sendMail') and optional 'body'
+
+        Returns:
+            list of GraphBatchResponse, in the same order as batch_requests
+        """
+        results = [None] * len(batch_requests)
+        pending = list(range(len(batch_requests)))
+        slept = 0
+
+        for attempt in range(self.max_retries + 1):
+            throttled = []
+            delay = 0
+
+            iterator = iter(pending)
+            while True:
+                chunk = list(islice(iterator, GRAPH_BATCH_LIMIT))
+                if not chunk:
+                    break
+
+                for index, sub_response in self._send_batch(access_token, batch_requests, chunk):
+                    results[index] = sub_response
+                    method = batch_requests[index].get('method', 'GET')
+                    if sub_response.status_code in retry_status_codes(method):
+                        throttled.append(index)
+                        delay = max(delay, self._retry_delay(attempt, sub_response.headers))
+
+            if not throttled or attempt >= self.max_retries or slept + delay > self.retry_time_budget:
+                break
+
+            logger.warning(f"⚠️ Graph $batch: {len(throttled)} requests throttled, retrying in {delay}s")
+            time.sleep(delay)
+            slept += delay
+            pending = throttled
+
+        return results
+
+    def _send_batch(self, access_token, batch_requests, indexes):
+        """One $batch call; yields (index, GraphBatchResponse)"""
+        payload = {'requests': []}
+        for index in indexes:
+            item = batch_requests[index]
+            sub_request = {
+                'id': str(index),
+                'method': item.get('method', 'GET'),
+                'url': item['url'],
+            }
+            if item.get('body') is not None:
+                sub_request['body'] = item['body']
+                sub_request['headers'] = {'Content-Type': 'application/json'}
+            payload['requests'].append(sub_request)
+
+        try:
+            response = self.post('/$batch', access_token, json=payload)
+        except requests.RequestException as e:
+            logger.error(f"❌ Graph $batch failed: {e}")
+            for index in indexes:
+                yield index, GraphBatchResponse(0, body={'error': str(e)})
+            return
+
+        if response.status_code != 200:
+            logger.error(f"❌ Graph $batch failed: {response.status_code} - {response.text}")
+            for index in indexes:
+                yield index, GraphBatchResponse(
+                    response.status_code, dict(response.headers), response.text
+                )
+            return
+
+        answered = set()
+        for sub_response in response.json().get('responses', []):
+            index = int(sub_response['id'])
+            answered.add(index)
+            yield index, GraphBatchResponse(
+                sub_response.get('status', 0),
+                sub_response.get('headers'),
+                sub_response.get('body')
+            )
+
+        for index in indexes:
+            if index not in answered:
+                yield index, GraphBatchResponse(0, body={'error': 'Missing from $batch response'})
+
+
+def build_mail_message(subject, body_html, recipients, sender_email=None):
+    """sendMail payload; recipients is an address or a list of addresses (all in TO)"""
+    if isinstance(recipients, str):
+        recipients = [recipients]
+
+    message = {
+        "message": {
+            "subject": subject,
+            "body": {
+                "contentType": "HTML",
+                "content": body_html
+            },
+            "toRecipients": [
+                {"emailAddress": {"address": email}}
+                for email in recipients
+            ]
+        },
+        "saveToSentItems": "true"
+    }
+    if sender_email:
+        message["message"]["from"] = {"emailAddress": {"address": sender_email}}
+    return message
+
+
+# Shared instance - one connection pool per process
+graph_client = GraphClient()
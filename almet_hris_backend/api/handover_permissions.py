@@ -2,6 +2,7 @@
 from rest_framework import permissions
 from django.db.models import Q
 from .models import Employee
+from .access_scope import get_access_scope
 
 
 def is_admin_user(user):
@@ -11,21 +12,7 @@ def is_admin_user(user):
         return True
     
     # Role-based admin check
-    try:
-        from .role_models import EmployeeRole
-        
-        employee = Employee.objects.get(user=user, is_deleted=False)
-        
-        has_admin_role = EmployeeRole.objects.filter(
-            employee=employee,
-            role__name__icontains='Admin',
-            role__is_active=True,
-            is_active=True
-        ).exists()
-        
-        return has_admin_role
-    except:
-        return False
+    return get_access_scope(user).is_admin
 
 
 def get_handover_access(user):
@@ -3,25 +3,11 @@ from functools import wraps
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Q
+from .access_scope import get_access_scope
 
 def is_admin_user(user):
     """Check if user has Admin role"""
-    try:
-        from .models import Employee
-        from .role_models import EmployeeRole
-        
-        employee = Employee.objects.get(user=user, is_deleted=False)
-        
-        has_admin_role = EmployeeRole.objects.filter(
-            employee=employee,
-            role__name__icontains='Admin',
-            role__is_active=True,
-            is_active=True
-        ).exists()
-        
-        return has_admin_role
-    except:
-        return False
+    return get_access_scope(user).is_admin
 
 def get_headcount_access(user):
     """
@@ -34,10 +20,10 @@ def get_headcount_access(user):
         'accessible_business_functions': list or None
     }
     """
-    from .models import Employee
+    scope = get_access_scope(user)
     
     # Admin - Full Access
-    if is_admin_user(user):
+    if scope.is_admin:
         return {
             'can_view_all': True,
             'is_manager': True,
@@ -46,9 +32,7 @@ def get_headcount_access(user):
             'accessible_business_functions': None  # None means ALL
         }
     
-    try:
-        employee = Employee.objects.get(user=user, is_deleted=False)
-    except Employee.DoesNotExist:
+    if not scope.has_employee:
         return {
             'can_view_all': False,
             'is_manager': False,
@@ -57,41 +41,23 @@ def get_headcount_access(user):
             'accessible_business_functions': []
         }
     
-    # Check if manager (has direct reports)
-    direct_reports = Employee.objects.filter(
-        line_manager=employee,
-        is_deleted=False
-    )
-    
-    is_manager = direct_reports.exists()
-    
-    if is_manager:
+    if scope.is_manager:
         # Manager can see: self + direct reports
-        accessible_ids = [employee.id]
-        accessible_ids.extend(list(direct_reports.values_list('id', flat=True)))
-        
-        # Get business functions of accessible employees
-        accessible_bfs = set()
-        accessible_bfs.add(employee.business_function_id)
-        accessible_bfs.update(
-            direct_reports.values_list('business_function_id', flat=True)
-        )
-        
         return {
             'can_view_all': False,
             'is_manager': True,
-            'employee': employee,
-            'accessible_employee_ids': accessible_ids,
-            'accessible_business_functions': list(accessible_bfs)
+            'employee': scope.employee,
+            'accessible_employee_ids': scope.team_employee_ids,
+            'accessible_business_functions': scope.team_business_function_ids
         }
     else:
         # Regular employee - NO ACCESS to headcount table
         return {
             'can_view_all': False,
             'is_manager': False,
-            'employee': employee,
-            'accessible_employee_ids': [employee.id],  # Only self
-            'accessible_business_functions': [employee.business_function_id] if employee.business_function else []
+            'employee': scope.employee,
+            'accessible_employee_ids': [scope.employee_id],  # Only self
+            'accessible_business_functions': [scope.business_function_id] if scope.business_function_id else []
         }
 
 def filter_headcount_queryset(user, queryset):
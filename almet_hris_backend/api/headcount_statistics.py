@@ -0,0 +1,215 @@
+# api/headcount_statistics.py - Employee statistics (EmployeeViewSet.statistics)
+
+"""
+Headcount statistics computed with one grouped query per breakdown
+(conditional aggregates instead of a count() per status / function / group)
+and cached as a snapshot per filter combination.
+
+Snapshots are dropped by replacing a version token whenever employees,
+vacancies or the lookup tables they are grouped by change; the timeout is a
+safety net. Tokens are random and never repeat, so a version key culled from
+the cache can not bring back snapshots stored under an old version.
+"""
+
+import hashlib
+import json
+import logging
+import uuid
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+logger = logging.getLogger(__name__)
+
+STATISTICS_VERSION_KEY = 'headcount_statistics:version'
+SNAPSHOT_TIMEOUT = 300  # 5 minutes - safety net on top of version invalidation
+
+# Query params read by ComprehensiveEmployeeFilter - the snapshot scope
+STATISTICS_FILTER_PARAMS = (
+    'business_function', 'department', 'unit', 'job_function',
+    'position_group', 'status', 'search',
+)
+
+RECENT_HIRE_DAYS = 30
+
+
+def get_statistics_version():
+    version = cache.get(STATISTICS_VERSION_KEY)
+    if version is None:
+        token = uuid.uuid4().hex
+        cache.add(STATISTICS_VERSION_KEY, token, None)
+        version = cache.get(STATISTICS_VERSION_KEY) or token
+    return version
+
+
+def invalidate_headcount_statistics():
+    """Drop every cached statistics snapshot"""
+    try:
+        cache.set(STATISTICS_VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f"Could not invalidate headcount statistics cache: {e}")
+
+
+def _filter_scope(params):
+    scope = {}
+    for name in STATISTICS_FILTER_PARAMS:
+        values = params.getlist(name) if hasattr(params, 'getlist') else [params.get(name)]
+        values = sorted(str(value) for value in values if value not in (None, ''))
+        if values:
+            scope[name] = values
+    return scope
+
+
+def snapshot_key(params, today=None):
+    scope = json.dumps(_filter_scope(params), sort_keys=True)
+    digest = hashlib.md5(scope.encode('utf-8')).hexdigest()
+    # Date is part of the key - recent hires and status transitions move with it
+    today = today or date.today()
+    return f'headcount_statistics:v{get_statistics_version()}:{today.isoformat()}:{digest}'
+
+
+def _contract_display_names():
+    from .models import ContractTypeConfig
+
+    return dict(
+        ContractTypeConfig.objects.filter(is_active=True).values_list('contract_type', 'display_name')
+    )
+
+
+def _status_update_analysis():
+    """Pending automatic status transitions of all employees (not filtered)"""
+    try:
+        from .status_management import BulkStatusEngine
+
+        transitions = BulkStatusEngine().count_transitions()
+        return {
+            'employees_needing_updates': sum(transitions.values()),
+            'status_transitions': transitions
+        }
+    except Exception as e:
+        return {
+            'employees_needing_updates': 0,
+            'status_transitions': {},
+            'error': str(e)
+        }
+
+
+def compute_statistics(queryset, today=None):
+    """Statistics of the (already filtered) employee queryset"""
+    from .models import EmployeeStatus, BusinessFunction, PositionGroup, VacantPosition
+
+    today = today or date.today()
+    queryset = queryset.order_by()
+    active = Q(status__affects_headcount=True)
+    recent = Q(start_date__gte=today - timedelta(days=RECENT_HIRE_DAYS))
+
+    totals = queryset.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=active),
+        recent=Count('id', filter=recent)
+    )
+
+    # By status
+    status_counts = dict(queryset.values_list('status_id').annotate(count=Count('id')))
+    status_stats = {}
+    for emp_status in EmployeeStatus.objects.filter(is_active=True):
+        count = status_counts.get(emp_status.id, 0)
+        if count > 0:
+            status_stats[emp_status.name] = {
+                'count': count,
+                'color': emp_status.color,
+                'affects_headcount': emp_status.affects_headcount
+            }
+
+    # By business function with ALL info
+    function_counts = {
+        row['business_function_id']: row
+        for row in queryset.values('business_function_id').annotate(
+            count=Count('id'),
+            active=Count('id', filter=active),
+            recent_hires=Count('id', filter=recent)
+        )
+    }
+
+    # Vacant positions by business function
+    vacant_positions = VacantPosition.objects.filter(
+        is_filled=False,
+        is_deleted=False,
+        include_in_headcount=True
+    ).order_by()
+    vacant_counts = dict(vacant_positions.values_list('business_function_id').annotate(count=Count('id')))
+
+    function_stats = {}
+    vacant_by_function = {}
+    for func_id, func_name in BusinessFunction.objects.filter(is_active=True).values_list('id', 'name'):
+        row = function_counts.get(func_id, {})
+        function_stats[func_name] = {
+            'count': row.get('count', 0),
+            'active': row.get('active', 0),
+            'recent_hires': row.get('recent_hires', 0)
+        }
+        vacant_by_function[func_name] = vacant_counts.get(func_id, 0)
+
+    # By position group
+    position_counts = dict(queryset.values_list('position_group_id').annotate(count=Count('id')))
+    position_stats = {}
+    for pos in PositionGroup.objects.filter(is_active=True):
+        count = position_counts.get(pos.id, 0)
+        if count > 0:
+            position_stats[pos.get_name_display()] = count
+
+    # Contract duration statistics
+    contract_stats = {}
+    try:
+        display_names = _contract_display_names()
+        for contract_type, count in queryset.values_list('contract_duration').annotate(count=Count('id')):
+            if contract_type and count > 0:
+                if contract_type in display_names:
+                    display_name = display_names[contract_type]
+                else:
+                    display_name = contract_type.replace('_', ' ').title()
+                contract_stats[display_name] = count
+    except Exception as e:
+        logger.error(f"Error calculating contract statistics: {e}")
+        contract_stats = {}
+
+    return {
+        'total_employees': totals['total'],
+        'active_employees': totals['active'],
+        'inactive_employees': totals['total'] - totals['active'],
+        'total_vacant_positions': sum(vacant_counts.values()),
+        'by_status': status_stats,
+        'by_business_function': function_stats,
+        'vacant_positions_by_business_function': vacant_by_function,
+        'by_position_group': position_stats,
+        'by_contract_duration': contract_stats,
+        'recent_hires_30_days': totals['recent'],
+        'status_update_analysis': _status_update_analysis()
+    }
+
+
+def get_headcount_statistics(queryset, params, filter_class):
+    """
+    Cached statistics for params. filter_class(queryset, params).filter() is
+    only evaluated on a cache miss.
+    """
+    today = date.today()
+
+    cache_key = None
+    try:
+        cache_key = snapshot_key(params, today)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+    except Exception as e:
+        logger.warning(f"Headcount statistics cache unavailable: {e}")
+
+    data = compute_statistics(filter_class(queryset, params).filter(), today)
+
+    if cache_key:
+        try:
+            cache.set(cache_key, data, SNAPSHOT_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Could not cache headcount statistics: {e}")
+    return data
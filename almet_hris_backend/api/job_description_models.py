@@ -556,6 +556,9 @@ class JobDescription(models.Model):
     version = models.PositiveIntegerField(default=1)
     is_active = models.BooleanField(default=True)
     
+    # Lowercased search text, maintained by api/search_index.py
+    search_document = models.TextField(default='', blank=True, editable=False)
+    
     class Meta:
         db_table = 'job_descriptions'
         verbose_name = 'Job Description'
@@ -0,0 +1,509 @@
+# api/job_description_pdf.py - Job description PDF rendering with an on-disk cache
+
+"""
+Job description PDFs are rendered in two steps:
+
+1. collect_pdf_content() reads everything the document shows into plain data.
+2. render_pdf() lays that data out with ReportLab.
+
+Rendered files are kept in default_storage under a hash of the collected content,
+so a JD is only laid out again when something it shows changes: the JD itself,
+its sections, skills, assignments or approvals. Styles and table styles are
+built once per process.
+"""
+
+from datetime import datetime
+import hashlib
+import json
+import logging
+import tempfile
+import uuid
+import zipfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    HAS_REPORTLAB = True
+except ImportError:
+    HAS_REPORTLAB = False
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_DIR = 'job_description_pdfs'
+
+# Bump when the layout below changes, so cached files are rendered again
+PDF_LAYOUT_VERSION = 2
+
+
+def _build_styles():
+    styles = getSampleStyleSheet()
+
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            textColor=colors.HexColor('#1e3a8a'),
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        'heading2': ParagraphStyle(
+            'CustomHeading2',
+            parent=styles['Heading2'],
+            fontSize=14,
+            textColor=colors.HexColor('#1e40af'),
+            spaceAfter=12,
+            spaceBefore=20,
+            fontName='Helvetica-Bold',
+            borderWidth=1,
+            borderColor=colors.HexColor('#93c5fd'),
+            borderPadding=5,
+            backColor=colors.HexColor('#eff6ff')
+        ),
+        'heading3': ParagraphStyle(
+            'CustomHeading3',
+            parent=styles['Heading3'],
+            fontSize=12,
+            textColor=colors.HexColor('#1e40af'),
+            spaceAfter=8,
+            spaceBefore=12,
+            fontName='Helvetica-Bold'
+        ),
+        'body': ParagraphStyle(
+            'CustomBody',
+            parent=styles['Normal'],
+            fontSize=10,
+            leading=14,
+            alignment=TA_JUSTIFY,
+            spaceAfter=6
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.HexColor('#6b7280'),
+            alignment=TA_CENTER
+        ),
+        'basic_table': TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#374151')),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d1d5db')),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]),
+        'assignment_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d1d5db')),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # TOP alignment for better text wrapping
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ]),
+    }
+
+
+# ✅ Built once at import, shared by every render
+PDF_STYLES = _build_styles() if HAS_REPORTLAB else {}
+
+
+# ==================== CONTENT ====================
+
+def _group_names(rows):
+    """[(group name, name)] -> {group name: [names]} keeping first-seen order"""
+    grouped = {}
+    for group_name, name in rows:
+        grouped.setdefault(group_name, []).append(name)
+    return grouped
+
+
+def _item_lines(links, relation):
+    """[(name, [item names])] for business resources / access rights"""
+    return [
+        (getattr(link, relation).name, [item.name for item in link.specific_items.all()])
+        for link in links
+    ]
+
+
+def collect_pdf_content(job_description):
+    """Everything the PDF shows, as plain JSON-serializable data"""
+    assignments = list(
+        job_description.assignments.filter(is_active=True).select_related(
+            'employee', 'reports_to', 'vacancy_position'
+        )
+    )
+
+    return {
+        'layout': PDF_LAYOUT_VERSION,
+        'id': str(job_description.pk),
+        'basic_info': [
+            ['Job Title:', job_description.job_title],
+            ['Business Function:', job_description.business_function.name],
+            ['Department:', job_description.department.name],
+            ['Unit:', job_description.unit.name if job_description.unit else 'N/A'],
+            ['Job Function:', job_description.job_function.name],
+            ['Position Group:', job_description.position_group.name],
+            ['Grading Levels:', ', '.join(job_description.grading_levels)],
+            ['Version:', str(job_description.version)],
+            ['Created:', job_description.created_at.strftime('%d %B %Y')],
+        ],
+        'job_title': job_description.job_title,
+        'version': job_description.version,
+        'job_purpose': job_description.job_purpose,
+        'assignments': [
+            {
+                'name': assignment.get_display_name(),
+                'type': 'Employee' if not assignment.is_vacancy else 'Vacant',
+                'status': assignment.get_status_display(),
+                'reports_to': assignment.reports_to.full_name if assignment.reports_to else 'N/A',
+            }
+            for assignment in assignments
+        ],
+        'sections': [
+            [section.title.upper(), section.content]
+            for section in job_description.sections.all().order_by('order')
+        ],
+        'skills': _group_names(
+            (jd_skill.skill.group.name if jd_skill.skill.group else 'Other', jd_skill.skill.name)
+            for jd_skill in job_description.required_skills.select_related('skill', 'skill__group')
+        ),
+        'competencies': _group_names(
+            (jd_comp.competency.group.name if jd_comp.competency.group else 'Other', jd_comp.competency.name)
+            for jd_comp in job_description.behavioral_competencies.select_related(
+                'competency', 'competency__group'
+            )
+        ),
+        'business_resources': _item_lines(
+            job_description.business_resources.select_related('resource').prefetch_related('specific_items'),
+            'resource'
+        ),
+        'access_rights': _item_lines(
+            job_description.access_rights.select_related('access_matrix').prefetch_related('specific_items'),
+            'access_matrix'
+        ),
+        'benefits': [
+            (
+                jd_benefit.benefit.name,
+                [
+                    [item.name, item.value, item.description]
+                    for item in jd_benefit.specific_items.all()
+                ]
+            )
+            for jd_benefit in job_description.company_benefits.select_related(
+                'benefit'
+            ).prefetch_related('specific_items')
+        ],
+        'approvals': [
+            {
+                'name': assignment.get_display_name(),
+                'line_manager': assignment.reports_to.full_name if assignment.reports_to else 'N/A',
+                'line_manager_approved_at': (
+                    assignment.line_manager_approved_at.strftime('%d %B %Y, %H:%M')
+                    if assignment.line_manager_approved_at else None
+                ),
+                'line_manager_comments': assignment.line_manager_comments,
+                'employee': (
+                    assignment.employee.full_name
+                    if assignment.employee_approved_at and not assignment.is_vacancy else None
+                ),
+                'employee_approved_at': (
+                    assignment.employee_approved_at.strftime('%d %B %Y, %H:%M')
+                    if assignment.employee_approved_at else None
+                ),
+                'employee_comments': assignment.employee_comments,
+            }
+            for assignment in assignments
+            if assignment.status == 'APPROVED'
+        ],
+    }
+
+
+def content_hash(content):
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()[:32]
+
+
+# ==================== RENDERING ====================
+
+def render_pdf(content, fileobj):
+    """Lay out collected content as a PDF into fileobj"""
+    title_style = PDF_STYLES['title']
+    heading2_style = PDF_STYLES['heading2']
+    heading3_style = PDF_STYLES['heading3']
+    body_style = PDF_STYLES['body']
+
+    # Create PDF document with margins
+    doc = SimpleDocTemplate(
+        fileobj,
+        pagesize=A4,
+        topMargin=2*cm,
+        bottomMargin=2*cm,
+        leftMargin=2*cm,
+        rightMargin=2*cm
+    )
+
+    story = []
+
+    # ============================================
+    # HEADER SECTION
+    # ============================================
+    story.append(Paragraph("JOB DESCRIPTION", title_style))
+    story.append(Spacer(1, 0.3*cm))
+
+    basic_table = Table(content['basic_info'], colWidths=[4*cm, 13*cm])
+    basic_table.setStyle(PDF_STYLES['basic_table'])
+    story.append(basic_table)
+    story.append(Spacer(1, 0.5*cm))
+
+    # ============================================
+    # ASSIGNMENTS SECTION
+    # ============================================
+    if content['assignments']:
+        story.append(Paragraph("ASSIGNED EMPLOYEES & POSITIONS", heading2_style))
+
+        assignment_data = [['Name', 'Type', 'Status', 'Reports To']]
+        for assignment in content['assignments']:
+            # Wrap text in Paragraph for better text handling
+            assignment_data.append([
+                Paragraph(assignment['name'], body_style),
+                assignment['type'],
+                Paragraph(assignment['status'], body_style),
+                Paragraph(assignment['reports_to'], body_style)
+            ])
+
+        # Better column widths - total = 17cm (fits in A4 with margins)
+        assignment_table = Table(assignment_data, colWidths=[5.5*cm, 2.5*cm, 4.5*cm, 4.5*cm])
+        assignment_table.setStyle(PDF_STYLES['assignment_table'])
+        story.append(assignment_table)
+        story.append(Spacer(1, 0.5*cm))
+
+    # ============================================
+    # JOB PURPOSE
+    # ============================================
+    story.append(Paragraph("JOB PURPOSE", heading2_style))
+    story.append(Paragraph(content['job_purpose'], body_style))
+    story.append(Spacer(1, 0.3*cm))
+
+    # ============================================
+    # SECTIONS (Critical Duties, KPIs, etc.)
+    # ============================================
+    for title, section_content in content['sections']:
+        story.append(Paragraph(title, heading2_style))
+        story.append(Paragraph(section_content, body_style))
+        story.append(Spacer(1, 0.3*cm))
+
+    # ============================================
+    # REQUIRED SKILLS / BEHAVIORAL COMPETENCIES
+    # ============================================
+    for heading, grouped in (
+        ("REQUIRED SKILLS", content['skills']),
+        ("BEHAVIORAL COMPETENCIES", content['competencies']),
+    ):
+        if not grouped:
+            continue
+
+        story.append(Paragraph(heading, heading2_style))
+        for group_name, names in grouped.items():
+            story.append(Paragraph(f"<b>{group_name}:</b>", heading3_style))
+            for name in names:
+                story.append(Paragraph(f"• {name}", body_style))
+        story.append(Spacer(1, 0.3*cm))
+
+    # ============================================
+    # BUSINESS RESOURCES / ACCESS RIGHTS
+    # ============================================
+    for heading, lines in (
+        ("BUSINESS RESOURCES", content['business_resources']),
+        ("ACCESS RIGHTS & PERMISSIONS", content['access_rights']),
+    ):
+        if not lines:
+            continue
+
+        story.append(Paragraph(heading, heading2_style))
+        for name, items in lines:
+            items_text = ', '.join(items) if items else 'All items'
+            story.append(Paragraph(f"<b>{name}:</b> {items_text}", body_style))
+        story.append(Spacer(1, 0.3*cm))
+
+    # ============================================
+    # COMPANY BENEFITS
+    # ============================================
+    if content['benefits']:
+        story.append(Paragraph("COMPANY BENEFITS", heading2_style))
+
+        for benefit_name, items in content['benefits']:
+            if items:
+                for item_name, value, description in items:
+                    value_text = f" ({value})" if value else ""
+                    story.append(Paragraph(
+                        f"<b>{benefit_name} - {item_name}:</b>{value_text} {description}",
+                        body_style
+                    ))
+            else:
+                story.append(Paragraph(f"<b>{benefit_name}:</b> Standard package", body_style))
+
+        story.append(Spacer(1, 0.3*cm))
+
+    # ============================================
+    # APPROVAL SIGNATURES (if any approved)
+    # ============================================
+    if content['approvals']:
+        story.append(PageBreak())
+        story.append(Paragraph("APPROVAL SIGNATURES", heading2_style))
+
+        for approval in content['approvals']:
+            story.append(Paragraph(f"<b>Position:</b> {approval['name']}", heading3_style))
+
+            if approval['line_manager_approved_at']:
+                story.append(Paragraph(f"<b>Line Manager:</b> {approval['line_manager']}", body_style))
+                story.append(Paragraph(f"<b>Approved:</b> {approval['line_manager_approved_at']}", body_style))
+                if approval['line_manager_comments']:
+                    story.append(Paragraph(f"<b>Comments:</b> {approval['line_manager_comments']}", body_style))
+
+            if approval['employee']:
+                story.append(Paragraph(f"<b>Employee:</b> {approval['employee']}", body_style))
+                story.append(Paragraph(f"<b>Approved:</b> {approval['employee_approved_at']}", body_style))
+                if approval['employee_comments']:
+                    story.append(Paragraph(f"<b>Comments:</b> {approval['employee_comments']}", body_style))
+
+            story.append(Spacer(1, 0.5*cm))
+
+    # ============================================
+    # FOOTER
+    # ============================================
+    # Only collected content goes into the file - it is cached under the content hash
+    story.append(Spacer(1, 1*cm))
+    story.append(Paragraph(f"Version {content['version']}", PDF_STYLES['footer']))
+
+    doc.build(story)
+
+
+def pdf_filename(job_description):
+    return f"JobDescription_{job_description.job_title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+
+
+def get_job_description_pdf(job_description):
+    """
+    Storage path of the JD's PDF - rendered only when its content changed
+    since the last render. Renders of older content of the same JD are removed.
+    """
+    content = collect_pdf_content(job_description)
+    directory = f"{PDF_CACHE_DIR}/{job_description.pk}"
+    current_name = f"{content_hash(content)}.pdf"
+    path = f"{directory}/{current_name}"
+
+    if default_storage.exists(path):
+        return path
+
+    with tempfile.TemporaryFile() as tmp:
+        render_pdf(content, tmp)
+        tmp.seek(0)
+        saved_path = default_storage.save(path, File(tmp))
+
+    if saved_path != path:
+        # Same content rendered concurrently - storage kept both under different names
+        default_storage.delete(saved_path)
+
+    try:
+        _, files = default_storage.listdir(directory)
+        for name in files:
+            if name != current_name:
+                default_storage.delete(f"{directory}/{name}")
+    except (FileNotFoundError, NotImplementedError):
+        pass
+    except Exception as e:
+        logger.warning(f"Could not clean old PDFs of job description {job_description.pk}: {e}")
+
+    logger.info(f"✅ Rendered PDF for job description {job_description.pk}")
+    return path
+
+
+def open_job_description_pdf(job_description):
+    """Open the JD's PDF - a file removed by a concurrent render is a cache miss"""
+    try:
+        return default_storage.open(get_job_description_pdf(job_description), 'rb')
+    except FileNotFoundError:
+        return default_storage.open(get_job_description_pdf(job_description), 'rb')
+
+
+# ==================== BULK ====================
+
+def approved_job_descriptions(user):
+    """Job descriptions with an active approved assignment, limited to what user can see"""
+    from .job_description_models import JobDescription
+    from .job_description_permissions import filter_job_description_queryset
+
+    queryset = JobDescription.objects.filter(
+        assignments__is_active=True,
+        assignments__status='APPROVED'
+    ).distinct().select_related(
+        'business_function', 'department', 'unit', 'job_function', 'position_group'
+    )
+    return filter_job_description_queryset(user, queryset)
+
+
+def run_pdf_zip_job(user_id):
+    """Render (or reuse) every approved JD's PDF and pack them into one ZIP in default_storage"""
+    from django.contrib.auth.models import User
+    from .export_service import BACKGROUND_EXPORT_DIR
+
+    user = User.objects.get(id=user_id)
+    filename = f"JobDescriptions_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
+    rendered, failed = 0, []
+
+    with tempfile.TemporaryFile() as tmp:
+        with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED) as archive:
+            used_names = set()
+            for job_description in approved_job_descriptions(user).order_by('job_title').iterator(chunk_size=100):
+                try:
+                    pdf = open_job_description_pdf(job_description)
+                except Exception as e:
+                    logger.error(f"❌ PDF render failed for job description {job_description.pk}: {e}")
+                    failed.append(str(job_description.pk))
+                    continue
+
+                name = f"{job_description.job_title.replace(' ', '_').replace('/', '_')}.pdf"
+                if name in used_names:
+                    name = f"{name[:-4]}_{str(job_description.pk)[:8]}.pdf"
+                used_names.add(name)
+
+                with pdf:
+                    archive.writestr(name, pdf.read())
+                rendered += 1
+
+        tmp.seek(0)
+        file_path = default_storage.save(
+            f"{BACKGROUND_EXPORT_DIR}/{uuid.uuid4().hex}/{filename}", File(tmp)
+        )
+
+    return {
+        'file_path': file_path,
+        'filename': filename,
+        'user_id': user_id,
+        'export_name': 'job_description_pdfs',
+        'rendered': rendered,
+        'failed': failed,
+    }
@@ -3,25 +3,11 @@ from functools import wraps
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Q
+from .access_scope import get_access_scope
 
 def is_admin_user(user):
     """Check if user has Admin role"""
-    try:
-        from .models import Employee
-        from .role_models import EmployeeRole
-        
-        employee = Employee.objects.get(user=user, is_deleted=False)
-        
-        has_admin_role = EmployeeRole.objects.filter(
-            employee=employee,
-            role__name__icontains='Admin',
-            role__is_active=True,
-            is_active=True
-        ).exists()
-        
-        return has_admin_role
-    except:
-        return False
+    return get_access_scope(user).is_admin
 
 def get_job_description_access(user):
 
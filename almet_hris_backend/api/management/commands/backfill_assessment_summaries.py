@@ -0,0 +1,39 @@
+# api/management/commands/backfill_assessment_summaries.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.assessment_summary import backfill_assessment_summaries
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Build EmployeeAssessmentSummary rows from existing core / behavioral / leadership assessments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            choices=['CORE', 'BEHAVIORAL', 'LEADERSHIP'],
+            action='append',
+            dest='assessment_types',
+            help='Only this assessment type (repeatable, default: all)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(self.style.SUCCESS(f'🔄 ASSESSMENT SUMMARY BACKFILL'))
+        self.stdout.write(self.style.SUCCESS(f'⏰ Started at: {timezone.now()}'))
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+
+        totals = backfill_assessment_summaries(
+            options.get('assessment_types'),
+            progress_callback=lambda assessment_type, done, total: self.stdout.write(
+                f"   {assessment_type}: {done}/{total} employees"
+            )
+        )
+
+        for assessment_type, built in totals.items():
+            self.stdout.write(self.style.SUCCESS(f"✅ {assessment_type}: {built} summary rows"))
+
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(self.style.SUCCESS(f'✅ Command completed at: {timezone.now()}'))
+        self.stdout.write(self.style.SUCCESS('=' * 80))
@@ -0,0 +1,26 @@
+# api/management/commands/rebuild_search_documents.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.search_index import rebuild_search_documents
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Rebuild employee / vacancy / job description search documents'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(self.style.SUCCESS(f'🔄 SEARCH DOCUMENT REBUILD'))
+        self.stdout.write(self.style.SUCCESS(f'⏰ Started at: {timezone.now()}'))
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+
+        rebuild_search_documents(
+            progress_callback=lambda label, changed: self.stdout.write(
+                self.style.SUCCESS(f"✅ {label}: {changed} documents updated")
+            )
+        )
+
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(self.style.SUCCESS(f'✅ Command completed at: {timezone.now()}'))
+        self.stdout.write(self.style.SUCCESS('=' * 80))
@@ -0,0 +1,68 @@
+# api/management/commands/recalculate_scores.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.score_recalculation import (
+    RECALCULATORS, get_target_ids, recalculate_all, start_recalculation_job
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recalculate performance / competency assessment scores in bulk (e.g. after changing grade scales or weights)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=list(RECALCULATORS) + ['all'],
+            default='all',
+            help='What to recalculate (default: all)',
+        )
+        parser.add_argument(
+            '--year',
+            type=int,
+            help='Performance year / assessment date year (default: every year)',
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Queue Celery chunk tasks instead of running in this process',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(self.style.SUCCESS(f'🔄 SCORE RECALCULATION COMMAND'))
+        self.stdout.write(self.style.SUCCESS(f'⏰ Started at: {timezone.now()}'))
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+
+        kinds = list(RECALCULATORS) if options['kind'] == 'all' else [options['kind']]
+        year = options.get('year')
+
+        for kind in kinds:
+            if options['run_async']:
+                job = start_recalculation_job(kind, year=year)
+                self.stdout.write(
+                    f"📤 {kind}: {job['total']} queued in {job['chunks']} chunks (job {job['job_id']})"
+                )
+                continue
+
+            ids = get_target_ids(kind, year=year)
+            self.stdout.write(f"\n📌 {kind}: {len(ids)} to recalculate")
+
+            try:
+                result = recalculate_all(
+                    kind, ids,
+                    progress_callback=lambda done, total: self.stdout.write(f"   {done}/{total}")
+                )
+            except Exception as e:
+                logger.error(f"Score recalculation failed for {kind}: {e}")
+                raise CommandError(f"{kind}: {e}")
+
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {kind}: {result['updated']} updated, {result['skipped']} skipped"
+            ))
+
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(self.style.SUCCESS(f'✅ Command completed at: {timezone.now()}'))
+        self.stdout.write(self.style.SUCCESS('=' * 80))
@@ -0,0 +1,49 @@
+# api/management/commands/reconcile_balances.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.balance_ledger import reconcile_balances
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Compare time off / vacation balances with their ledger and (with --apply) rewrite them from it'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--apply',
+            action='store_true',
+            help='Rewrite mismatched balances from the ledger (default: dry run)',
+        )
+
+    def handle(self, *args, **options):
+        apply = options.get('apply', False)
+
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(self.style.SUCCESS(f'🔄 BALANCE LEDGER RECONCILIATION'))
+        self.stdout.write(self.style.SUCCESS(f'⏰ Started at: {timezone.now()}'))
+        if not apply:
+            self.stdout.write(self.style.WARNING('🔍 DRY RUN - use --apply to fix balances'))
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+
+        results = reconcile_balances(apply=apply)
+
+        for ledger, result in results.items():
+            mismatched = result['mismatched']
+            for entry in mismatched:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️ {ledger} balance {entry['balance_id']}: "
+                    f"stored {entry['stored']} → ledger {entry['ledger']}"
+                ))
+            if result['missing_opening']:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️ {ledger}: {result['missing_opening']} balances without ledger movements"
+                ))
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {ledger}: {len(mismatched)} mismatched"
+                f"{' (fixed)' if apply and mismatched else ''}"
+            ))
+
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(self.style.SUCCESS(f'✅ Command completed at: {timezone.now()}'))
+        self.stdout.write(self.style.SUCCESS('=' * 80))
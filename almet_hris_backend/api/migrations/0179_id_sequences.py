@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-16 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0178_trainingrequest_approved_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(help_text='Business function code', max_length=20)),
+                ('kind', models.CharField(choices=[('EMPLOYEE', 'Employee ID'), ('POSITION', 'Vacant Position ID')], max_length=10)),
+                ('last_value', models.PositiveIntegerField(default=0, help_text='Last allocated number')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'ID Sequence',
+                'verbose_name_plural': 'ID Sequences',
+                'db_table': 'id_sequences',
+                'unique_together': {('prefix', 'kind')},
+            },
+        ),
+    ]
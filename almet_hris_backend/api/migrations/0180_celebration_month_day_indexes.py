@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-16 19:00
+
+import django.db.models.expressions
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0179_id_sequences'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='celebrationwish',
+            index=models.Index(fields=['employee', 'celebration_type'], name='api_celebra_employe_6567f4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.functions.datetime.ExtractMonth('date_of_birth'), '*', models.Value(100)), '+', django.db.models.functions.datetime.ExtractDay('date_of_birth')), name='employee_birth_md_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.functions.datetime.ExtractMonth('start_date'), '*', models.Value(100)), '+', django.db.models.functions.datetime.ExtractDay('start_date')), name='employee_start_md_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-16 19:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0180_celebration_month_day_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerformanceDashboardSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('objectives_completed', models.IntegerField(default=0)),
+                ('mid_year_completed', models.IntegerField(default=0)),
+                ('end_year_completed', models.IntegerField(default=0)),
+                ('end_year_approved', models.IntegerField(default=0)),
+                ('pending_employee_approval', models.IntegerField(default=0)),
+                ('pending_manager_approval', models.IntegerField(default=0)),
+                ('need_clarification', models.IntegerField(default=0)),
+                ('graded_total', models.IntegerField(default=0)),
+                ('grade_counts', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='performance_dashboard_summaries', to='api.department')),
+                ('performance_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_summaries', to='api.performanceyear')),
+            ],
+            options={
+                'db_table': 'performance_dashboard_summaries',
+                'unique_together': {('performance_year', 'department')},
+            },
+        ),
+    ]
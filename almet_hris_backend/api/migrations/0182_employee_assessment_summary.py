@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-16 19:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0181_performance_dashboard_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeAssessmentSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assessment_type', models.CharField(choices=[('CORE', 'Core'), ('BEHAVIORAL', 'Behavioral'), ('LEADERSHIP', 'Leadership')], max_length=20)),
+                ('total_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('latest_assessment_id', models.UUIDField(blank=True, null=True)),
+                ('latest_status', models.CharField(blank=True, max_length=20)),
+                ('latest_percentage', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('latest_letter_grade', models.CharField(blank=True, max_length=10)),
+                ('latest_assessment_date', models.DateTimeField(blank=True, null=True)),
+                ('best_assessment_id', models.UUIDField(blank=True, null=True)),
+                ('best_percentage', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('best_letter_grade', models.CharField(blank=True, max_length=10)),
+                ('best_assessment_date', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assessment_summaries', to='api.employee')),
+            ],
+            options={
+                'db_table': 'employee_assessment_summaries',
+                'indexes': [models.Index(fields=['assessment_type', '-best_percentage'], name='assess_summary_best_idx')],
+                'unique_together': {('employee', 'assessment_type')},
+            },
+        ),
+    ]
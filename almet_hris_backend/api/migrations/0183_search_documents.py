@@ -0,0 +1,94 @@
+# Generated by Django 5.2.1 on 2026-10-16 19:31
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# table -> index name (pg_trgm GIN, PostgreSQL only - SQLite searches by scan)
+TRIGRAM_INDEXES = {
+    'api_employee': 'employee_search_trgm_idx',
+    'api_vacantposition': 'vacancy_search_trgm_idx',
+    'job_descriptions': 'job_description_search_trgm_idx',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, index_name in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin (search_document gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name in TRIGRAM_INDEXES.values():
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+# Fields copied into search_document when this migration ran (frozen here -
+# later changes to api.search_index must not change what this migration does)
+DOCUMENT_FIELDS = {
+    'Employee': (
+        'full_name', 'employee_id', 'father_name', 'job_title', 'phone', 'user__email',
+        'business_function__name', 'department__name', 'unit__name', 'job_function__name',
+    ),
+    'VacantPosition': (
+        'position_id', 'job_title', 'notes',
+        'business_function__name', 'department__name', 'unit__name', 'job_function__name',
+    ),
+    'JobDescription': (
+        'job_title', 'job_purpose',
+        'business_function__name', 'department__name', 'unit__name', 'job_function__name',
+    ),
+}
+
+CHUNK_SIZE = 1000
+
+
+def _document(values):
+    parts = [' '.join(str(value).lower().split()) for value in values if value is not None]
+    return ' ' + ' '.join(part for part in parts if part)
+
+
+def build_search_documents(apps, schema_editor):
+    for model_name, fields in DOCUMENT_FIELDS.items():
+        model = apps.get_model('api', model_name)
+        changed = []
+        rows = model._base_manager.order_by().values_list('pk', *fields)
+        for row in rows.iterator(chunk_size=CHUNK_SIZE):
+            changed.append(model(pk=row[0], search_document=_document(row[1:])))
+            if len(changed) >= CHUNK_SIZE:
+                model._base_manager.bulk_update(changed, ['search_document'])
+                changed = []
+        if changed:
+            model._base_manager.bulk_update(changed, ['search_document'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0182_employee_assessment_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobdescription',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='vacantposition',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+    ]
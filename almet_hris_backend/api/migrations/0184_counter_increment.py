@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-16 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0183_search_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterIncrement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(help_text='Model label, e.g. api.CompanyPolicy', max_length=50)),
+                ('object_id', models.CharField(max_length=64)),
+                ('field', models.CharField(help_text='Counter column, e.g. view_count', max_length=30)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Counter Increment',
+                'verbose_name_plural': 'Counter Increments',
+                'indexes': [models.Index(fields=['target', 'object_id', 'field'], name='api_counter_target_12b9b8_idx')],
+            },
+        ),
+    ]
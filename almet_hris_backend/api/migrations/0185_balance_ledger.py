@@ -0,0 +1,89 @@
+# Generated by Django 5.2.1 on 2026-10-16 19:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    """Existing balances start their ledger with an OPENING movement"""
+    ledgers = (
+        ('TimeOffBalance', 'TimeOffBalanceMovement', {
+            'current_balance_hours': 'balance_delta',
+            'used_hours_this_month': 'used_delta',
+        }),
+        ('EmployeeVacationBalance', 'VacationBalanceMovement', {
+            'start_balance': 'start_delta',
+            'yearly_balance': 'yearly_delta',
+            'used_days': 'used_delta',
+            'scheduled_days': 'scheduled_delta',
+        }),
+    )
+    for balance_name, movement_name, columns in ledgers:
+        balance_model = apps.get_model('api', balance_name)
+        movement_model = apps.get_model('api', movement_name)
+        movements = [
+            movement_model(
+                balance_id=values['pk'],
+                movement_type='OPENING',
+                description='Opening balance',
+                **{field: values[column] or 0 for column, field in columns.items()}
+            )
+            for values in balance_model._base_manager.values('pk', *columns).iterator(chunk_size=1000)
+        ]
+        movement_model.objects.bulk_create(movements, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0184_counter_increment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeOffBalanceMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('OPENING', 'Opening Balance'), ('DEDUCT', 'Deducted for Request'), ('REFUND', 'Refunded for Request'), ('MONTHLY_ACCRUAL', 'Monthly Accrual'), ('ADJUSTMENT', 'Manual Adjustment')], max_length=20)),
+                ('balance_delta', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('used_delta', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('balance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='api.timeoffbalance')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='balance_movements', to='api.timeoffrequest')),
+            ],
+            options={
+                'verbose_name': 'Time Off Balance Movement',
+                'verbose_name_plural': 'Time Off Balance Movements',
+                'db_table': 'timeoff_balance_movements',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VacationBalanceMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('OPENING', 'Opening Balance'), ('USED', 'Approved Request'), ('SCHEDULED', 'Schedule Added'), ('UNSCHEDULED', 'Schedule Removed'), ('REGISTERED', 'Schedule Registered'), ('ADJUSTMENT', 'Manual Adjustment'), ('RESET', 'Year Reset')], max_length=20)),
+                ('start_delta', models.DecimalField(decimal_places=1, default=0, max_digits=6)),
+                ('yearly_delta', models.DecimalField(decimal_places=1, default=0, max_digits=6)),
+                ('used_delta', models.DecimalField(decimal_places=1, default=0, max_digits=6)),
+                ('scheduled_delta', models.DecimalField(decimal_places=1, default=0, max_digits=6)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('balance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='api.employeevacationbalance')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('schedule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='balance_movements', to='api.vacationschedule')),
+                ('vacation_request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='balance_movements', to='api.vacationrequest')),
+            ],
+            options={
+                'verbose_name': 'Vacation Balance Movement',
+                'verbose_name_plural': 'Vacation Balance Movements',
+                'db_table': 'vacation_balance_movements',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-16 19:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0185_balance_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeoffrequest',
+            index=models.Index(fields=['employee', 'date'], name='timeoff_req_employe_d825f3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacationrequest',
+            index=models.Index(fields=['employee', 'start_date', 'end_date'], name='vacation_re_employe_2fad1b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacationrequest',
+            index=models.Index(fields=['start_date', 'end_date'], name='vacation_re_start_d_3e0549_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacationschedule',
+            index=models.Index(fields=['employee', 'start_date', 'end_date'], name='api_vacatio_employe_658e0f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacationschedule',
+            index=models.Index(fields=['start_date', 'end_date'], name='api_vacatio_start_d_2e7da9_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-16 20:00
+
+from django.db import migrations, models
+
+
+def drop_duplicate_unassigned_rows(apps, schema_editor):
+    """Keep the newest no-department summary row of each year"""
+    PerformanceDashboardSummary = apps.get_model('api', 'PerformanceDashboardSummary')
+
+    seen = set()
+    duplicates = []
+    rows = PerformanceDashboardSummary.objects.filter(department__isnull=True).order_by(
+        'performance_year_id', '-updated_at', '-id'
+    ).values_list('id', 'performance_year_id')
+    for pk, year_id in rows:
+        if year_id in seen:
+            duplicates.append(pk)
+        seen.add(year_id)
+    PerformanceDashboardSummary.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0186_date_range_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_unassigned_rows, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='performancedashboardsummary',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='performancedashboardsummary',
+            constraint=models.UniqueConstraint(fields=('performance_year', 'department'), name='unique_dashboard_summary_department'),
+        ),
+        migrations.AddConstraint(
+            model_name='performancedashboardsummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('department__isnull', True)), fields=('performance_year',), name='unique_dashboard_summary_no_department'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-16 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0187_dashboard_summary_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreRecalculationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=32, unique=True)),
+                ('kind', models.CharField(max_length=20)),
+                ('year', models.IntegerField(blank=True, null=True)),
+                ('total', models.IntegerField(default=0)),
+                ('chunks', models.IntegerField(default=0)),
+                ('processed', models.IntegerField(default=0)),
+                ('updated', models.IntegerField(default=0)),
+                ('skipped', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'score_recalculation_jobs',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
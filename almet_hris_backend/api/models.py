@@ -10,6 +10,7 @@ from django.db import transaction
 import os
 import logging
 from django.db.models import Q
+from .celebration_calendar import month_day_expression
 
 import traceback
 from datetime import datetime, timedelta
@@ -416,6 +417,163 @@ class EmployeeStatus(SoftDeleteModel):
         verbose_name = "Employee Status"
         verbose_name_plural = "Employee Statuses"
 
+class IdSequence(models.Model):
+    """
+    Per business-function counter for auto-generated employee / position IDs.
+    
+    Allocation locks a single row (SELECT ... FOR UPDATE) instead of scanning
+    every existing ID for the prefix. The counter is seeded once from the
+    highest existing numeric ID and is only advanced inside the caller's
+    transaction, so a rolled back insert does not leave a hole.
+    """
+    
+    EMPLOYEE = 'EMPLOYEE'
+    POSITION = 'POSITION'
+    KIND_CHOICES = [
+        (EMPLOYEE, 'Employee ID'),
+        (POSITION, 'Vacant Position ID'),
+    ]
+    
+    prefix = models.CharField(max_length=20, help_text="Business function code")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    last_value = models.PositiveIntegerField(default=0, help_text="Last allocated number")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'id_sequences'
+        unique_together = ['prefix', 'kind']
+        verbose_name = "ID Sequence"
+        verbose_name_plural = "ID Sequences"
+    
+    def __str__(self):
+        return f"{self.kind} {self.prefix}: {self.last_value}"
+    
+    @staticmethod
+    def _id_sources(kind):
+        """(model, field) pairs an ID of this kind must not collide with"""
+        sources = [(Employee, 'employee_id')]
+        if kind == IdSequence.POSITION:
+            sources.insert(0, (VacantPosition, 'position_id'))
+        return sources
+    
+    @staticmethod
+    def _existing_max(kind, prefix):
+        """Highest numeric suffix in use for prefix (one scan, only when seeding)"""
+        highest = 0
+        for model, field in IdSequence._id_sources(kind):
+            values = model.all_objects.filter(**{
+                f'{field}__startswith': prefix,
+                f'{field}__regex': f'^{prefix}[0-9]+$'
+            }).values_list(field, flat=True)
+            for value in values:
+                number_part = value[len(prefix):]
+                if number_part.isdigit():
+                    highest = max(highest, int(number_part))
+        return highest
+    
+    @classmethod
+    def _get_sequence(cls, kind, prefix, lock=False):
+        sequence, created = cls.objects.get_or_create(
+            prefix=prefix,
+            kind=kind,
+            defaults={'last_value': cls._existing_max(kind, prefix)}
+        )
+        if lock and not created:
+            sequence = cls.objects.select_for_update().get(pk=sequence.pk)
+        return sequence
+    
+    @classmethod
+    def _base_value(cls, sequence):
+        """Position IDs also skip numbers already handed out as employee IDs"""
+        if sequence.kind == cls.POSITION:
+            employee_sequence = cls._get_sequence(cls.EMPLOYEE, sequence.prefix)
+            return max(sequence.last_value, employee_sequence.last_value)
+        return sequence.last_value
+    
+    @classmethod
+    def _taken(cls, kind, candidates):
+        taken = set()
+        for model, field in cls._id_sources(kind):
+            taken.update(
+                model.all_objects.filter(**{f'{field}__in': candidates}).values_list(field, flat=True)
+            )
+        return taken
+    
+    @classmethod
+    def reserve(cls, kind, prefix, n=1):
+        """
+        Reserve n consecutive free IDs for prefix and return them in order.
+        Manually entered IDs that already use a number are skipped.
+        """
+        if n < 1:
+            return []
+        
+        with transaction.atomic():
+            sequence = cls._get_sequence(kind, prefix, lock=True)
+            next_number = cls._base_value(sequence) + 1
+            
+            reserved = []
+            while len(reserved) < n:
+                needed = n - len(reserved)
+                candidates = [f"{prefix}{number}" for number in range(next_number, next_number + needed)]
+                taken = cls._taken(kind, candidates)
+                reserved.extend(candidate for candidate in candidates if candidate not in taken)
+                next_number += needed
+            
+            sequence.last_value = next_number - 1
+            sequence.save(update_fields=['last_value', 'updated_at'])
+            return reserved
+    
+    @classmethod
+    def release(cls, kind, prefix, unused_ids):
+        """
+        Give back reserved IDs that were not used.
+        Only possible while they are still the top of the sequence.
+        """
+        numbers = sorted(
+            int(value[len(prefix):]) for value in unused_ids
+            if value.startswith(prefix) and value[len(prefix):].isdigit()
+        )
+        if not numbers:
+            return False
+        
+        with transaction.atomic():
+            sequence = cls._get_sequence(kind, prefix, lock=True)
+            if sequence.last_value != numbers[-1]:
+                logger.warning(f"Cannot release {len(numbers)} {kind} IDs for {prefix} - sequence moved on")
+                return False
+            
+            # Roll back the contiguous tail of unused numbers
+            last_value = sequence.last_value
+            for number in reversed(numbers):
+                if number != last_value:
+                    break
+                last_value -= 1
+            sequence.last_value = last_value
+            sequence.save(update_fields=['last_value', 'updated_at'])
+            return True
+    
+    @classmethod
+    def _stored_last_value(cls, kind, prefix):
+        """last_value of the row, or the value seeding would give it - never creates the row"""
+        last_value = cls.objects.filter(prefix=prefix, kind=kind).values_list('last_value', flat=True).first()
+        if last_value is None:
+            last_value = cls._existing_max(kind, prefix)
+        return last_value
+    
+    @classmethod
+    def peek(cls, kind, prefix):
+        """Next ID that reserve() would hand out (read only - no lock, no allocation, no rows created)"""
+        base_value = cls._stored_last_value(kind, prefix)
+        if kind == cls.POSITION:
+            base_value = max(base_value, cls._stored_last_value(cls.EMPLOYEE, prefix))
+        
+        next_number = base_value + 1
+        while cls._taken(kind, [f"{prefix}{next_number}"]):
+            next_number += 1
+        return f"{prefix}{next_number}"
+
+
 class VacantPosition(SoftDeleteModel):
     """Enhanced Vacant Position with business function based position_id generation"""
     
@@ -498,6 +656,9 @@ class VacantPosition(SoftDeleteModel):
     # Auto-generated display name
     display_name = models.CharField(max_length=300, editable=False, default='')
     
+    # Lowercased search text, maintained by api/search_index.py
+    search_document = models.TextField(default='', blank=True, editable=False)
+    
     # Status tracking
     is_filled = models.BooleanField(default=False)
     filled_by_employee = models.ForeignKey(
@@ -528,92 +689,14 @@ class VacantPosition(SoftDeleteModel):
         if not self.business_function:
             raise ValueError("Business function is required to generate position ID")
         
-        business_code = self.business_function.code
-        
-        with transaction.atomic():
-            # Get ALL existing position IDs for this business function (including filled and deleted)
-            existing_ids = set()
-            
-            # Get from VacantPosition
-            vacancy_ids = VacantPosition.all_objects.filter(
-                position_id__startswith=business_code,
-                position_id__regex=f'^{business_code}[0-9]+$'  # Only numeric suffixes
-            ).values_list('position_id', flat=True)
-            existing_ids.update(vacancy_ids)
-            
-            # IMPORTANT: Also check Employee IDs to avoid conflicts
-            employee_ids = Employee.all_objects.filter(
-                employee_id__startswith=business_code,
-                employee_id__regex=f'^{business_code}[0-9]+$'  # Only numeric suffixes
-            ).values_list('employee_id', flat=True)
-            existing_ids.update(employee_ids)
-            
-            # Extract numbers from existing IDs
-            used_numbers = set()
-            for pos_id in existing_ids:
-                try:
-                    number_part = pos_id[len(business_code):]
-                    if number_part.isdigit():
-                        used_numbers.add(int(number_part))
-                except (ValueError, IndexError):
-                    continue
-            
-            # Find the next available number
-            next_number = 1
-            while next_number in used_numbers:
-                next_number += 1
-            
-            new_position_id = f"{business_code}{next_number}"
-            
-            # Final safety check against both vacancy and employee IDs
-            while (VacantPosition.all_objects.filter(position_id=new_position_id).exists() or 
-                   Employee.all_objects.filter(employee_id=new_position_id).exists()):
-                next_number += 1
-                new_position_id = f"{business_code}{next_number}"
-            
-            return new_position_id
+        return IdSequence.reserve(IdSequence.POSITION, self.business_function.code)[0]
     
     @classmethod
     def get_next_position_id_preview(cls, business_function_id):
         """Preview next position ID for business function"""
         try:
             business_function = BusinessFunction.objects.get(id=business_function_id)
-            business_code = business_function.code
-            
-            # Get all existing IDs (both vacancy and employee)
-            existing_ids = set()
-            
-            # From vacancies
-            vacancy_ids = cls.all_objects.filter(
-                position_id__startswith=business_code,
-                position_id__regex=f'^{business_code}[0-9]+$'
-            ).values_list('position_id', flat=True)
-            existing_ids.update(vacancy_ids)
-            
-            # From employees
-            employee_ids = Employee.all_objects.filter(
-                employee_id__startswith=business_code,
-                employee_id__regex=f'^{business_code}[0-9]+$'
-            ).values_list('employee_id', flat=True)
-            existing_ids.update(employee_ids)
-            
-            # Extract numbers
-            used_numbers = set()
-            for id_value in existing_ids:
-                try:
-                    number_part = id_value[len(business_code):]
-                    if number_part.isdigit():
-                        used_numbers.add(int(number_part))
-                except (ValueError, IndexError):
-                    continue
-            
-            # Find next available number
-            next_number = 1
-            while next_number in used_numbers:
-                next_number += 1
-            
-            return f"{business_code}{next_number}"
-            
+            return IdSequence.peek(IdSequence.POSITION, business_function.code)
         except BusinessFunction.DoesNotExist:
             return None
 
@@ -623,9 +706,11 @@ class VacantPosition(SoftDeleteModel):
         # CRITICAL: Store original_employee_pk BEFORE any operations
         original_pk_to_preserve = self.original_employee_pk
         
-        # Auto-generate position_id if not set
+        # Auto-generate position_id if not set - in the same transaction as the insert
         if not self.position_id and self.business_function:
-            self.position_id = self.generate_position_id()
+            with transaction.atomic():
+                self.position_id = self.generate_position_id()
+                return self.save(*args, **kwargs)
         
         # Auto-generate display name
         self.display_name = f"[VACANT]"
@@ -980,6 +1065,9 @@ class Employee(SoftDeleteModel):
     # Additional Information
     notes = models.TextField(default='', blank=True)
     
+    # Lowercased search text, maintained by api/search_index.py
+    search_document = models.TextField(default='', blank=True, editable=False)
+    
     original_vacancy = models.OneToOneField('VacantPosition', on_delete=models.SET_NULL, null=True, blank=True, 
                                           related_name='employee_hired_for_position', 
                                           help_text="Original vacancy this employee was hired for")
@@ -993,92 +1081,29 @@ class Employee(SoftDeleteModel):
     updated_at = models.DateTimeField(auto_now=True)
     
     def generate_employee_id(self):
-        """FIXED: Generate employee ID with better uniqueness logic"""
+        """Generate employee ID from the business function sequence"""
         if not self.business_function:
             raise ValueError("Business function is required to generate employee ID")
         
-        business_code = self.business_function.code
-        
-        with transaction.atomic():
-            # Get ALL existing employee IDs for this business function (including deleted ones)
-            existing_ids = set(
-                Employee.all_objects.filter(
-                    employee_id__startswith=business_code,
-                    employee_id__regex=f'^{business_code}[0-9]+$'  # Only numeric suffixes
-                ).values_list('employee_id', flat=True)
-            )
-            
-            # Extract numbers from existing IDs
-            used_numbers = set()
-            for emp_id in existing_ids:
-                try:
-                    number_part = emp_id[len(business_code):]
-                    if number_part.isdigit():
-                        used_numbers.add(int(number_part))
-                except (ValueError, IndexError):
-                    continue
-            
-            # Find the next available number
-            next_number = 1
-            while next_number in used_numbers:
-                next_number += 1
-            
-            new_employee_id = f"{business_code}{next_number}"
-            
-            # Final safety check
-            while Employee.all_objects.filter(employee_id=new_employee_id).exists():
-                next_number += 1
-                new_employee_id = f"{business_code}{next_number}"
-            
-            return new_employee_id
+        return IdSequence.reserve(IdSequence.EMPLOYEE, self.business_function.code)[0]
     
     @classmethod
     def get_next_employee_id_preview(cls, business_function_id):
-        """FIXED: Preview next employee ID"""
+        """Preview next employee ID"""
         try:
             business_function = BusinessFunction.objects.get(id=business_function_id)
-            business_code = business_function.code
-            
-            # Get all existing IDs for this business function
-            existing_ids = set(
-                cls.all_objects.filter(
-                    employee_id__startswith=business_code,
-                    employee_id__regex=f'^{business_code}[0-9]+$'
-                ).values_list('employee_id', flat=True)
-            )
-            
-            # Extract numbers
-            used_numbers = set()
-            for emp_id in existing_ids:
-                try:
-                    number_part = emp_id[len(business_code):]
-                    if number_part.isdigit():
-                        used_numbers.add(int(number_part))
-                except (ValueError, IndexError):
-                    continue
-            
-            # Find next available number
-            next_number = 1
-            while next_number in used_numbers:
-                next_number += 1
-            
-            return f"{business_code}{next_number}"
-            
+            return IdSequence.peek(IdSequence.EMPLOYEE, business_function.code)
         except BusinessFunction.DoesNotExist:
             return None
-    def save(self, *args, **kwargs):
-        # Auto-generate employee_id BEFORE calling super().save()
-        if not self.employee_id and self.business_function:
-            self.employee_id = self.generate_employee_id()
-        
+    
+    def populate_derived_fields(self):
+        """Fields computed on save (also used by bulk_create paths that bypass save)"""
         if self.first_name or self.last_name:
             # Priority 1: Use employee's own first_name/last_name fields
             self.full_name = f"{self.first_name} {self.last_name}".strip()
         elif self.user and (self.user.first_name or self.user.last_name):
             # Priority 2: Use user's first_name/last_name as fallback
             self.full_name = f"{self.user.first_name} {self.user.last_name}".strip()
-        if not self.pk and not self.status_id:  # pk None = yeni object
-            self.auto_assign_status()
         # Sync email: if user exists and employee email is empty, use user email
         if self.user and self.user.email and not self.email:
             self.email = self.user.email
@@ -1117,17 +1142,22 @@ class Employee(SoftDeleteModel):
         if self.position_group and not self.grading_level:
             self.grading_level = f"{self.position_group.grading_shorthand}_M"
         
-        # CRITICAL: Status təyini - yalnız yeni işçi yaradılarkən
-        if not self.pk and not self.status_id:  # pk None = yeni object
-            self.auto_assign_status()
-        
         # Contract start date default
         if not self.contract_start_date:
             self.contract_start_date = self.start_date
+    
+    def save(self, *args, **kwargs):
+        # Auto-generate employee_id BEFORE calling super().save() - in the same transaction as the insert
+        if not self.employee_id and self.business_function:
+            with transaction.atomic():
+                self.employee_id = self.generate_employee_id()
+                return self.save(*args, **kwargs)
         
+        # CRITICAL: Status təyini - yalnız yeni işçi yaradılarkən
+        if not self.pk and not self.status_id:  # pk None = yeni object
+            self.auto_assign_status()
         
-        
-        
+        self.populate_derived_fields()
         
         # Link to vacant position if applicable
         if not self.original_vacancy and hasattr(self, '_vacancy_id'):
@@ -2475,6 +2505,9 @@ class Employee(SoftDeleteModel):
             models.Index(fields=['is_deleted']),
             models.Index(fields=['contract_end_date']),
             models.Index(fields=['line_manager']),
+            # ✅ Month/day lookups for birthday and work anniversary feeds
+            models.Index(month_day_expression('date_of_birth'), name='employee_birth_md_idx'),
+            models.Index(month_day_expression('start_date'), name='employee_start_md_idx'),
         ]
 
 class EmployeeDeletionManager:
@@ -2831,6 +2864,27 @@ class EmployeeActivity(models.Model):
         verbose_name = "Employee Activity"
         verbose_name_plural = "Employee Activities"
 
+class CounterIncrement(models.Model):
+    """
+    Buffered view / download counter increment (see api/view_counters.py).
+    Appended on every view, folded into the counter columns by a Celery beat task.
+    """
+    
+    target = models.CharField(max_length=50, help_text="Model label, e.g. api.CompanyPolicy")
+    object_id = models.CharField(max_length=64)
+    field = models.CharField(max_length=30, help_text="Counter column, e.g. view_count")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.target}:{self.object_id} {self.field} +1"
+
+    class Meta:
+        verbose_name = "Counter Increment"
+        verbose_name_plural = "Counter Increments"
+        indexes = [
+            models.Index(fields=['target', 'object_id', 'field']),
+        ]
+
 class ContractStatusManager:
     """Helper class for managing contract-based status transitions"""
     
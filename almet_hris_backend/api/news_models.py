@@ -278,9 +278,9 @@ class CompanyNews(SoftDeleteModel):
         return self.title
     
     def increment_view_count(self):
-        """Increment view counter"""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """Increment view counter (buffered - see api/view_counters.py)"""
+        from .view_counters import record_increment
+        record_increment(self, 'view_count')
     
     def get_tags_list(self):
         """Get tags as list"""
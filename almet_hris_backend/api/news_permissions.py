@@ -9,27 +9,12 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import BasePermission
 from .role_models import Permission, EmployeeRole, Role
+from .access_scope import get_access_scope
 
 
 def is_admin_user(user):
     """Check if user has Admin role"""
-    try:
-        from .models import Employee
-        employee = Employee.objects.get(user=user, is_deleted=False)
-        
-        # Admin role check (case-insensitive)
-        has_admin_role = EmployeeRole.objects.filter(
-            employee=employee,
-            role__name__icontains='Admin',
-            role__is_active=True,
-            is_active=True
-        ).exists()
-        
-        return has_admin_role
-    except Employee.DoesNotExist:
-        return False
-
-
+    return get_access_scope(user).is_admin
 
 
 # ==================== DRF PERMISSION CLASSES ====================
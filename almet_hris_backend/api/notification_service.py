@@ -1,19 +1,28 @@
 # api/notification_service.py - UPDATED WITH SENT/RECEIVED SEPARATION
 
 import logging
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
+from django.utils import timezone
 from .notification_models import NotificationSettings, NotificationLog
 from .token_helpers import extract_graph_token_from_request
+from .graph_client import graph_client, build_mail_message
 
 logger = logging.getLogger(__name__)
 
+# Concurrent Graph requests when reading several subject prefixes / folders
+MAILBOX_FETCH_WORKERS = 10
+
+MAILBOX_FOLDERS = {
+    'received': ("/me/messages", "RECEIVED"),  # Default inbox
+    'sent': ("/me/mailFolders/sentitems/messages", "SENT"),  # Sent items folder
+}
+
 
 class NotificationService:
     """Service for sending notifications via Microsoft Graph API"""
     
     def __init__(self):
-        self.graph_endpoint = "https://graph.microsoft.com/v1.0"
         self._settings = None
         self._verified_mailboxes = {}  # Cache for verified mailboxes
     
@@ -48,18 +57,7 @@ class NotificationService:
             return self._verified_mailboxes[cache_key]
         
         try:
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-            
-   
-            
-            response = requests.get(
-                f"{self.graph_endpoint}/users/{shared_mailbox_email}",
-                headers=headers,
-                timeout=30
-            )
+            response = graph_client.get(f"/users/{shared_mailbox_email}", access_token)
             
             if response.status_code == 200:
                 mailbox_info = response.json()
@@ -163,42 +161,13 @@ class NotificationService:
                 )
             
             # ✅ STEP 2: Shared mailbox is accessible, send normally
-            message = {
-                "message": {
-                    "subject": subject,
-                    "body": {
-                        "contentType": "HTML",
-                        "content": body_html
-                    },
-                    "toRecipients": [
-                        {
-                            "emailAddress": {
-                                "address": recipient_email
-                            }
-                        }
-                    ],
-                    "from": {
-                        "emailAddress": {
-                            "address": shared_mailbox_email
-                        }
-                    }
-                },
-                "saveToSentItems": "true"
-            }
-            
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-       
+            message = build_mail_message(subject, body_html, recipient_email, sender_email=shared_mailbox_email)
             
             # Use shared mailbox endpoint
-            response = requests.post(
-                f"{self.graph_endpoint}/users/{shared_mailbox_email}/sendMail",
-                headers=headers,
-                json=message,
-                timeout=30
+            response = graph_client.post(
+                f"/users/{shared_mailbox_email}/sendMail",
+                access_token,
+                json=message
             )
             
             if response.status_code == 202:
@@ -251,37 +220,9 @@ class NotificationService:
             
             modified_body = fallback_note + body_html
             
-            message = {
-                "message": {
-                    "subject": f"{subject}",
-                    "body": {
-                        "contentType": "HTML",
-                        "content": modified_body
-                    },
-                    "toRecipients": [
-                        {
-                            "emailAddress": {
-                                "address": recipient_email
-                            }
-                        }
-                    ]
-                },
-                "saveToSentItems": "true"
-            }
+            message = build_mail_message(f"{subject}", modified_body, recipient_email)
             
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-      
-            
-            response = requests.post(
-                f"{self.graph_endpoint}/me/sendMail",
-                headers=headers,
-                json=message,
-                timeout=30
-            )
+            response = graph_client.post("/me/sendMail", access_token, json=message)
             
             if response.status_code == 202:
 
@@ -363,19 +304,7 @@ class NotificationService:
                 '$select': 'id,subject,from,toRecipients,receivedDateTime,sentDateTime,isRead,hasAttachments,importance,bodyPreview'
             }
             
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-          
-            
-            response = requests.get(
-                f"{self.graph_endpoint}{folder_endpoint}",
-                headers=headers,
-                params=params,
-                timeout=30
-            )
+            response = graph_client.get(folder_endpoint, access_token, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -412,17 +341,7 @@ class NotificationService:
                 '$select': 'id,subject,from,toRecipients,receivedDateTime,sentDateTime,isRead,hasAttachments,importance,bodyPreview'
             }
             
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(
-                f"{self.graph_endpoint}{folder_endpoint}",
-                headers=headers,
-                params=params,
-                timeout=30
-            )
+            response = graph_client.get(folder_endpoint, access_token, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -462,30 +381,55 @@ class NotificationService:
         Returns:
             dict: {"received": [...], "sent": [...], "all": [...]}
         """
-        result = {
-            "received": [],
-            "sent": [],
-            "all": []
-        }
+        result = self.get_emails_for_subjects(access_token, [subject_filter], top, email_type)
+        result["all"] = []
         
-        try:
-            if email_type in ["received", "all"]:
-                result["received"] = self.get_received_emails(access_token, subject_filter, top)
-            
-            if email_type in ["sent", "all"]:
-                result["sent"] = self.get_sent_emails(access_token, subject_filter, top)
-            
-            if email_type == "all":
-                # Combine and sort by date
-                all_emails = result["received"] + result["sent"]
-                all_emails.sort(key=lambda x: x.get('receivedDateTime', ''), reverse=True)
-                result["all"] = all_emails[:top]
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error in get_all_emails_by_type: {str(e)}")
+        if email_type == "all":
+            # Combine and sort by date
+            all_emails = result["received"] + result["sent"]
+            all_emails.sort(key=lambda x: x.get('receivedDateTime', ''), reverse=True)
+            result["all"] = all_emails[:top]
+        
+        return result
+    
+    def get_emails_for_subjects(self, access_token, subject_filters, top=50, email_type="all"):
+        """
+        📬 Received / sent emails for several subject prefixes at once
+        
+        Every (prefix, folder) query runs concurrently on a bounded thread pool,
+        so the wait is about one Graph round trip instead of one per query.
+        Emails matching more than one prefix are returned once (by message id).
+        
+        Returns:
+            dict: {"received": [...], "sent": [...]}, each newest first
+        """
+        result = {"received": [], "sent": []}
+        
+        folders = [key for key in ("received", "sent") if email_type in [key, "all"]]
+        jobs = [(key, subject_filter) for subject_filter in subject_filters for key in folders]
+        if not jobs:
             return result
+        
+        def fetch(job):
+            key, subject_filter = job
+            folder_endpoint, tag = MAILBOX_FOLDERS[key]
+            return self._get_emails_from_folder(access_token, folder_endpoint, subject_filter, top, tag)
+        
+        with ThreadPoolExecutor(max_workers=min(MAILBOX_FETCH_WORKERS, len(jobs))) as pool:
+            responses = list(pool.map(fetch, jobs))
+        
+        seen = {"received": set(), "sent": set()}
+        for (key, _), emails in zip(jobs, responses):
+            for email in emails:
+                message_id = email.get('id')
+                if message_id in seen[key]:
+                    continue
+                seen[key].add(message_id)
+                result[key].append(email)
+        
+        result["received"].sort(key=lambda x: x.get('receivedDateTime') or '', reverse=True)
+        result["sent"].sort(key=lambda x: x.get('sentDateTime') or '', reverse=True)
+        return result
     
     # ==================== EXISTING METHODS ====================
     
@@ -518,37 +462,9 @@ class NotificationService:
         )
         
         try:
-            message = {
-                "message": {
-                    "subject": subject,
-                    "body": {
-                        "contentType": "HTML",
-                        "content": body_html
-                    },
-                    "toRecipients": [
-                        {
-                            "emailAddress": {
-                                "address": recipient_email
-                            }
-                        }
-                    ]
-                },
-                "saveToSentItems": "true"
-            }
-            
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-        
+            message = build_mail_message(subject, body_html, recipient_email)
             
-            response = requests.post(
-                f"{self.graph_endpoint}/me/sendMail",
-                headers=headers,
-                json=message,
-                timeout=30
-            )
+            response = graph_client.post("/me/sendMail", access_token, json=message)
             
             if response.status_code == 202:
         
@@ -569,16 +485,10 @@ class NotificationService:
     def mark_email_as_read(self, access_token, message_id):
         """Mark email as read"""
         try:
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.patch(
-                f"{self.graph_endpoint}/me/messages/{message_id}",
-                headers=headers,
-                json={"isRead": True},
-                timeout=30
+            response = graph_client.patch(
+                f"/me/messages/{message_id}",
+                access_token,
+                json={"isRead": True}
             )
             
             return response.status_code == 200
@@ -589,16 +499,10 @@ class NotificationService:
     def mark_email_as_unread(self, access_token, message_id):
         """Mark email as unread"""
         try:
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.patch(
-                f"{self.graph_endpoint}/me/messages/{message_id}",
-                headers=headers,
-                json={"isRead": False},
-                timeout=30
+            response = graph_client.patch(
+                f"/me/messages/{message_id}",
+                access_token,
+                json={"isRead": False}
             )
             
             return response.status_code == 200
@@ -607,17 +511,101 @@ class NotificationService:
             return False
     
     def mark_multiple_emails_as_read(self, access_token, message_ids):
-        """Mark multiple emails as read"""
+        """Mark multiple emails as read - one $batch call per 20 messages"""
         results = {'success': 0, 'failed': 0, 'total': len(message_ids)}
         
-        for message_id in message_ids:
-            if self.mark_email_as_read(access_token, message_id):
+        try:
+            responses = graph_client.batch(access_token, [
+                {'method': 'PATCH', 'url': f"/me/messages/{message_id}", 'body': {"isRead": True}}
+                for message_id in message_ids
+            ])
+        except Exception as e:
+            logger.error(f"Error marking emails as read: {str(e)}")
+            results['failed'] = len(message_ids)
+            return results
+        
+        for response in responses:
+            if response.status_code == 200:
                 results['success'] += 1
             else:
                 results['failed'] += 1
         
         return results
     
+    def send_bulk_email(self, recipient_emails, subject, body_html, access_token=None,
+                        related_model=None, related_object_id=None, sent_by=None, request=None):
+        """
+        Send the same email to each recipient separately via Graph $batch (20 per round trip)
+        
+        Returns:
+            int: Number of recipients the email was sent to
+        """
+        recipient_emails = [email for email in dict.fromkeys(recipient_emails) if email]
+        if not recipient_emails:
+            return 0
+        
+        if not self.settings.enable_email_notifications:
+            return 0
+        
+        if not access_token:
+            if request:
+                access_token = extract_graph_token_from_request(request)
+        
+        if not access_token:
+            logger.error("❌ Microsoft Graph token is required")
+            return 0
+        
+        logs = NotificationLog.objects.bulk_create([
+            NotificationLog(
+                notification_type='EMAIL',
+                recipient_email=recipient_email,
+                subject=subject,
+                body=body_html,
+                related_model=related_model or '',
+                related_object_id=str(related_object_id) if related_object_id else '',
+                status='PENDING',
+                sent_by=sent_by
+            )
+            for recipient_email in recipient_emails
+        ])
+        
+        try:
+            responses = graph_client.batch(access_token, [
+                {
+                    'method': 'POST',
+                    'url': '/me/sendMail',
+                    'body': build_mail_message(subject, body_html, recipient_email)
+                }
+                for recipient_email in recipient_emails
+            ])
+        except Exception as e:
+            logger.error(f"Error: {str(e)}")
+            responses = [None] * len(logs)
+        
+        now = timezone.now()
+        sent, failed = [], []
+        for log, response in zip(logs, responses):
+            if response is not None and response.status_code == 202:
+                log.status = 'SENT'
+                log.sent_at = now
+                sent.append(log)
+            else:
+                log.status = 'FAILED'
+                log.error_message = f"Failed: {response.status_code}" if response is not None else 'Failed: batch error'
+                log.retry_count += 1
+                failed.append(log)
+        
+        # bulk_update skips auto_now, so updated_at is set explicitly
+        for log in logs:
+            log.updated_at = now
+        if sent:
+            NotificationLog.objects.bulk_update(sent, ['status', 'sent_at', 'updated_at'])
+        if failed:
+            logger.error(f"❌ Failed to send '{subject}' to {len(failed)} of {len(logs)} recipients")
+            NotificationLog.objects.bulk_update(failed, ['status', 'error_message', 'retry_count', 'updated_at'])
+        
+        return len(sent)
+    
     
     
 # Singleton instance
@@ -1,20 +1,55 @@
 # api/notification_views.py - COMPLETE VERSION WITH EMAIL DETAIL
 
+import hashlib
 import logging
-import requests  # ✅ REQUIRED for email detail endpoint
+import uuid
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.core.cache import cache
 
 from .notification_models import NotificationSettings, NotificationLog
 from .notification_service import notification_service
-from .models import UserGraphToken
+from .graph_client import graph_client, get_graph_access_token
 
 logger = logging.getLogger(__name__)
 
+# Outlook email lists are cached per user for a short time
+OUTLOOK_CACHE_TIMEOUT = 60
+
+
+def _outlook_version_key(user):
+    return f'outlook_emails_version:user:{user.pk}'
+
+
+def _outlook_cache_version(user):
+    """Per-user random token - never repeats, so a culled key can not revive old lists"""
+    version_key = _outlook_version_key(user)
+    version = cache.get(version_key)
+    if version is None:
+        token = uuid.uuid4().hex
+        cache.add(version_key, token, None)
+        version = cache.get(version_key) or token
+    return version
+
+
+def invalidate_outlook_cache(user):
+    """Drop the user's cached email lists (read state changed or email deleted)"""
+    try:
+        cache.set(_outlook_version_key(user), uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f"Could not invalidate Outlook email cache: {e}")
+
+
+def _outlook_cache_key(user, graph_token, *parts):
+    # Token hash keeps lists fetched with a different mailbox token apart
+    token_hash = hashlib.sha256(graph_token.encode()).hexdigest()[:16]
+    suffix = ':'.join(str(part) for part in parts)
+    return f'outlook_emails:v{_outlook_cache_version(user)}:user:{user.pk}:{token_hash}:{suffix}'
+
 
 def get_graph_token_from_request(request):
     """
@@ -29,15 +64,9 @@ def get_graph_token_from_request(request):
     
     # 2. Try database (stored during login)
     if request.user and request.user.is_authenticated:
-        try:
-            graph_token = UserGraphToken.get_valid_token(request.user)
-            if graph_token:
-                logger.info(f"✅ Graph token found in database for {request.user.username}")
-                return graph_token
-            else:
-                logger.warning(f"⚠️ Graph token in database is expired for {request.user.username}")
-        except Exception as e:
-            logger.error(f"❌ Error retrieving Graph token from database: {e}")
+        graph_token = get_graph_access_token(request.user)
+        if graph_token:
+            return graph_token
     
     logger.warning("❌ No valid Graph token found")
     return None
@@ -74,6 +103,14 @@ def get_graph_token_from_request(request):
             required=False,
             default=50,
             description='Number of emails per type (max 50)'
+        ),
+        openapi.Parameter(
+            'refresh',
+            openapi.IN_QUERY,
+            type=openapi.TYPE_BOOLEAN,
+            required=False,
+            default=False,
+            description='Skip the short per-user cache'
         )
     ],
     responses={200: openapi.Response(description='Outlook emails with sent/received separation')}
@@ -142,32 +179,22 @@ def get_outlook_emails(request):
                 settings.company_news_subject_prefix
             ]
         
-        # Fetch emails for each subject filter
-        for subject_filter in subject_filters:
-            emails_by_type = notification_service.get_all_emails_by_type(
-                access_token=graph_token,
-                subject_filter=subject_filter,
-                top=top,
-                email_type=email_type
-            )
-            
-            # Accumulate results
-            result['received_emails'].extend(emails_by_type['received'])
-            result['sent_emails'].extend(emails_by_type['sent'])
-        
-        # Sort received emails by date
-        result['received_emails'].sort(
-            key=lambda x: x.get('receivedDateTime', ''), 
-            reverse=True
-        )
-        result['received_emails'] = result['received_emails'][:top]
+        # ✅ Short per-user cache - ?refresh=true skips it
+        cache_key = _outlook_cache_key(request.user, graph_token, module, email_type, top)
+        if request.GET.get('refresh', '').lower() not in ['true', '1', 'yes']:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return Response(cached)
         
-        # Sort sent emails by date
-        result['sent_emails'].sort(
-            key=lambda x: x.get('sentDateTime', ''), 
-            reverse=True
+        # Fetch all subject filters concurrently (de-duplicated, newest first)
+        emails_by_type = notification_service.get_emails_for_subjects(
+            access_token=graph_token,
+            subject_filters=subject_filters,
+            top=top,
+            email_type=email_type
         )
-        result['sent_emails'] = result['sent_emails'][:top]
+        result['received_emails'] = emails_by_type['received'][:top]
+        result['sent_emails'] = emails_by_type['sent'][:top]
         
         # Combine all emails based on email_type filter
         if email_type == 'all':
@@ -205,6 +232,7 @@ def get_outlook_emails(request):
             'total': len(result['all_emails'])
         }
         
+        cache.set(cache_key, result, OUTLOOK_CACHE_TIMEOUT)
         return Response(result)
         
     except Exception as e:
@@ -304,19 +332,13 @@ def get_email_detail(request, message_id):
                 'error': 'Microsoft Graph token not available'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        headers = {
-            "Authorization": f"Bearer {graph_token}",
-            "Content-Type": "application/json"
-        }
-        
         # Fetch full email details
-        response = requests.get(
-            f"https://graph.microsoft.com/v1.0/me/messages/{message_id}",
-            headers=headers,
+        response = graph_client.get(
+            f"/me/messages/{message_id}",
+            graph_token,
             params={
                 '$select': 'id,subject,from,toRecipients,ccRecipients,receivedDateTime,sentDateTime,isRead,hasAttachments,importance,body,bodyPreview,attachments'
-            },
-            timeout=30
+            }
         )
         
         if response.status_code == 200:
@@ -416,19 +438,11 @@ def delete_email_handler(request, message_id):
                 'error': 'Microsoft Graph token not available'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        headers = {
-            "Authorization": f"Bearer {graph_token}",
-            "Content-Type": "application/json"
-        }
-        
         # Delete email (moves to Deleted Items)
-        response = requests.delete(
-            f"https://graph.microsoft.com/v1.0/me/messages/{message_id}",
-            headers=headers,
-            timeout=30
-        )
+        response = graph_client.delete(f"/me/messages/{message_id}", graph_token)
         
         if response.status_code == 204:
+            invalidate_outlook_cache(request.user)
     
             return Response({
                 'success': True,
@@ -504,27 +518,26 @@ def mark_all_emails_read(request):
         if module in ['company_news', 'all']:
             subject_filters.append(settings.company_news_subject_prefix)
         
-        # Collect unread emails
-        for subject_filter in subject_filters:
-            emails_by_type = notification_service.get_all_emails_by_type(
-                access_token=graph_token,
-                subject_filter=subject_filter,
-                top=50,
-                email_type=email_type
-            )
-            
-            # Get unread IDs based on email_type filter
-            if email_type in ['received', 'all']:
-                unread_ids.extend([
-                    email['id'] for email in emails_by_type['received']
-                    if not email.get('isRead', False)
-                ])
-            
-            if email_type in ['sent', 'all']:
-                unread_ids.extend([
-                    email['id'] for email in emails_by_type['sent']
-                    if not email.get('isRead', False)
-                ])
+        # Collect unread emails (all subject filters fetched concurrently)
+        emails_by_type = notification_service.get_emails_for_subjects(
+            access_token=graph_token,
+            subject_filters=subject_filters,
+            top=50,
+            email_type=email_type
+        )
+        
+        # Get unread IDs based on email_type filter
+        if email_type in ['received', 'all']:
+            unread_ids.extend([
+                email['id'] for email in emails_by_type['received']
+                if not email.get('isRead', False)
+            ])
+        
+        if email_type in ['sent', 'all']:
+            unread_ids.extend([
+                email['id'] for email in emails_by_type['sent']
+                if not email.get('isRead', False)
+            ])
         
         if not unread_ids:
             return Response({
@@ -540,6 +553,7 @@ def mark_all_emails_read(request):
             access_token=graph_token,
             message_ids=unread_ids
         )
+        invalidate_outlook_cache(request.user)
         
         return Response({
             'success': True,
@@ -601,8 +615,8 @@ def mark_email_read(request):
             access_token=graph_token,
             message_id=message_id
         )
-        
         if success:
+            invalidate_outlook_cache(request.user)
             return Response({
                 'success': True,
                 'message': 'Email marked as read',
@@ -658,8 +672,8 @@ def mark_email_unread(request):
             access_token=graph_token,
             message_id=message_id
         )
-        
         if success:
+            invalidate_outlook_cache(request.user)
             return Response({
                 'success': True,
                 'message': 'Email marked as unread',
@@ -0,0 +1,148 @@
+# api/org_hierarchy.py - In-memory org hierarchy for org chart serialization
+
+from collections import defaultdict, Counter
+import logging
+
+from .models import Employee
+
+logger = logging.getLogger(__name__)
+
+
+class OrgHierarchy:
+    """
+    Manager tree built once per request.
+
+    Org chart node metrics (direct reports, level to CEO, subtree size,
+    unit / business function colleague counts) are answered from in-memory
+    maps so that serializing the whole tree costs a constant number of queries
+    instead of several queries per node.
+    """
+
+    # Same recursion guard as the old per-node walk up line_manager
+    MAX_LEVEL_TO_CEO = 10
+
+    def __init__(self, nodes, manager_map):
+        # nodes: org-chart visible employees (allows_org_chart, not deleted)
+        self.nodes = {node.id: node for node in nodes}
+        # manager_map: employee_id(pk) -> line_manager_id for every employee row
+        self.manager_map = manager_map
+
+        self.children = defaultdict(list)
+        self.unit_counts = Counter()
+        self.business_function_counts = Counter()
+
+        for node in nodes:
+            if node.line_manager_id:
+                self.children[node.line_manager_id].append(node)
+            if node.unit_id:
+                self.unit_counts[node.unit_id] += 1
+            if node.business_function_id:
+                self.business_function_counts[node.business_function_id] += 1
+
+        self._level_cache = {}
+        self._subordinate_cache = {}
+
+    @classmethod
+    def build(cls):
+        """Load the hierarchy with two queries"""
+        nodes = list(
+            Employee.objects.filter(
+                status__allows_org_chart=True,
+                is_deleted=False
+            ).select_related(
+                'user', 'business_function', 'department', 'unit', 'position_group', 'status'
+            ).order_by('id')
+        )
+
+        # line_manager relation is followed regardless of soft delete (base manager behaviour)
+        manager_map = dict(
+            Employee.all_objects.values_list('id', 'line_manager_id')
+        )
+
+        return cls(nodes, manager_map)
+
+    def get_node(self, employee_id):
+        return self.nodes.get(employee_id)
+
+    def get_direct_reports(self, employee_id):
+        """Org-chart visible direct reports of an employee"""
+        return self.children.get(employee_id, [])
+
+    def get_direct_reports_count(self, employee_id):
+        return len(self.children.get(employee_id, []))
+
+    def get_level_to_ceo(self, employee_id):
+        """Number of line_manager hops up to the top of the tree"""
+        if employee_id in self._level_cache:
+            return self._level_cache[employee_id]
+
+        level = 0
+        current = employee_id
+        visited = set()
+
+        while current and self.manager_map.get(current) and current not in visited:
+            visited.add(current)
+            current = self.manager_map[current]
+            level += 1
+
+            if level > self.MAX_LEVEL_TO_CEO:
+                break
+
+        self._level_cache[employee_id] = level
+        return level
+
+    def get_total_subordinates(self, employee_id):
+        """Size of the visible subtree below an employee (excluding the employee)"""
+        if employee_id in self._subordinate_cache:
+            return self._subordinate_cache[employee_id]
+
+        # Iterative post-order walk, memoizing every subtree on the way back up
+        stack = [(employee_id, False)]
+        in_progress = set()
+
+        while stack:
+            current, expanded = stack.pop()
+
+            if current in self._subordinate_cache:
+                continue
+
+            if expanded:
+                in_progress.discard(current)
+                total = 0
+                for report in self.children.get(current, []):
+                    total += 1 + self._subordinate_cache.get(report.id, 0)
+                self._subordinate_cache[current] = total
+                continue
+
+            if current in in_progress:
+                # Cycle in line_manager chain - stop descending
+                continue
+
+            in_progress.add(current)
+            stack.append((current, True))
+            for report in self.children.get(current, []):
+                if report.id not in self._subordinate_cache and report.id not in in_progress:
+                    stack.append((report.id, False))
+
+        return self._subordinate_cache[employee_id]
+
+    def get_colleagues_in_unit(self, employee):
+        if not employee.unit_id:
+            return 0
+        count = self.unit_counts.get(employee.unit_id, 0)
+        if self._is_counted(employee, 'unit_id'):
+            count -= 1
+        return count
+
+    def get_colleagues_in_business_function(self, employee):
+        if not employee.business_function_id:
+            return 0
+        count = self.business_function_counts.get(employee.business_function_id, 0)
+        if self._is_counted(employee, 'business_function_id'):
+            count -= 1
+        return count
+
+    def _is_counted(self, employee, field):
+        """Whether employee itself is included in the colleague counter for field"""
+        node = self.nodes.get(employee.id)
+        return node is not None and getattr(node, field) == getattr(employee, field)
@@ -0,0 +1,267 @@
+# api/performance_dashboard.py - Performance dashboard statistics
+
+"""
+Dashboard counts are computed with conditional aggregation:
+one aggregate for the totals, one GROUP BY department and one GROUP BY
+letter grade, however many departments there are.
+
+Users who see every employee read the materialized PerformanceDashboardSummary
+rows instead (one query). Those rows are refreshed per year and department when
+the transaction that changed a performance commits.
+"""
+
+from collections import Counter
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .commit_batch import CommitBatch
+
+logger = logging.getLogger(__name__)
+
+OBJECTIVES_COMPLETED = Q(objectives_employee_approved=True, objectives_manager_approved=True)
+END_YEAR_APPROVED = Q(approval_status='COMPLETED')
+END_YEAR_COMPLETED = END_YEAR_APPROVED & Q(competencies_submitted=True) & ~Q(final_rating='N/A')
+
+# Summary / response field -> aggregate
+STATISTIC_AGGREGATES = {
+    'total': Count('id'),
+    'objectives_completed': Count('id', filter=OBJECTIVES_COMPLETED),
+    'mid_year_completed': Count('id', filter=Q(mid_year_completed=True)),
+    'end_year_completed': Count('id', filter=END_YEAR_COMPLETED),
+    'end_year_approved': Count('id', filter=END_YEAR_APPROVED),
+    'pending_employee_approval': Count('id', filter=Q(approval_status='PENDING_EMPLOYEE_APPROVAL')),
+    'pending_manager_approval': Count('id', filter=Q(approval_status='PENDING_MANAGER_APPROVAL')),
+    'need_clarification': Count('id', filter=Q(approval_status='NEED_CLARIFICATION')),
+    # Competency grade distribution counts end_year_completed=True records
+    'graded_total': Count('id', filter=Q(end_year_completed=True)),
+}
+
+
+# Annotation aliases must not shadow model fields (mid_year_completed, end_year_completed)
+_ALIASES = {f'{field}_count': aggregate for field, aggregate in STATISTIC_AGGREGATES.items()}
+
+
+def _counts(row):
+    """Aliased aggregate row -> {STATISTIC_AGGREGATES field: count}"""
+    return {field: row[f'{field}_count'] for field in STATISTIC_AGGREGATES}
+
+
+def _empty_totals():
+    return {field: 0 for field in STATISTIC_AGGREGATES}
+
+
+def _grade_rows(performances, *group_by):
+    return performances.filter(end_year_completed=True).order_by().values(
+        *group_by, 'competencies_letter_grade'
+    ).annotate(count=Count('id')).values_list(*group_by, 'competencies_letter_grade', 'count')
+
+
+def _format_statistics(totals, departments, grades):
+    """
+    totals: aggregate dict, departments: {name: aggregate dict}, grades: Counter
+    """
+    return {
+        'total_employees': totals['total'],
+        'objectives_completed': totals['objectives_completed'],
+        'mid_year_completed': totals['mid_year_completed'],
+        'end_year_completed': totals['end_year_completed'],
+        'pending_employee_approval': totals['pending_employee_approval'],
+        'pending_manager_approval': totals['pending_manager_approval'],
+        'need_clarification': totals['need_clarification'],
+        'by_department': [
+            {
+                'department': name,
+                'total': stats['total'],
+                'objectives_complete': stats['objectives_completed'],
+                'mid_year_complete': stats['mid_year_completed'],
+                'end_year_complete': stats['end_year_approved'],
+            }
+            for name, stats in sorted(departments.items())
+        ],
+        'competency_grade_distribution': {
+            'total': totals['graded_total'],
+            'grades': dict(grades),
+        },
+    }
+
+
+def aggregate_statistics(performances):
+    """Dashboard statistics of a performance queryset - three queries"""
+    performances = performances.order_by()
+
+    totals = _counts(performances.aggregate(**_ALIASES))
+
+    departments = {}
+    for row in performances.values('employee__department__name').annotate(**_ALIASES):
+        if row['employee__department__name']:
+            departments[row['employee__department__name']] = _counts(row)
+
+    grades = Counter()
+    for grade, count in _grade_rows(performances):
+        grades[grade] += count
+
+    return _format_statistics(totals, departments, grades)
+
+
+# ==================== MATERIALIZED SUMMARY ====================
+
+def _year_performances(performance_year_id):
+    from .performance_models import EmployeePerformance
+
+    # Same scope as get_accessible_employees_for_analytics for full access
+    return EmployeePerformance.objects.filter(
+        performance_year_id=performance_year_id,
+        employee__is_deleted=False
+    )
+
+
+def refresh_dashboard_summary(performance_year_id, department_ids=None):
+    """
+    Recompute summary rows of one year - only department_ids when given
+    (None inside department_ids = employees without a department)
+    """
+    from .performance_models import PerformanceYear
+
+    with transaction.atomic():
+        # Refreshes of the same year run one after another, each counting
+        # what the previous one committed
+        locked = PerformanceYear.objects.select_for_update().filter(pk=performance_year_id)
+        if locked.values_list('pk', flat=True).first() is None:
+            return 0
+        return _rebuild_summary_rows(performance_year_id, department_ids)
+
+
+def _rebuild_summary_rows(performance_year_id, department_ids):
+    from .performance_models import PerformanceDashboardSummary
+
+    performances = _year_performances(performance_year_id).order_by()
+    rows = PerformanceDashboardSummary.objects.filter(performance_year_id=performance_year_id)
+
+    if department_ids is not None:
+        department_ids = set(department_ids)
+        department_filter = Q(employee__department_id__in=[d for d in department_ids if d is not None])
+        row_filter = Q(department_id__in=[d for d in department_ids if d is not None])
+        if None in department_ids:
+            department_filter |= Q(employee__department_id__isnull=True)
+            row_filter |= Q(department_id__isnull=True)
+        performances = performances.filter(department_filter)
+        rows = rows.filter(row_filter)
+
+    summaries = {}
+    for row in performances.values('employee__department_id').annotate(**_ALIASES):
+        department_id = row['employee__department_id']
+        summaries[department_id] = PerformanceDashboardSummary(
+            performance_year_id=performance_year_id,
+            department_id=department_id,
+            grade_counts={},
+            **_counts(row)
+        )
+
+    for department_id, grade, count in _grade_rows(performances, 'employee__department_id'):
+        if department_id in summaries:
+            grade_counts = summaries[department_id].grade_counts
+            grade_counts[grade] = grade_counts.get(grade, 0) + count
+
+    rows.delete()
+    PerformanceDashboardSummary.objects.bulk_create(summaries.values())
+    return len(summaries)
+
+
+def get_summary_statistics(performance_year):
+    """Dashboard statistics of every employee from the summary rows"""
+    from .performance_models import PerformanceDashboardSummary
+
+    summaries = list(
+        PerformanceDashboardSummary.objects.filter(
+            performance_year=performance_year
+        ).select_related('department')
+    )
+    if not summaries and _year_performances(performance_year.id).exists():
+        # Not built yet (new year, or rows never materialized)
+        refresh_dashboard_summary(performance_year.id)
+        return get_summary_statistics(performance_year)
+
+    totals = _empty_totals()
+    departments = {}
+    grades = Counter()
+
+    for summary in summaries:
+        stats = {field: getattr(summary, field) for field in STATISTIC_AGGREGATES}
+        for field, value in stats.items():
+            totals[field] += value
+        grades.update(summary.grade_counts)
+
+        if summary.department and summary.department.name:
+            # Departments of different business functions can share a name
+            merged = departments.setdefault(summary.department.name, _empty_totals())
+            for field, value in stats.items():
+                merged[field] += value
+
+    return _format_statistics(totals, departments, grades)
+
+
+# ==================== STALE TRACKING ====================
+
+class DashboardSummaryRefresh(CommitBatch):
+    """
+    Summary rows touched by one transaction, refreshed once on commit
+    (right away in autocommit mode)
+    """
+
+    CONNECTION_ATTR = '_performance_dashboard_refresh'
+
+    def __init__(self):
+        super().__init__()
+        self.performance_ids = set()
+        # performance year id -> department ids, or None for the whole year
+        self.years = {}
+
+    def add_year(self, performance_year_id, department_ids=None):
+        if department_ids is None or self.years.get(performance_year_id, set()) is None:
+            self.years[performance_year_id] = None
+        else:
+            self.years.setdefault(performance_year_id, set()).update(department_ids)
+
+    def run(self):
+        from .performance_models import EmployeePerformance
+
+        try:
+            if self.performance_ids:
+                for year_id, department_id in EmployeePerformance.objects.filter(
+                    pk__in=self.performance_ids
+                ).order_by().values_list('performance_year_id', 'employee__department_id').distinct():
+                    self.add_year(year_id, {department_id})
+
+            for year_id, department_ids in self.years.items():
+                refresh_dashboard_summary(year_id, department_ids)
+        except Exception as e:
+            logger.error(f"❌ Performance dashboard summary refresh failed: {e}", exc_info=True)
+
+
+def mark_performances_changed(performance_ids):
+    pending = DashboardSummaryRefresh.current()
+    pending.performance_ids.update(performance_ids)
+    pending.flush_if_autocommit()
+
+
+def mark_years_changed(performance_year_ids):
+    """Whole years - deletions, employee moves, bulk updates"""
+    pending = DashboardSummaryRefresh.current()
+    for year_id in performance_year_ids:
+        pending.add_year(year_id)
+    pending.flush_if_autocommit()
+
+
+def mark_employees_changed(employee_ids):
+    """Department / deletion changes move an employee's performances between rows"""
+    from .performance_models import EmployeePerformance
+
+    year_ids = set(
+        EmployeePerformance.objects.filter(employee_id__in=employee_ids).order_by().values_list(
+            'performance_year_id', flat=True
+        ).distinct()
+    )
+    if year_ids:
+        mark_years_changed(year_ids)
@@ -186,31 +186,16 @@ class EvaluationScale(models.Model):
     def get_rating_by_percentage(cls, percentage):
         """
         ✅ IMPROVED: Find the correct rating scale for given percentage
+        (compiled, cached table - no query per call)
         """
-        try:
-            percentage = float(percentage)
-            
-            # ✅ Normal lookup with explicit ordering
-            rating = cls.objects.filter(
-                range_min__lte=percentage,
-                range_max__gte=percentage,
-                is_active=True
-            ).order_by('range_min').first()
-            
-            if rating:
-                return rating
-            
-            # ✅ Fallback for edge cases
-            # If percentage is below all ranges
-            if percentage < 1:
-                return cls.objects.filter(is_active=True).order_by('range_min').first()
-            
-            # If percentage is above all ranges (>500%)
-            return cls.objects.filter(is_active=True).order_by('-range_max').first()
-            
-        except Exception as e:
-            logger.error(f"❌ Error getting rating for {percentage}%: {e}")
-            return None
+        from .grade_tables import get_evaluation_scale_table
+        return get_evaluation_scale_table().rating_for(percentage)
+    
+    @classmethod
+    def ratings_for(cls, percentages):
+        """Rating scales for many percentages, in the same order"""
+        from .grade_tables import get_evaluation_scale_table
+        return get_evaluation_scale_table().ratings_for(percentages)
 
 class EvaluationTargetConfig(models.Model):
     """Evaluation Target Configuration - REMOVED competency_score_target"""
@@ -344,13 +329,29 @@ class EmployeePerformance(models.Model):
     def __str__(self):
         return f"{self.employee.full_name} - {self.performance_year.year}"
     
+    # Rating columns read by apply_scores (one row per competency rating)
+    COMPETENCY_SCORE_FIELDS = (
+        'behavioral_competency_id',
+        'behavioral_competency__group__name',
+        'leadership_item_id',
+        'leadership_item__child_group_id',
+        'leadership_item__child_group__main_group__name',
+        'required_level',
+        'end_year_rating__value',
+    )
+    
+    # Fields written by apply_scores
+    SCORE_FIELDS = [
+        'total_objectives_score', 'objectives_percentage',
+        'group_competency_scores', 'total_competencies_required_score',
+        'total_competencies_actual_score', 'competencies_percentage',
+        'competencies_letter_grade', 'overall_weighted_percentage', 'final_rating',
+    ]
+    
     def calculate_scores(self):
         """
         ✅ FIXED: Ensure final_rating is ALWAYS calculated
         """
-        from collections import defaultdict
-     
-        
         eval_target = EvaluationTargetConfig.get_active_config()
         weight_config = PerformanceWeightConfig.objects.filter(
             position_group=self.employee.position_group
@@ -360,13 +361,27 @@ class EmployeePerformance(models.Model):
             logger.warning(f"❌ No weight config for {self.employee.position_group}")
             return
         
+        objective_scores = self.objectives.filter(is_cancelled=False).values_list('calculated_score', flat=True)
+        competency_rows = self.competency_ratings.values_list(*self.COMPETENCY_SCORE_FIELDS)
+        
+        self.apply_scores(objective_scores, competency_rows, eval_target, weight_config)
+        self.save()
+    
+    def apply_scores(self, objective_scores, competency_rows, eval_target, weight_config):
+        """
+        Set score fields from preloaded data without saving
+        
+        objective_scores: calculated_score of non-cancelled objectives
+        competency_rows: tuples of COMPETENCY_SCORE_FIELDS
+        """
+        from collections import defaultdict
+        
         # ========== OBJECTIVES CALCULATION ==========
-        objectives = self.objectives.filter(is_cancelled=False)
         obj_score = 0
         
-        for obj in objectives:
-            if obj.calculated_score and obj.calculated_score > 0:
-                obj_score += float(obj.calculated_score)
+        for calculated_score in objective_scores:
+            if calculated_score and calculated_score > 0:
+                obj_score += float(calculated_score)
         
         self.total_objectives_score = round(obj_score, 2)
         self.objectives_percentage = round(
@@ -376,27 +391,22 @@ class EmployeePerformance(models.Model):
 
         
         # ========== COMPETENCIES CALCULATION ==========
-        competencies = self.competency_ratings.select_related(
-            'behavioral_competency__group',
-            'leadership_item',
-            'end_year_rating'
-        ).all()
-        
         group_data = defaultdict(lambda: {'required_total': 0, 'actual_total': 0, 'count': 0})
         total_required = 0
         total_actual = 0
         
-        for comp in competencies:
+        for (behavioral_id, behavioral_group, leadership_id, child_group_id,
+             main_group, required_level, rating_value) in competency_rows:
             # ✅ Handle both behavioral and leadership competencies
-            if comp.behavioral_competency:
-                group_name = comp.behavioral_competency.group.name
-            elif comp.leadership_item:
-                group_name = comp.leadership_item.child_group.main_group.name if comp.leadership_item.child_group else 'Leadership'
+            if behavioral_id:
+                group_name = behavioral_group
+            elif leadership_id:
+                group_name = main_group if child_group_id else 'Leadership'
             else:
                 continue
                 
-            required = comp.required_level or 0
-            actual = comp.end_year_rating.value if comp.end_year_rating else 0
+            required = required_level or 0
+            actual = rating_value or 0
             
             group_data[group_name]['required_total'] += required
             group_data[group_name]['actual_total'] += actual
@@ -451,8 +461,6 @@ class EmployeePerformance(models.Model):
                 self.final_rating = 'N/A'
                 logger.error(f"❌ No rating scales found!")
         
-        self.save()
-        
      
 class EmployeeObjective(models.Model):
     """Employee Objectives - UNCHANGED"""
@@ -749,4 +757,85 @@ class PerformanceActivityLog(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.performance.employee.full_name} - {self.action}"
\ No newline at end of file
+        return f"{self.performance.employee.full_name} - {self.action}"
+
+class PerformanceDashboardSummary(models.Model):
+    """
+    Materialized dashboard counts per performance year and department.
+    Kept up to date by performance_dashboard.py - never edit by hand.
+    """
+    performance_year = models.ForeignKey(
+        PerformanceYear,
+        on_delete=models.CASCADE,
+        related_name='dashboard_summaries'
+    )
+    # NULL = employees without a department (counted in the totals only)
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='performance_dashboard_summaries'
+    )
+    
+    total = models.IntegerField(default=0)
+    objectives_completed = models.IntegerField(default=0)
+    mid_year_completed = models.IntegerField(default=0)
+    # approval_status COMPLETED, competencies submitted and rated
+    end_year_completed = models.IntegerField(default=0)
+    # approval_status COMPLETED only (department breakdown)
+    end_year_approved = models.IntegerField(default=0)
+    pending_employee_approval = models.IntegerField(default=0)
+    pending_manager_approval = models.IntegerField(default=0)
+    need_clarification = models.IntegerField(default=0)
+    
+    # Competency letter grades of end_year_completed performances
+    graded_total = models.IntegerField(default=0)
+    grade_counts = models.JSONField(default=dict, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'performance_dashboard_summaries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['performance_year', 'department'],
+                name='unique_dashboard_summary_department'
+            ),
+            # NULLs are distinct in the constraint above - one no-department row per year
+            models.UniqueConstraint(
+                fields=['performance_year'],
+                condition=models.Q(department__isnull=True),
+                name='unique_dashboard_summary_no_department'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.performance_year} - {self.department or 'No department'}"
+
+
+class ScoreRecalculationJob(models.Model):
+    """
+    Progress of one background score recalculation (see score_recalculation.py).
+    Chunk tasks add to the counters with F() updates, so parallel chunks never
+    lose an increment.
+    """
+    job_id = models.CharField(max_length=32, unique=True)
+    kind = models.CharField(max_length=20)
+    year = models.IntegerField(null=True, blank=True)
+    
+    total = models.IntegerField(default=0)
+    chunks = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    updated = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'score_recalculation_jobs'
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"{self.kind} recalculation {self.job_id} ({self.processed}/{self.total})"
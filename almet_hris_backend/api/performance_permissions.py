@@ -4,25 +4,11 @@ from functools import wraps
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Q
+from .access_scope import get_access_scope
 
 def is_admin_user(user):
     """Check if user has Admin role"""
-    try:
-        from .models import Employee
-        from .role_models import EmployeeRole
-        
-        employee = Employee.objects.get(user=user, is_deleted=False)
-        
-        has_admin_role = EmployeeRole.objects.filter(
-            employee=employee,
-            role__name__icontains='Admin',
-            role__is_active=True,
-            is_active=True
-        ).exists()
-        
-        return has_admin_role
-    except:
-        return False
+    return get_access_scope(user).is_admin
 
 
 def get_performance_access(user):
@@ -36,26 +22,19 @@ def get_performance_access(user):
         'accessible_employee_ids': list or None
     }
     """
-    from .models import Employee
+    scope = get_access_scope(user)
     
     # ✅ Admin - Full Access
-    if is_admin_user(user):
-        try:
-            employee = Employee.objects.get(user=user, is_deleted=False)
-        except Employee.DoesNotExist:
-            employee = None
-        
+    if scope.is_admin:
         return {
             'can_view_all': True,
             'is_manager': True,
             'is_admin': True,
-            'employee': employee,
+            'employee': scope.employee,
             'accessible_employee_ids': None  # None means ALL
         }
     
-    try:
-        employee = Employee.objects.get(user=user, is_deleted=False)
-    except Employee.DoesNotExist:
+    if not scope.has_employee:
         return {
             'can_view_all': False,
             'is_manager': False,
@@ -64,25 +43,14 @@ def get_performance_access(user):
             'accessible_employee_ids': []
         }
     
-    # ✅ Check if manager (has direct reports)
-    direct_reports = Employee.objects.filter(
-        line_manager=employee,
-        is_deleted=False
-    )
-    
-    is_manager = direct_reports.exists()
-    
-    if is_manager:
+    if scope.is_manager:
         # Manager can see: self + direct reports
-        accessible_ids = [employee.id]
-        accessible_ids.extend(list(direct_reports.values_list('id', flat=True)))
-        
         return {
             'can_view_all': False,
             'is_manager': True,
             'is_admin': False,
-            'employee': employee,
-            'accessible_employee_ids': accessible_ids
+            'employee': scope.employee,
+            'accessible_employee_ids': scope.team_employee_ids
         }
     else:
         # ✅ Regular employee - CAN VIEW their own performance
@@ -90,8 +58,8 @@ def get_performance_access(user):
             'can_view_all': False,
             'is_manager': False,
             'is_admin': False,
-            'employee': employee,
-            'accessible_employee_ids': [employee.id]  # Only self
+            'employee': scope.employee,
+            'accessible_employee_ids': [scope.employee_id]  # Only self
         }
 
 
@@ -6,15 +6,12 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from django.utils import timezone
-from django.http import HttpResponse
 import logging
-import io
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 from .performance_models import *
 from .performance_serializers import *
 from .models import Employee
+from .performance_dashboard import aggregate_statistics, get_summary_statistics
+from .assessment_documents import document_response, start_document_export
 
 from .performance_permissions import (
     is_admin_user,
@@ -1585,7 +1582,59 @@ class EmployeePerformanceViewSet(viewsets.ModelViewSet):
                 'final_rating': performance.final_rating
             }
         })
-    
+
+    @action(detail=False, methods=['post'])
+    @admin_only
+    def bulk_recalculate_scores(self, request):
+        """
+        ✅ Recalculate scores of a whole year in background chunks - Admin only
+
+        Body: {"kind": "performance" | "core" | "behavioral" | "leadership", "year": 2025}
+        For assessments "year" is the assessment date year and may be omitted (all).
+        """
+        from .score_recalculation import RECALCULATORS, start_recalculation_job
+
+        kind = request.data.get('kind', 'performance')
+        if kind not in RECALCULATORS:
+            return Response({
+                'error': f"kind must be one of: {', '.join(RECALCULATORS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        year = request.data.get('year')
+        if year in (None, ''):
+            if kind == 'performance':
+                active_year = PerformanceYear.objects.filter(is_active=True).first()
+                if not active_year:
+                    return Response({'error': 'No active performance year'}, status=status.HTTP_400_BAD_REQUEST)
+                year = active_year.year
+            else:
+                year = None
+        else:
+            try:
+                year = int(year)
+            except (TypeError, ValueError):
+                return Response({'error': 'Invalid year'}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = start_recalculation_job(kind, year=year, status=request.data.get('status'))
+        logger.info(f"✅ Score recalculation {job['job_id']} queued: {job['total']} {kind} in {job['chunks']} chunks")
+
+        return Response({
+            'success': True,
+            'message': f"Recalculating {job['total']} records",
+            'job': job
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path='bulk_recalculate_scores/(?P<job_id>[0-9a-f]+)')
+    @admin_only
+    def bulk_recalculate_progress(self, request, job_id=None):
+        """Progress of a bulk score recalculation - Admin only"""
+        from .score_recalculation import get_recalculation_progress
+
+        progress = get_recalculation_progress(job_id)
+        if progress is None:
+            return Response({'error': 'Recalculation job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(progress)
+
     # ==================== OBJECTIVES ENDPOINTS ====================
     
     @action(detail=True, methods=['post'])
@@ -2271,158 +2320,16 @@ class EmployeePerformanceViewSet(viewsets.ModelViewSet):
                 'detail': reason
             }, status=status.HTTP_403_FORBIDDEN)
         
-        wb = openpyxl.Workbook()
-        
-        header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        header_font = Font(bold=True, color='FFFFFF', size=11)
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        ws_summary = wb.active
-        ws_summary.title = 'Summary'
-        
-        ws_summary['A1'] = 'PERFORMANCE REVIEW SUMMARY'
-        ws_summary['A1'].font = Font(bold=True, size=14)
-        
-        row = 3
-        info_data = [
-            ['Employee Name:', performance.employee.full_name],
-            ['Employee ID:', performance.employee.employee_id],
-            ['Department:', performance.employee.department.name if performance.employee.department else 'N/A'],
-            ['Position:', str(performance.employee.position_group) if performance.employee.position_group else 'N/A'],
-            ['Manager:', performance.employee.line_manager.full_name if performance.employee.line_manager else 'N/A'],
-            ['Performance Year:', str(performance.performance_year.year)],
-            ['Status:', performance.get_approval_status_display()],
-        ]
-        
-        for label, value in info_data:
-            ws_summary[f'A{row}'] = label
-            ws_summary[f'A{row}'].font = Font(bold=True)
-            ws_summary[f'B{row}'] = value
-            row += 1
-        
-        row += 2
-        ws_summary[f'A{row}'] = 'PERFORMANCE SCORES'
-        ws_summary[f'A{row}'].font = Font(bold=True, size=12)
-        row += 1
-        
-        scores_data = [
-            ['Objectives Score:', f"{performance.total_objectives_score}"],
-            ['Objectives Percentage:', f"{performance.objectives_percentage}%"],
-            ['Competencies Score:', f"{performance.total_competencies_actual_score} / {performance.total_competencies_required_score}"],
-            ['Competencies Percentage:', f"{performance.competencies_percentage}%"],
-            ['Competencies Letter Grade:', performance.competencies_letter_grade or 'N/A'],
-            ['Overall Percentage:', f"{performance.overall_weighted_percentage}%"],
-            ['Final Rating:', performance.final_rating or 'N/A'],
-        ]
-        
-        for label, value in scores_data:
-            ws_summary[f'A{row}'] = label
-            ws_summary[f'A{row}'].font = Font(bold=True)
-            ws_summary[f'B{row}'] = value
-            row += 1
-        
-        # OBJECTIVES SHEET
-        ws_obj = wb.create_sheet('Objectives')
-        headers = ['#', 'Title', 'Description', 'Weight %', 'Status', 'End-Year Rating', 'Score']
-        for col, header in enumerate(headers, 1):
-            cell = ws_obj.cell(row=1, column=col, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.border = border
-        
-        objectives = performance.objectives.filter(is_cancelled=False).order_by('display_order')
-        for idx, obj in enumerate(objectives, 1):
-            ws_obj.cell(row=idx+1, column=1, value=idx)
-            ws_obj.cell(row=idx+1, column=2, value=obj.title)
-            ws_obj.cell(row=idx+1, column=3, value=obj.description)
-            ws_obj.cell(row=idx+1, column=4, value=obj.weight)
-            ws_obj.cell(row=idx+1, column=5, value=obj.status.label if obj.status else 'N/A')
-            ws_obj.cell(row=idx+1, column=6, value=obj.end_year_rating.name if obj.end_year_rating else 'N/A')
-            ws_obj.cell(row=idx+1, column=7, value=float(obj.calculated_score))
-        
-        # COMPETENCIES SHEET
-        ws_comp = wb.create_sheet('Competencies')
-        headers = ['Group', 'Competency', 'Required Level', 'End-Year Rating', 'Actual Value', 'Gap', 'Notes']
-        for col, header in enumerate(headers, 1):
-            cell = ws_comp.cell(row=1, column=col, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.border = border
-        
-        competencies = performance.competency_ratings.select_related(
-            'behavioral_competency', 
-            'behavioral_competency__group',
-            'leadership_item',
-            'end_year_rating'
-        ).all()
-        
-        for idx, comp in enumerate(competencies, 1):
-            if comp.behavioral_competency:
-                group_name = comp.behavioral_competency.group.name
-                comp_name = comp.behavioral_competency.name
-            elif comp.leadership_item:
-                group_name = comp.leadership_item.child_group.main_group.name if comp.leadership_item.child_group else 'Leadership'
-                comp_name = comp.leadership_item.name
-            else:
-                group_name = 'N/A'
-                comp_name = 'N/A'
-            
-            ws_comp.cell(row=idx+1, column=1, value=group_name)
-            ws_comp.cell(row=idx+1, column=2, value=comp_name)
-            ws_comp.cell(row=idx+1, column=3, value=comp.required_level or 0)
-            ws_comp.cell(row=idx+1, column=4, value=comp.end_year_rating.name if comp.end_year_rating else 'N/A')
-            ws_comp.cell(row=idx+1, column=5, value=comp.actual_value)
-            ws_comp.cell(row=idx+1, column=6, value=comp.gap)
-            ws_comp.cell(row=idx+1, column=7, value=comp.notes or '')
-        
-        # DEVELOPMENT NEEDS SHEET
-        ws_dev = wb.create_sheet('Development Needs')
-        headers = ['Competency Gap', 'Development Activity', 'Progress %', 'Comment']
-        for col, header in enumerate(headers, 1):
-            cell = ws_dev.cell(row=1, column=col, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.border = border
-        
-        dev_needs = performance.development_needs.all()
-        for idx, need in enumerate(dev_needs, 1):
-            ws_dev.cell(row=idx+1, column=1, value=need.competency_gap)
-            ws_dev.cell(row=idx+1, column=2, value=need.development_activity)
-            ws_dev.cell(row=idx+1, column=3, value=need.progress)
-            ws_dev.cell(row=idx+1, column=4, value=need.comment or '')
-        
-        # AUTO-ADJUST COLUMN WIDTHS
-        for ws in [ws_summary, ws_obj, ws_comp, ws_dev]:
-            for column in ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # SAVE AND RETURN
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        filename = f'Performance_{performance.employee.employee_id}_{performance.performance_year.year}.xlsx'
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        return document_response('performance', performance)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_export(self, request):
+        """
+        Export the performance reviews visible to the user (same filters as the list)
+        in the background - ZIP with one workbook per review.
+        Body: ids (optional), department (optional)
+        """
+        return start_document_export(request, 'performance', self.get_queryset())
 
 
 class PerformanceDashboardViewSet(viewsets.ViewSet):
@@ -2454,74 +2361,24 @@ class PerformanceDashboardViewSet(viewsets.ViewSet):
         # ✅ Get accessible employees based on access
         accessible_employees, can_view_all, is_manager = get_accessible_employees_for_analytics(request.user)
         
-        # Filter performances by accessible employees AND year
-        performances = EmployeePerformance.objects.filter(
-            performance_year=perf_year,
-            employee__in=accessible_employees
-        ).select_related('employee', 'employee__department')
-        
-        total_employees = performances.count()
-        
-        objectives_completed = performances.filter(
-            objectives_employee_approved=True,
-            objectives_manager_approved=True
-        ).count()
-        
-        mid_year_completed = performances.filter(mid_year_completed=True).count()
-        
-        # Count only truly completed performances
-        end_year_completed = performances.filter(
-            approval_status='COMPLETED',
-            competencies_submitted=True
-        ).exclude(final_rating='N/A').count()
-        
-        pending_employee_approval = performances.filter(
-            approval_status='PENDING_EMPLOYEE_APPROVAL'
-        ).count()
-        
-        pending_manager_approval = performances.filter(
-            approval_status='PENDING_MANAGER_APPROVAL'
-        ).count()
-        
-        need_clarification = performances.filter(
-            approval_status='NEED_CLARIFICATION'
-        ).count()
-        
-        # Department stats
-        by_department = []
-        accessible_dept_names = performances.values_list(
-            'employee__department__name', 
-            flat=True
-        ).distinct()
-        
-        for dept_name in accessible_dept_names:
-            if not dept_name:
-                continue
-            dept_performances = performances.filter(employee__department__name=dept_name)
-            by_department.append({
-                'department': dept_name,
-                'total': dept_performances.count(),
-                'objectives_complete': dept_performances.filter(
-                    objectives_employee_approved=True,
-                    objectives_manager_approved=True
-                ).count(),
-                'mid_year_complete': dept_performances.filter(mid_year_completed=True).count(),
-                'end_year_complete': dept_performances.filter(
-                    approval_status='COMPLETED'
-                ).count()
-            })
-        
-        # Competency grade distribution
-        competency_grade_distribution = self._get_grade_distribution(performances)
+        # ✅ Full access: materialized summary rows, otherwise conditional aggregation of the team
+        if can_view_all:
+            stats = get_summary_statistics(perf_year)
+        else:
+            stats = aggregate_statistics(EmployeePerformance.objects.filter(
+                performance_year=perf_year,
+                employee__in=accessible_employees
+            ))
+        total_employees = stats['total_employees']
         
         return Response({
             'total_employees': total_employees,
-            'objectives_completed': objectives_completed,
-            'mid_year_completed': mid_year_completed,
-            'end_year_completed': end_year_completed,
-            'pending_employee_approval': pending_employee_approval,
-            'pending_manager_approval': pending_manager_approval,
-            'need_clarification': need_clarification,
+            'objectives_completed': stats['objectives_completed'],
+            'mid_year_completed': stats['mid_year_completed'],
+            'end_year_completed': stats['end_year_completed'],
+            'pending_employee_approval': stats['pending_employee_approval'],
+            'pending_manager_approval': stats['pending_manager_approval'],
+            'need_clarification': stats['need_clarification'],
             'current_period': perf_year.get_current_period(),
             'year': year,
             'can_view_all': can_view_all,
@@ -2543,22 +2400,9 @@ class PerformanceDashboardViewSet(viewsets.ViewSet):
                     'end': perf_year.end_year_review_end
                 }
             },
-            'by_department': by_department,
-            'competency_grade_distribution': competency_grade_distribution
+            'by_department': stats['by_department'],
+            'competency_grade_distribution': stats['competency_grade_distribution']
         })
-    
-    def _get_grade_distribution(self, performances):
-        """Get distribution of competency letter grades"""
-        from collections import Counter
-        
-        completed = performances.filter(end_year_completed=True)
-        grades = completed.values_list('competencies_letter_grade', flat=True)
-        distribution = Counter(grades)
-        
-        return {
-            'total': completed.count(),
-            'grades': dict(distribution)
-        }
 
 class PerformanceNotificationTemplateViewSet(viewsets.ModelViewSet):
     """Performance Notification Templates"""
@@ -1,6 +1,7 @@
 # api/policy_models.py - UPDATED with PolicyCompany Model
 
 from django.db import models
+from django.db.models import Count, Q, Sum
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator
@@ -10,6 +11,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Folder list annotations - PolicyFolderSerializer reads these instead of querying per folder
+POLICY_FOLDER_TOTALS = {
+    'active_policy_count': Count('policies', filter=Q(policies__is_active=True)),
+    'active_total_views': Sum('policies__view_count', filter=Q(policies__is_active=True)),
+    'active_total_downloads': Sum('policies__download_count', filter=Q(policies__is_active=True)),
+}
+
 
 class PolicyCompany(models.Model):
     """
@@ -167,11 +175,11 @@ class PolicyFolder(models.Model):
     
     def get_total_views(self):
         """Get total view count for all policies in folder"""
-        return sum(policy.view_count for policy in self.policies.filter(is_active=True))
+        return self.policies.filter(is_active=True).aggregate(total=Sum('view_count'))['total'] or 0
     
     def get_total_downloads(self):
         """Get total download count for all policies in folder"""
-        return sum(policy.download_count for policy in self.policies.filter(is_active=True))
+        return self.policies.filter(is_active=True).aggregate(total=Sum('download_count'))['total'] or 0
     
     def clean(self):
         """Validate folder data"""
@@ -336,14 +344,14 @@ class CompanyPolicy(models.Model):
         return "Unknown"
     
     def increment_view_count(self):
-        """Increment view counter"""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """Increment view counter (buffered - see api/view_counters.py)"""
+        from .view_counters import record_increment
+        record_increment(self, 'view_count')
     
     def increment_download_count(self):
-        """Increment download counter"""
-        self.download_count += 1
-        self.save(update_fields=['download_count'])
+        """Increment download counter (buffered - see api/view_counters.py)"""
+        from .view_counters import record_increment
+        record_increment(self, 'download_count')
     
     def get_company_name(self):
         """Get the company this policy belongs to"""
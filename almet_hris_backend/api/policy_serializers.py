@@ -2,7 +2,7 @@
 
 from rest_framework import serializers
 from .policy_models import (
-    PolicyFolder, CompanyPolicy, PolicyAcknowledgment, PolicyCompany
+    PolicyFolder, CompanyPolicy, PolicyAcknowledgment, PolicyCompany, POLICY_FOLDER_TOTALS
 )
 from .models import BusinessFunction
 from django.utils import timezone
@@ -98,7 +98,7 @@ class BusinessFunctionWithFoldersSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_folders(self, obj):
-        folders = obj.policy_folders.filter(is_active=True).order_by('name')
+        folders = obj.policy_folders.filter(is_active=True).annotate(**POLICY_FOLDER_TOTALS).order_by('name')
         return PolicyFolderSerializer(folders, many=True, context=self.context).data
     
     def get_folder_count(self, obj):
@@ -152,13 +152,20 @@ class PolicyFolderSerializer(serializers.ModelSerializer):
             return 'policy_company'
         return None
     
+    # Folder lists annotate these (POLICY_FOLDER_TOTALS) - nested folders query them
     def get_policy_count(self, obj):
+        if hasattr(obj, 'active_policy_count'):
+            return obj.active_policy_count
         return obj.get_policy_count()
     
     def get_total_views(self, obj):
+        if hasattr(obj, 'active_total_views'):
+            return obj.active_total_views or 0
         return obj.get_total_views()
     
     def get_total_downloads(self, obj):
+        if hasattr(obj, 'active_total_downloads'):
+            return obj.active_total_downloads or 0
         return obj.get_total_downloads()
     
     def get_created_by_name(self, obj):
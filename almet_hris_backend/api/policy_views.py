@@ -13,7 +13,7 @@ from drf_yasg import openapi
 import logging
 
 from .policy_models import (
-    PolicyFolder, CompanyPolicy, PolicyAcknowledgment, PolicyCompany
+    PolicyFolder, CompanyPolicy, PolicyAcknowledgment, PolicyCompany, POLICY_FOLDER_TOTALS
 )
 from .policy_serializers import (
     PolicyFolderSerializer, PolicyFolderCreateUpdateSerializer,
@@ -157,7 +157,7 @@ class PolicyFolderViewSet(viewsets.ModelViewSet):
     
     queryset = PolicyFolder.objects.select_related(
         'business_function', 'policy_company', 'created_by'
-    ).prefetch_related('policies')
+    ).annotate(**POLICY_FOLDER_TOTALS)
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['business_function', 'policy_company', 'is_active']
@@ -443,11 +443,14 @@ class PolicyStatisticsViewSet(viewsets.ViewSet):
             policy_folders__isnull=False
         ).distinct().count()
         
-        policies = CompanyPolicy.objects.filter(is_active=True)
-        policies_requiring_ack = policies.filter(requires_acknowledgment=True).count()
-        
-        total_views = sum(p.view_count for p in policies)
-        total_downloads = sum(p.download_count for p in policies)
+        totals = CompanyPolicy.objects.filter(is_active=True).aggregate(
+            requiring_ack=Count('id', filter=Q(requires_acknowledgment=True)),
+            views=Sum('view_count'),
+            downloads=Sum('download_count')
+        )
+        policies_requiring_ack = totals['requiring_ack']
+        total_views = totals['views'] or 0
+        total_downloads = totals['downloads'] or 0
         
         return Response({
             'total_policies': total_policies,
@@ -1,6 +1,7 @@
 # api/procedure_models.py
 
 from django.db import models
+from django.db.models import Count, Q, Sum
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator
@@ -10,6 +11,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Folder list annotations - ProcedureFolderSerializer reads these instead of querying per folder
+PROCEDURE_FOLDER_TOTALS = {
+    'active_procedure_count': Count('procedures', filter=Q(procedures__is_active=True)),
+    'active_total_views': Sum('procedures__view_count', filter=Q(procedures__is_active=True)),
+    'active_total_downloads': Sum('procedures__download_count', filter=Q(procedures__is_active=True)),
+}
+
 
 class ProcedureCompany(models.Model):
     """
@@ -145,10 +153,10 @@ class ProcedureFolder(models.Model):
         return self.procedures.filter(is_active=True).count()
     
     def get_total_views(self):
-        return sum(proc.view_count for proc in self.procedures.filter(is_active=True))
+        return self.procedures.filter(is_active=True).aggregate(total=Sum('view_count'))['total'] or 0
     
     def get_total_downloads(self):
-        return sum(proc.download_count for proc in self.procedures.filter(is_active=True))
+        return self.procedures.filter(is_active=True).aggregate(total=Sum('download_count'))['total'] or 0
     
     def clean(self):
         super().clean()
@@ -291,12 +299,12 @@ class CompanyProcedure(models.Model):
         return "Unknown"
     
     def increment_view_count(self):
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        from .view_counters import record_increment
+        record_increment(self, 'view_count')
     
     def increment_download_count(self):
-        self.download_count += 1
-        self.save(update_fields=['download_count'])
+        from .view_counters import record_increment
+        record_increment(self, 'download_count')
     
     def get_company_name(self):
         return self.folder.get_company_name() if self.folder else "Unknown"
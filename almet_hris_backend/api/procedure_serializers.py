@@ -103,13 +103,20 @@ class ProcedureFolderSerializer(serializers.ModelSerializer):
             return 'procedure_company'
         return None
     
+    # Folder lists annotate these (PROCEDURE_FOLDER_TOTALS) - nested folders query them
     def get_procedure_count(self, obj):
+        if hasattr(obj, 'active_procedure_count'):
+            return obj.active_procedure_count
         return obj.get_procedure_count()
     
     def get_total_views(self, obj):
+        if hasattr(obj, 'active_total_views'):
+            return obj.active_total_views or 0
         return obj.get_total_views()
     
     def get_total_downloads(self, obj):
+        if hasattr(obj, 'active_total_downloads'):
+            return obj.active_total_downloads or 0
         return obj.get_total_downloads()
     
     def get_created_by_name(self, obj):
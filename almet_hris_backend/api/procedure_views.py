@@ -11,7 +11,7 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 import logging
 
-from .procedure_models import ProcedureFolder, CompanyProcedure, ProcedureCompany
+from .procedure_models import ProcedureFolder, CompanyProcedure, ProcedureCompany, PROCEDURE_FOLDER_TOTALS
 from .procedure_serializers import (
     ProcedureFolderSerializer, ProcedureFolderCreateUpdateSerializer,
     CompanyProcedureListSerializer, CompanyProcedureDetailSerializer,
@@ -127,7 +127,7 @@ class ProcedureFolderViewSet(viewsets.ModelViewSet):
     
     queryset = ProcedureFolder.objects.select_related(
         'business_function', 'procedure_company', 'created_by'
-    ).prefetch_related('procedures')
+    ).annotate(**PROCEDURE_FOLDER_TOTALS)
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['business_function', 'procedure_company', 'is_active']
@@ -320,10 +320,12 @@ class ProcedureStatisticsViewSet(viewsets.ViewSet):
             procedure_folders__isnull=False
         ).distinct().count()
         
-        procedures = CompanyProcedure.objects.filter(is_active=True)
-        
-        total_views = sum(p.view_count for p in procedures)
-        total_downloads = sum(p.download_count for p in procedures)
+        totals = CompanyProcedure.objects.filter(is_active=True).aggregate(
+            views=Sum('view_count'),
+            downloads=Sum('download_count')
+        )
+        total_views = totals['views'] or 0
+        total_downloads = totals['downloads'] or 0
         
         return Response({
             'total_procedures': total_procedures,
@@ -0,0 +1,302 @@
+# api/score_recalculation.py - Bulk recalculation of performance and competency assessment scores
+
+from collections import defaultdict
+from datetime import timedelta
+import logging
+import uuid
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Objects recalculated per chunk (one Celery task each)
+RECALCULATION_CHUNK_SIZE = 200
+
+
+def _performance_model():
+    from .performance_models import EmployeePerformance
+    return EmployeePerformance
+
+
+def _core_model():
+    from .competency_assessment_models import EmployeeCoreAssessment
+    return EmployeeCoreAssessment
+
+
+def _behavioral_model():
+    from .competency_assessment_models import EmployeeBehavioralAssessment
+    return EmployeeBehavioralAssessment
+
+
+def _leadership_model():
+    from .competency_assessment_models import EmployeeLeadershipAssessment
+    return EmployeeLeadershipAssessment
+
+
+# kind -> model loader
+RECALCULATION_MODELS = {
+    'performance': _performance_model,
+    'core': _core_model,
+    'behavioral': _behavioral_model,
+    'leadership': _leadership_model,
+}
+
+
+def get_target_ids(kind, year=None, status=None):
+    """
+    Ids to recalculate: performances of a PerformanceYear, or
+    assessments dated in that year (all of them when year is None)
+    """
+    model = RECALCULATION_MODELS[kind]()
+    queryset = model.objects.all()
+
+    if kind == 'performance':
+        if year is not None:
+            queryset = queryset.filter(performance_year__year=year)
+    else:
+        if year is not None:
+            queryset = queryset.filter(assessment_date__year=year)
+        if status:
+            queryset = queryset.filter(status=status)
+
+    return list(queryset.order_by('pk').values_list('pk', flat=True))
+
+
+def _group_rows(rating_model, parent_field, parent_ids, fields):
+    """parent id -> list of rating rows, one query"""
+    rows = defaultdict(list)
+    queryset = rating_model.objects.filter(
+        **{f'{parent_field}__in': parent_ids}
+    ).order_by(parent_field, 'pk').values_list(f'{parent_field}', *fields)
+
+    for parent_id, *values in queryset:
+        rows[parent_id].append(tuple(values))
+    return rows
+
+
+def _save_scores(model, objects, fields):
+    """bulk_update only the score fields (and updated_at, which bulk_update does not touch)"""
+    if not objects:
+        return
+
+    now = timezone.now()
+    for obj in objects:
+        obj.updated_at = now
+
+    with transaction.atomic():
+        model.objects.bulk_update(objects, fields + ['updated_at'], batch_size=RECALCULATION_CHUNK_SIZE)
+
+
+def recalculate_performances(performance_ids):
+    """
+    Recalculate EmployeePerformance scores in a handful of queries:
+    performances, weight configs, objective scores and competency ratings
+    are each loaded once for the whole batch.
+    """
+    from .performance_models import (
+        EmployeePerformance, EmployeeObjective, EmployeeCompetencyRating,
+        EvaluationTargetConfig, PerformanceWeightConfig
+    )
+
+    performances = list(
+        EmployeePerformance.objects.filter(pk__in=performance_ids).select_related('employee').only(
+            'pk', 'performance_year_id', 'employee__id', 'employee__position_group_id',
+            *EmployeePerformance.SCORE_FIELDS
+        )
+    )
+    if not performances:
+        return {'updated': 0, 'skipped': 0}
+
+    eval_target = EvaluationTargetConfig.get_active_config()
+    weight_configs = {
+        config.position_group_id: config
+        for config in PerformanceWeightConfig.objects.filter(
+            position_group_id__in={p.employee.position_group_id for p in performances}
+        )
+    }
+
+    objective_scores = defaultdict(list)
+    for performance_id, calculated_score in EmployeeObjective.objects.filter(
+        performance_id__in=performance_ids, is_cancelled=False
+    ).values_list('performance_id', 'calculated_score'):
+        objective_scores[performance_id].append(calculated_score)
+
+    competency_rows = _group_rows(
+        EmployeeCompetencyRating, 'performance_id', performance_ids,
+        EmployeePerformance.COMPETENCY_SCORE_FIELDS
+    )
+
+    updated, skipped = [], 0
+    for performance in performances:
+        weight_config = weight_configs.get(performance.employee.position_group_id)
+        if not weight_config:
+            logger.warning(f"❌ No weight config for position group {performance.employee.position_group_id}")
+            skipped += 1
+            continue
+
+        performance.apply_scores(
+            objective_scores.get(performance.pk, []),
+            competency_rows.get(performance.pk, []),
+            eval_target,
+            weight_config
+        )
+        updated.append(performance)
+
+    _save_scores(EmployeePerformance, updated, EmployeePerformance.SCORE_FIELDS)
+
+    # bulk_update sends no post_save - refresh the dashboard summary here
+    if updated:
+        from .performance_dashboard import mark_years_changed
+        mark_years_changed({performance.performance_year_id for performance in updated})
+
+    return {'updated': len(updated), 'skipped': skipped}
+
+
+def _recalculate_assessments(model, rating_model, assessment_ids):
+    assessments = list(model.objects.filter(pk__in=assessment_ids).only('pk', 'employee_id', *model.SCORE_FIELDS))
+    rows = _group_rows(rating_model, 'assessment_id', assessment_ids, model.RATING_SCORE_FIELDS)
+
+    for assessment in assessments:
+        assessment.apply_scores(rows.get(assessment.pk, []))
+
+    _save_scores(model, assessments, model.SCORE_FIELDS)
+
+    # bulk_update sends no post_save - refresh the assessment summary here
+    if assessments:
+        from .assessment_summary import assessment_type_of, mark_assessments_changed
+        mark_assessments_changed(assessment_type_of(model), {assessment.employee_id for assessment in assessments})
+
+    return {'updated': len(assessments), 'skipped': 0}
+
+
+def recalculate_core_assessments(assessment_ids):
+    from .competency_assessment_models import EmployeeCoreAssessment, EmployeeCoreCompetencyRating
+    return _recalculate_assessments(EmployeeCoreAssessment, EmployeeCoreCompetencyRating, assessment_ids)
+
+
+def recalculate_behavioral_assessments(assessment_ids):
+    from .competency_assessment_models import EmployeeBehavioralAssessment, EmployeeBehavioralCompetencyRating
+    return _recalculate_assessments(EmployeeBehavioralAssessment, EmployeeBehavioralCompetencyRating, assessment_ids)
+
+
+def recalculate_leadership_assessments(assessment_ids):
+    from .competency_assessment_models import EmployeeLeadershipAssessment, EmployeeLeadershipCompetencyRating
+    return _recalculate_assessments(EmployeeLeadershipAssessment, EmployeeLeadershipCompetencyRating, assessment_ids)
+
+
+RECALCULATORS = {
+    'performance': recalculate_performances,
+    'core': recalculate_core_assessments,
+    'behavioral': recalculate_behavioral_assessments,
+    'leadership': recalculate_leadership_assessments,
+}
+
+
+def recalculate_chunk(kind, ids):
+    if kind not in RECALCULATORS:
+        raise ValueError(f"Unknown recalculation kind: {kind}")
+    return RECALCULATORS[kind](list(ids))
+
+
+def iter_id_chunks(ids, size=RECALCULATION_CHUNK_SIZE):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def recalculate_all(kind, ids, progress_callback=None):
+    """Recalculate ids chunk by chunk in this process"""
+    totals = {'updated': 0, 'skipped': 0}
+    done = 0
+
+    for chunk in iter_id_chunks(ids):
+        result = recalculate_chunk(kind, chunk)
+        totals['updated'] += result['updated']
+        totals['skipped'] += result['skipped']
+        done += len(chunk)
+        if progress_callback:
+            progress_callback(done, len(ids))
+
+    return totals
+
+
+# ==================== BACKGROUND JOBS ====================
+
+# Finished jobs are kept this long for progress lookups
+JOB_RETENTION_DAYS = 30
+
+
+def _job_model():
+    from .performance_models import ScoreRecalculationJob
+    return ScoreRecalculationJob
+
+
+def start_recalculation_job(kind, year=None, status=None):
+    """
+    Queue one Celery task per chunk; the chunks run in parallel on the workers.
+    Returns the job description used for progress reporting.
+    """
+    from .tasks import recalculate_scores_chunk
+
+    ScoreRecalculationJob = _job_model()
+    ScoreRecalculationJob.objects.filter(
+        started_at__lt=timezone.now() - timedelta(days=JOB_RETENTION_DAYS)
+    ).delete()
+
+    ids = get_target_ids(kind, year=year, status=status)
+    chunks = list(iter_id_chunks(ids))
+    job = ScoreRecalculationJob.objects.create(
+        job_id=uuid.uuid4().hex,
+        kind=kind,
+        year=year,
+        total=len(ids),
+        chunks=len(chunks),
+    )
+
+    for chunk in chunks:
+        # UUID primary keys are not JSON serializable
+        recalculate_scores_chunk.delay(job.job_id, kind, [str(pk) for pk in chunk])
+
+    return _job_data(job)
+
+
+def record_chunk_progress(job_id, processed, updated=0, skipped=0, failed=0):
+    """
+    Add one chunk's counts to its job row - a single UPDATE with F() expressions,
+    so parallel chunks never overwrite each other's counts
+    """
+    if not job_id:
+        return
+    _job_model().objects.filter(job_id=job_id).update(
+        processed=F('processed') + processed,
+        updated=F('updated') + updated,
+        skipped=F('skipped') + skipped,
+        failed=F('failed') + failed,
+    )
+
+
+def _job_data(job):
+    return {
+        'job_id': job.job_id,
+        'kind': job.kind,
+        'year': job.year,
+        'total': job.total,
+        'chunks': job.chunks,
+        'started_at': job.started_at.isoformat(),
+        'processed': job.processed,
+        'updated': job.updated,
+        'skipped': job.skipped,
+        'failed': job.failed,
+    }
+
+
+def get_recalculation_progress(job_id):
+    job = _job_model().objects.filter(job_id=job_id).first()
+    if job is None:
+        return None
+
+    job = _job_data(job)
+    job['percentage'] = round(job['processed'] / job['total'] * 100, 1) if job['total'] else 100.0
+    job['completed'] = job['processed'] >= job['total']
+    return job
@@ -0,0 +1,244 @@
+# api/search_index.py - Search documents for employee, vacancy and job description search
+
+"""
+Each searchable model keeps a denormalized, lowercased search_document built
+from its own text fields and the names of its business function, department,
+unit and job function. Search is one LIKE '%term%' per term on that column,
+which PostgreSQL serves from a pg_trgm GIN index (migration 0183); on SQLite
+the same lookup runs as a plain scan, so results are identical locally.
+
+Documents are rebuilt in bulk with values() + bulk_update (no save(), no
+signals) whenever a row or one of the names it copies changes.
+"""
+
+import logging
+
+from django.apps import apps
+from django.db.models import Case, IntegerField, Q, Value, When
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .commit_batch import CommitBatch
+
+logger = logging.getLogger(__name__)
+
+# Rows rebuilt per query
+SEARCH_CHUNK_SIZE = 1000
+
+# Longer queries are cut - every term is one LIKE on the document
+MAX_SEARCH_TERMS = 8
+
+# model label -> (source fields, exact match field, name field)
+SEARCH_SOURCES = {
+    'api.Employee': (
+        (
+            'full_name', 'employee_id', 'father_name', 'job_title', 'phone', 'user__email',
+            'business_function__name', 'department__name', 'unit__name', 'job_function__name',
+        ),
+        'employee_id', 'full_name'
+    ),
+    'api.VacantPosition': (
+        (
+            'position_id', 'job_title', 'notes',
+            'business_function__name', 'department__name', 'unit__name', 'job_function__name',
+        ),
+        'position_id', 'job_title'
+    ),
+    'api.JobDescription': (
+        (
+            'job_title', 'job_purpose',
+            'business_function__name', 'department__name', 'unit__name', 'job_function__name',
+        ),
+        None, 'job_title'
+    ),
+}
+
+# Model whose name / email is copied -> (foreign key, searchable models that copy it)
+NAME_SOURCES = {
+    'api.BusinessFunction': ('business_function', tuple(SEARCH_SOURCES)),
+    'api.Department': ('department', tuple(SEARCH_SOURCES)),
+    'api.Unit': ('unit', tuple(SEARCH_SOURCES)),
+    'api.JobFunction': ('job_function', tuple(SEARCH_SOURCES)),
+    'auth.User': ('user', ('api.Employee',)),
+}
+
+
+def normalize_search_text(value):
+    """Lowercased, whitespace-collapsed text"""
+    if value is None:
+        return ''
+    return ' '.join(str(value).lower().split())
+
+
+def build_search_document(values):
+    """Leading space marks the start of the first word, so ' term' is a word-prefix match"""
+    parts = [normalize_search_text(value) for value in values]
+    return ' ' + ' '.join(part for part in parts if part)
+
+
+def search_terms(search):
+    terms = []
+    for term in normalize_search_text(search).split(' '):
+        if term and term not in terms:
+            terms.append(term)
+    return terms[:MAX_SEARCH_TERMS]
+
+
+def _sources(model):
+    return SEARCH_SOURCES[model._meta.label]
+
+
+# ==================== QUERYING ====================
+
+def search_q(search, prefix=''):
+    """
+    Every term must appear in the document (in any field, in any order).
+    prefix targets a related model, e.g. 'employee__'.
+    """
+    condition = Q()
+    for term in search_terms(search):
+        condition &= Q(**{f'{prefix}search_document__contains': term})
+    return condition
+
+
+def search_rank(model, search):
+    """
+    3 - exact id match (employee / position id), 2 - name starts with the query,
+    1 - a term starts a word, 0 - substring match only
+    """
+    terms = search_terms(search)
+    if not terms:
+        return Value(0, output_field=IntegerField())
+
+    _, exact_field, name_field = _sources(model)
+    query = ' '.join(terms)
+
+    whens = []
+    if exact_field:
+        whens.append(When(**{f'{exact_field}__iexact': query, 'then': Value(3)}))
+    whens.append(When(**{f'{name_field}__istartswith': query, 'then': Value(2)}))
+    whens.append(When(Q(*[Q(search_document__contains=f' {term}') for term in terms], _connector=Q.OR), then=Value(1)))
+    return Case(*whens, default=Value(0), output_field=IntegerField())
+
+
+def apply_search(queryset, search, ranked=False):
+    """
+    Filter queryset by search and annotate search_rank.
+    ranked=True orders best matches first (existing ordering breaks ties).
+    """
+    if not search_terms(search):
+        return queryset
+
+    queryset = queryset.filter(search_q(search)).annotate(
+        search_rank=search_rank(queryset.model, search)
+    )
+    if ranked:
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        queryset = queryset.order_by('-search_rank', *ordering)
+    return queryset
+
+
+class SearchDocumentFilter(filters.SearchFilter):
+    """
+    ?search= over search_document (replaces SearchFilter + search_fields).
+    Best matches come first unless ?ordering= is given - list it after OrderingFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param, '')
+        ranked = not request.query_params.get(api_settings.ORDERING_PARAM)
+        return apply_search(queryset, search, ranked=ranked)
+
+
+# ==================== MAINTENANCE ====================
+
+def refresh_search_documents(model, ids=None, **filters):
+    """
+    Rebuild search_document for rows of model (ids / filters, default: all).
+    Returns rows changed.
+    """
+    fields, _, _ = _sources(model)
+    queryset = model._base_manager.filter(**filters).order_by()
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return 0
+        queryset = queryset.filter(pk__in=ids)
+
+    changed = []
+    updated = 0
+    for row in queryset.values_list('pk', 'search_document', *fields).iterator(chunk_size=SEARCH_CHUNK_SIZE):
+        document = build_search_document(row[2:])
+        if document != row[1]:
+            changed.append(model(pk=row[0], search_document=document))
+        if len(changed) >= SEARCH_CHUNK_SIZE:
+            model._base_manager.bulk_update(changed, ['search_document'])
+            updated += len(changed)
+            changed = []
+
+    if changed:
+        model._base_manager.bulk_update(changed, ['search_document'])
+        updated += len(changed)
+    return updated
+
+
+def refresh_for_name_change(lookup_model, lookup_ids):
+    """Rows that copy the name of a business function / department / unit / job function (or a user's email)"""
+    field, labels = NAME_SOURCES[lookup_model._meta.label]
+    for label in labels:
+        refresh_search_documents(apps.get_model(label), **{f'{field}_id__in': list(lookup_ids)})
+
+
+def rebuild_search_documents(progress_callback=None):
+    """Rebuild every search document"""
+    totals = {}
+    for label in SEARCH_SOURCES:
+        totals[label] = refresh_search_documents(apps.get_model(label))
+        if progress_callback:
+            progress_callback(label, totals[label])
+    return totals
+
+
+# ==================== CHANGE TRACKING ====================
+
+class SearchDocumentRefresh(CommitBatch):
+    """
+    Rows whose search documents went stale in one transaction, rebuilt once on
+    commit (right away in autocommit mode)
+    """
+
+    CONNECTION_ATTR = '_search_document_refresh'
+
+    def __init__(self):
+        super().__init__()
+        # model label -> ids
+        self.ids = {}
+        # lookup model label -> ids whose name may have changed
+        self.name_ids = {}
+
+    def run(self):
+        for label, ids in self.name_ids.items():
+            try:
+                refresh_for_name_change(apps.get_model(label), ids)
+            except Exception as e:
+                logger.error(f"❌ Search document refresh failed ({label} names): {e}", exc_info=True)
+
+        for label, ids in self.ids.items():
+            try:
+                refresh_search_documents(apps.get_model(label), ids)
+            except Exception as e:
+                logger.error(f"❌ Search document refresh failed ({label}): {e}", exc_info=True)
+
+
+def _mark(attr, label, ids):
+    pending = SearchDocumentRefresh.current()
+    getattr(pending, attr).setdefault(label, set()).update(ids)
+    pending.flush_if_autocommit()
+
+
+def mark_search_documents_stale(model, ids):
+    _mark('ids', model._meta.label, ids)
+
+
+def mark_names_changed(lookup_model, ids):
+    _mark('name_ids', lookup_model._meta.label, ids)
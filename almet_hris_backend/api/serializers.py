@@ -15,6 +15,7 @@ import os
 from django.db import models 
 logger = logging.getLogger(__name__)
 from .job_description_models import JobDescription
+from .org_hierarchy import OrgHierarchy
 
 class UserSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
@@ -1210,7 +1211,7 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
     transfers_summary = serializers.SerializerMethodField()
     class Meta:
         model = Employee
-        fields = '__all__'
+        exclude = ['search_document']  # Internal search text
     def to_representation(self, instance):
         """Format text fields to title case"""
         data = super().to_representation(instance)
@@ -2695,7 +2696,8 @@ class EmployeeCreateUpdateSerializer(serializers.ModelSerializer):
             'status', 
             'created_by', 
             'updated_by', 
-            'profile_image'
+            'profile_image',
+            'search_document'
         ]
         read_only_fields = [
         
@@ -3242,6 +3244,14 @@ class OrgChartNodeSerializer(serializers.ModelSerializer):
         
         return data
     
+    def _get_hierarchy(self):
+        """Shared in-memory org hierarchy, built once per serialization"""
+        hierarchy = self.context.get('org_hierarchy')
+        if hierarchy is None:
+            hierarchy = OrgHierarchy.build()
+            self.context['org_hierarchy'] = hierarchy
+        return hierarchy
+    
     def get_employee_details(self, obj):
         """Get additional employee details safely"""
         try:
@@ -3274,7 +3284,7 @@ class OrgChartNodeSerializer(serializers.ModelSerializer):
                 'grading_display': grading_display,
                 'tags': [
                     {'name': tag.name, 'color': tag.color} 
-                    for tag in obj.tags.filter(is_active=True)
+                    for tag in obj.tags.all() if tag.is_active
                 ],
                 'is_visible_in_org_chart': obj.is_visible_in_org_chart,
                 'created_at': obj.created_at,
@@ -3297,11 +3307,7 @@ class OrgChartNodeSerializer(serializers.ModelSerializer):
     def get_direct_reports_details(self, obj):
         """NEW: Get detailed information about direct reports"""
         try:
-            direct_reports = Employee.objects.filter(
-                line_manager=obj,
-                status__allows_org_chart=True,
-                is_deleted=False
-            ).select_related('user', 'department', 'position_group', 'status')
+            direct_reports = self._get_hierarchy().get_direct_reports(obj.id)
             
             reports_data = []
             for report in direct_reports:
@@ -3327,10 +3333,11 @@ class OrgChartNodeSerializer(serializers.ModelSerializer):
     def get_manager_info(self, obj):
         """Get manager information safely"""
         try:
-            if not obj.line_manager:
+            if not obj.line_manager_id:
                 return None
             
-            manager = obj.line_manager
+            # Prefer the hierarchy node (user/department already joined)
+            manager = self._get_hierarchy().get_node(obj.line_manager_id) or obj.line_manager
             return {
                 'id': manager.id,  # ✅ Internal ID
                 'employee_id': manager.employee_id,  # ✅ Business ID
@@ -3377,11 +3384,7 @@ class OrgChartNodeSerializer(serializers.ModelSerializer):
     def get_direct_reports(self, obj):
         """Get number of direct reports safely"""
         try:
-            return Employee.objects.filter(
-                line_manager=obj,
-                status__allows_org_chart=True,
-                is_deleted=False
-            ).count()
+            return self._get_hierarchy().get_direct_reports_count(obj.id)
         except Exception:
             return 0
     
@@ -3403,78 +3406,30 @@ class OrgChartNodeSerializer(serializers.ModelSerializer):
         return self._get_safe_profile_image_url(obj)
     
     def get_level_to_ceo(self, obj):
-        """FIXED: Calculate level to CEO with recursion protection"""
+        """Level to CEO from the in-memory manager map"""
         try:
-            level = 0
-            current = obj
-            visited = set()
-            
-            while current and current.line_manager and current.id not in visited:
-                visited.add(current.id)
-                current = current.line_manager
-                level += 1
-                
-                if level > 10:  # Prevent infinite loops
-                    break
-            
-            return level
+            return self._get_hierarchy().get_level_to_ceo(obj.id)
         except Exception:
             return 0
     
     def get_total_subordinates(self, obj):
-        """FIXED: Calculate total subordinates with recursion protection"""
+        """Total visible subordinates from the in-memory manager tree"""
         try:
-            def count_subordinates_safe(employee, visited=None):
-                if visited is None:
-                    visited = set()
-                
-                if employee.id in visited:
-                    return 0
-                
-                visited.add(employee.id)
-                
-                direct_reports = Employee.objects.filter(
-                    line_manager=employee,
-                    status__allows_org_chart=True,
-                    is_deleted=False
-                )
-                
-                total = direct_reports.count()
-                for report in direct_reports:
-                    if report.id not in visited:
-                        total += count_subordinates_safe(report, visited.copy())
-                
-                return total
-            
-            return count_subordinates_safe(obj)
+            return self._get_hierarchy().get_total_subordinates(obj.id)
         except Exception:
             return 0
     
     def get_colleagues_in_unit(self, obj):
         """Get colleagues in same unit safely"""
         try:
-            if not obj.unit:
-                return 0
-            
-            return Employee.objects.filter(
-                unit=obj.unit,
-                status__allows_org_chart=True,
-                is_deleted=False
-            ).exclude(id=obj.id).count()
+            return self._get_hierarchy().get_colleagues_in_unit(obj)
         except Exception:
             return 0
     
     def get_colleagues_in_business_function(self, obj):
         """Get colleagues in same business function safely"""
         try:
-            if not obj.business_function:
-                return 0
-            
-            return Employee.objects.filter(
-                business_function=obj.business_function,
-                status__allows_org_chart=True,
-                is_deleted=False
-            ).exclude(id=obj.id).count()
+            return self._get_hierarchy().get_colleagues_in_business_function(obj)
         except Exception:
             return 0
     
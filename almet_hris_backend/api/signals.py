@@ -1,349 +1,132 @@
 # api/signals.py
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete
 from django.dispatch import receiver
+from django.contrib.auth.models import User
 from .models import Employee
-from .status_management import EmployeeStatusManager
+from .employee_signal_batch import EmployeeSaveBatch
+from .status_management import employee_statuses_changed
 import logging
 
 logger = logging.getLogger(__name__)
 
-# ==================== STATUS MANAGEMENT SIGNALS ====================
-
-@receiver(post_save, sender=Employee)
-def auto_update_employee_status(sender, instance, created, **kwargs):
-    """
-    ✅ Avtomatik status yenilənməsi - FIXED
-    """
-    
-    # Skip if explicitly disabled (for bulk operations)
-    if getattr(instance, '_skip_auto_status_update', False):
-        return
-    
-    # Skip if deleted
-    if instance.is_deleted:
-        return
-    
+# ==================== EMPLOYEE SAVE SIGNALS ====================
+# Status recalculation, job description auto-assignment, position change
+# emails, welcome triggers (logged only) and access scope invalidation are collected per transaction
+# by EmployeeSaveBatch and run once on commit - see employee_signal_batch.py
 
-    if created:
- 
-        return
-    
-    try:
-        # Check if status needs update
-        required_status, reason = EmployeeStatusManager.calculate_required_status(instance)
-        
-        # If status needs to change
-        if required_status and required_status != instance.status:
-            logger.info(
-                f"🔄 Auto-updating status for {instance.employee_id}: "
-                f"{instance.status.name if instance.status else 'None'} -> {required_status.name}"
-            )
-            logger.info(f"   Reason: {reason}")
-            
-            # ✅ CRITICAL: Update using queryset to avoid triggering signal again
-            Employee.objects.filter(pk=instance.pk).update(status=required_status)
-            
-            # Refresh instance
-            instance.refresh_from_db()
-            
-            # Log activity
-            from .models import EmployeeActivity
-            EmployeeActivity.objects.create(
-                employee=instance,
-                activity_type='STATUS_CHANGED',
-                description=f"Status automatically updated to {required_status.name}. Reason: {reason}",
-                performed_by=None,
-                metadata={
-                    'automatic': True,
-                    'trigger': 'post_save_signal',
-                    'reason': reason,
-                    'new_status': required_status.name
-                }
-            )
-            
-           
-        else:
-            logger.debug(f"   ℹ️  No status update needed for {instance.employee_id}")
-            
-    except Exception as e:
-        logger.error(f"❌ Error in auto_update_employee_status for {instance.employee_id}: {e}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
+EMPLOYEE_SNAPSHOT_FIELDS = (
+    'position_group_id', 'status__name', 'start_date', 'is_deleted',
+    'user_id', 'line_manager_id', 'business_function_id', 'department_id'
+)
 
 
-# ==================== CELEBRATION NOTIFICATION SIGNALS ====================
-
 @receiver(pre_save, sender=Employee)
-def track_position_change(sender, instance, **kwargs):
+def snapshot_employee_before_save(sender, instance, **kwargs):
     """
-    📝 Track position_group changes before saving
-    Stores old position in instance for comparison
+    📝 Stored row before saving - one query shared by every handler
+    that compares old and new values
     """
-    if instance.pk:  # Only for existing employees
-        try:
-            old_employee = Employee.objects.get(pk=instance.pk)
-            instance._old_position_group = old_employee.position_group
-        except Employee.DoesNotExist:
-            instance._old_position_group = None
-    else:
-        instance._old_position_group = None
+    instance._pre_save_snapshot = None
+    if instance.pk:
+        instance._pre_save_snapshot = Employee.objects.filter(
+            pk=instance.pk
+        ).values(*EMPLOYEE_SNAPSHOT_FIELDS).first()
 
 
 @receiver(post_save, sender=Employee)
-def send_position_change_notification(sender, instance, created, **kwargs):
-
-    if created:
-        # New employee - no notification needed
-        return
-    
-    # Check if position_group changed
-    old_position = getattr(instance, '_old_position_group', None)
-    new_position = instance.position_group
-    
-    if old_position and new_position and old_position != new_position:
-      
-        
-       
-        change_type = 'promotion'  # or 'transfer' based on your logic
-        
-        # Send notification asynchronously using Celery
-        try:
-            from .tasks import send_position_change_email
-            send_position_change_email.delay(
-                employee_id=instance.id,
-                old_position=str(old_position),
-                new_position=str(new_position),
-                change_type=change_type
-            )
-        
-        except Exception as e:
-            logger.error(f"❌ Failed to queue position change notification: {e}")
-            
-            # Fallback: Send synchronously if Celery fails
-            try:
-                from .celebration_notification_service import celebration_notification_service
-                celebration_notification_service.send_position_change_notification(
-                    employee=instance,
-                    old_position=str(old_position),
-                    new_position=str(new_position),
-                    change_type=change_type
-                )
-            except Exception as fallback_error:
-                logger.error(f"❌ Fallback notification also failed: {fallback_error}")
-
+def collect_employee_save(sender, instance, created, **kwargs):
+    """Hand the save to the transaction's batch - handlers run once on commit"""
+    with EmployeeSaveBatch.collect() as batch:
+        batch.add_save(instance, created, getattr(instance, '_pre_save_snapshot', None))
 
-# ==================== WELCOME EMAIL SIGNAL ====================
 
-@receiver(pre_save, sender=Employee)
-def track_employee_changes_for_welcome(sender, instance, **kwargs):
+def assign_job_descriptions(employee_ids):
     """
-    📝 Track changes before saving for welcome email detection
+    Auto-assign the first matching active job description to each employee.
+    Candidate job descriptions and existing assignments are loaded once for the batch.
     """
-    if instance.pk:
-        try:
-            old = Employee.objects.get(pk=instance.pk)
-            instance._old_status = old.status
-            instance._old_start_date = old.start_date
-            instance._old_is_deleted = old.is_deleted
-            
-          
-        except Employee.DoesNotExist:
-            instance._old_status = None
-            instance._old_start_date = None
-            instance._old_is_deleted = None
-           
-    else:
-        instance._old_status = None
-        instance._old_start_date = None
-        instance._old_is_deleted = None
-      
-
-
-@receiver(post_save, sender=Employee)
-def welcome_new_employee(sender, instance, created, **kwargs):
- 
-    
-    should_send_welcome = False
-    trigger_reason = ""
-    
-    # Case 1: Brand new employee with start_date
-    if created and not instance.is_deleted and instance.start_date:
-        should_send_welcome = True
-        trigger_reason = "New employee created with start_date"
-     
+    from .job_description_models import JobDescription, JobDescriptionAssignment, normalize_grading_level
     
-    # Case 2: Existing employee changes
-    elif not created and not instance.is_deleted:
-        old_status = getattr(instance, '_old_status', None)
-        old_start_date = getattr(instance, '_old_start_date', None)
-        old_is_deleted = getattr(instance, '_old_is_deleted', None)
-        
+    employees = list(Employee.objects.filter(id__in=employee_ids, is_deleted=False))
+    if not employees:
+        return 0
+    
+    def match_key(job_title, business_function_id, department_id, job_function_id, position_group_id):
+        return ((job_title or '').lower(), business_function_id, department_id, job_function_id, position_group_id)
+    
+    # Active job descriptions by the fields they must match exactly
+    candidates = {}
+    for jd in JobDescription.objects.filter(is_active=True).only(
+        'id', 'job_title', 'business_function_id', 'department_id', 'unit_id',
+        'job_function_id', 'position_group_id', 'grading_levels'
+    ):
+        key = match_key(jd.job_title, jd.business_function_id, jd.department_id, jd.job_function_id, jd.position_group_id)
+        jd.normalized_grades = [normalize_grading_level(gl) for gl in jd.grading_levels]
+        candidates.setdefault(key, []).append(jd)
+    
+    existing = set(
+        JobDescriptionAssignment.objects.filter(
+            employee_id__in=[employee.id for employee in employees],
+            is_active=True
+        ).values_list('job_description_id', 'employee_id')
+    )
     
+    assigned = 0
+    for employee in employees:
+        job_title = employee.job_title.strip() if employee.job_title else ''
+        matching_jds = candidates.get(match_key(
+            job_title, employee.business_function_id, employee.department_id,
+            employee.job_function_id, employee.position_group_id
+        ), [])
         
-        # Status: Vacant → Not Vacant (and has start_date)
-        status_changed_from_vacant = (
-            old_status and 
-            old_status.name == 'Vacant' and 
-            instance.status and 
-            instance.status.name != 'Vacant' and
-            instance.start_date  # Must have start_date
-        )
-        
-        # Start date added (was None, now has value)
-        start_date_added = (
-            not old_start_date and 
-            instance.start_date and
-            instance.status and
-            instance.status.name != 'Vacant'  # Not vacant status
-        )
-        
-        # Was deleted, now active
-        reactivated = (
-            old_is_deleted == True and
-            instance.is_deleted == False and
-            instance.start_date and
-            instance.status and
-            instance.status.name != 'Vacant'
-        )
+        if employee.unit_id:
+            matching_jds = [jd for jd in matching_jds if jd.unit_id == employee.unit_id]
         
-        if status_changed_from_vacant:
-            should_send_welcome = True
-            trigger_reason = f"Status changed from Vacant to {instance.status.name}"
-           
-            
-        elif start_date_added:
-            should_send_welcome = True
-            trigger_reason = "Start date added to existing employee"
-      
-            
-        elif reactivated:
-            should_send_welcome = True
-            trigger_reason = "Employee reactivated from deleted state"
-       
-        else:
-            logger.info(f"❌ NO TRIGGER: Conditions not met")
-    else:
-        logger.info(f"❌ NO TRIGGER: Either deleted or brand new without start_date")
-    
-  
-    
-    if should_send_welcome:
-       
+        emp_grade_normalized = normalize_grading_level(employee.grading_level or '')
         
-        # ✅ FIRST TRY: Direct synchronous send (most reliable)
         try:
-         
-            
-            from .celebration_notification_service import celebration_notification_service
-
-        except Exception as e:
-            logger.error(f"❌ Failed to send welcome email directly: {e}")
-            import traceback
-            logger.error(f"   Traceback: {traceback.format_exc()}")
-            
-            # ✅ SECOND TRY: Celery (if available)
-            try:
-               
-                from .tasks import send_welcome_email_task
+            # Filter by grading level
+            for jd in matching_jds:
+                if emp_grade_normalized not in jd.normalized_grades:
+                    continue
                 
-                send_welcome_email_task.delay(employee_id=instance.id)
+                # Check if already assigned
+                if (jd.id, employee.id) in existing:
+                    continue
                 
+                # Check if there's a vacant assignment for this job description
+                vacant_assignment = JobDescriptionAssignment.objects.filter(
+                    job_description=jd,
+                    is_vacancy=True,
+                    is_active=True,
+                    vacancy_position__job_title__iexact=job_title,
+                    vacancy_position__business_function_id=employee.business_function_id,
+                    vacancy_position__department_id=employee.department_id
+                ).first()
                 
-            except Exception as celery_error:
-                logger.error(f"❌ Celery also failed: {celery_error}")
-                import traceback
-                logger.error(f"   Traceback: {traceback.format_exc()}")
-    else:
-        logger.info(f"❌ NOT sending welcome email - conditions not met")
-    
-    logger.info("=" * 80)
-    
-
-
-from django.db.models.signals import post_save, pre_delete
-from django.dispatch import receiver
-from django.db import transaction
-import logging
-
-logger = logging.getLogger(__name__)
-
-
-@receiver(post_save, sender='api.Employee')
-def auto_assign_job_description_to_employee(sender, instance, created, **kwargs):
-  
-    
-    # Skip if employee is deleted
-    if instance.is_deleted:
-        return
-    
-    # Lazy import to avoid circular dependency
-    from .job_description_models import JobDescription, JobDescriptionAssignment, normalize_grading_level
-    
-    try:
-       
-        
-        # Find matching job descriptions
-        matching_jds = JobDescription.objects.filter(
-            job_title__iexact=instance.job_title.strip() if instance.job_title else '',
-            business_function=instance.business_function,
-            department=instance.department,
-            job_function=instance.job_function,
-            position_group=instance.position_group,
-            is_active=True
-        )
-        
-        if instance.unit:
-            matching_jds = matching_jds.filter(unit=instance.unit)
+                if vacant_assignment:
+                    # ✅ Vacant assignment-ı employee-ə çevir
+                    vacant_assignment.assign_new_employee(employee)
+                else:
+                    # ✅ Yeni assignment yarat
+                    with transaction.atomic():
+                        JobDescriptionAssignment.objects.create(
+                            job_description=jd,
+                            employee=employee,
+                            is_vacancy=False,
+                            reports_to_id=employee.line_manager_id
+                        )
+                        logger.info(f"✅ Auto-assigned: {employee.full_name} -> {jd.job_title}")
+                
+                assigned += 1
+                # Only assign to first matching JD
+                break
         
-        # Filter by grading level
-        for jd in matching_jds:
-            emp_grade_normalized = normalize_grading_level(instance.grading_level or '')
-            jd_grades_normalized = [normalize_grading_level(gl) for gl in jd.grading_levels]
-            
-            if emp_grade_normalized not in jd_grades_normalized:
-                continue
-            
-            # Check if already assigned
-            existing_assignment = JobDescriptionAssignment.objects.filter(
-                job_description=jd,
-                employee=instance,
-                is_active=True
-            ).exists()
-            
-            if existing_assignment:
-    
-                continue
-            
-            # Check if there's a vacant assignment for this job description
-            vacant_assignment = JobDescriptionAssignment.objects.filter(
-                job_description=jd,
-                is_vacancy=True,
-                is_active=True,
-                vacancy_position__job_title__iexact=instance.job_title.strip() if instance.job_title else '',
-                vacancy_position__business_function=instance.business_function,
-                vacancy_position__department=instance.department
-            ).first()
-            
-            if vacant_assignment:
-                # ✅ Vacant assignment-ı employee-ə çevir
-                vacant_assignment.assign_new_employee(instance)
-              
-            else:
-                # ✅ Yeni assignment yarat
-                with transaction.atomic():
-                    assignment = JobDescriptionAssignment.objects.create(
-                        job_description=jd,
-                        employee=instance,
-                        is_vacancy=False,
-                        reports_to=instance.line_manager
-                    )
-                    logger.info(f"✅ Auto-assigned: {instance.full_name} -> {jd.job_title}")
-            
-            # Only assign to first matching JD
-            break
+        except Exception as e:
+            logger.error(f"❌ Error in auto_assign_job_description for {employee.employee_id}: {str(e)}", exc_info=True)
     
-    except Exception as e:
-        logger.error(f"❌ Error in auto_assign_job_description: {str(e)}", exc_info=True)
+    return assigned
 
 
 @receiver(pre_delete, sender='api.Employee')
@@ -406,6 +189,135 @@ def handle_vacant_position_filled(sender, instance, created, **kwargs):
         logger.error(f"❌ Error in handle_vacant_position_filled: {str(e)}", exc_info=True)
 
 
+# ============================================
+# ACCESS SCOPE CACHE INVALIDATION
+# ============================================
+
+@receiver(post_delete, sender='api.Employee')
+@receiver(post_save, sender='api.EmployeeRole')
+@receiver(post_delete, sender='api.EmployeeRole')
+@receiver(post_save, sender='api.Role')
+@receiver(post_delete, sender='api.Role')
+def invalidate_access_scope_on_role_change(sender, instance, **kwargs):
+    from .access_scope import invalidate_access_scopes
+    invalidate_access_scopes()
+
+
+# ============================================
+# GRADE TABLE CACHE INVALIDATION
+# ============================================
+
+@receiver(post_save, sender='api.LetterGradeMapping')
+@receiver(post_delete, sender='api.LetterGradeMapping')
+@receiver(post_save, sender='api.EvaluationScale')
+@receiver(post_delete, sender='api.EvaluationScale')
+def invalidate_grade_tables_on_change(sender, instance, **kwargs):
+    from .grade_tables import invalidate_grade_tables
+    invalidate_grade_tables()
+
+
+# ============================================
+# PERFORMANCE DASHBOARD SUMMARY
+# ============================================
+
+@receiver(post_save, sender='api.EmployeePerformance')
+def refresh_dashboard_summary_on_save(sender, instance, **kwargs):
+    """Refresh the summary row of the performance's department on commit"""
+    from .performance_dashboard import mark_performances_changed
+    mark_performances_changed([instance.pk])
+
+
+@receiver(post_delete, sender='api.EmployeePerformance')
+def refresh_dashboard_summary_on_delete(sender, instance, **kwargs):
+    from .performance_dashboard import mark_years_changed
+    mark_years_changed([instance.performance_year_id])
+
+
+# ============================================
+# ASSESSMENT SUMMARY
+# ============================================
+
+@receiver(post_save, sender='api.EmployeeCoreAssessment')
+@receiver(post_delete, sender='api.EmployeeCoreAssessment')
+@receiver(post_save, sender='api.EmployeeBehavioralAssessment')
+@receiver(post_delete, sender='api.EmployeeBehavioralAssessment')
+@receiver(post_save, sender='api.EmployeeLeadershipAssessment')
+@receiver(post_delete, sender='api.EmployeeLeadershipAssessment')
+def refresh_assessment_summary_on_change(sender, instance, **kwargs):
+    """Submit / reopen / recalculate / delete - rebuild the employee's summary row on commit"""
+    from .assessment_summary import assessment_type_of, mark_assessments_changed
+    mark_assessments_changed(assessment_type_of(sender), [instance.employee_id])
+
+
+# ============================================
+# HEADCOUNT STATISTICS CACHE INVALIDATION
+# ============================================
+# Employee saves go through EmployeeSaveBatch (invalidated once on commit)
+
+@receiver(post_delete, sender='api.Employee')
+@receiver(post_save, sender='api.VacantPosition')
+@receiver(post_delete, sender='api.VacantPosition')
+@receiver(post_save, sender='api.EmployeeStatus')
+@receiver(post_delete, sender='api.EmployeeStatus')
+@receiver(post_save, sender='api.BusinessFunction')
+@receiver(post_delete, sender='api.BusinessFunction')
+@receiver(post_save, sender='api.PositionGroup')
+@receiver(post_delete, sender='api.PositionGroup')
+@receiver(post_save, sender='api.ContractTypeConfig')
+@receiver(post_delete, sender='api.ContractTypeConfig')
+@receiver(employee_statuses_changed)
+def invalidate_headcount_statistics_on_change(sender, **kwargs):
+    from .headcount_statistics import invalidate_headcount_statistics
+    invalidate_headcount_statistics()
+
+
+# ============================================
+# SEARCH DOCUMENTS
+# ============================================
+# Employee saves go through EmployeeSaveBatch - see search_index.py
+
+@receiver(post_save, sender='api.VacantPosition')
+@receiver(post_save, sender='api.JobDescription')
+def refresh_search_document_on_save(sender, instance, **kwargs):
+    from .search_index import mark_search_documents_stale
+    mark_search_documents_stale(sender, [instance.pk])
+
+
+@receiver(post_save, sender='api.BusinessFunction')
+@receiver(post_save, sender='api.Department')
+@receiver(post_save, sender='api.Unit')
+@receiver(post_save, sender='api.JobFunction')
+@receiver(post_save, sender=User)
+def refresh_search_documents_on_name_change(sender, instance, created, update_fields=None, **kwargs):
+    """Names (and user emails) are copied into search documents"""
+    if created:
+        return
+    # Login only touches last_login
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    from .search_index import mark_names_changed
+    mark_names_changed(sender, [instance.pk])
+
+
+# ============================================
+# BALANCE LEDGER
+# ============================================
+# Later changes go through api/balance_ledger.py
+
+@receiver(post_save, sender='api.TimeOffBalance')
+def record_timeoff_opening_balance(sender, instance, created, **kwargs):
+    if created:
+        from .balance_ledger import record_timeoff_opening
+        record_timeoff_opening(instance)
+
+
+@receiver(post_save, sender='api.EmployeeVacationBalance')
+def record_vacation_opening_balance(sender, instance, created, **kwargs):
+    if created:
+        from .balance_ledger import record_vacation_opening
+        record_vacation_opening(instance)
+
+
 # ============================================
 # HELPER FUNCTION FOR MANAGEMENT COMMAND
 # ============================================
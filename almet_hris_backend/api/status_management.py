@@ -1,11 +1,76 @@
 # api/status_management.py - ENHANCED: Advanced Contract Status Management with Line Manager Integration
 
+from django.db import transaction
+from django.db.models import Count, Q
+from django.dispatch import Signal
 from django.utils import timezone
+from collections import defaultdict
 from datetime import timedelta, date
 from .models import Employee, EmployeeStatus, EmployeeActivity, ContractTypeConfig
 import logging
 logger = logging.getLogger(__name__)
 
+# Sent once per bulk recalculation with the list of applied changes
+employee_statuses_changed = Signal()
+
+class StatusLookup:
+    """
+    Status / contract config lookups used by status calculation.
+    Loaded on demand and reused, or preloaded in two queries for bulk runs.
+    """
+    
+    STATUS_TYPES = ('ACTIVE', 'INACTIVE', 'PROBATION')
+    
+    def __init__(self, statuses=None, contract_configs=None):
+        self._statuses = statuses if statuses is not None else {}
+        self._contract_configs = contract_configs
+        self._config_cache = {}
+    
+    @classmethod
+    def preload(cls):
+        statuses = {}
+        # Same ordering as .first() per status type
+        for status_obj in EmployeeStatus.objects.filter(
+            status_type__in=cls.STATUS_TYPES,
+            is_active=True
+        ):
+            statuses.setdefault(status_obj.status_type, status_obj)
+        for status_type in cls.STATUS_TYPES:
+            statuses.setdefault(status_type, None)
+        
+        contract_configs = {
+            config.contract_type: config
+            for config in ContractTypeConfig.objects.filter(is_active=True)
+        }
+        return cls(statuses, contract_configs)
+    
+    def get_status(self, status_type):
+        if status_type not in self._statuses:
+            self._statuses[status_type] = EmployeeStatus.objects.filter(
+                status_type=status_type,
+                is_active=True
+            ).first()
+        return self._statuses[status_type]
+    
+    @property
+    def contract_configs(self):
+        """Active contract configs by type (preloaded lookups only)"""
+        return self._contract_configs or {}
+    
+    def get_contract_config(self, contract_type):
+        if self._contract_configs is not None:
+            return self._contract_configs.get(contract_type)
+        if contract_type not in self._config_cache:
+            try:
+                self._config_cache[contract_type] = ContractTypeConfig.objects.get(
+                    contract_type=contract_type,
+                    is_active=True
+                )
+            except ContractTypeConfig.DoesNotExist:
+                self._config_cache[contract_type] = None
+        return self._config_cache[contract_type]
+
+
 class EmployeeStatusManager:
     """
     Employee status-larını avtomatik idarə etmək üçün enhanced class
@@ -15,117 +80,85 @@ class EmployeeStatusManager:
    
     
     @staticmethod
-    def calculate_required_status(employee):
+    def calculate_required_status(employee, lookup=None):
         """✅ COMPLETELY FIXED: Status calculation with proper logic"""
         try:
-            current_date = date.today()
-            
-            # ✅ CHECK 1: Has start date?
-            if not employee.start_date:
-              
-                return employee.status, "No start date defined"
-            
-            # ✅ CHECK 2: Not started yet?
-            if employee.start_date > current_date:
-                days_until_start = (employee.start_date - current_date).days
-               
-                return employee.status, f"Employee hasn't started yet (starts in {days_until_start} days)"
-            
-            # ✅ CHECK 3: Calculate days since start
-            days_since_start = (current_date - employee.start_date).days
-            
-        
-            
-            # ✅ CHECK 4: Contract ended?
-            if employee.contract_end_date and employee.contract_end_date <= current_date:
-                inactive_status = EmployeeStatus.objects.filter(
-                    status_type='INACTIVE',
-                    is_active=True
-                ).first()
-                
-                if inactive_status:
-                   
-                    return inactive_status, f"Contract ended on {employee.contract_end_date}"
-            
-            # ✅ CHECK 5: Get contract config
-            try:
-                contract_config = ContractTypeConfig.objects.get(
-                    contract_type=employee.contract_duration,
-                    is_active=True
-                )
-            except ContractTypeConfig.DoesNotExist:
-             
-                
-                # DEFAULT: If no config, use ACTIVE after 90 days
-                if days_since_start > 90:
-                    active_status = EmployeeStatus.objects.filter(
-                        status_type='ACTIVE',
-                        is_active=True
-                    ).first()
-                    return active_status, "No contract config - defaulting to ACTIVE after 90 days"
-                else:
-                    return employee.status, "No contract configuration found"
-            
-            # ✅ CHECK 6: Auto transitions enabled?
-            if not contract_config.enable_auto_transitions:
-      
-                return employee.status, "Auto transitions disabled for this contract type"
-            
-            # ✅ CHECK 7: PERMANENT contracts → directly ACTIVE (NO probation)
-            if employee.contract_duration == 'PERMANENT':
-                active_status = EmployeeStatus.objects.filter(
-                    status_type='ACTIVE',
-                    is_active=True
-                ).first()
-                
-                if active_status:
-           
-                    return active_status, "Permanent contract - directly active (no probation period)"
-                else:
-                   
-                    return employee.status, "ACTIVE status not found"
-            
-            # ✅ CHECK 8: For ALL other contracts → Check probation period
-            probation_days = contract_config.probation_days
-            
-          
-            
-            # ✅ CRITICAL: Still in probation?
-            if days_since_start < probation_days:
-                probation_status = EmployeeStatus.objects.filter(
-                    status_type='PROBATION',
-                    is_active=True
-                ).first()
-                
-                if not probation_status:
-                  
-                    active_status = EmployeeStatus.objects.filter(
-                        status_type='ACTIVE',
-                        is_active=True
-                    ).first()
-                    return active_status, "PROBATION status not found - using ACTIVE"
-                
-                remaining_days = probation_days - days_since_start
-         
-                return probation_status, f"In probation period ({remaining_days} days remaining of {probation_days})"
-            
-            # ✅ CHECK 9: Probation completed → ACTIVE
-            else:
-                active_status = EmployeeStatus.objects.filter(
-                    status_type='ACTIVE',
-                    is_active=True
-                ).first()
-                
-                if not active_status:
-          
-                    return employee.status, "ACTIVE status not found"
-                
-                
-                return active_status, f"Probation period completed ({days_since_start} days since start, probation was {probation_days} days)"
-                
+            return EmployeeStatusManager.resolve_required_status(
+                start_date=employee.start_date,
+                contract_end_date=employee.contract_end_date,
+                contract_duration=employee.contract_duration,
+                current_status=employee.status,
+                lookup=lookup or StatusLookup()
+            )
         except Exception as e:
             logger.error(f"Error calculating status for employee {employee.employee_id}: {str(e)}")
             return employee.status, f"Error: {str(e)}"
+    
+    @staticmethod
+    def resolve_required_status(start_date, contract_end_date, contract_duration,
+                                current_status, lookup, current_date=None):
+        """
+        Required status from contract / probation dates.
+        current_status is returned unchanged when no transition applies.
+        """
+        current_date = current_date or date.today()
+        
+        # ✅ CHECK 1: Has start date?
+        if not start_date:
+            return current_status, "No start date defined"
+        
+        # ✅ CHECK 2: Not started yet?
+        if start_date > current_date:
+            days_until_start = (start_date - current_date).days
+            return current_status, f"Employee hasn't started yet (starts in {days_until_start} days)"
+        
+        # ✅ CHECK 3: Calculate days since start
+        days_since_start = (current_date - start_date).days
+        
+        # ✅ CHECK 4: Contract ended?
+        if contract_end_date and contract_end_date <= current_date:
+            inactive_status = lookup.get_status('INACTIVE')
+            if inactive_status:
+                return inactive_status, f"Contract ended on {contract_end_date}"
+        
+        # ✅ CHECK 5: Get contract config
+        contract_config = lookup.get_contract_config(contract_duration)
+        if contract_config is None:
+            # DEFAULT: If no config, use ACTIVE after 90 days
+            if days_since_start > 90:
+                return lookup.get_status('ACTIVE'), "No contract config - defaulting to ACTIVE after 90 days"
+            return current_status, "No contract configuration found"
+        
+        # ✅ CHECK 6: Auto transitions enabled?
+        if not contract_config.enable_auto_transitions:
+            return current_status, "Auto transitions disabled for this contract type"
+        
+        # ✅ CHECK 7: PERMANENT contracts → directly ACTIVE (NO probation)
+        if contract_duration == 'PERMANENT':
+            active_status = lookup.get_status('ACTIVE')
+            if active_status:
+                return active_status, "Permanent contract - directly active (no probation period)"
+            return current_status, "ACTIVE status not found"
+        
+        # ✅ CHECK 8: For ALL other contracts → Check probation period
+        probation_days = contract_config.probation_days
+        
+        # ✅ CRITICAL: Still in probation?
+        if days_since_start < probation_days:
+            probation_status = lookup.get_status('PROBATION')
+            if not probation_status:
+                return lookup.get_status('ACTIVE'), "PROBATION status not found - using ACTIVE"
+            
+            remaining_days = probation_days - days_since_start
+            return probation_status, f"In probation period ({remaining_days} days remaining of {probation_days})"
+        
+        # ✅ CHECK 9: Probation completed → ACTIVE
+        active_status = lookup.get_status('ACTIVE')
+        if not active_status:
+            return current_status, "ACTIVE status not found"
+        
+        return active_status, f"Probation period completed ({days_since_start} days since start, probation was {probation_days} days)"
+    
     @staticmethod
     def update_employee_status(employee, force_update=False, user=None):
         """
@@ -356,6 +389,214 @@ class EmployeeStatusManager:
         
         return analytics
 
+# Bulk (set-based) status recalculation
+class BulkStatusEngine:
+    """
+    Recalculates statuses for the whole population in a few queries.
+    
+    Required statuses are computed from preloaded lookups and plain row values,
+    changes are applied with one UPDATE per target status (no per-row save, so
+    Employee post_save signals are not fired), activities are bulk-created and
+    a single employee_statuses_changed signal is sent for the whole batch.
+    """
+    
+    UPDATE_CHUNK_SIZE = 1000
+    
+    EMPLOYEE_FIELDS = (
+        'id', 'employee_id', 'full_name', 'status_id',
+        'start_date', 'contract_end_date', 'contract_duration'
+    )
+    
+    def __init__(self, employee_ids=None, current_date=None):
+        self.employee_ids = employee_ids
+        self.current_date = current_date or date.today()
+        self.error_count = 0
+    
+    def get_queryset(self):
+        queryset = Employee.objects.filter(is_deleted=False)
+        if self.employee_ids:
+            queryset = queryset.filter(id__in=self.employee_ids)
+        return queryset
+    
+    def compute_changes(self):
+        """Employees whose required status differs from the current one"""
+        lookup = StatusLookup.preload()
+        status_names = dict(EmployeeStatus.all_objects.values_list('id', 'name'))
+        
+        changes = []
+        total = 0
+        for row in self.get_queryset().values(*self.EMPLOYEE_FIELDS).iterator(chunk_size=2000):
+            total += 1
+            try:
+                # current_status=None: "no transition" and "status not found" both mean no change
+                required_status, reason = EmployeeStatusManager.resolve_required_status(
+                    start_date=row['start_date'],
+                    contract_end_date=row['contract_end_date'],
+                    contract_duration=row['contract_duration'],
+                    current_status=None,
+                    lookup=lookup,
+                    current_date=self.current_date
+                )
+            except Exception as e:
+                logger.error(f"Error calculating status for employee {row['employee_id']}: {str(e)}")
+                self.error_count += 1
+                continue
+            
+            if required_status is None or required_status.id == row['status_id']:
+                continue
+            
+            changes.append({
+                'id': row['id'],
+                'employee_id': row['employee_id'],
+                'employee_name': row['full_name'],
+                'old_status_id': row['status_id'],
+                'old_status': status_names.get(row['status_id']),
+                'new_status_id': required_status.id,
+                'new_status': required_status.name,
+                'reason': reason,
+                'contract_type': row['contract_duration'],
+                'days_since_start': (self.current_date - row['start_date']).days,
+            })
+        
+        return total, changes
+    
+    def required_status_cases(self, lookup):
+        """
+        resolve_required_status as (condition, required status) pairs.
+        Conditions are mutually exclusive and only use indexed start / contract end
+        dates, so every transition can be counted in SQL without loading rows.
+        """
+        today = self.current_date
+        active_status = lookup.get_status('ACTIVE')
+        cases = []
+        
+        # Not started yet (or no start date) - no transition
+        remaining = Q(start_date__lte=today)
+        
+        # Contract ended
+        inactive_status = lookup.get_status('INACTIVE')
+        if inactive_status:
+            contract_ended = Q(contract_end_date__lte=today)
+            cases.append((remaining & contract_ended, inactive_status))
+            remaining &= ~contract_ended
+        
+        configs = lookup.contract_configs
+        
+        # No contract config - ACTIVE after 90 days
+        if active_status:
+            cases.append((
+                remaining & ~Q(contract_duration__in=list(configs)) &
+                Q(start_date__lt=today - timedelta(days=90)),
+                active_status
+            ))
+        
+        for contract_type, config in configs.items():
+            if not config.enable_auto_transitions:
+                continue
+            
+            of_type = remaining & Q(contract_duration=contract_type)
+            if contract_type == 'PERMANENT':
+                if active_status:
+                    cases.append((of_type, active_status))
+                continue
+            
+            # days since start < probation days
+            in_probation = Q(start_date__gt=today - timedelta(days=config.probation_days))
+            probation_status = lookup.get_status('PROBATION') or active_status
+            if probation_status:
+                cases.append((of_type & in_probation, probation_status))
+            if active_status:
+                cases.append((of_type & ~in_probation, active_status))
+        
+        return cases
+    
+    def count_transitions(self):
+        """
+        {'Old → New': count} of compute_changes() in one grouped query
+        (no rows loaded, no per-employee previews)
+        """
+        lookup = StatusLookup.preload()
+        cases = self.required_status_cases(lookup)
+        if not cases:
+            return {}
+        
+        aggregates = {
+            f'case_{i}': Count('id', filter=condition & ~Q(status_id=required_status.id))
+            for i, (condition, required_status) in enumerate(cases)
+        }
+        status_names = dict(EmployeeStatus.all_objects.values_list('id', 'name'))
+        
+        transitions = defaultdict(int)
+        for row in self.get_queryset().order_by().values('status_id').annotate(**aggregates):
+            for i, (_, required_status) in enumerate(cases):
+                count = row[f'case_{i}']
+                if count:
+                    transitions[f"{status_names.get(row['status_id'])} → {required_status.name}"] += count
+        
+        return dict(transitions)
+    
+    def apply_changes(self, changes, user=None, extra_metadata=None):
+        """Grouped UPDATE ... WHERE id IN (...) per new status + bulk activity log"""
+        by_status = defaultdict(list)
+        for change in changes:
+            by_status[change['new_status_id']].append(change['id'])
+        
+        now = timezone.now()
+        with transaction.atomic():
+            for new_status_id, ids in by_status.items():
+                for i in range(0, len(ids), self.UPDATE_CHUNK_SIZE):
+                    Employee.objects.filter(
+                        id__in=ids[i:i + self.UPDATE_CHUNK_SIZE]
+                    ).update(status_id=new_status_id, updated_at=now)
+            
+            EmployeeActivity.objects.bulk_create([
+                EmployeeActivity(
+                    employee_id=change['id'],
+                    activity_type='STATUS_CHANGED',
+                    description=(
+                        f"Status automatically updated from {change['old_status']} "
+                        f"to {change['new_status']}. Reason: {change['reason']}"
+                    ),
+                    performed_by=user,
+                    metadata={
+                        'old_status': change['old_status'],
+                        'new_status': change['new_status'],
+                        'reason': change['reason'],
+                        'automatic': True,
+                        'contract_type': change['contract_type'],
+                        'days_since_start': change['days_since_start'],
+                        'force_update': False,
+                        'bulk': True,
+                        **(extra_metadata or {})
+                    }
+                )
+                for change in changes
+            ], batch_size=self.UPDATE_CHUNK_SIZE)
+        
+        if changes:
+            employee_statuses_changed.send(sender=Employee, changes=changes)
+    
+    def run(self, dry_run=False, user=None):
+        total, changes = self.compute_changes()
+        
+        if not dry_run:
+            self.apply_changes(changes, user=user)
+        
+        transitions = defaultdict(int)
+        for change in changes:
+            transitions[f"{change['old_status']} → {change['new_status']}"] += 1
+        
+        return {
+            'total_employees': total,
+            'updated_count': 0 if dry_run else len(changes),
+            'needs_update_count': len(changes),
+            'error_count': self.error_count,
+            'transitions': dict(transitions),
+            'dry_run': dry_run,
+            'changes': changes if dry_run else []
+        }
+
+
 # Enhanced Line Manager Status Integration
 class LineManagerStatusIntegration:
     """
@@ -5,11 +5,12 @@ User access token lazım deyil, application öz tokenini alır
 """
 
 import logging
-import requests
 from django.conf import settings
 from django.core.cache import cache
 import msal
 
+from .graph_client import graph_client, build_mail_message
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,8 +21,6 @@ class SystemEmailService:
     """
     
     def __init__(self):
-        self.graph_endpoint = "https://graph.microsoft.com/v1.0"
-        
         # ⚙️ Azure AD Application settings (settings.py-dən oxuyur)
         self.tenant_id = getattr(settings, 'MICROSOFT_TENANT_ID', '')
         self.client_id = getattr(settings, 'MICROSOFT_CLIENT_ID', '')
@@ -95,44 +94,15 @@ class SystemEmailService:
                     'message_id': None
                 }
             
-            # ✅ Handle both single email and list of emails
-            if isinstance(to_email, str):
-                to_emails = [to_email]
-            else:
-                to_emails = to_email
-            
-            # ✅ Build toRecipients array with ALL emails
-            to_recipients = [
-                {"emailAddress": {"address": email}} 
-                for email in to_emails
-            ]
-            
-            # Email message hazırla
-            message = {
-                "message": {
-                    "subject": subject,
-                    "body": {
-                        "contentType": "HTML",
-                        "content": body_html
-                    },
-                    "toRecipients": to_recipients  # ✅ All emails in one array
-                },
-                "saveToSentItems": "true"
-            }
-            
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-        
+            # ✅ Handle both single email and list of emails - all recipients in TO field together
+            to_recipients = [to_email] if isinstance(to_email, str) else list(to_email)
+            message = build_mail_message(subject, body_html, to_recipients)
             
             # API endpoint: /users/{from_email}/sendMail
-            response = requests.post(
-                f"{self.graph_endpoint}/users/{from_email}/sendMail",
-                headers=headers,
-                json=message,
-                timeout=30
+            response = graph_client.post(
+                f"/users/{from_email}/sendMail",
+                access_token,
+                json=message
             )
             
             if response.status_code == 202:
@@ -160,30 +130,53 @@ class SystemEmailService:
                 'message_id': None
             }
     def send_bulk_emails_as_system(self, from_email, recipients, subject, body_html):
- 
+        """
+        One email per recipient, sent through Graph $batch (20 per round trip)
+        """
         results = {
             'success_count': 0,
             'failed_count': 0,
             'results': []
         }
         
-        for recipient in recipients:
-            result = self.send_email_as_system(
-                from_email=from_email,
-                to_email=recipient,
-                subject=subject,
-                body_html=body_html
-            )
-            
-            if result['success']:
+        recipients = list(recipients)
+        if not recipients:
+            return results
+        
+        access_token = self.get_application_token()
+        if not access_token:
+            for recipient in recipients:
+                results['failed_count'] += 1
+                results['results'].append({
+                    'recipient': recipient,
+                    'success': False,
+                    'message': 'Failed to get application access token'
+                })
+            return results
+        
+        responses = graph_client.batch(access_token, [
+            {
+                'method': 'POST',
+                'url': f"/users/{from_email}/sendMail",
+                'body': build_mail_message(subject, body_html, recipient)
+            }
+            for recipient in recipients
+        ])
+        
+        for recipient, response in zip(recipients, responses):
+            success = response.status_code == 202
+            if success:
                 results['success_count'] += 1
+                message = 'Email sent to 1 recipients'
             else:
                 results['failed_count'] += 1
+                message = f"Failed: {response.status_code} - {response.text}"
+                logger.error(message)
             
             results['results'].append({
                 'recipient': recipient,
-                'success': result['success'],
-                'message': result['message']
+                'success': success,
+                'message': message
             })
         
         return results
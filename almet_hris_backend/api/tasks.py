@@ -9,49 +9,21 @@ logger = logging.getLogger(__name__)
 # ==================== EMPLOYEE STATUS TASKS ====================
 
 @shared_task(name='api.tasks.update_all_employee_statuses')
-def update_all_employee_statuses():
-   
-    from .models import Employee
-    from .status_management import EmployeeStatusManager
+def update_all_employee_statuses(dry_run=False):
+    """Nightly status recalculation - set-based, cost scales with number of changes"""
+    from .status_management import BulkStatusEngine
     
     try:
-    
-        
-        # Get all active employees (not deleted)
-        employees = Employee.objects.filter(is_deleted=False).select_related('status', 'business_function', 'department')
-        
-        total_employees = employees.count()
-        updated_count = 0
-        error_count = 0
-    
-        
-        for employee in employees:
-            try:
-                # Check if status needs update
-                preview = EmployeeStatusManager.get_status_preview(employee)
-                
-                if preview['needs_update']:
-                
-                    
-                    # Update the status
-                    if EmployeeStatusManager.update_employee_status(employee, force_update=False, user=None):
-                        updated_count += 1
-                       
-                    else:
-                        logger.warning(f"   ⚠️ Update returned False for {employee.employee_id}")
-                
-            except Exception as e:
-                error_count += 1
-                logger.error(f"❌ Error updating employee {employee.employee_id}: {str(e)}")
-                continue
-        
-        
+        result = BulkStatusEngine().run(dry_run=dry_run)
         
         return {
             'success': True,
-            'total_employees': total_employees,
-            'updated_count': updated_count,
-            'error_count': error_count,
+            'total_employees': result['total_employees'],
+            'updated_count': result['updated_count'],
+            'error_count': result['error_count'],
+            'transitions': result['transitions'],
+            'dry_run': dry_run,
+            'changes': result['changes'],
             'timestamp': timezone.now().isoformat()
         }
         
@@ -418,4 +390,206 @@ def send_welcome_email_task(employee_id):
         logger.error(error_msg)
         import traceback
         logger.error(traceback.format_exc())
-        return {'success': False, 'error': str(e)}
\ No newline at end of file
+        return {'success': False, 'error': str(e)}
+
+# ==================== JOB DESCRIPTION AUTO-ASSIGNMENT ====================
+
+@shared_task(name='api.tasks.auto_assign_job_descriptions')
+def auto_assign_job_descriptions(employee_ids):
+    """Match saved employees to active job descriptions (queued once per transaction)"""
+    from .signals import assign_job_descriptions
+    
+    try:
+        assigned = assign_job_descriptions(employee_ids)
+        return {
+            'success': True,
+            'checked': len(employee_ids),
+            'assigned': assigned,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"💥 Job description auto-assignment failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'timestamp': timezone.now().isoformat()
+        }
+
+# ==================== BULK EMPLOYEE IMPORT ====================
+
+@shared_task(bind=True, name='api.tasks.import_employees_from_excel')
+def import_employees_from_excel(self, file_path, user_id, total_estimate=0):
+    """Background bulk employee import with progress reporting"""
+    from django.contrib.auth.models import User
+    from django.core.files.storage import default_storage
+    from .employee_import import EmployeeImportEngine
+    
+    def report_progress(processed, total, results):
+        self.update_state(state='PROGRESS', meta={
+            'user_id': user_id,
+            'processed': processed,
+            'total': total,
+            'successful': results['successful'],
+            'failed': results['failed']
+        })
+    
+    try:
+        user = User.objects.filter(id=user_id).first()
+        engine = EmployeeImportEngine(user, progress_callback=report_progress)
+        
+        with default_storage.open(file_path, 'rb') as file:
+            result = engine.run_file(file, total_estimate)
+        
+        result['success'] = True
+        result['user_id'] = user_id
+        result['timestamp'] = timezone.now().isoformat()
+        return result
+        
+    except Exception as e:
+        logger.error(f"💥 Bulk employee import failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'user_id': user_id,
+            'timestamp': timezone.now().isoformat()
+        }
+    finally:
+        try:
+            default_storage.delete(file_path)
+        except Exception as e:
+            logger.warning(f"Could not delete import file {file_path}: {e}")
+
+
+# ==================== BACKGROUND EXPORTS ====================
+
+@shared_task(bind=True, name='api.tasks.generate_export_file')
+def generate_export_file(self, export_name, user_id, query_params, data=None, export_format='excel'):
+    """Build a large export into storage - download it via export_job_download"""
+    from .export_service import run_export_job
+    
+    try:
+        result = run_export_job(export_name, user_id, query_params, data, export_format)
+        result['success'] = True
+        result['timestamp'] = timezone.now().isoformat()
+        return result
+        
+    except Exception as e:
+        logger.error(f"💥 Export {export_name} failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'user_id': user_id,
+            'timestamp': timezone.now().isoformat()
+        }
+
+
+@shared_task(name='api.tasks.cleanup_export_files')
+def cleanup_export_files(max_age_hours=24):
+    """Delete finished background exports older than max_age_hours"""
+    from .export_service import cleanup_export_files as cleanup
+    
+    try:
+        deleted = cleanup(max_age_hours)
+        return {
+            'success': True,
+            'deleted': deleted,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"💥 Export cleanup failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'timestamp': timezone.now().isoformat()
+        }
+
+
+@shared_task(name='api.tasks.recalculate_scores_chunk')
+def recalculate_scores_chunk(job_id, kind, ids):
+    """Recalculate one chunk of performances / assessments (see score_recalculation)"""
+    from .score_recalculation import recalculate_chunk, record_chunk_progress
+    
+    try:
+        result = recalculate_chunk(kind, ids)
+        record_chunk_progress(job_id, len(ids), updated=result['updated'], skipped=result['skipped'])
+        return {
+            'success': True,
+            'job_id': job_id,
+            'kind': kind,
+            **result,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"💥 Score recalculation chunk failed ({kind}, job {job_id}): {str(e)}")
+        record_chunk_progress(job_id, len(ids), failed=len(ids))
+        return {
+            'success': False,
+            'job_id': job_id,
+            'kind': kind,
+            'error': str(e),
+            'timestamp': timezone.now().isoformat()
+        }
+
+
+@shared_task(name='api.tasks.render_job_description_pdfs_zip')
+def render_job_description_pdfs_zip(user_id):
+    """Render every approved job description PDF into one ZIP - download it via export_job_download"""
+    from .job_description_pdf import run_pdf_zip_job
+    
+    try:
+        result = run_pdf_zip_job(user_id)
+        result['success'] = True
+        result['timestamp'] = timezone.now().isoformat()
+        return result
+        
+    except Exception as e:
+        logger.error(f"💥 Job description PDF ZIP failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'user_id': user_id,
+            'timestamp': timezone.now().isoformat()
+        }
+
+
+@shared_task(name='api.tasks.export_assessment_documents')
+def export_assessment_documents(kind, record_ids, user_id, export_format='workbook'):
+    """Assessment / performance documents in one workbook or ZIP - download it via export_job_download"""
+    from .assessment_documents import run_document_export_job
+    
+    try:
+        result = run_document_export_job(kind, record_ids, user_id, export_format)
+        result['success'] = True
+        result['timestamp'] = timezone.now().isoformat()
+        return result
+        
+    except Exception as e:
+        logger.error(f"💥 {kind} document export failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'user_id': user_id,
+            'timestamp': timezone.now().isoformat()
+        }
+
+
+@shared_task(name='api.tasks.flush_counter_increments')
+def flush_counter_increments():
+    """Fold buffered policy / procedure / document / news view and download counts into their rows"""
+    from .view_counters import flush_counter_increments as flush
+    
+    try:
+        applied = flush()
+        return {
+            'success': True,
+            'applied': applied,
+            'timestamp': timezone.now().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"💥 Counter flush failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'timestamp': timezone.now().isoformat()
+        }
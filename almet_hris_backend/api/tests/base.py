@@ -0,0 +1,42 @@
+# api/tests/base.py - Shared organisation fixture for the api tests
+
+from datetime import date
+
+from django.contrib.auth.models import User
+
+from api.models import (
+    BusinessFunction, Department, Unit, JobFunction, PositionGroup, EmployeeStatus, Employee
+)
+
+
+class OrgFixtureMixin:
+    """One business function / department / unit / job function / position group and an active status"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.business_function = BusinessFunction.objects.create(name='Holding', code='HC')
+        cls.department = Department.objects.create(name='IT', business_function=cls.business_function)
+        cls.unit = Unit.objects.create(name='Dev', department=cls.department)
+        cls.job_function = JobFunction.objects.create(name='Engineering')
+        cls.position_group = PositionGroup.objects.create(name='MANAGER', hierarchy_level=3)
+        cls.active_status = EmployeeStatus.objects.create(
+            name='Active', status_type='ACTIVE', allows_org_chart=True, affects_headcount=True
+        )
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+
+    @classmethod
+    def make_employee(cls, first_name, line_manager=None, **kwargs):
+        values = {
+            'last_name': 'Tester',
+            'business_function': cls.business_function,
+            'department': cls.department,
+            'unit': cls.unit,
+            'job_function': cls.job_function,
+            'job_title': 'Engineer',
+            'position_group': cls.position_group,
+            'start_date': date(2020, 1, 1),
+            'status': cls.active_status,
+        }
+        values.update(kwargs)
+        return Employee.objects.create(first_name=first_name, line_manager=line_manager, **values)
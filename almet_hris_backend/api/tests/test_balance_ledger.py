@@ -0,0 +1,202 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.test import TestCase
+
+from api.balance_ledger import (
+    deduct_timeoff_hours, refund_timeoff_hours, set_timeoff_balance, roll_over_timeoff_month,
+    move_vacation_balance, set_vacation_balance, reset_vacation_balances, reconcile_balances
+)
+from api.timeoff_models import TimeOffBalance, TimeOffBalanceMovement
+from api.vacation_models import (
+    EmployeeVacationBalance, VacationBalanceMovement, VacationRequest, VacationType
+)
+from api.tests.base import OrgFixtureMixin
+
+
+def ledger_sum(movements, field):
+    return movements.aggregate(total=Sum(field))['total']
+
+
+class TimeOffLedgerTests(OrgFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.employee = self.make_employee('Alice')
+        self.balance = TimeOffBalance.get_or_create_for_employee(self.employee)
+
+    def movements(self):
+        return TimeOffBalanceMovement.objects.filter(balance=self.balance)
+
+    def test_new_balance_records_opening_movement(self):
+        opening = self.movements().get()
+
+        self.assertEqual(opening.movement_type, 'OPENING')
+        self.assertEqual(opening.balance_delta, Decimal('4'))
+
+    def test_deduct_and_refund_update_columns_and_ledger(self):
+        deduct_timeoff_hours(self.balance, 3, user=self.admin_user)
+        refund_timeoff_hours(self.balance, 2)
+
+        self.balance.refresh_from_db()
+        self.assertEqual(self.balance.current_balance_hours, Decimal('3'))
+        self.assertEqual(self.balance.used_hours_this_month, Decimal('1'))
+        self.assertEqual(
+            list(self.movements().order_by('pk').values_list('movement_type', flat=True)),
+            ['OPENING', 'DEDUCT', 'REFUND']
+        )
+        self.assertEqual(ledger_sum(self.movements(), 'balance_delta'), self.balance.current_balance_hours)
+        self.assertEqual(ledger_sum(self.movements(), 'used_delta'), self.balance.used_hours_this_month)
+
+    def test_deduct_checks_the_stored_balance(self):
+        stale = TimeOffBalance.objects.get(pk=self.balance.pk)
+        deduct_timeoff_hours(self.balance, 3)
+
+        with self.assertRaisesMessage(ValueError, 'Insufficient balance. Available: 1.00h'):
+            deduct_timeoff_hours(stale, 2)
+        self.assertEqual(stale.current_balance_hours, Decimal('1'))
+        self.assertEqual(self.movements().filter(movement_type='DEDUCT').count(), 1)
+
+    def test_refund_never_makes_used_hours_negative(self):
+        deduct_timeoff_hours(self.balance, 1)
+        refund_timeoff_hours(self.balance, 3)
+
+        self.assertEqual(self.balance.used_hours_this_month, Decimal('0'))
+        self.assertEqual(self.balance.current_balance_hours, Decimal('6'))
+
+    def test_set_balance_records_the_difference(self):
+        movement = set_timeoff_balance(self.balance, 10, user=self.admin_user, reason='Carry over')
+
+        self.assertEqual(movement.balance_delta, Decimal('6'))
+        self.assertTrue(self.balance.is_initialized)
+        self.assertEqual(self.balance.current_balance_hours, Decimal('10'))
+
+    def test_monthly_rollover_runs_once_per_month(self):
+        set_timeoff_balance(self.balance, 2)
+        deduct_timeoff_hours(self.balance, 1)
+        TimeOffBalance.objects.filter(pk=self.balance.pk).update(last_reset_date=date(2025, 1, 15))
+
+        self.assertEqual(roll_over_timeoff_month(today=date(2025, 2, 3)), [self.balance.pk])
+        self.assertEqual(roll_over_timeoff_month(today=date(2025, 2, 20)), [])
+
+        self.balance.refresh_from_db()
+        self.assertEqual(self.balance.current_balance_hours, Decimal('5'))
+        self.assertEqual(self.balance.used_hours_this_month, Decimal('0'))
+        self.assertEqual(self.balance.last_reset_date, date(2025, 2, 3))
+        self.assertEqual(self.movements().filter(movement_type='MONTHLY_ACCRUAL').count(), 1)
+
+    def test_rollover_skips_uninitialized_balances(self):
+        TimeOffBalance.objects.filter(pk=self.balance.pk).update(last_reset_date=date(2025, 1, 15))
+
+        self.assertEqual(roll_over_timeoff_month(today=date(2025, 2, 3)), [])
+
+
+class VacationLedgerTests(OrgFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.employee = self.make_employee('Alice')
+        self.year = date.today().year
+        self.balance = EmployeeVacationBalance.objects.create(
+            employee=self.employee, year=self.year, start_balance=2, yearly_balance=20
+        )
+
+    def movements(self):
+        return VacationBalanceMovement.objects.filter(balance=self.balance)
+
+    def test_movements_keep_columns_and_ledger_in_step(self):
+        move_vacation_balance(self.balance, 'SCHEDULED', scheduled=5)
+        move_vacation_balance(self.balance, 'REGISTERED', used=3, scheduled=-3)
+        set_vacation_balance(self.balance, {'yearly_balance': 21}, user=self.admin_user)
+
+        self.balance.refresh_from_db()
+        self.assertEqual(
+            (self.balance.used_days, self.balance.scheduled_days, self.balance.yearly_balance),
+            (Decimal('3'), Decimal('2'), Decimal('21'))
+        )
+        for column, field in [('start_balance', 'start_delta'), ('yearly_balance', 'yearly_delta'),
+                              ('used_days', 'used_delta'), ('scheduled_days', 'scheduled_delta')]:
+            self.assertEqual(ledger_sum(self.movements(), field), getattr(self.balance, column), column)
+
+    def test_scheduled_days_never_go_negative(self):
+        move_vacation_balance(self.balance, 'SCHEDULED', scheduled=2)
+        movement = move_vacation_balance(self.balance, 'UNSCHEDULED', scheduled=-5)
+
+        self.assertEqual(movement.scheduled_delta, Decimal('-2'))
+        self.assertEqual(self.balance.scheduled_days, Decimal('0'))
+
+    def test_year_reset_clears_used_and_scheduled(self):
+        move_vacation_balance(self.balance, 'USED', used=4, scheduled=1)
+
+        reset = reset_vacation_balances(EmployeeVacationBalance.objects.filter(year=self.year))
+
+        self.balance.refresh_from_db()
+        self.assertEqual(reset, 1)
+        self.assertEqual((self.balance.used_days, self.balance.scheduled_days), (0, 0))
+        self.assertEqual(ledger_sum(self.movements(), 'used_delta'), 0)
+
+    def test_hr_approval_is_counted_once(self):
+        vacation_type = VacationType.objects.create(name='Annual')
+        request = VacationRequest.objects.create(
+            employee=self.employee, requester=self.admin_user, vacation_type=vacation_type,
+            start_date=date(self.year, 12, 14), end_date=date(self.year, 12, 15)
+        )
+        VacationRequest.objects.filter(pk=request.pk).update(status='PENDING_HR', number_of_days=2)
+        first = VacationRequest.objects.get(pk=request.pk)
+        stale = VacationRequest.objects.get(pk=request.pk)
+
+        first.approve_by_hr(self.admin_user, 'ok')
+        with self.assertRaisesMessage(ValueError, 'Cannot approve request with status: APPROVED'):
+            stale.approve_by_hr(self.admin_user, 'again')
+
+        self.balance.refresh_from_db()
+        self.assertEqual(self.balance.used_days, Decimal('2'))
+        self.assertEqual(self.movements().filter(movement_type='USED').count(), 1)
+
+
+class ReconcileBalancesTests(OrgFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.timeoff = TimeOffBalance.get_or_create_for_employee(self.make_employee('Alice'))
+        self.vacation = EmployeeVacationBalance.objects.create(
+            employee=self.make_employee('Bob'), year=2025, yearly_balance=20
+        )
+        deduct_timeoff_hours(self.timeoff, 1)
+        move_vacation_balance(self.vacation, 'USED', used=3)
+
+    def test_consistent_balances_report_nothing(self):
+        report = reconcile_balances()
+
+        self.assertEqual(report['timeoff'], {'mismatched': [], 'missing_opening': 0})
+        self.assertEqual(report['vacation'], {'mismatched': [], 'missing_opening': 0})
+
+    def test_drifted_columns_are_reported_and_fixed(self):
+        TimeOffBalance.objects.filter(pk=self.timeoff.pk).update(current_balance_hours=10)
+        EmployeeVacationBalance.objects.filter(pk=self.vacation.pk).update(used_days=7)
+
+        report = reconcile_balances()
+        self.assertEqual(report['timeoff']['mismatched'], [{
+            'balance_id': self.timeoff.pk,
+            'stored': {'current_balance_hours': Decimal('10')},
+            'ledger': {'current_balance_hours': Decimal('3')},
+        }])
+        self.assertEqual(report['vacation']['mismatched'][0]['ledger'], {'used_days': Decimal('3')})
+        self.timeoff.refresh_from_db()
+        self.assertEqual(self.timeoff.current_balance_hours, Decimal('10'))
+
+        reconcile_balances(apply=True)
+
+        self.timeoff.refresh_from_db()
+        self.vacation.refresh_from_db()
+        self.assertEqual(self.timeoff.current_balance_hours, Decimal('3'))
+        self.assertEqual(self.vacation.used_days, Decimal('3'))
+        self.assertEqual(reconcile_balances()['timeoff']['mismatched'], [])
+
+    def test_balances_without_ledger_get_an_opening_movement(self):
+        TimeOffBalanceMovement.objects.filter(balance=self.timeoff).delete()
+
+        self.assertEqual(reconcile_balances()['timeoff']['missing_opening'], 1)
+        reconcile_balances(apply=True)
+
+        opening = TimeOffBalanceMovement.objects.get(balance=self.timeoff)
+        self.assertEqual((opening.movement_type, opening.balance_delta), ('OPENING', Decimal('3')))
+        self.assertEqual(reconcile_balances()['timeoff'], {'mismatched': [], 'missing_opening': 0})
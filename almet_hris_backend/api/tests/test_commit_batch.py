@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from api.commit_batch import CommitBatch
+from api.models import Employee
+from api.tests.base import OrgFixtureMixin
+
+
+class RecordingBatch(CommitBatch):
+    CONNECTION_ATTR = '_test_recording_batch'
+    runs = []
+
+    def __init__(self):
+        super().__init__()
+        self.ids = set()
+
+    def run(self):
+        self.runs.append(sorted(self.ids))
+
+
+def mark(*ids):
+    batch = RecordingBatch.current()
+    batch.ids.update(ids)
+    batch.flush_if_autocommit()
+    return batch
+
+
+class FailedTransaction(Exception):
+    pass
+
+
+class CommitBatchTests(TransactionTestCase):
+
+    def setUp(self):
+        RecordingBatch.runs = []
+
+    def test_autocommit_runs_right_away(self):
+        mark(1)
+        mark(2)
+
+        self.assertEqual(RecordingBatch.runs, [[1], [2]])
+
+    def test_one_run_per_committed_transaction(self):
+        with transaction.atomic():
+            first = mark(1)
+            with transaction.atomic():
+                second = mark(2, 3)
+            self.assertIs(first, second)
+            self.assertEqual(RecordingBatch.runs, [])
+
+        self.assertEqual(RecordingBatch.runs, [[1, 2, 3]])
+
+    def test_rolled_back_transaction_runs_nothing(self):
+        with self.assertRaises(FailedTransaction):
+            with transaction.atomic():
+                mark(1)
+                raise FailedTransaction
+
+        self.assertEqual(RecordingBatch.runs, [])
+
+        with transaction.atomic():
+            mark(2)
+        self.assertEqual(RecordingBatch.runs, [[2]])
+
+    def test_batch_started_in_rolled_back_savepoint_is_replaced(self):
+        with transaction.atomic():
+            with self.assertRaises(FailedTransaction):
+                with transaction.atomic():
+                    dropped = mark(1)
+                    raise FailedTransaction
+            replacement = mark(2)
+            self.assertIsNot(dropped, replacement)
+
+        self.assertEqual(RecordingBatch.runs, [[2]])
+
+    def test_batch_started_before_savepoint_survives_its_rollback(self):
+        with transaction.atomic():
+            mark(1)
+            with self.assertRaises(FailedTransaction):
+                with transaction.atomic():
+                    mark(2)
+                    raise FailedTransaction
+            mark(3)
+
+        # Ids from the rolled back savepoint stay collected - the work is a refresh, re-doing it is harmless
+        self.assertEqual(RecordingBatch.runs, [[1, 2, 3]])
+
+    def test_no_batch_left_on_connection_after_commit(self):
+        with transaction.atomic():
+            mark(1)
+
+        self.assertIsNone(getattr(transaction.get_connection(), RecordingBatch.CONNECTION_ATTR, None))
+
+
+class EmployeeSaveBatchRollbackTests(OrgFixtureMixin, TestCase):
+
+    def test_rolled_back_savepoint_does_not_break_the_transaction_batch(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                with self.assertRaises(FailedTransaction):
+                    with transaction.atomic():
+                        self.make_employee('Ghost')
+                        raise FailedTransaction
+                alice = self.make_employee('Alice')
+                bob = self.make_employee('Bob')
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(Employee.objects.filter(first_name='Ghost').exists())
+        self.assertEqual(
+            dict(Employee.objects.filter(pk__in=[alice.pk, bob.pk]).values_list('first_name', 'search_document')),
+            {'Alice': f' alice tester {alice.employee_id.lower()} engineer holding it dev engineering',
+             'Bob': f' bob tester {bob.employee_id.lower()} engineer holding it dev engineering'}
+        )
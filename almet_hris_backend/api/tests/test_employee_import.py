@@ -0,0 +1,147 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+import pandas as pd
+
+from api.employee_import import EmployeeImportEngine
+from api.models import Employee, EmployeeActivity
+from api.tests.base import OrgFixtureMixin
+
+
+HEADER = [
+    'Employee ID', 'First Name', 'Last Name', 'Email', 'Business Function', 'Department',
+    'Unit', 'Job Function', 'Job Title', 'Position Group', 'Start Date', 'Contract Duration',
+    'Line Manager Employee ID', 'Tags',
+]
+
+
+class EmployeeImportEngineTests(OrgFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.manager = self.make_employee('Boss', employee_id='HC10')
+        self.position_group_name = self.position_group.get_name_display()
+
+    def row(self, first_name, **overrides):
+        values = {
+            'Employee ID': '',
+            'First Name': first_name,
+            'Last Name': 'Imported',
+            'Email': f'{first_name.lower()}@example.com',
+            'Business Function': 'Holding',
+            'Department': 'it',
+            'Unit': 'Dev',
+            'Job Function': 'Engineering',
+            'Job Title': 'Engineer',
+            'Position Group': self.position_group_name,
+            'Start Date': date(2024, 3, 1),
+            'Contract Duration': 'PERMANENT',
+            'Line Manager Employee ID': '',
+            'Tags': '',
+        }
+        values.update(overrides)
+        return [values[column] for column in HEADER]
+
+    def run_import(self, *rows, header=HEADER, **kwargs):
+        engine = EmployeeImportEngine(self.admin_user, **kwargs)
+        with self.captureOnCommitCallbacks(execute=True):
+            return engine.run(
+                ((number, header, values) for number, values in enumerate(rows, start=2)),
+                total_estimate=len(rows)
+            )
+
+    def test_creates_employees_with_resolved_references(self):
+        results = self.run_import(
+            self.row('Alice', **{'Line Manager Employee ID': 'HC10', 'Tags': 'Remote, Team:Core'}),
+            self.row('Bob', **{'Employee ID': 'HC50'}),
+        )
+
+        self.assertEqual((results['successful'], results['failed']), (2, 0), results['errors'])
+        alice = Employee.objects.get(first_name='Alice')
+        self.assertEqual(alice.line_manager, self.manager)
+        self.assertEqual(alice.unit, self.unit)
+        self.assertEqual(alice.department, self.department)
+        self.assertEqual(set(alice.tags.values_list('name', flat=True)), {'Remote', 'Core'})
+        self.assertEqual(Employee.objects.get(first_name='Bob').employee_id, 'HC50')
+        self.assertEqual(
+            [(e['employee_id'], e['id_auto_generated']) for e in results['created_employees']],
+            [('HC11', True), ('HC50', False)]
+        )
+        self.assertEqual(
+            EmployeeActivity.objects.filter(employee=alice, activity_type='BULK_CREATED').count(), 1
+        )
+
+    def test_auto_ids_continue_after_provided_ones(self):
+        results = self.run_import(self.row('Alice', **{'Employee ID': 'HC60'}))
+        results_second = self.run_import(self.row('Bob'))
+
+        self.assertEqual(results['successful'], 1)
+        self.assertEqual(results_second['created_employees'][0]['employee_id'], 'HC61')
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        User.objects.create_user('taken', email='taken@example.com')
+
+        results = self.run_import(
+            self.row('Alice', **{'Employee ID': 'HC70'}),
+            self.row('Bob', **{'Employee ID': 'HC70'}),
+            self.row('Carol', Email='taken@example.com'),
+            self.row('Dave', Department='Finance'),
+            self.row('Erin', **{'Contract Duration': '9_MONTHS'}),
+            self.row('Frank', **{'Employee ID': 'HC10'}),
+            self.row('Grace', **{'Job Title': ''}),
+        )
+
+        self.assertEqual((results['total_rows'], results['successful'], results['failed']), (7, 1, 6))
+        self.assertEqual(list(Employee.objects.filter(last_name='Imported').values_list('first_name', flat=True)), ['Alice'])
+        self.assertEqual(results['errors'][:3], [
+            'Row 3: Employee ID HC70 already exists',
+            'Row 4: Email taken@example.com already exists',
+            "Row 5: Department 'Finance' not found",
+        ])
+        self.assertTrue(results['errors'][3].startswith("Row 6: Invalid contract duration '9_MONTHS'"))
+        self.assertEqual(results['errors'][4:], [
+            'Row 7: Employee ID HC10 already exists',
+            'Row 8: Missing required data',
+        ])
+
+    def test_sample_and_empty_rows_are_ignored(self):
+        results = self.run_import(
+            self.row('John'),
+            [''] * len(HEADER),
+            self.row('Alice'),
+        )
+
+        self.assertEqual((results['total_rows'], results['successful']), (1, 1))
+
+    def test_missing_required_columns_stop_the_import(self):
+        header = [column for column in HEADER if column != 'Department']
+        results = self.run_import(self.row('Alice')[:len(header)], header=header)
+
+        self.assertEqual(results['errors'], ['Missing required columns: department'])
+        self.assertFalse(Employee.objects.filter(last_name='Imported').exists())
+
+    def test_chunks_report_progress(self):
+        progress = []
+        EmployeeImportEngine.CHUNK_SIZE, chunk_size = 2, EmployeeImportEngine.CHUNK_SIZE
+        self.addCleanup(setattr, EmployeeImportEngine, 'CHUNK_SIZE', chunk_size)
+
+        results = self.run_import(
+            self.row('Alice'), self.row('Bob'), self.row('Carol'),
+            progress_callback=lambda processed, total, _: progress.append((processed, total))
+        )
+
+        self.assertEqual(results['successful'], 3)
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+
+    def test_run_dataframe(self):
+        df = pd.DataFrame([self.row('Alice'), self.row('Bob')], columns=HEADER)
+
+        engine = EmployeeImportEngine(self.admin_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            results = engine.run_dataframe(df)
+
+        self.assertEqual(results['successful'], 2, results['errors'])
+        self.assertEqual(
+            set(Employee.objects.filter(last_name='Imported').values_list('start_date', flat=True)),
+            {date(2024, 3, 1)}
+        )
@@ -0,0 +1,62 @@
+from django.test import TestCase
+
+from api.models import IdSequence, VacantPosition
+from api.tests.base import OrgFixtureMixin
+
+
+class IdSequenceTests(OrgFixtureMixin, TestCase):
+
+    def test_reserve_returns_consecutive_ids(self):
+        first = IdSequence.reserve(IdSequence.EMPLOYEE, 'HC', 3)
+        second = IdSequence.reserve(IdSequence.EMPLOYEE, 'HC', 2)
+
+        self.assertEqual(first, ['HC1', 'HC2', 'HC3'])
+        self.assertEqual(second, ['HC4', 'HC5'])
+
+    def test_seeded_from_highest_existing_id(self):
+        self.make_employee('Manual', employee_id='HC41')
+
+        self.assertEqual(IdSequence.reserve(IdSequence.EMPLOYEE, 'HC'), ['HC42'])
+
+    def test_reserve_skips_manually_used_numbers(self):
+        IdSequence.reserve(IdSequence.EMPLOYEE, 'HC')
+        self.make_employee('Manual', employee_id='HC2')
+
+        self.assertEqual(IdSequence.reserve(IdSequence.EMPLOYEE, 'HC', 2), ['HC3', 'HC4'])
+
+    def test_employee_save_allocates_id(self):
+        first = self.make_employee('First')
+        second = self.make_employee('Second')
+
+        self.assertEqual((first.employee_id, second.employee_id), ('HC1', 'HC2'))
+
+    def test_position_ids_skip_employee_numbers(self):
+        IdSequence.reserve(IdSequence.EMPLOYEE, 'HC', 5)
+
+        self.assertEqual(IdSequence.reserve(IdSequence.POSITION, 'HC'), ['HC6'])
+
+    def test_release_gives_back_unused_tail(self):
+        reserved = IdSequence.reserve(IdSequence.EMPLOYEE, 'HC', 3)
+
+        self.assertTrue(IdSequence.release(IdSequence.EMPLOYEE, 'HC', reserved[1:]))
+        self.assertEqual(IdSequence.reserve(IdSequence.EMPLOYEE, 'HC'), ['HC2'])
+
+    def test_release_refused_after_sequence_moved_on(self):
+        reserved = IdSequence.reserve(IdSequence.EMPLOYEE, 'HC', 2)
+        IdSequence.reserve(IdSequence.EMPLOYEE, 'HC')
+
+        self.assertFalse(IdSequence.release(IdSequence.EMPLOYEE, 'HC', reserved))
+
+    def test_peek_matches_next_reserve(self):
+        IdSequence.reserve(IdSequence.EMPLOYEE, 'HC', 2)
+        peeked = IdSequence.peek(IdSequence.EMPLOYEE, 'HC')
+
+        self.assertEqual(IdSequence.reserve(IdSequence.EMPLOYEE, 'HC'), [peeked])
+
+    def test_peek_creates_no_rows(self):
+        self.make_employee('Manual', employee_id='HC7')
+        IdSequence.objects.all().delete()
+
+        self.assertEqual(IdSequence.peek(IdSequence.POSITION, 'HC'), 'HC8')
+        self.assertEqual(IdSequence.peek(IdSequence.EMPLOYEE, 'HC'), 'HC8')
+        self.assertFalse(IdSequence.objects.exists())
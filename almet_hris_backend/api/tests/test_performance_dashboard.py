@@ -0,0 +1,153 @@
+from datetime import date
+
+from django.test import TestCase
+
+from api.models import BusinessFunction, Department
+from api.performance_dashboard import aggregate_statistics, get_summary_statistics, refresh_dashboard_summary
+from api.performance_models import EmployeePerformance, PerformanceDashboardSummary, PerformanceYear
+from api.tests.base import OrgFixtureMixin
+
+
+class PerformanceDashboardTests(OrgFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        dates = {
+            field: date(2025, 1, 1)
+            for field in (
+                'goal_setting_employee_start', 'goal_setting_employee_end',
+                'goal_setting_manager_start', 'goal_setting_manager_end',
+                'mid_year_review_start', 'mid_year_review_end',
+                'end_year_review_start', 'end_year_review_end',
+            )
+        }
+        cls.year = PerformanceYear.objects.create(year=2025, **dates)
+        cls.other_year = PerformanceYear.objects.create(year=2024, **dates)
+        cls.finance = Department.objects.create(name='Finance', business_function=cls.business_function)
+        # Same name under another business function - merged by name in the breakdown
+        other_function = BusinessFunction.objects.create(name='Trading', code='TR')
+        cls.other_it = Department.objects.create(name='IT', business_function=other_function)
+
+    def setUp(self):
+        self.performances = []
+
+    def add(self, first_name, department=None, year=None, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            employee = self.make_employee(first_name, department=department or self.department, unit=None)
+            performance = EmployeePerformance.objects.create(
+                employee=employee, performance_year=year or self.year, **fields
+            )
+        self.performances.append(performance)
+        return performance
+
+    def add_sample(self):
+        self.add('Ann', objectives_employee_approved=True, objectives_manager_approved=True,
+                 mid_year_completed=True)
+        self.add('Ben', approval_status='COMPLETED', competencies_submitted=True, final_rating='E',
+                 end_year_completed=True, competencies_letter_grade='A')
+        self.add('Cat', department=self.finance, approval_status='COMPLETED', final_rating='N/A',
+                 end_year_completed=True, competencies_letter_grade='B')
+        self.add('Dan', department=self.finance, approval_status='PENDING_MANAGER_APPROVAL')
+        self.add('Eve', department=self.other_it, approval_status='NEED_CLARIFICATION',
+                 end_year_completed=True, competencies_letter_grade='A')
+        self.add('Fay', department=self.finance, year=self.other_year, approval_status='PENDING_EMPLOYEE_APPROVAL')
+
+    def year_statistics(self):
+        return aggregate_statistics(EmployeePerformance.objects.filter(
+            performance_year=self.year, employee__is_deleted=False
+        ))
+
+    def test_aggregates(self):
+        self.add_sample()
+
+        with self.assertNumQueries(3):
+            statistics = self.year_statistics()
+
+        self.assertEqual(statistics, {
+            'total_employees': 5,
+            'objectives_completed': 1,
+            'mid_year_completed': 1,
+            'end_year_completed': 1,
+            'pending_employee_approval': 0,
+            'pending_manager_approval': 1,
+            'need_clarification': 1,
+            'by_department': [
+                {'department': 'Finance', 'total': 2, 'objectives_complete': 0,
+                 'mid_year_complete': 0, 'end_year_complete': 1},
+                {'department': 'IT', 'total': 3, 'objectives_complete': 1,
+                 'mid_year_complete': 1, 'end_year_complete': 1},
+            ],
+            'competency_grade_distribution': {'total': 3, 'grades': {'A': 2, 'B': 1}},
+        })
+
+    def test_summary_rows_match_live_aggregates(self):
+        self.add_sample()
+
+        self.assertEqual(
+            PerformanceDashboardSummary.objects.filter(performance_year=self.year).count(), 3
+        )
+        with self.assertNumQueries(1):
+            summary = get_summary_statistics(self.year)
+        self.assertEqual(summary, self.year_statistics())
+
+    def test_summary_follows_performance_changes(self):
+        self.add_sample()
+        performance = self.performances[3]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            performance.approval_status = 'COMPLETED'
+            performance.save()
+
+        self.assertEqual(get_summary_statistics(self.year)['pending_manager_approval'], 0)
+        self.assertEqual(get_summary_statistics(self.year), self.year_statistics())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            performance.delete()
+
+        self.assertEqual(get_summary_statistics(self.year)['total_employees'], 4)
+        self.assertEqual(get_summary_statistics(self.year), self.year_statistics())
+
+    def test_summary_follows_employee_moves_and_deletes(self):
+        self.add_sample()
+        moved = self.performances[0].employee
+        deleted = self.performances[3].employee
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.department = self.finance
+            moved.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted.is_deleted = True
+            deleted.save()
+
+        summary = get_summary_statistics(self.year)
+        self.assertEqual(summary, self.year_statistics())
+        self.assertEqual(summary['total_employees'], 4)
+        self.assertEqual(
+            [(row['department'], row['total']) for row in summary['by_department']],
+            [('Finance', 2), ('IT', 2)]
+        )
+
+    def test_missing_rows_are_built_on_read(self):
+        self.add_sample()
+        PerformanceDashboardSummary.objects.all().delete()
+
+        self.assertEqual(get_summary_statistics(self.year), self.year_statistics())
+        self.assertTrue(PerformanceDashboardSummary.objects.filter(performance_year=self.year).exists())
+
+    def test_department_refresh_leaves_other_rows(self):
+        self.add_sample()
+        EmployeePerformance.objects.filter(employee__department=self.finance).update(mid_year_completed=True)
+
+        refresh_dashboard_summary(self.year.id, {self.department.id})
+        self.assertEqual(
+            PerformanceDashboardSummary.objects.get(performance_year=self.year, department=self.finance).mid_year_completed, 0
+        )
+
+        refresh_dashboard_summary(self.year.id, {self.finance.id})
+        self.assertEqual(get_summary_statistics(self.year), self.year_statistics())
+
+    def test_empty_year(self):
+        self.assertEqual(refresh_dashboard_summary(self.year.id), 0)
+        self.assertEqual(get_summary_statistics(self.year)['total_employees'], 0)
+        self.assertEqual(refresh_dashboard_summary(0), 0)
@@ -0,0 +1,160 @@
+from decimal import Decimal
+import random
+
+import numpy as np
+from django.test import TestCase
+
+from api.models import PositionGroup
+from api.tests.base import OrgFixtureMixin
+from grading.managers import SalaryCalculationManager
+from grading.scenario_model import (
+    get_scenario_model, invalidate_scenario_model, GRADE_LEVELS, MAX_BATCH_CANDIDATES
+)
+
+
+def decimal_loop_grades(positions, base_value, input_rates):
+    """The manager's original per-position Decimal loop - the reference the compiled model must match"""
+    grades = {}
+    for i in range(len(positions) - 1, -1, -1):
+        name = positions[i].get_name_display()
+        inputs = input_rates.get(name, {})
+        if i == len(positions) - 1:
+            lower_decile = Decimal(str(base_value))
+        else:
+            vertical = inputs.get('vertical', 0)
+            rate = Decimal(str(vertical)) if vertical not in ('', None) else Decimal('0')
+            below = grades[positions[i + 1].get_name_display()]['LD']
+            lower_decile = Decimal(str(below)) * (Decimal('1') + rate / Decimal('100'))
+        grades[name] = SalaryCalculationManager._calculate_horizontal_grades_with_intervals(
+            lower_decile, inputs.get('horizontal_intervals', {})
+        )
+    return grades
+
+
+def random_rates(rng, names):
+    return {
+        name: {
+            'vertical': round(rng.uniform(0, 40), rng.choice([0, 1, 2, 4])),
+            'horizontal_intervals': {
+                interval: round(rng.uniform(0, 25), rng.choice([0, 1, 2]))
+                for interval in ('LD_to_LQ', 'LQ_to_M', 'M_to_UQ', 'UQ_to_UD')
+            },
+        }
+        for name in names
+    }
+
+
+class CompiledScenarioModelTests(OrgFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for name, level in [('VC', 1), ('DIRECTOR', 2), ('HEAD OF DEPARTMENT', 4),
+                            ('SPECIALIST', 5), ('BLUE COLLAR', 7)]:
+            PositionGroup.objects.create(name=name, hierarchy_level=level)
+
+    def setUp(self):
+        invalidate_scenario_model()
+        self.addCleanup(invalidate_scenario_model)
+        self.model = get_scenario_model()
+        self.positions = list(SalaryCalculationManager.get_position_groups_from_db())
+        self.rng = random.Random(20)
+
+    def test_positions_in_hierarchy_order(self):
+        self.assertEqual(self.model.names, [
+            'Vice Chairman', 'Director', 'Manager', 'Head of Department', 'Specialist', 'Blue Collar'
+        ])
+
+    def test_full_calculation_matches_decimal_loop(self):
+        for _ in range(200):
+            base_value = self.rng.choice([self.rng.randint(300, 5000), round(self.rng.uniform(300, 5000), 2)])
+            rates = random_rates(self.rng, self.model.names)
+
+            self.assertEqual(
+                SalaryCalculationManager.calculate_scenario_grades(base_value, rates),
+                decimal_loop_grades(self.positions, base_value, rates),
+                (base_value, rates)
+            )
+
+    def test_incremental_calculation_matches_full_one(self):
+        base_value = 850
+        rates = random_rates(self.rng, self.model.names)
+        result = self.model.calculate(base_value, rates)
+
+        for _ in range(200):
+            # One slider at a time, like the UI
+            name = self.rng.choice(self.model.names)
+            if self.rng.random() < 0.5:
+                rates[name]['vertical'] = round(self.rng.uniform(0, 40), 2)
+            else:
+                interval = self.rng.choice(list(rates[name]['horizontal_intervals']))
+                rates[name]['horizontal_intervals'][interval] = round(self.rng.uniform(0, 25), 1)
+
+            result = self.model.calculate(base_value, rates, previous=result)
+            full = self.model.calculate(base_value, rates)
+
+            self.assertEqual(self.model.to_grades(result), self.model.to_grades(full))
+            self.assertEqual(self.model.to_grades(result), decimal_loop_grades(self.positions, base_value, rates))
+
+    def test_incremental_with_new_base_value_recomputes_everything(self):
+        rates = random_rates(self.rng, self.model.names)
+        previous = self.model.calculate(850, rates)
+
+        result = self.model.calculate(910, rates, previous=previous)
+
+        self.assertEqual(self.model.to_grades(result), decimal_loop_grades(self.positions, 910, rates))
+
+    def test_blank_and_invalid_rates_count_as_zero(self):
+        rates = {
+            'Manager': {'vertical': '', 'horizontal_intervals': {'LD_to_LQ': None, 'LQ_to_M': 'None'}},
+            'Director': {'vertical': None},
+            'Unknown': {'vertical': 10},
+        }
+
+        grades = SalaryCalculationManager.calculate_scenario_grades(1000, rates)
+
+        self.assertEqual(grades['Director'], dict.fromkeys(GRADE_LEVELS, 1000))
+        self.assertEqual(grades, decimal_loop_grades(self.positions, 1000, {
+            'Manager': {'vertical': '', 'horizontal_intervals': {}},
+            'Director': {'vertical': ''},
+        }))
+
+    def test_batch_matches_single_calculations(self):
+        rates = random_rates(self.rng, self.model.names)
+        base_values, steps, overrides = self.model.build_candidates(
+            1200, rates,
+            candidates=[{'baseValue1': 1500}, {'verticals': {'Director': 12.5}}],
+            grid={'Manager': [0, 10.25, 33], 'Vice Chairman': [5, 7]},
+        )
+        batch = np.round(self.model.calculate_batch(base_values, steps, self.model.interval_factors(rates)))
+
+        self.assertEqual(len(overrides), 8)
+        for k, override in enumerate(overrides):
+            candidate_rates = {name: dict(values) for name, values in rates.items()}
+            for name, rate in (override.get('verticals') or {}).items():
+                candidate_rates[name]['vertical'] = rate
+            expected = decimal_loop_grades(self.positions, override.get('baseValue1', 1200), candidate_rates)
+            self.assertEqual(
+                {name: dict(zip(GRADE_LEVELS, batch[k, i].astype(int).tolist())) for i, name in enumerate(self.model.names)},
+                expected,
+                override
+            )
+
+    def test_candidate_validation(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown positions: Pilot'):
+            self.model.build_candidates(1000, {}, grid={'Pilot': [1]})
+        with self.assertRaisesMessage(ValueError, 'Vertical rates must be between 0-100'):
+            self.model.build_candidates(1000, {}, candidates=[{'verticals': {'Manager': 101}}])
+        with self.assertRaisesMessage(ValueError, 'Base value must be greater than 0'):
+            self.model.build_candidates(1000, {}, candidates=[{'baseValue1': -5}])
+        with self.assertRaisesMessage(ValueError, f'(max {MAX_BATCH_CANDIDATES})'):
+            self.model.build_candidates(1000, {}, grid={name: list(range(10)) for name in self.model.names})
+
+    def test_position_group_change_rebuilds_the_model(self):
+        self.assertIs(get_scenario_model(), self.model)
+
+        PositionGroup.objects.create(name='JUNIOR SPECIALIST', hierarchy_level=6)
+
+        rebuilt = get_scenario_model()
+        self.assertIsNot(rebuilt, self.model)
+        self.assertEqual(rebuilt.names[-2:], ['Junior Specialist', 'Blue Collar'])
@@ -0,0 +1,74 @@
+from django.test import TestCase
+
+from api.models import Employee
+from api.search_index import (
+    apply_search, build_search_document, refresh_search_documents, search_terms, MAX_SEARCH_TERMS
+)
+from api.tests.base import OrgFixtureMixin
+
+
+class SearchDocumentTests(OrgFixtureMixin, TestCase):
+
+    def make_employee(self, first_name, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            employee = super().make_employee(first_name, **kwargs)
+        employee.refresh_from_db()
+        return employee
+
+    def test_document_is_normalized(self):
+        self.assertEqual(build_search_document(['  Alice   Tester ', None, '', 'HC1']), ' alice tester hc1')
+        self.assertEqual(search_terms('Alice  alice IT'), ['alice', 'it'])
+        self.assertEqual(len(search_terms(' '.join(f't{i}' for i in range(20)))), MAX_SEARCH_TERMS)
+
+    def test_employee_document_built_on_commit(self):
+        employee = self.make_employee('Alice', job_title='Data Engineer')
+
+        self.assertEqual(
+            employee.search_document,
+            ' alice tester hc1 data engineer holding it dev engineering'
+        )
+
+    def test_name_change_refreshes_copied_documents(self):
+        employee = self.make_employee('Alice')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.department.name = 'Finance'
+            self.department.save()
+
+        employee.refresh_from_db()
+        self.assertIn(' finance ', employee.search_document)
+        self.assertNotIn(' it ', employee.search_document)
+
+    def test_refresh_only_writes_changed_rows(self):
+        alice = self.make_employee('Alice')
+        self.make_employee('Bob')
+        Employee.objects.filter(pk=alice.pk).update(search_document='')
+
+        self.assertEqual(refresh_search_documents(Employee), 1)
+        self.assertEqual(refresh_search_documents(Employee), 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(refresh_search_documents(Employee, ids=[]), 0)
+
+    def test_refresh_by_ids(self):
+        alice = self.make_employee('Alice')
+        bob = self.make_employee('Bob')
+        Employee.objects.update(search_document='')
+
+        self.assertEqual(refresh_search_documents(Employee, ids=[bob.pk]), 1)
+        self.assertEqual(
+            dict(Employee.objects.filter(pk__in=[alice.pk, bob.pk]).values_list('first_name', 'search_document'))['Alice'],
+            ''
+        )
+
+    def test_search_matches_every_term_and_ranks(self):
+        alice = self.make_employee('Alice', job_title='Analyst')
+        bob = self.make_employee('Bob', job_title='Alice Liaison')
+        self.make_employee('Carol')
+
+        results = list(apply_search(Employee.objects.order_by('pk'), 'alice', ranked=True))
+        self.assertEqual(results, [alice, bob])
+        self.assertEqual([e.search_rank for e in results], [2, 1])
+
+        self.assertEqual(list(apply_search(Employee.objects.all(), 'ALICE analyst')), [alice])
+        self.assertEqual(apply_search(Employee.objects.all(), bob.employee_id.lower(), ranked=True)[0], bob)
+        self.assertEqual(apply_search(Employee.objects.all(), '   ').count(), 3)
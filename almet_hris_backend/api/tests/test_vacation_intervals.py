@@ -0,0 +1,103 @@
+from datetime import date
+
+from django.test import TestCase
+
+from api.vacation_intervals import find_conflicts, ranges_overlap, CALENDAR_SCHEDULE_STATUSES
+from api.vacation_models import VacationRequest, VacationSchedule, VacationType
+from api.tests.base import OrgFixtureMixin
+
+
+class FindConflictsTests(OrgFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.alice = cls.make_employee('Alice')
+        cls.bob = cls.make_employee('Bob')
+        cls.annual = VacationType.objects.create(name='Annual')
+
+        # bulk_create - fixtures are allowed to overlap each other
+        cls.approved, cls.rejected, cls.other_employee = VacationRequest.objects.bulk_create([
+            cls.vacation_request('VR20250001', cls.alice, date(2025, 3, 10), date(2025, 3, 14), 'APPROVED'),
+            cls.vacation_request('VR20250002', cls.alice, date(2025, 3, 17), date(2025, 3, 18), 'REJECTED_HR'),
+            cls.vacation_request('VR20250003', cls.bob, date(2025, 3, 10), date(2025, 3, 14), 'PENDING_HR'),
+        ])
+        cls.scheduled, cls.registered = VacationSchedule.objects.bulk_create([
+            VacationSchedule(employee=cls.alice, vacation_type=cls.annual, status='SCHEDULED',
+                             start_date=date(2025, 3, 20), end_date=date(2025, 3, 21)),
+            VacationSchedule(employee=cls.alice, vacation_type=cls.annual, status='REGISTERED',
+                             start_date=date(2025, 4, 1), end_date=date(2025, 4, 2)),
+        ])
+
+    @classmethod
+    def vacation_request(cls, request_id, employee, start_date, end_date, status):
+        return VacationRequest(
+            request_id=request_id, employee=employee, requester=cls.admin_user,
+            vacation_type=cls.annual, start_date=start_date, end_date=end_date, status=status
+        )
+
+    def ids(self, conflicts):
+        return [conflict['id'] for conflict in conflicts]
+
+    def test_ranges_overlap_is_inclusive(self):
+        self.assertTrue(ranges_overlap(date(2025, 1, 1), date(2025, 1, 5), date(2025, 1, 5), date(2025, 1, 9)))
+        self.assertFalse(ranges_overlap(date(2025, 1, 1), date(2025, 1, 4), date(2025, 1, 5), date(2025, 1, 9)))
+
+    def test_reports_overlapping_request_and_schedule(self):
+        [conflicts] = find_conflicts([(self.alice.pk, date(2025, 3, 14), date(2025, 3, 20))])
+
+        self.assertEqual(conflicts, [
+            {
+                'type': 'request', 'id': 'VR20250001',
+                'start_date': date(2025, 3, 10), 'end_date': date(2025, 3, 14),
+                'vacation_type': 'Annual', 'status': 'Approved',
+            },
+            {
+                'type': 'schedule', 'id': f'SCH{self.scheduled.pk}',
+                'start_date': date(2025, 3, 20), 'end_date': date(2025, 3, 21),
+                'vacation_type': 'Annual', 'status': 'Scheduled',
+            },
+        ])
+
+    def test_inactive_rows_and_other_employees_do_not_conflict(self):
+        [conflicts] = find_conflicts([(self.alice.pk, date(2025, 3, 15), date(2025, 3, 18))])
+        self.assertEqual(conflicts, [])
+
+        VacationRequest.objects.filter(pk=self.approved.pk).update(is_deleted=True)
+        [conflicts] = find_conflicts([(self.alice.pk, date(2025, 3, 10), date(2025, 3, 10))])
+        self.assertEqual(conflicts, [])
+
+    def test_one_result_list_per_range(self):
+        results = find_conflicts([
+            (self.alice.pk, date(2025, 3, 11), date(2025, 3, 11)),
+            (self.bob.pk, date(2025, 3, 11), date(2025, 3, 11)),
+            (self.alice.pk, date(2025, 5, 1), date(2025, 5, 2)),
+            (self.alice.pk, None, None),
+            (self.alice.pk, date(2025, 3, 21), date(2025, 3, 21)),
+        ])
+
+        self.assertEqual([self.ids(conflicts) for conflicts in results], [
+            ['VR20250001'], ['VR20250003'], [], [], [f'SCH{self.scheduled.pk}'],
+        ])
+
+    def test_excluded_ids_are_skipped(self):
+        [conflicts] = find_conflicts(
+            [(self.alice.pk, date(2025, 3, 1), date(2025, 3, 31))],
+            exclude_request_ids=[self.approved.pk],
+            exclude_schedule_ids=[self.scheduled.pk, None],
+        )
+
+        self.assertEqual(conflicts, [])
+
+    def test_schedule_statuses_can_be_widened(self):
+        [conflicts] = find_conflicts(
+            [(self.alice.pk, date(2025, 4, 2), date(2025, 4, 3))],
+            schedule_statuses=CALENDAR_SCHEDULE_STATUSES,
+        )
+
+        self.assertEqual(self.ids(conflicts), [f'SCH{self.registered.pk}'])
+        self.assertEqual(conflicts[0]['status'], 'Registered')
+
+    def test_no_dates_no_query(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(find_conflicts([(self.alice.pk, None, date(2025, 3, 1))]), [[]])
@@ -6,7 +6,7 @@ Time Off System Models
 - HR notification
 """
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -79,61 +79,50 @@ class TimeOffBalance(models.Model):
         - Yalnız initialized balances üçün işləyir
         - HƏR AY yeni monthly_allowance əlavə edir (istifadə etməsə də)
         - used_hours_this_month 0-a çevrilir
+        - Ledger: MONTHLY_ACCRUAL movement (api/balance_ledger.py)
         """
-        if not self.is_initialized:
-          
-            return False
+        from .balance_ledger import roll_over_timeoff_month
         
         today = timezone.now().date()
         
-        # Əgər yeni ay başlayıbsa
-        if today.month != self.last_reset_date.month or today.year != self.last_reset_date.year:
-            # Yeni ay üçün monthly_allowance əlavə et (istifadə etməsə də)
-            old_balance = self.current_balance_hours
-            self.current_balance_hours += self.monthly_allowance_hours
-            self.used_hours_this_month = Decimal('0.0')
-            self.last_reset_date = today
-            self.save()
-            
-            logger.info(
-                f"✅ Monthly reset: {self.employee.full_name} - "
-                f"Added {self.monthly_allowance_hours}h, "
-                f"{old_balance}h → {self.current_balance_hours}h"
-            )
-            return True
+        # Cheap in-memory check first - the ledger re-checks on the locked row
+        if not self.is_initialized or self.last_reset_date >= today.replace(day=1):
+            return False
         
-        return False
+        old_balance = self.current_balance_hours
+        rolled_over = roll_over_timeoff_month([self.pk], today)
+        self.refresh_from_db(fields=['current_balance_hours', 'used_hours_this_month', 'last_reset_date', 'updated_at'])
+        if not rolled_over:
+            # Another request already reset this month
+            return False
+        
+        logger.info(
+            f"✅ Monthly reset: {self.employee.full_name} - "
+            f"Added {self.monthly_allowance_hours}h, "
+            f"{old_balance}h → {self.current_balance_hours}h"
+        )
+        return True
     
     def has_sufficient_balance(self, hours_requested):
         """Kifayət qədər balans var?"""
         return self.current_balance_hours >= Decimal(str(hours_requested))
     
-    def deduct_hours(self, hours):
-        """Saatları balansdan çıxart"""
-        if not self.has_sufficient_balance(hours):
-            raise ValueError(
-                f"Insufficient balance. Available: {self.current_balance_hours}h, "
-                f"Requested: {hours}h"
-            )
+    def deduct_hours(self, hours, request=None, user=None):
+        """Saatları balansdan çıxart (ledger: DEDUCT)"""
+        from .balance_ledger import deduct_timeoff_hours
         
-        self.current_balance_hours -= Decimal(str(hours))
-        self.used_hours_this_month += Decimal(str(hours))
-        self.save()
+        deduct_timeoff_hours(self, hours, request=request, user=user)
         
         logger.info(
             f"💰 Deducted {hours}h from {self.employee.full_name} - "
             f"New balance: {self.current_balance_hours}h"
         )
     
-    def refund_hours(self, hours):
-        """Saatları geri qaytar (məsələn, reject zamanı)"""
-        self.current_balance_hours += Decimal(str(hours))
-        # Used hours-dan da çıxart
-        self.used_hours_this_month = max(
-            Decimal('0.0'), 
-            self.used_hours_this_month - Decimal(str(hours))
-        )
-        self.save()
+    def refund_hours(self, hours, request=None, user=None):
+        """Saatları geri qaytar (məsələn, reject zamanı) (ledger: REFUND)"""
+        from .balance_ledger import refund_timeoff_hours
+        
+        refund_timeoff_hours(self, hours, request=request, user=user)
         
         logger.info(
             f"💵 Refunded {hours}h to {self.employee.full_name} - "
@@ -274,6 +263,7 @@ class TimeOffRequest(models.Model):
         indexes = [
             models.Index(fields=['employee', 'status']),
             models.Index(fields=['date']),
+            models.Index(fields=['employee', 'date']),
             models.Index(fields=['status', '-created_at']),
         ]
     
@@ -314,13 +304,22 @@ class TimeOffRequest(models.Model):
                 f"Insufficient balance. Available: {balance.current_balance_hours}h"
             )
         
-        balance.deduct_hours(self.duration_hours)
-        
-        self.status = 'APPROVED'
-        self.approved_by = approved_by_user
-        self.approved_at = timezone.now()
-        self.balance_deducted = True
-        self.save()
+        # Deduction and status change commit together
+        with transaction.atomic():
+            # Concurrent approval of the same request
+            current_status = TimeOffRequest.objects.select_for_update().values_list(
+                'status', flat=True
+            ).get(pk=self.pk)
+            if current_status != 'PENDING':
+                raise ValueError(f"Cannot approve request with status: {current_status}")
+            
+            balance.deduct_hours(self.duration_hours, request=self, user=approved_by_user)
+            
+            self.status = 'APPROVED'
+            self.approved_by = approved_by_user
+            self.approved_at = timezone.now()
+            self.balance_deducted = True
+            self.save()
         
         # HR-lara bildiriş göndər
         self.notify_hr()
@@ -338,14 +337,20 @@ class TimeOffRequest(models.Model):
     
     def cancel(self):
         """Employee tərəfindən cancel"""
-        if self.status == 'APPROVED' and self.balance_deducted:
-            # Balance-ə geri qaytar
-            balance = TimeOffBalance.get_or_create_for_employee(self.employee)
-            balance.refund_hours(self.duration_hours)
-            self.balance_deducted = False
-        
-        self.status = 'CANCELLED'
-        self.save()
+        with transaction.atomic():
+            # Concurrent cancel of the same request refunds only once
+            self.status, self.balance_deducted = TimeOffRequest.objects.select_for_update().values_list(
+                'status', 'balance_deducted'
+            ).get(pk=self.pk)
+            
+            if self.status == 'APPROVED' and self.balance_deducted:
+                # Balance-ə geri qaytar
+                balance = TimeOffBalance.get_or_create_for_employee(self.employee)
+                balance.refund_hours(self.duration_hours, request=self)
+                self.balance_deducted = False
+            
+            self.status = 'CANCELLED'
+            self.save()
     
     def notify_hr(self):
         """HR-lara bildiriş göndər"""
@@ -456,6 +461,52 @@ class TimeOffSettings(models.Model):
         ]
 
 
+class TimeOffBalanceMovement(models.Model):
+    """
+    Balans hərəkəti (ledger) - append-only.
+    Balance sütunları bu cədvəlin cəmidir - see api/balance_ledger.py
+    """
+    
+    MOVEMENT_TYPES = [
+        ('OPENING', 'Opening Balance'),
+        ('DEDUCT', 'Deducted for Request'),
+        ('REFUND', 'Refunded for Request'),
+        ('MONTHLY_ACCRUAL', 'Monthly Accrual'),
+        ('ADJUSTMENT', 'Manual Adjustment'),
+    ]
+    
+    balance = models.ForeignKey(
+        TimeOffBalance,
+        on_delete=models.CASCADE,
+        related_name='movements'
+    )
+    movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPES)
+    
+    # Signed deltas of current_balance_hours / used_hours_this_month
+    balance_delta = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    used_delta = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    
+    request = models.ForeignKey(
+        TimeOffRequest,
+        on_delete=models.SET_NULL,
+        related_name='balance_movements',
+        null=True,
+        blank=True
+    )
+    description = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'timeoff_balance_movements'
+        verbose_name = 'Time Off Balance Movement'
+        verbose_name_plural = 'Time Off Balance Movements'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.balance_id} {self.movement_type} {self.balance_delta:+}h"
+
+
 class TimeOffActivity(models.Model):
     """
     Time Off request activity log
@@ -26,6 +26,7 @@ from .timeoff_serializers import (
     TimeOffActivitySerializer
 )
 from .models import Employee
+from .balance_ledger import set_timeoff_balance, roll_over_timeoff_month, timeoff_reset_due_q
 from .notification_service import notification_service
 from .token_helpers import extract_graph_token_from_request
 from .timeoff_permissions import (
@@ -195,11 +196,8 @@ class TimeOffBalanceViewSet(viewsets.ReadOnlyModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Update balance
-            balance.current_balance_hours = new_balance_decimal
-            balance.is_initialized = True
-            balance.last_reset_date = timezone.now().date()
-            balance.save()
+            # Update balance (ledger: ADJUSTMENT)
+            set_timeoff_balance(balance, new_balance_decimal, user=request.user, reason=reason)
             
             # Log activity
             TimeOffActivity.objects.create(
@@ -312,12 +310,8 @@ class TimeOffBalanceViewSet(viewsets.ReadOnlyModelViewSet):
                     balance = TimeOffBalance.get_or_create_for_employee(employee)
                     old_balance = balance.current_balance_hours
                     
-                    # Update balance
-                    from decimal import Decimal
-                    balance.current_balance_hours = Decimal(str(new_balance))
-                    balance.is_initialized = True
-                    balance.last_reset_date = timezone.now().date()
-                    balance.save()
+                    # Update balance (ledger: ADJUSTMENT)
+                    set_timeoff_balance(balance, new_balance, user=request.user, reason=reason)
                     
                     # Log activity
                     TimeOffActivity.objects.create(
@@ -395,39 +389,42 @@ class TimeOffBalanceViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        reset_count = 0
-        skipped_count = 0
-        failed_count = 0
         results = []
         
-        for balance in TimeOffBalance.objects.all():
-            try:
-                if not balance.is_initialized:
-                    skipped_count += 1
-                    results.append({
-                        'employee_id': balance.employee.employee_id,
-                        'employee_name': balance.employee.full_name,
-                        'status': 'skipped',
-                        'reason': 'Not initialized'
-                    })
-                    continue
-                
-                if balance.check_and_reset_monthly():
-                    reset_count += 1
-                    results.append({
-                        'employee_id': balance.employee.employee_id,
-                        'employee_name': balance.employee.full_name,
-                        'new_balance': float(balance.current_balance_hours),
-                        'status': 'reset'
-                    })
-            except Exception as e:
-                failed_count += 1
+        # Not initialized balances are never reset
+        for row in TimeOffBalance.objects.filter(is_initialized=False).values(
+            'employee__employee_id', 'employee__full_name'
+        ):
+            results.append({
+                'employee_id': row['employee__employee_id'],
+                'employee_name': row['employee__full_name'],
+                'status': 'skipped',
+                'reason': 'Not initialized'
+            })
+        skipped_count = len(results)
+        
+        # ✅ One UPDATE for every balance due this month (ledger: MONTHLY_ACCRUAL)
+        reset_count = 0
+        failed_count = 0
+        try:
+            reset_ids = roll_over_timeoff_month()
+            reset_count = len(reset_ids)
+            for row in TimeOffBalance.objects.filter(pk__in=reset_ids).values(
+                'employee__employee_id', 'employee__full_name', 'current_balance_hours'
+            ):
                 results.append({
-                    'employee_id': balance.employee.employee_id,
-                    'employee_name': balance.employee.full_name,
-                    'status': 'failed',
-                    'error': str(e)
+                    'employee_id': row['employee__employee_id'],
+                    'employee_name': row['employee__full_name'],
+                    'new_balance': float(row['current_balance_hours']),
+                    'status': 'reset'
                 })
+        except Exception as e:
+            logger.error(f"❌ Monthly balance reset failed: {e}")
+            failed_count = TimeOffBalance.objects.filter(timeoff_reset_due_q()).count()
+            results.append({
+                'status': 'failed',
+                'error': str(e)
+            })
         
         return Response({
             'success': True,
@@ -938,16 +935,15 @@ class TimeOffRequestViewSet(viewsets.ModelViewSet):
             """
             
             # Send to all HR emails
-            for hr_email in hr_emails:
-                notification_service.send_email(
-                    recipient_email=hr_email,
-                    subject=subject,
-                    body_html=body_html,
-                    access_token=access_token,
-                    related_model='TimeOffRequest',
-                    related_object_id=str(request_obj.id),
-                    sent_by=request.user
-                )
+            notification_service.send_bulk_email(
+                recipient_emails=hr_emails,
+                subject=subject,
+                body_html=body_html,
+                access_token=access_token,
+                related_model='TimeOffRequest',
+                related_object_id=str(request_obj.id),
+                sent_by=request.user
+            )
             
             # Mark as notified
             request_obj.hr_notified = True
@@ -39,6 +39,7 @@ from .competency_assessment_views import (
 )
 
 from .role_views import RoleViewSet, PermissionViewSet, EmployeeRoleViewSet
+from .export_service import export_job_status, export_job_download
 
 from api.resignation_exit_views import (
     ResignationRequestViewSet,
@@ -179,6 +180,9 @@ urlpatterns = [
     
     path('handovers/', include('api.handover_urls')),
     path('assets/', include('api.asset_urls')),
+    
+    path('exports/<str:task_id>/status/', export_job_status, name='export-job-status'),
+    path('exports/<str:task_id>/download/', export_job_download, name='export-job-download'),
     path('trainings/', include('api.training_urls')),
     path('vacation/', include('api.vacation_urls')),
     path('business-trips/', include('api.business_trip_urls')),
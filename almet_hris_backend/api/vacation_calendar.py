@@ -0,0 +1,157 @@
+# api/vacation_calendar.py - Compiled holiday calendars for working-day calculations
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+SATURDAY, SUNDAY = 5, 6
+
+# Process-wide cache: settings pk -> (version, {country: HolidayCalendar})
+_calendar_cache = {}
+_calendar_lock = threading.Lock()
+
+
+def get_calendar_country(business_function_code=None):
+    """'uk' for UK business function, 'az' for everything else"""
+    if business_function_code and business_function_code.upper() == 'UK':
+        return 'uk'
+    return 'az'
+
+
+def _weekdays_before(ordinal):
+    """Number of Mon-Fri days with date ordinal < ordinal (ordinal 1 = Monday 0001-01-01)"""
+    weeks, rest = divmod(ordinal - 1, 7)
+    return weeks * 5 + min(rest, 5)
+
+
+class HolidayCalendar:
+    """
+    One country's production calendar compiled to a sorted ordinal array.
+
+    Counting working days in a range is two binary searches (holidays are
+    treated as a prefix-count over the sorted array), so the cost no longer
+    depends on the range length or on how many holidays are configured.
+
+    Azerbaijan: weekends are working days, only holidays are excluded.
+    UK: weekends (Saturday, Sunday) and holidays are excluded.
+    """
+
+    def __init__(self, holidays, exclude_weekends=False, country='az'):
+        self.exclude_weekends = exclude_weekends
+        self.country = country
+
+        ordinals = set()
+        entries = []
+        for holiday in holidays or []:
+            if isinstance(holiday, dict):
+                value = holiday.get('date')
+                name = holiday.get('name', 'Holiday')
+            elif isinstance(holiday, str):
+                value = holiday
+                name = 'Holiday'
+            else:
+                continue
+
+            try:
+                holiday_date = datetime.strptime(value, '%Y-%m-%d').date()
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid holiday date format: {holiday}")
+                continue
+
+            entries.append((holiday_date.toordinal(), value, name))
+
+            # Only exact YYYY-MM-DD strings mark a day off
+            if holiday_date.strftime('%Y-%m-%d') != value:
+                continue
+            # Weekend holidays are already off in UK - don't subtract them twice
+            if exclude_weekends and holiday_date.weekday() in (SATURDAY, SUNDAY):
+                continue
+            ordinals.add(holiday_date.toordinal())
+
+        self.ordinals = sorted(ordinals)
+        self._ordinal_set = ordinals
+        entries.sort(key=lambda entry: entry[0])
+        self._entries = entries
+        self._entry_ordinals = [entry[0] for entry in entries]
+
+    @classmethod
+    def from_settings(cls, settings, country):
+        if country == 'uk':
+            return cls(settings.non_working_days_uk, exclude_weekends=True, country='uk')
+        return cls(settings.non_working_days_az, exclude_weekends=False, country='az')
+
+    def holidays_in_range(self, start, end):
+        """Number of non-working holidays between start and end (inclusive)"""
+        return (
+            bisect_right(self.ordinals, end.toordinal()) -
+            bisect_left(self.ordinals, start.toordinal())
+        )
+
+    def is_working_day(self, check_date):
+        if self.exclude_weekends and check_date.weekday() in (SATURDAY, SUNDAY):
+            return False
+        return check_date.toordinal() not in self._ordinal_set
+
+    def count_working_days(self, start, end):
+        """Working days between start and end (inclusive)"""
+        if start > end:
+            return 0
+
+        start_ordinal = start.toordinal()
+        end_ordinal = end.toordinal()
+
+        if self.exclude_weekends:
+            days = _weekdays_before(end_ordinal + 1) - _weekdays_before(start_ordinal)
+        else:
+            days = end_ordinal - start_ordinal + 1
+
+        return days - self.holidays_in_range(start, end)
+
+    def count_working_days_batch(self, ranges):
+        """Working days for many (start, end) ranges"""
+        return [self.count_working_days(start, end) for start, end in ranges]
+
+    def next_working_day(self, after_date):
+        """First working day after after_date"""
+        current = after_date + timedelta(days=1)
+        while not self.is_working_day(current):
+            current += timedelta(days=1)
+        return current
+
+    def holidays_between(self, start, end):
+        """Configured holiday entries (date string, name) between start and end, in date order"""
+        lo = bisect_left(self._entry_ordinals, start.toordinal())
+        hi = bisect_right(self._entry_ordinals, end.toordinal())
+        return [(value, name) for _, value, name in self._entries[lo:hi]]
+
+
+def get_holiday_calendar(settings, business_function_code=None, country=None):
+    """
+    Compiled calendar for settings.
+
+    Calendars are cached per process and keyed by the settings row and its
+    updated_at, so they are rebuilt only after the settings are saved.
+    Unsaved settings are compiled on the fly.
+    """
+    country = country or get_calendar_country(business_function_code)
+
+    if settings.pk is None:
+        return HolidayCalendar.from_settings(settings, country)
+
+    version = settings.updated_at
+    cached = _calendar_cache.get(settings.pk)
+    if cached is None or cached[0] != version:
+        with _calendar_lock:
+            cached = _calendar_cache.get(settings.pk)
+            if cached is None or cached[0] != version:
+                cached = (version, {})
+                _calendar_cache[settings.pk] = cached
+
+    calendars = cached[1]
+    calendar = calendars.get(country)
+    if calendar is None:
+        calendar = calendars[country] = HolidayCalendar.from_settings(settings, country)
+    return calendar
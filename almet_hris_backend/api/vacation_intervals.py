@@ -0,0 +1,122 @@
+# api/vacation_intervals.py - Date-range overlap lookups for vacation requests / schedules
+
+"""
+Two ranges overlap when start_date <= other.end_date and end_date >= other.start_date
+(both ends inclusive). Requests and schedules carry (employee, start_date,
+end_date) and (start_date, end_date) indexes, so the per-employee check and the
+calendar month window are index range scans.
+
+find_conflicts checks any number of proposed ranges, for one or many employees,
+with one UNION query over requests and schedules and returns every overlap per
+range.
+"""
+
+from django.db.models import CharField, F, Q, Value
+from django.db.models.functions import Cast, Concat
+
+# Requests / schedules that occupy their dates
+ACTIVE_REQUEST_STATUSES = ['PENDING_LINE_MANAGER', 'PENDING_UK_ADDITIONAL', 'PENDING_HR', 'APPROVED']
+BLOCKING_SCHEDULE_STATUSES = ['SCHEDULED']
+CALENDAR_SCHEDULE_STATUSES = ['SCHEDULED', 'REGISTERED']
+
+CONFLICT_FIELDS = ('kind', 'ref', 'employee_id', 'start_date', 'end_date', 'vacation_type__name', 'status')
+
+
+def overlap_q(start_date, end_date):
+    """Rows whose range overlaps start_date..end_date"""
+    return Q(start_date__lte=end_date, end_date__gte=start_date)
+
+
+def ranges_overlap(start_a, end_a, start_b, end_b):
+    return start_a <= end_b and end_a >= start_b
+
+
+def schedule_conflict(schedule):
+    """Conflict entry of an in-memory schedule (same shape as find_conflicts)"""
+    return {
+        'type': 'schedule',
+        'id': f'SCH{schedule.id}',
+        'start_date': schedule.start_date,
+        'end_date': schedule.end_date,
+        'vacation_type': schedule.vacation_type.name,
+        'status': schedule.get_status_display()
+    }
+
+
+def _window_q(ranges):
+    """One condition per employee covering all of its proposed ranges"""
+    windows = {}
+    for employee_id, start_date, end_date in ranges:
+        lowest, highest = windows.get(employee_id, (start_date, end_date))
+        windows[employee_id] = (min(lowest, start_date), max(highest, end_date))
+
+    condition = Q()
+    for employee_id, (start_date, end_date) in windows.items():
+        condition |= Q(employee_id=employee_id) & overlap_q(start_date, end_date)
+    return condition
+
+
+def find_conflicts(ranges, exclude_request_ids=(), exclude_schedule_ids=(),
+                   request_statuses=ACTIVE_REQUEST_STATUSES,
+                   schedule_statuses=BLOCKING_SCHEDULE_STATUSES):
+    """
+    ranges: [(employee_id, start_date, end_date), ...]
+    Returns one list of conflicts per range (same order), each conflict as
+    {'type', 'id', 'start_date', 'end_date', 'vacation_type', 'status'}.
+    """
+    from .vacation_models import VacationRequest, VacationSchedule
+
+    ranges = [tuple(item) for item in ranges]
+    results = [[] for _ in ranges]
+    ranges_with_dates = [item for item in ranges if item[1] and item[2]]
+    if not ranges_with_dates:
+        return results
+
+    window = _window_q(ranges_with_dates)
+    request_rows = VacationRequest.objects.filter(
+        window, is_deleted=False, status__in=request_statuses
+    ).exclude(
+        pk__in=[pk for pk in exclude_request_ids if pk]
+    ).annotate(
+        kind=Value('request', output_field=CharField()),
+        ref=F('request_id')
+    ).order_by().values_list(*CONFLICT_FIELDS)
+
+    schedule_rows = VacationSchedule.objects.filter(
+        window, is_deleted=False, status__in=schedule_statuses
+    ).exclude(
+        pk__in=[pk for pk in exclude_schedule_ids if pk]
+    ).annotate(
+        kind=Value('schedule', output_field=CharField()),
+        ref=Concat(Value('SCH'), Cast('id', CharField()), output_field=CharField())
+    ).order_by().values_list(*CONFLICT_FIELDS)
+
+    request_labels = dict(VacationRequest.STATUS_CHOICES)
+    schedule_labels = dict(VacationSchedule.STATUS_CHOICES)
+
+    # Requests first, as the single-record check always listed them
+    rows = sorted(
+        request_rows.union(schedule_rows, all=True),
+        key=lambda row: (row[0] != 'request', row[3], row[1])
+    )
+
+    by_employee = {}
+    for row in rows:
+        by_employee.setdefault(row[2], []).append(row)
+
+    for index, (employee_id, start_date, end_date) in enumerate(ranges):
+        if not (start_date and end_date):
+            continue
+        for kind, ref, _, row_start, row_end, type_name, row_status in by_employee.get(employee_id, ()):
+            if not ranges_overlap(start_date, end_date, row_start, row_end):
+                continue
+            labels = request_labels if kind == 'request' else schedule_labels
+            results[index].append({
+                'type': kind,
+                'id': ref,
+                'start_date': row_start,
+                'end_date': row_end,
+                'vacation_type': type_name,
+                'status': labels.get(row_status, row_status)
+            })
+    return results
@@ -1,11 +1,12 @@
 # api/vacation_models.py - Enhanced and Fixed
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from datetime import date, timedelta
 from .models import Employee, SoftDeleteModel
+from .vacation_calendar import get_holiday_calendar, get_calendar_country
 import uuid
 
 class VacationSetting(SoftDeleteModel):
@@ -95,6 +96,10 @@ class VacationSetting(SoftDeleteModel):
         self.clean()
         super().save(*args, **kwargs)
     
+    def get_calendar(self, business_function_code=None):
+        """Compiled holiday calendar (cached per settings version)"""
+        return get_holiday_calendar(self, business_function_code)
+    
     def is_working_day(self, check_date, business_function_code=None):
         """
         ✅ ENHANCED: Verilən tarixi iş günü olub-olmadığını yoxlayır
@@ -106,33 +111,7 @@ class VacationSetting(SoftDeleteModel):
             check_date: yoxlanılacaq tarix
             business_function_code: 'UK' və ya digər
         """
-        date_str = check_date.strftime('%Y-%m-%d')
-        
-        # ✅ UK LOGIC
-        if business_function_code and business_function_code.upper() == 'UK':
-            # Check weekends
-            if check_date.weekday() in [5, 6]:  # Saturday=5, Sunday=6
-                return False
-            
-            # Check UK holidays
-            for holiday in self.non_working_days_uk:
-                if isinstance(holiday, dict) and holiday.get('date') == date_str:
-                    return False
-                elif isinstance(holiday, str) and holiday == date_str:
-                    return False
-            
-            return True
-        
-        # ✅ AZERBAIJAN LOGIC (default)
-        else:
-            # Check AZ holidays only (weekends are working days)
-            for holiday in self.non_working_days_az:
-                if isinstance(holiday, dict) and holiday.get('date') == date_str:
-                    return False
-                elif isinstance(holiday, str) and holiday == date_str:
-                    return False
-            
-            return True
+        return self.get_calendar(business_function_code).is_working_day(check_date)
     
     def calculate_working_days(self, start, end, business_function_code=None):
         """
@@ -143,16 +122,25 @@ class VacationSetting(SoftDeleteModel):
             end: bitmə tarixi
             business_function_code: 'UK' və ya digər
         """
-        if start > end:
-            return 0
-            
-        days = 0
-        current = start
-        while current <= end:
-            if self.is_working_day(current, business_function_code):
-                days += 1
-            current += timedelta(days=1)
-        return days
+        return self.get_calendar(business_function_code).count_working_days(start, end)
+    
+    def calculate_working_days_batch(self, ranges):
+        """
+        ✅ Bir neçə (start, end, business_function_code) aralığı üçün iş günləri
+        
+        Args:
+            ranges: [(start, end, business_function_code), ...]
+        Returns:
+            iş günlərinin siyahısı (eyni sıra ilə)
+        """
+        calendars = {}
+        results = []
+        for start, end, business_function_code in ranges:
+            country = get_calendar_country(business_function_code)
+            if country not in calendars:
+                calendars[country] = self.get_calendar(business_function_code)
+            results.append(calendars[country].count_working_days(start, end))
+        return results
     
     def calculate_return_date(self, end_date, business_function_code=None):
         """
@@ -162,10 +150,7 @@ class VacationSetting(SoftDeleteModel):
             end_date: məzuniyyət bitmə tarixi
             business_function_code: 'UK' və ya digər
         """
-        ret = end_date + timedelta(days=1)
-        while not self.is_working_day(ret, business_function_code):
-            ret += timedelta(days=1)
-        return ret
+        return self.get_calendar(business_function_code).next_working_day(end_date)
 
 
 class VacationType(SoftDeleteModel):
@@ -419,6 +404,11 @@ class VacationRequest(SoftDeleteModel):
         verbose_name_plural = "Vacation Requests"
         db_table = 'vacation_requests'
         ordering = ['-created_at']
+        indexes = [
+            # Date-range overlap lookups - see api/vacation_intervals.py
+            models.Index(fields=['employee', 'start_date', 'end_date']),
+            models.Index(fields=['start_date', 'end_date']),
+        ]
     
     def __str__(self):
         return f"{self.request_id} - {self.employee.full_name} - {self.vacation_type.name}"
@@ -576,80 +566,97 @@ class VacationRequest(SoftDeleteModel):
         self.save()
 
 
+    def _lock_for_approval(self, expected_status):
+        """Lock the row and re-check its status - concurrent approvals count the days once"""
+        current_status = VacationRequest._base_manager.select_for_update().values_list(
+            'status', flat=True
+        ).get(pk=self.pk)
+        if current_status != expected_status:
+            raise ValueError(f"Cannot approve request with status: {current_status}")
+    
+    
     def approve_by_line_manager(self, user, comment=''):
         """✅ ENHANCED: Line Manager təsdiq edir"""
-        self.line_manager_approved_at = timezone.now()
-        self.line_manager_approved_by = user
-        self.line_manager_comment = comment
-        
-        # ✅ Determine next step
-        if self.requires_uk_additional_approval():
-            next_status = 'PENDING_UK_ADDITIONAL'
-        elif self.hr_representative:
-            next_status = 'PENDING_HR'
-        else:
-            next_status = 'APPROVED'
-        
-        self.status = next_status
-        self.save()
-        
-        # Only update balance if fully approved
-        if self.status == 'APPROVED':
-            self._update_balance()
+        # Status change and balance movement commit together
+        with transaction.atomic():
+            self._lock_for_approval('PENDING_LINE_MANAGER')
+            
+            self.line_manager_approved_at = timezone.now()
+            self.line_manager_approved_by = user
+            self.line_manager_comment = comment
+            
+            # ✅ Determine next step
+            if self.requires_uk_additional_approval():
+                next_status = 'PENDING_UK_ADDITIONAL'
+            elif self.hr_representative:
+                next_status = 'PENDING_HR'
+            else:
+                next_status = 'APPROVED'
+            
+            self.status = next_status
+            self.save()
+            
+            # Only update balance if fully approved
+            if self.status == 'APPROVED':
+                self._update_balance()
     
     
     def approve_by_uk_additional(self, user, comment=''):
         """✅ FIXED: UK Additional Approver təsdiq edir"""
-        from django.utils import timezone
-        
-        # Set approval data
-        self.uk_additional_approved_at = timezone.now()
-        self.uk_additional_approved_by = user
-        self.uk_additional_comment = comment
-        
-        # ✅ CRITICAL FIX: Force refresh hr_representative from DB
-        self.refresh_from_db()
-        
-        # Determine next status
-        if self.hr_representative and self.hr_representative.id:
-            next_status = 'PENDING_HR'
-        else:
-            next_status = 'APPROVED'
-        
-        self.status = next_status
-        
-        # ✅ Save with update_fields to force status change
-        self.save(update_fields=[
-            'uk_additional_approved_at',
-            'uk_additional_approved_by',
-            'uk_additional_comment',
-            'status',
-            'updated_at'
-        ])
-        
-        # Only update balance if fully approved
-        if self.status == 'APPROVED':
-            self._update_balance()
+        with transaction.atomic():
+            self._lock_for_approval('PENDING_UK_ADDITIONAL')
+            
+            # ✅ CRITICAL FIX: Force refresh hr_representative from DB
+            self.refresh_from_db()
+            
+            # Set approval data
+            self.uk_additional_approved_at = timezone.now()
+            self.uk_additional_approved_by = user
+            self.uk_additional_comment = comment
+            
+            # Determine next status
+            if self.hr_representative and self.hr_representative.id:
+                next_status = 'PENDING_HR'
+            else:
+                next_status = 'APPROVED'
+            
+            self.status = next_status
+            
+            # ✅ Save with update_fields to force status change
+            self.save(update_fields=[
+                'uk_additional_approved_at',
+                'uk_additional_approved_by',
+                'uk_additional_comment',
+                'status',
+                'updated_at'
+            ])
+            
+            # Only update balance if fully approved
+            if self.status == 'APPROVED':
+                self._update_balance()
     
     
     def approve_by_hr(self, user, comment=''):
         """✅ HR təsdiq edir - FINAL APPROVAL"""
-        self.hr_approved_at = timezone.now()
-        self.hr_approved_by = user
-        self.hr_comment = comment
-        self.status = 'APPROVED'
-        
-        # Save first
-        self.save(update_fields=[
-            'hr_approved_at',
-            'hr_approved_by',
-            'hr_comment',
-            'status',
-            'updated_at'
-        ])
-        
-        # Then update balance
-        self._update_balance()
+        with transaction.atomic():
+            self._lock_for_approval('PENDING_HR')
+            
+            self.hr_approved_at = timezone.now()
+            self.hr_approved_by = user
+            self.hr_comment = comment
+            self.status = 'APPROVED'
+            
+            # Save first
+            self.save(update_fields=[
+                'hr_approved_at',
+                'hr_approved_by',
+                'hr_comment',
+                'status',
+                'updated_at'
+            ])
+            
+            # Then update balance
+            self._update_balance()
     
     
     def _update_balance(self):
@@ -664,9 +671,14 @@ class VacationRequest(SoftDeleteModel):
                 }
             )
             
-            # ✅ Add used_days
-            balance.used_days = float(balance.used_days) + float(self.number_of_days)
-            balance.save()
+            # ✅ Add used_days (ledger: USED)
+            from .balance_ledger import move_vacation_balance
+            move_vacation_balance(
+                balance, 'USED',
+                used=self.number_of_days,
+                vacation_request=self,
+                description=f"Request {self.request_id} approved"
+            )
             
             import logging
             logger = logging.getLogger(__name__)
@@ -678,46 +690,12 @@ class VacationRequest(SoftDeleteModel):
             logger.error(f"❌ Balance update failed: {e}")
     def check_date_conflicts(self):
         """Eyni employee üçün kəsişən tarixlərdə request/schedule olub-olmadığını yoxla"""
-        conflicting_requests = VacationRequest.objects.filter(
-            employee=self.employee,
-            is_deleted=False,
-            status__in=['PENDING_LINE_MANAGER', 'PENDING_UK_ADDITIONAL', 'PENDING_HR', 'APPROVED']
-        ).filter(
-            start_date__lte=self.end_date,
-            end_date__gte=self.start_date
-        ).exclude(pk=self.pk)
-        
-        conflicting_schedules = VacationSchedule.objects.filter(
-            employee=self.employee,
-            is_deleted=False,
-            status='SCHEDULED'
-        ).filter(
-            start_date__lte=self.end_date,
-            end_date__gte=self.start_date
-        )
-        
-        conflicts = []
-        
-        for req in conflicting_requests:
-            conflicts.append({
-                'type': 'request',
-                'id': req.request_id,
-                'start_date': req.start_date,
-                'end_date': req.end_date,
-                'vacation_type': req.vacation_type.name,
-                'status': req.get_status_display()
-            })
-        
-        for sch in conflicting_schedules:
-            conflicts.append({
-                'type': 'schedule',
-                'id': f'SCH{sch.id}',
-                'start_date': sch.start_date,
-                'end_date': sch.end_date,
-                'vacation_type': sch.vacation_type.name,
-                'status': sch.get_status_display()
-            })
+        from .vacation_intervals import find_conflicts
         
+        conflicts = find_conflicts(
+            [(self.employee_id, self.start_date, self.end_date)],
+            exclude_request_ids=[self.pk]
+        )[0]
         return len(conflicts) > 0, conflicts
 
 
@@ -783,6 +761,13 @@ class VacationSchedule(SoftDeleteModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Date-range overlap lookups - see api/vacation_intervals.py
+            models.Index(fields=['employee', 'start_date', 'end_date']),
+            models.Index(fields=['start_date', 'end_date']),
+        ]
+    
     def approve_by_manager(self, user, comment=''):
         """✅ NEW: Manager təsdiq edir"""
         self.manager_approved_at = timezone.now()
@@ -799,48 +784,12 @@ class VacationSchedule(SoftDeleteModel):
         Eyni employee üçün kəsişən tarixlərdə request/schedule olub-olmadığını yoxla
         Returns: (has_conflict, conflicting_records)
         """
-        # Mövcud approved/pending requestlər
-        conflicting_requests = VacationRequest.objects.filter(
-            employee=self.employee,
-            is_deleted=False,
-            status__in=['PENDING_LINE_MANAGER', 'PENDING_HR', 'APPROVED']
-        ).filter(
-            start_date__lte=self.end_date,
-            end_date__gte=self.start_date
-        )
-        
-        # Başqa scheduled schedules
-        conflicting_schedules = VacationSchedule.objects.filter(
-            employee=self.employee,
-            is_deleted=False,
-            status='SCHEDULED'
-        ).filter(
-            start_date__lte=self.end_date,
-            end_date__gte=self.start_date
-        ).exclude(pk=self.pk)
-        
-        conflicts = []
-        
-        for req in conflicting_requests:
-            conflicts.append({
-                'type': 'request',
-                'id': req.request_id,
-                'start_date': req.start_date,
-                'end_date': req.end_date,
-                'vacation_type': req.vacation_type.name,
-                'status': req.get_status_display()
-            })
-        
-        for sch in conflicting_schedules:
-            conflicts.append({
-                'type': 'schedule',
-                'id': f'SCH{sch.id}',
-                'start_date': sch.start_date,
-                'end_date': sch.end_date,
-                'vacation_type': sch.vacation_type.name,
-                'status': sch.get_status_display()
-            })
+        from .vacation_intervals import find_conflicts
         
+        conflicts = find_conflicts(
+            [(self.employee_id, self.start_date, self.end_date)],
+            exclude_schedule_ids=[self.pk]
+        )[0]
         return len(conflicts) > 0, conflicts
     
     def clean(self):
@@ -849,7 +798,9 @@ class VacationSchedule(SoftDeleteModel):
         if self.start_date and self.end_date and self.start_date > self.end_date:
             raise ValidationError("End date start date-dən kiçik ola bilməz")
         
-        # ✅ Conflict check
+        # ✅ Conflict check (skipped when a batch check already covered this schedule)
+        if getattr(self, 'conflicts_checked', False):
+            return
         has_conflict, conflicts = self.check_date_conflicts()
         if has_conflict:
             conflict_details = ", ".join([
@@ -910,15 +861,21 @@ class VacationSchedule(SoftDeleteModel):
             }
         )
         
-        # DÜZƏLTMƏ: Scheduled-dən sil, used-ə əlavə et
-        balance.scheduled_days = max(0, float(balance.scheduled_days) - float(self.number_of_days))
-        balance.used_days = float(balance.used_days) + float(self.number_of_days)
-        balance.updated_by = user
-        balance.save()
-        
-        # Status dəyiş
-        self.status = 'REGISTERED'
-        self.save()
+        # DÜZƏLTMƏ: Scheduled-dən sil, used-ə əlavə et (ledger: REGISTERED)
+        from .balance_ledger import move_vacation_balance
+        with transaction.atomic():
+            move_vacation_balance(
+                balance, 'REGISTERED',
+                used=self.number_of_days,
+                scheduled=-self.number_of_days,
+                user=user,
+                schedule=self,
+                description=f"Schedule SCH{self.pk} registered"
+            )
+            
+            # Status dəyiş
+            self.status = 'REGISTERED'
+            self.save()
     
     def _update_scheduled_balance(self, add=True):
         """Scheduled balansı yenilə"""
@@ -928,12 +885,14 @@ class VacationSchedule(SoftDeleteModel):
            
         )
         
-        if add:
-            balance.scheduled_days += self.number_of_days
-        else:
-            balance.scheduled_days = max(0, balance.scheduled_days - self.number_of_days)
-        
-        balance.save()
+        # Ledger: SCHEDULED / UNSCHEDULED (never below 0)
+        from .balance_ledger import move_vacation_balance
+        move_vacation_balance(
+            balance, 'SCHEDULED' if add else 'UNSCHEDULED',
+            scheduled=self.number_of_days if add else -self.number_of_days,
+            schedule=self,
+            description=f"Schedule SCH{self.pk} {'added' if add else 'removed'}"
+        )
     
     def can_edit(self):
         """Edit edilə bilərmi?"""
@@ -944,6 +903,63 @@ class VacationSchedule(SoftDeleteModel):
         max_edits = settings.max_schedule_edits if settings else 3
         return self.edit_count < max_edits
 
+class VacationBalanceMovement(models.Model):
+    """
+    Vacation balans hərəkəti (ledger) - append-only.
+    Balance sütunları bu cədvəlin cəmidir - see api/balance_ledger.py
+    """
+    
+    MOVEMENT_TYPES = [
+        ('OPENING', 'Opening Balance'),
+        ('USED', 'Approved Request'),
+        ('SCHEDULED', 'Schedule Added'),
+        ('UNSCHEDULED', 'Schedule Removed'),
+        ('REGISTERED', 'Schedule Registered'),
+        ('ADJUSTMENT', 'Manual Adjustment'),
+        ('RESET', 'Year Reset'),
+    ]
+    
+    balance = models.ForeignKey(
+        EmployeeVacationBalance,
+        on_delete=models.CASCADE,
+        related_name='movements'
+    )
+    movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPES)
+    
+    # Signed deltas of the balance columns
+    start_delta = models.DecimalField(max_digits=6, decimal_places=1, default=0)
+    yearly_delta = models.DecimalField(max_digits=6, decimal_places=1, default=0)
+    used_delta = models.DecimalField(max_digits=6, decimal_places=1, default=0)
+    scheduled_delta = models.DecimalField(max_digits=6, decimal_places=1, default=0)
+    
+    vacation_request = models.ForeignKey(
+        VacationRequest,
+        on_delete=models.SET_NULL,
+        related_name='balance_movements',
+        null=True,
+        blank=True
+    )
+    schedule = models.ForeignKey(
+        VacationSchedule,
+        on_delete=models.SET_NULL,
+        related_name='balance_movements',
+        null=True,
+        blank=True
+    )
+    description = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'vacation_balance_movements'
+        verbose_name = "Vacation Balance Movement"
+        verbose_name_plural = "Vacation Balance Movements"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.balance_id} {self.movement_type} used {self.used_delta:+} scheduled {self.scheduled_delta:+}"
+
+
 def vacation_attachment_path(instance, filename):
     """Generate upload path for vacation attachments"""
     # vacation/2025/VR202500001/filename.pdf
@@ -52,27 +52,22 @@ class VacationNotificationManager:
         ✅ NEW: Send email to multiple recipients
         Returns: (success_count, total_count)
         """
-        success_count = 0
         total_count = len(recipients)
         
-        for recipient_email in recipients:
-            try:
-                result = self.service.send_email(
-                    recipient_email=recipient_email,
-                    subject=subject,
-                    body_html=body_html,
-                    access_token=access_token,
-                    related_model=related_model,
-                    related_object_id=related_object_id,
-                    sent_by=sent_by
-                )
-                if result:
-                    success_count += 1
-                    logger.info(f"✅ Notification sent to {recipient_email}")
-                else:
-                    logger.warning(f"⚠️ Failed to send to {recipient_email}")
-            except Exception as e:
-                logger.error(f"❌ Error sending to {recipient_email}: {e}")
+        # ✅ One Graph $batch round trip per 20 recipients
+        try:
+            success_count = self.service.send_bulk_email(
+                recipient_emails=recipients,
+                subject=subject,
+                body_html=body_html,
+                access_token=access_token,
+                related_model=related_model,
+                related_object_id=related_object_id,
+                sent_by=sent_by
+            )
+        except Exception as e:
+            logger.error(f"❌ Error sending to {total_count} recipients: {e}")
+            success_count = 0
         
         return success_count, total_count
     
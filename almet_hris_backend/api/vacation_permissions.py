@@ -5,23 +5,11 @@ from rest_framework.response import Response
 from rest_framework import status
 from .role_models import Permission, EmployeeRole, Role
 from django.db.models import Q
+from .access_scope import get_access_scope
 
 def is_admin_user(user):
     """Check if user has Admin role"""
-    try:
-        from .models import Employee
-        employee = Employee.objects.get(user=user, is_deleted=False)
-        
-        has_admin_role = EmployeeRole.objects.filter(
-            employee=employee,
-            role__name__icontains='Admin',
-            role__is_active=True,
-            is_active=True
-        ).exists()
-        
-        return has_admin_role
-    except Employee.DoesNotExist:
-        return False
+    return get_access_scope(user).is_admin
 
 
 def get_vacation_access(user):
@@ -29,27 +17,20 @@ def get_vacation_access(user):
     ✅ Get user's vacation access level and permissions
     Returns: dict with access info
     """
-    from .models import Employee
+    scope = get_access_scope(user)
     
     # Admin - Full Access
-    if is_admin_user(user):
-        try:
-            employee = Employee.objects.get(user=user, is_deleted=False)
-        except Employee.DoesNotExist:
-            employee = None
-            
+    if scope.is_admin:
         return {
             'can_view_all': True,
             'is_manager': True,
             'is_admin': True,
-            'employee': employee,
+            'employee': scope.employee,
             'accessible_employee_ids': None,  # None means ALL
             'access_level': 'Admin - Full Access'
         }
     
-    try:
-        employee = Employee.objects.get(user=user, is_deleted=False)
-    except Employee.DoesNotExist:
+    if not scope.has_employee:
         return {
             'can_view_all': False,
             'is_manager': False,
@@ -59,25 +40,14 @@ def get_vacation_access(user):
             'access_level': 'No Access'
         }
     
-    # Check if manager (has direct reports)
-    direct_reports = Employee.objects.filter(
-        line_manager=employee,
-        is_deleted=False
-    )
-    
-    is_manager = direct_reports.exists()
-    
-    if is_manager:
+    if scope.is_manager:
         # Manager can see: self + direct reports
-        accessible_ids = [employee.id]
-        accessible_ids.extend(list(direct_reports.values_list('id', flat=True)))
-        
         return {
             'can_view_all': False,
             'is_manager': True,
             'is_admin': False,
-            'employee': employee,
-            'accessible_employee_ids': accessible_ids,
+            'employee': scope.employee,
+            'accessible_employee_ids': scope.team_employee_ids,
             'access_level': 'Manager - Team Access'
         }
     else:
@@ -86,8 +56,8 @@ def get_vacation_access(user):
             'can_view_all': False,
             'is_manager': False,
             'is_admin': False,
-            'employee': employee,
-            'accessible_employee_ids': [employee.id],
+            'employee': scope.employee,
+            'accessible_employee_ids': [scope.employee_id],
             'access_level': 'Employee - Own Access'
         }
 
@@ -102,8 +72,8 @@ def is_uk_additional_approver(user):
         if not settings or not settings.uk_additional_approver:
             return False
         
-        employee = Employee.objects.get(user=user, is_deleted=False)
-        return employee == settings.uk_additional_approver
+        scope = get_access_scope(user)
+        return scope.has_employee and scope.employee_id == settings.uk_additional_approver_id
         
     except Employee.DoesNotExist:
         return False
@@ -6,8 +6,9 @@ from rest_framework.response import Response
 from rest_framework import status, viewsets
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.db import transaction
-from django.db.models import Q, Count, Sum
+from django.db.models import Q, Count, Sum, F
 from datetime import date, datetime, timedelta
+import heapq
 import openpyxl
 from .vacation_serializers import *
 from .models import Employee
@@ -43,6 +44,11 @@ from .vacation_models import (
     VacationAttachment
 )
 from .vacation_serializers import EmployeeVacationBalanceSerializer
+from .balance_ledger import set_vacation_balance, reset_vacation_balances
+from .vacation_intervals import (
+    ACTIVE_REQUEST_STATUSES, CALENDAR_SCHEDULE_STATUSES,
+    overlap_q, ranges_overlap, find_conflicts, schedule_conflict
+)
 
 import logging
 from django.shortcuts import get_object_or_404
@@ -52,19 +58,11 @@ warning_fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="
 from rest_framework import status as rest_status
 from .vacation_notifications import notification_manager
 from .models import UserGraphToken
-
-def get_graph_access_token(user):
-    """Get Microsoft Graph access token for the authenticated user"""
-    try:
-        token = UserGraphToken.get_valid_token(user)
-        if token:
-            logger.info(f"✅ Valid Graph token found for user {user.username}")
-            return token
-        else:
-            return None
-    except Exception as e:
-        logger.error(f"❌ Error getting Graph token: {e}")
-        return None
+from .export_service import (
+    ExportDocument, ExportSheet, iter_values, choice_labels, format_datetime,
+    user_full_name, export_response, wants_background, start_background_export
+)
+from .graph_client import get_graph_access_token
 
 def get_notification_context(request):
     """Get notification context with Graph token status"""
@@ -206,45 +204,21 @@ def get_calendar_events(request):
         
         if settings:
             # ✅ Use appropriate calendar
-            if country == 'uk':
-                holiday_calendar = settings.non_working_days_uk
-            else:
-                holiday_calendar = settings.non_working_days_az
+            calendar = settings.get_calendar('UK' if country == 'uk' else None)
             
-            for holiday in holiday_calendar:
-                if isinstance(holiday, dict):
-                    try:
-                        holiday_date = datetime.strptime(holiday['date'], '%Y-%m-%d').date()
-                        if start_date <= holiday_date <= end_date:
-                            holidays.append({
-                                'date': holiday['date'],
-                                'name': holiday.get('name', 'Holiday'),
-                                'type': 'holiday',
-                                'country': country.upper()
-                            })
-                    except (ValueError, KeyError) as e:
-                        logger.warning(f"Invalid holiday date format: {holiday}")
-                        continue
-                elif isinstance(holiday, str):
-                    try:
-                        holiday_date = datetime.strptime(holiday, '%Y-%m-%d').date()
-                        if start_date <= holiday_date <= end_date:
-                            holidays.append({
-                                'date': holiday,
-                                'name': 'Holiday',
-                                'type': 'holiday',
-                                'country': country.upper()
-                            })
-                    except ValueError as e:
-                        logger.warning(f"Invalid holiday date string: {holiday}")
-                        continue
+            for holiday_date, holiday_name in calendar.holidays_between(start_date, end_date):
+                holidays.append({
+                    'date': holiday_date,
+                    'name': holiday_name,
+                    'type': 'holiday',
+                    'country': country.upper()
+                })
         
         # ✅ Get vacation requests - filtered by access
         requests_qs = VacationRequest.objects.filter(
+            overlap_q(start_date, end_date),
             is_deleted=False,
-            status__in=['PENDING_LINE_MANAGER', 'PENDING_UK_ADDITIONAL', 'PENDING_HR', 'APPROVED']
-        ).filter(
-            Q(start_date__lte=end_date) & Q(end_date__gte=start_date)
+            status__in=ACTIVE_REQUEST_STATUSES
         ).select_related('employee', 'employee__department', 'employee__business_function', 'vacation_type')
         
         # ✅ Filter by access level
@@ -252,10 +226,9 @@ def get_calendar_events(request):
         
         # ✅ Get vacation schedules - filtered by access
         schedules_qs = VacationSchedule.objects.filter(
+            overlap_q(start_date, end_date),
             is_deleted=False,
-            status__in=['SCHEDULED', 'REGISTERED']
-        ).filter(
-            Q(start_date__lte=end_date) & Q(end_date__gte=start_date)
+            status__in=CALENDAR_SCHEDULE_STATUSES
         ).select_related('employee', 'employee__department', 'employee__business_function', 'vacation_type')
         
         # ✅ Filter by access level
@@ -1198,111 +1171,103 @@ def get_all_balances(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+def build_vacation_balances_export(user, query_params, data=None):
+    """Balances export rows straight from a values() projection"""
+    access = get_vacation_access(user)
+    
+    # Get filters
+    year = query_params.get('year', datetime.now().year)
+    department_id = query_params.get('department_id', '')
+    business_function_id = query_params.get('business_function_id', '')
+    min_remaining = query_params.get('min_remaining', '')
+    max_remaining = query_params.get('max_remaining', '')
+    
+    # Build queryset
+    queryset = EmployeeVacationBalance.objects.filter(
+        is_deleted=False,
+        year=year
+    ).order_by(
+        'employee__department__name', 'employee__full_name'
+    )
+    
+    # ✅ Filter by access level
+    if access['accessible_employee_ids'] is not None:
+        queryset = queryset.filter(employee_id__in=access['accessible_employee_ids'])
+    
+    if department_id:
+        queryset = queryset.filter(employee__department_id=department_id)
+    
+    if business_function_id:
+        queryset = queryset.filter(employee__business_function_id=business_function_id)
+    
+    # ✅ Remaining balance filters in the database (same formula as remaining_balance)
+    if min_remaining or max_remaining:
+        queryset = queryset.alias(
+            remaining=F('start_balance') + F('yearly_balance') - F('used_days')
+        )
+        if min_remaining:
+            queryset = queryset.filter(remaining__gte=float(min_remaining))
+        if max_remaining:
+            queryset = queryset.filter(remaining__lte=float(max_remaining))
+    
+    def rows():
+        for balance in iter_values(
+            queryset,
+            'employee__full_name', 'employee__employee_id', 'employee__department__name',
+            'year', 'start_balance', 'yearly_balance', 'used_days', 'scheduled_days'
+        ):
+            start_balance = float(balance['start_balance'])
+            yearly_balance = float(balance['yearly_balance'])
+            used_days = float(balance['used_days'])
+            scheduled_days = float(balance['scheduled_days'])
+            total_balance = start_balance + yearly_balance
+            
+            yield [
+                balance['employee__full_name'],
+                balance['employee__employee_id'] or '',
+                balance['employee__department__name'] or '',
+                balance['year'],
+                start_balance,
+                yearly_balance,
+                total_balance,
+                used_days,
+                scheduled_days,
+                total_balance - used_days,
+                max(0, yearly_balance - scheduled_days - used_days)
+            ]
+    
+    headers = [
+        'Employee Name', 'Employee ID', 'Department', 'Year',
+        'Start Balance', 'Yearly Balance', 'Total Balance',
+        'Used Days', 'Scheduled Days', 'Remaining Balance', 'To Plan'
+    ]
+    
+    # Center align numeric columns
+    centered = {'alignment': Alignment(horizontal='center')}
+    
+    return ExportDocument(
+        f'vacation_balances_{access["access_level"].replace(" ", "_")}_{year}',
+        [ExportSheet(
+            f'Vacation Balances {year}', headers, rows(),
+            column_styles={col: centered for col in range(3, 11)}
+        )]
+    )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def export_all_balances(request):
     """
-    ✅ Export all balances to Excel - filtered by access level
+    ✅ Export all balances to Excel / CSV - filtered by access level
     """
     try:
-        access = get_vacation_access(request.user)
-        
-        # Get filters
-        year = request.GET.get('year', datetime.now().year)
-        department_id = request.GET.get('department_id', '')
-        business_function_id = request.GET.get('business_function_id', '')
-        min_remaining = request.GET.get('min_remaining', '')
-        max_remaining = request.GET.get('max_remaining', '')
-        
-        # Build queryset
-        queryset = EmployeeVacationBalance.objects.filter(
-            is_deleted=False,
-            year=year
-        ).select_related('employee', 'employee__department').order_by(
-            'employee__department__name', 'employee__full_name'
-        )
-        
-        # ✅ Filter by access level
-        if access['accessible_employee_ids'] is not None:
-            queryset = queryset.filter(employee_id__in=access['accessible_employee_ids'])
-        
-        if department_id:
-            queryset = queryset.filter(employee__department_id=department_id)
+        export_format = request.GET.get('export_format', 'excel')
         
-        if business_function_id:
-            queryset = queryset.filter(employee__business_function_id=business_function_id)
+        if wants_background(request):
+            return start_background_export(request, 'vacation_balances', export_format)
         
-        # Apply remaining balance filters
-        balances_list = []
-        for balance in queryset:
-            if min_remaining and balance.remaining_balance < float(min_remaining):
-                continue
-            if max_remaining and balance.remaining_balance > float(max_remaining):
-                continue
-            balances_list.append(balance)
-        
-        # Create workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = f'Vacation Balances {year}'
-        
-        # Header style
-        header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        header_font = Font(bold=True, color='FFFFFF', size=11)
-        header_alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Headers
-        headers = [
-            'Employee Name', 'Employee ID', 'Department', 'Year',
-            'Start Balance', 'Yearly Balance', 'Total Balance',
-            'Used Days', 'Scheduled Days', 'Remaining Balance', 'To Plan'
-        ]
-        
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-        
-        # Data rows
-        for row_num, balance in enumerate(balances_list, 2):
-            ws.cell(row=row_num, column=1, value=balance.employee.full_name)
-            ws.cell(row=row_num, column=2, value=getattr(balance.employee, 'employee_id', ''))
-            ws.cell(row=row_num, column=3, value=balance.employee.department.name if balance.employee.department else '')
-            ws.cell(row=row_num, column=4, value=balance.year)
-            ws.cell(row=row_num, column=5, value=float(balance.start_balance))
-            ws.cell(row=row_num, column=6, value=float(balance.yearly_balance))
-            ws.cell(row=row_num, column=7, value=float(balance.total_balance))
-            ws.cell(row=row_num, column=8, value=float(balance.used_days))
-            ws.cell(row=row_num, column=9, value=float(balance.scheduled_days))
-            ws.cell(row=row_num, column=10, value=float(balance.remaining_balance))
-            ws.cell(row=row_num, column=11, value=float(balance.should_be_planned))
-            
-            # Center align numeric columns
-            for col in range(4, 12):
-                ws.cell(row=row_num, column=col).alignment = Alignment(horizontal='center')
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column = [cell for cell in column]
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column[0].column_letter].width = adjusted_width
-        
-        # Create response
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename=vacation_balances_{access["access_level"].replace(" ", "_")}_{year}.xlsx'
-        wb.save(response)
-        
-        return response
+        document = build_vacation_balances_export(request.user, request.GET)
+        return export_response(document, export_format)
     
     except Exception as e:
         logger.error(f"Error in export_all_balances: {e}")
@@ -1348,17 +1313,16 @@ def update_employee_balance(request):
     )
     
     if not created:
-        if 'start_balance' in request.data:
-            balance.start_balance = request.data['start_balance']
-        if 'yearly_balance' in request.data:
-            balance.yearly_balance = request.data['yearly_balance']
-        if 'used_days' in request.data:
-            balance.used_days = request.data['used_days']
-        if 'scheduled_days' in request.data:
-            balance.scheduled_days = request.data['scheduled_days']
-        
-        balance.updated_by = request.user
-        balance.save()
+        # Ledger: ADJUSTMENT
+        set_vacation_balance(
+            balance,
+            {
+                field: request.data[field]
+                for field in ('start_balance', 'yearly_balance', 'used_days', 'scheduled_days')
+                if field in request.data
+            },
+            user=request.user
+        )
     
     serializer = EmployeeVacationBalanceSerializer(balance)
     return Response({
@@ -1385,10 +1349,11 @@ def reset_balances(request):
     if department_id:
         queryset = queryset.filter(employee__department_id=department_id)
     
-    updated_count = queryset.update(
-        used_days=0,
-        scheduled_days=0,
-        updated_by=request.user
+    # ✅ One UPDATE (ledger: RESET)
+    updated_count = reset_vacation_balances(
+        queryset,
+        user=request.user,
+        description=f'Reset for year {year}'
     )
     
     return Response({
@@ -2580,6 +2545,21 @@ def bulk_create_schedules(request):
             employee_id is not None
         )
         
+        # ✅ All proposed ranges checked against existing vacations in one query
+        proposed = {}
+        for idx, schedule_data in enumerate(schedules_data):
+            try:
+                proposed[idx] = (
+                    datetime.strptime(schedule_data['start_date'], '%Y-%m-%d').date(),
+                    datetime.strptime(schedule_data['end_date'], '%Y-%m-%d').date()
+                )
+            except (KeyError, TypeError, ValueError):
+                pass  # Reported per schedule below
+        batch_conflicts = dict(zip(
+            proposed,
+            find_conflicts([(employee.id, start, end) for start, end in proposed.values()])
+        ))
+        
         with transaction.atomic():
             for idx, schedule_data in enumerate(schedules_data):
                 try:
@@ -2621,15 +2601,12 @@ def bulk_create_schedules(request):
                     
                     total_days += days
                     
-                    # Create temp schedule to check conflicts
-                    temp_schedule = VacationSchedule(
-                        employee=employee,
-                        start_date=start_dt,
-                        end_date=end_dt
-                    )
-                    
-                    has_conflict, conflicts = temp_schedule.check_date_conflicts()
-                    if has_conflict:
+                    # Existing vacations + schedules created earlier in this batch
+                    conflicts = batch_conflicts.get(idx, []) + [
+                        schedule_conflict(s) for s in created_schedules
+                        if ranges_overlap(start_dt, end_dt, s.start_date, s.end_date)
+                    ]
+                    if conflicts:
                         errors.append({
                             'index': idx,
                             'error': 'Date conflict',
@@ -2659,7 +2636,7 @@ def bulk_create_schedules(request):
                     # ✅ Create schedule with appropriate status
                     if is_manager_creating:
                         # Manager/Admin creating → auto-approve
-                        schedule = VacationSchedule.objects.create(
+                        schedule = VacationSchedule(
                             employee=employee,
                             vacation_type=vacation_type,
                             start_date=start_dt,
@@ -2672,7 +2649,7 @@ def bulk_create_schedules(request):
                         )
                     else:
                         # Employee creating → needs approval
-                        schedule = VacationSchedule.objects.create(
+                        schedule = VacationSchedule(
                             employee=employee,
                             vacation_type=vacation_type,
                             start_date=start_dt,
@@ -2683,6 +2660,9 @@ def bulk_create_schedules(request):
                             line_manager=employee.line_manager
                         )
                     
+                    # Conflicts were checked above
+                    schedule.conflicts_checked = True
+                    schedule.save()
                     created_schedules.append(schedule)
                     
                 except VacationType.DoesNotExist:
@@ -3384,6 +3364,228 @@ def all_vacation_records(request):
 
 
 # ==================== EXPORT ALL VACATION RECORDS ====================
+VACATION_REQUEST_EXPORT_VALUES = (
+    'request_id', 'employee__full_name', 'employee__employee_id',
+    'employee__department__name', 'employee__business_function__name',
+    'vacation_type__name', 'start_date', 'end_date', 'return_date', 'number_of_days',
+    'status', 'comment', 'request_type',
+    'line_manager__full_name', 'line_manager_comment', 'line_manager_approved_at',
+    'line_manager_approved_by__first_name', 'line_manager_approved_by__last_name',
+    'hr_representative__full_name', 'hr_comment', 'hr_approved_at',
+    'hr_approved_by__first_name', 'hr_approved_by__last_name',
+    'rejected_by__first_name', 'rejected_by__last_name', 'rejection_reason', 'rejected_at',
+    'created_at', 'updated_at'
+)
+
+VACATION_SCHEDULE_EXPORT_VALUES = (
+    'id', 'employee__full_name', 'employee__employee_id',
+    'employee__department__name', 'employee__business_function__name',
+    'vacation_type__name', 'start_date', 'end_date', 'return_date', 'number_of_days',
+    'status', 'comment', 'edit_count',
+    'last_edited_by__first_name', 'last_edited_by__last_name', 'last_edited_at',
+    'created_by__first_name', 'created_by__last_name',
+    'created_at', 'updated_at'
+)
+
+
+def _vacation_record_base(record):
+    """Employee / vacation columns shared by requests and schedules"""
+    return [
+        record['employee__full_name'],
+        record['employee__employee_id'] or '',
+        record['employee__department__name'] or '',
+        record['employee__business_function__name'] or '',
+        record['vacation_type__name'],
+        record['start_date'].strftime('%Y-%m-%d'),
+        record['end_date'].strftime('%Y-%m-%d'),
+        record['return_date'].strftime('%Y-%m-%d') if record['return_date'] else '',
+        float(record['number_of_days']),
+    ]
+
+
+def _vacation_approval_status(req):
+    approval_status = []
+    if req['line_manager_approved_at']:
+        approval_status.append('LM ✓')
+    elif req['status'] == 'PENDING_LINE_MANAGER':
+        approval_status.append('LM ⏳')
+    elif req['status'] == 'REJECTED_LINE_MANAGER':
+        approval_status.append('LM ✗')
+    
+    if req['hr_approved_at']:
+        approval_status.append('HR ✓')
+    elif req['status'] == 'PENDING_HR':
+        approval_status.append('HR ⏳')
+    elif req['status'] == 'REJECTED_HR':
+        approval_status.append('HR ✗')
+    
+    return ' | '.join(approval_status)
+
+
+def build_vacation_records_export(user, query_params, data=None):
+    """Requests and schedules export - combined (merged by created_at) or separated sheets"""
+    access = get_vacation_access(user)
+    
+    # Filter parameters
+    status_filter = query_params.get('status')
+    vacation_type_id = query_params.get('vacation_type_id')
+    department_id = query_params.get('department_id')
+    business_function_id = query_params.get('business_function_id')
+    start_date = query_params.get('start_date')
+    end_date = query_params.get('end_date')
+    employee_name = query_params.get('employee_name')
+    year = query_params.get('year')
+    export_format = query_params.get('format', 'combined')
+    
+    requests_qs = VacationRequest.objects.filter(is_deleted=False)
+    schedules_qs = VacationSchedule.objects.filter(is_deleted=False)
+    
+    # ✅ Filter by access level
+    requests_qs = filter_vacation_queryset(user, requests_qs, 'request')
+    schedules_qs = filter_vacation_queryset(user, schedules_qs, 'schedule')
+    
+    # Apply other filters
+    filters = {}
+    if status_filter:
+        filters['status'] = status_filter
+    if vacation_type_id:
+        filters['vacation_type_id'] = vacation_type_id
+    if department_id:
+        filters['employee__department_id'] = department_id
+    if business_function_id:
+        filters['employee__business_function_id'] = business_function_id
+    if start_date:
+        filters['start_date__gte'] = start_date
+    if end_date:
+        filters['end_date__lte'] = end_date
+    if employee_name:
+        filters['employee__full_name__icontains'] = employee_name
+    if year:
+        filters['start_date__year'] = year
+    
+    requests_qs = requests_qs.filter(**filters).order_by('-created_at')
+    schedules_qs = schedules_qs.filter(**filters).order_by('-created_at')
+    
+    request_status_labels = choice_labels(VacationRequest, 'status')
+    request_type_labels = choice_labels(VacationRequest, 'request_type')
+    schedule_status_labels = choice_labels(VacationSchedule, 'status')
+    
+    # Same rule as VacationSchedule.can_edit(), settings read once
+    settings = VacationSetting.get_active()
+    max_edits = settings.max_schedule_edits if settings else 3
+    
+    def can_edit(sch):
+        return sch['status'] == 'SCHEDULED' and sch['edit_count'] < max_edits
+    
+    access_indicator = access['access_level'].replace(' ', '_').replace('-', '')
+    filename = f'vacation_records_{access_indicator}_{export_format}_{date.today().strftime("%Y%m%d")}'
+    
+    if export_format == 'separated':
+        def request_rows():
+            for req in iter_values(requests_qs, *VACATION_REQUEST_EXPORT_VALUES):
+                yield [req['request_id']] + _vacation_record_base(req) + [
+                    request_status_labels.get(req['status'], req['status']),
+                    req['comment'],
+                    request_type_labels.get(req['request_type'], req['request_type']),
+                    req['line_manager__full_name'] or '',
+                    req['line_manager_comment'],
+                    format_datetime(req['line_manager_approved_at']),
+                    user_full_name(req['line_manager_approved_by__first_name'], req['line_manager_approved_by__last_name']),
+                    req['hr_representative__full_name'] or '',
+                    req['hr_comment'],
+                    format_datetime(req['hr_approved_at']),
+                    user_full_name(req['hr_approved_by__first_name'], req['hr_approved_by__last_name']),
+                    user_full_name(req['rejected_by__first_name'], req['rejected_by__last_name']),
+                    req['rejection_reason'],
+                    format_datetime(req['rejected_at']),
+                    format_datetime(req['created_at']),
+                    format_datetime(req['updated_at'])
+                ]
+        
+        def schedule_rows():
+            for sch in iter_values(schedules_qs, *VACATION_SCHEDULE_EXPORT_VALUES):
+                yield [f"SCH{sch['id']}"] + _vacation_record_base(sch) + [
+                    schedule_status_labels.get(sch['status'], sch['status']),
+                    sch['comment'],
+                    sch['edit_count'],
+                    'Yes' if can_edit(sch) else 'No',
+                    user_full_name(sch['last_edited_by__first_name'], sch['last_edited_by__last_name']),
+                    format_datetime(sch['last_edited_at']),
+                    user_full_name(sch['created_by__first_name'], sch['created_by__last_name']),
+                    format_datetime(sch['created_at']),
+                    format_datetime(sch['updated_at'])
+                ]
+        
+        req_headers = [
+            'Request ID', 'Employee Name', 'Employee ID', 'Department', 'Business Function',
+            'Vacation Type', 'Start Date', 'End Date', 'Return Date', 'Working Days',
+            'Status', 'Comment', 'Request Type',
+            'Line Manager', 'LM Comment', 'LM Approved At', 'LM Approved By',
+            'HR Representative', 'HR Comment', 'HR Approved At', 'HR Approved By',
+            'Rejected By', 'Rejection Reason', 'Rejected At',
+            'Created At', 'Updated At'
+        ]
+        sch_headers = [
+            'Schedule ID', 'Employee Name', 'Employee ID', 'Department', 'Business Function',
+            'Vacation Type', 'Start Date', 'End Date', 'Return Date', 'Working Days',
+            'Status', 'Comment', 
+            'Edit Count', 'Can Edit', 'Last Edited By', 'Last Edited At',
+            'Created By', 'Created At', 'Updated At'
+        ]
+        
+        return ExportDocument(filename, [
+            ExportSheet('Vacation Requests', req_headers, request_rows(), header_style={}),
+            ExportSheet('Vacation Schedules', sch_headers, schedule_rows(), header_style={})
+        ])
+    
+    # Combined sheet (default)
+    def request_records():
+        for req in iter_values(requests_qs, *VACATION_REQUEST_EXPORT_VALUES):
+            yield req['created_at'], ['Request', req['request_id']] + _vacation_record_base(req) + [
+                request_status_labels.get(req['status'], req['status']),
+                req['comment'],
+                req['line_manager__full_name'] or '',
+                req['hr_representative__full_name'] or '',
+                _vacation_approval_status(req),
+                '',
+                format_datetime(req['created_at']),
+                format_datetime(req['updated_at'])
+            ]
+    
+    def schedule_records():
+        for sch in iter_values(schedules_qs, *VACATION_SCHEDULE_EXPORT_VALUES):
+            yield sch['created_at'], ['Schedule', f"SCH{sch['id']}"] + _vacation_record_base(sch) + [
+                schedule_status_labels.get(sch['status'], sch['status']),
+                sch['comment'],
+                user_full_name(sch['created_by__first_name'], sch['created_by__last_name']),
+                '',
+                'No Approval Needed',
+                sch['edit_count'],
+                format_datetime(sch['created_at']),
+                format_datetime(sch['updated_at'])
+            ]
+    
+    def combined_rows():
+        # Both querysets are already newest first - merge instead of sorting everything
+        for _, row in heapq.merge(
+            request_records(), schedule_records(),
+            key=lambda record: record[0], reverse=True
+        ):
+            yield row
+    
+    headers = [
+        'Type', 'ID', 'Employee Name', 'Employee ID', 'Department', 'Business Function',
+        'Vacation Type', 'Start Date', 'End Date', 'Return Date', 'Working Days',
+        'Status', 'Comment', 
+        'Line Manager/Created By', 'HR Representative', 'Approval Status',
+        'Edit Count', 'Created At', 'Updated At'
+    ]
+    
+    return ExportDocument(filename, [
+        ExportSheet('All Vacation Records', headers, combined_rows(), header_style={})
+    ])
+
+
 @swagger_auto_schema(
     method='get',
     operation_description="Bütün vacation records-u Excel formatında export et (filterlər dəstəklənir)",
@@ -3396,286 +3598,13 @@ def all_vacation_records(request):
 def export_all_vacation_records(request):
     """✅ Bütün vacation records-u enhanced formatda export et - filtered by access"""
     try:
-        access = get_vacation_access(request.user)
+        export_format = request.GET.get('export_format', 'excel')
         
-        # Filter parameters
-        status_filter = request.GET.get('status')
-        vacation_type_id = request.GET.get('vacation_type_id')
-        department_id = request.GET.get('department_id')
-        business_function_id = request.GET.get('business_function_id')
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
-        employee_name = request.GET.get('employee_name')
-        year = request.GET.get('year')
-        export_format = request.GET.get('format', 'combined')
+        if wants_background(request):
+            return start_background_export(request, 'vacation_records', export_format)
         
-        # All requests base query
-        requests_qs = VacationRequest.objects.filter(is_deleted=False).select_related(
-            'employee', 'employee__department', 'employee__business_function', 
-            'vacation_type', 'line_manager', 'hr_representative',
-            'line_manager_approved_by', 'hr_approved_by', 'rejected_by'
-        )
-        
-        # All schedules base query
-        schedules_qs = VacationSchedule.objects.filter(is_deleted=False).select_related(
-            'employee', 'employee__department', 'employee__business_function', 
-            'vacation_type', 'created_by', 'last_edited_by'
-        )
-        
-        # ✅ Filter by access level
-        requests_qs = filter_vacation_queryset(request.user, requests_qs, 'request')
-        schedules_qs = filter_vacation_queryset(request.user, schedules_qs, 'schedule')
-        
-        # Apply other filters
-        if status_filter:
-            requests_qs = requests_qs.filter(status=status_filter)
-            schedules_qs = schedules_qs.filter(status=status_filter)
-        
-        if vacation_type_id:
-            requests_qs = requests_qs.filter(vacation_type_id=vacation_type_id)
-            schedules_qs = schedules_qs.filter(vacation_type_id=vacation_type_id)
-        
-        if department_id:
-            requests_qs = requests_qs.filter(employee__department_id=department_id)
-            schedules_qs = schedules_qs.filter(employee__department_id=department_id)
-        
-        if business_function_id:
-            requests_qs = requests_qs.filter(employee__business_function_id=business_function_id)
-            schedules_qs = schedules_qs.filter(employee__business_function_id=business_function_id)
-        
-        if start_date:
-            requests_qs = requests_qs.filter(start_date__gte=start_date)
-            schedules_qs = schedules_qs.filter(start_date__gte=start_date)
-        
-        if end_date:
-            requests_qs = requests_qs.filter(end_date__lte=end_date)
-            schedules_qs = schedules_qs.filter(end_date__lte=end_date)
-        
-        if employee_name:
-            requests_qs = requests_qs.filter(employee__full_name__icontains=employee_name)
-            schedules_qs = schedules_qs.filter(employee__full_name__icontains=employee_name)
-        
-        if year:
-            requests_qs = requests_qs.filter(start_date__year=year)
-            schedules_qs = schedules_qs.filter(start_date__year=year)
-        
-        # Get data
-        requests = requests_qs.order_by('-created_at')
-        schedules = schedules_qs.order_by('-created_at')
-        
-        wb = Workbook()
-        
-        if export_format == 'separated':
-            # Ayrı sheet-lər
-            ws_req = wb.active
-            ws_req.title = "Vacation Requests"
-            
-            req_headers = [
-                'Request ID', 'Employee Name', 'Employee ID', 'Department', 'Business Function',
-                'Vacation Type', 'Start Date', 'End Date', 'Return Date', 'Working Days',
-                'Status', 'Comment', 'Request Type',
-                'Line Manager', 'LM Comment', 'LM Approved At', 'LM Approved By',
-                'HR Representative', 'HR Comment', 'HR Approved At', 'HR Approved By',
-                'Rejected By', 'Rejection Reason', 'Rejected At',
-                'Created At', 'Updated At'
-            ]
-            ws_req.append(req_headers)
-            
-            for req in requests:
-                ws_req.append([
-                    req.request_id,
-                    req.employee.full_name,
-                    getattr(req.employee, 'employee_id', ''),
-                    req.employee.department.name if req.employee.department else '',
-                    req.employee.business_function.name if req.employee.business_function else '',
-                    req.vacation_type.name,
-                    req.start_date.strftime('%Y-%m-%d'),
-                    req.end_date.strftime('%Y-%m-%d'),
-                    req.return_date.strftime('%Y-%m-%d') if req.return_date else '',
-                    float(req.number_of_days),
-                    req.get_status_display(),
-                    req.comment,
-                    req.get_request_type_display(),
-                    req.line_manager.full_name if req.line_manager else '',
-                    req.line_manager_comment,
-                    req.line_manager_approved_at.strftime('%Y-%m-%d %H:%M') if req.line_manager_approved_at else '',
-                    req.line_manager_approved_by.get_full_name() if req.line_manager_approved_by else '',
-                    req.hr_representative.full_name if req.hr_representative else '',
-                    req.hr_comment,
-                    req.hr_approved_at.strftime('%Y-%m-%d %H:%M') if req.hr_approved_at else '',
-                    req.hr_approved_by.get_full_name() if req.hr_approved_by else '',
-                    req.rejected_by.get_full_name() if req.rejected_by else '',
-                    req.rejection_reason,
-                    req.rejected_at.strftime('%Y-%m-%d %H:%M') if req.rejected_at else '',
-                    req.created_at.strftime('%Y-%m-%d %H:%M') if req.created_at else '',
-                    req.updated_at.strftime('%Y-%m-%d %H:%M') if req.updated_at else ''
-                ])
-            
-            # Schedules sheet
-            ws_sch = wb.create_sheet("Vacation Schedules")
-            
-            sch_headers = [
-                'Schedule ID', 'Employee Name', 'Employee ID', 'Department', 'Business Function',
-                'Vacation Type', 'Start Date', 'End Date', 'Return Date', 'Working Days',
-                'Status', 'Comment', 
-                'Edit Count', 'Can Edit', 'Last Edited By', 'Last Edited At',
-                'Created By', 'Created At', 'Updated At'
-            ]
-            ws_sch.append(sch_headers)
-            
-            for sch in schedules:
-                ws_sch.append([
-                    f'SCH{sch.id}',
-                    sch.employee.full_name,
-                    getattr(sch.employee, 'employee_id', ''),
-                    sch.employee.department.name if sch.employee.department else '',
-                    sch.employee.business_function.name if sch.employee.business_function else '',
-                    sch.vacation_type.name,
-                    sch.start_date.strftime('%Y-%m-%d'),
-                    sch.end_date.strftime('%Y-%m-%d'),
-                    sch.return_date.strftime('%Y-%m-%d') if sch.return_date else '',
-                    float(sch.number_of_days),
-                    sch.get_status_display(),
-                    sch.comment,
-                    sch.edit_count,
-                    'Yes' if sch.can_edit() else 'No',
-                    sch.last_edited_by.get_full_name() if sch.last_edited_by else '',
-                    sch.last_edited_at.strftime('%Y-%m-%d %H:%M') if sch.last_edited_at else '',
-                    sch.created_by.get_full_name() if sch.created_by else '',
-                    sch.created_at.strftime('%Y-%m-%d %H:%M') if sch.created_at else '',
-                    sch.updated_at.strftime('%Y-%m-%d %H:%M') if sch.updated_at else ''
-                ])
-            
-        else:
-            # Combined sheet (default)
-            ws = wb.active
-            ws.title = "All Vacation Records"
-            
-            headers = [
-                'Type', 'ID', 'Employee Name', 'Employee ID', 'Department', 'Business Function',
-                'Vacation Type', 'Start Date', 'End Date', 'Return Date', 'Working Days',
-                'Status', 'Comment', 
-                'Line Manager/Created By', 'HR Representative', 'Approval Status',
-                'Edit Count', 'Created At', 'Updated At'
-            ]
-            ws.append(headers)
-            
-            # Combine and sort all records
-            all_records = []
-            
-            # Add requests
-            for req in requests:
-                approval_status = []
-                if req.line_manager_approved_at:
-                    approval_status.append('LM ✓')
-                elif req.status == 'PENDING_LINE_MANAGER':
-                    approval_status.append('LM ⏳')
-                elif req.status == 'REJECTED_LINE_MANAGER':
-                    approval_status.append('LM ✗')
-                
-                if req.hr_approved_at:
-                    approval_status.append('HR ✓')
-                elif req.status == 'PENDING_HR':
-                    approval_status.append('HR ⏳')
-                elif req.status == 'REJECTED_HR':
-                    approval_status.append('HR ✗')
-                
-                all_records.append({
-                    'type': 'Request',
-                    'id': req.request_id,
-                    'employee_name': req.employee.full_name,
-                    'employee_id': getattr(req.employee, 'employee_id', ''),
-                    'department': req.employee.department.name if req.employee.department else '',
-                    'business_function': req.employee.business_function.name if req.employee.business_function else '',
-                    'vacation_type': req.vacation_type.name,
-                    'start_date': req.start_date.strftime('%Y-%m-%d'),
-                    'end_date': req.end_date.strftime('%Y-%m-%d'),
-                    'return_date': req.return_date.strftime('%Y-%m-%d') if req.return_date else '',
-                    'working_days': float(req.number_of_days),
-                    'status': req.get_status_display(),
-                    'comment': req.comment,
-                    'manager_created_by': req.line_manager.full_name if req.line_manager else '',
-                    'hr_representative': req.hr_representative.full_name if req.hr_representative else '',
-                    'approval_status': ' | '.join(approval_status),
-                    'edit_count': '',
-                    'created_at': req.created_at,
-                    'updated_at': req.updated_at
-                })
-            
-            # Add schedules
-            for sch in schedules:
-                all_records.append({
-                    'type': 'Schedule',
-                    'id': f'SCH{sch.id}',
-                    'employee_name': sch.employee.full_name,
-                    'employee_id': getattr(sch.employee, 'employee_id', ''),
-                    'department': sch.employee.department.name if sch.employee.department else '',
-                    'business_function': sch.employee.business_function.name if sch.employee.business_function else '',
-                    'vacation_type': sch.vacation_type.name,
-                    'start_date': sch.start_date.strftime('%Y-%m-%d'),
-                    'end_date': sch.end_date.strftime('%Y-%m-%d'),
-                    'return_date': sch.return_date.strftime('%Y-%m-%d') if sch.return_date else '',
-                    'working_days': float(sch.number_of_days),
-                    'status': sch.get_status_display(),
-                    'comment': sch.comment,
-                    'manager_created_by': sch.created_by.get_full_name() if sch.created_by else '',
-                    'hr_representative': '',
-                    'approval_status': 'No Approval Needed',
-                    'edit_count': sch.edit_count,
-                    'created_at': sch.created_at,
-                    'updated_at': sch.updated_at
-                })
-            
-            # Sort by created_at desc
-            all_records.sort(key=lambda x: x['created_at'] if x['created_at'] else datetime.min, reverse=True)
-            
-            # Add data to sheet
-            for record in all_records:
-                ws.append([
-                    record['type'],
-                    record['id'],
-                    record['employee_name'],
-                    record['employee_id'],
-                    record['department'],
-                    record['business_function'],
-                    record['vacation_type'],
-                    record['start_date'],
-                    record['end_date'],
-                    record['return_date'],
-                    record['working_days'],
-                    record['status'],
-                    record['comment'],
-                    record['manager_created_by'],
-                    record['hr_representative'],
-                    record['approval_status'],
-                    record['edit_count'],
-                    record['created_at'].strftime('%Y-%m-%d %H:%M') if record['created_at'] else '',
-                    record['updated_at'].strftime('%Y-%m-%d %H:%M') if record['updated_at'] else ''
-                ])
-        
-        # Auto-adjust column widths for all sheets
-        for ws in wb.worksheets:
-            for col in ws.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column].width = adjusted_width
-        
-        # Generate filename
-        access_indicator = access['access_level'].replace(' ', '_').replace('-', '')
-        filename = f'vacation_records_{access_indicator}_{export_format}_{date.today().strftime("%Y%m%d")}.xlsx'
-        
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        wb.save(response)
-        
-        return response
+        document = build_vacation_records_export(request.user, request.GET)
+        return export_response(document, export_format)
         
     except Exception as e:
         logger.error(f"Export error: {e}")
@@ -0,0 +1,119 @@
+# api/view_counters.py - Buffered view / download counters (policies, procedures, documents, news)
+
+"""
+Opening a document appends one CounterIncrement row instead of updating the
+document's counter column, so concurrent views of the same document never
+wait on its row lock. flush_counter_increments (Celery beat, every minute)
+folds the buffered rows into the counter columns with one
+UPDATE ... SET view_count = view_count + CASE ... per model and field.
+
+The configured cache is DatabaseCache (incr is a get + set, entries are
+culled), so the buffer is a table rather than cache counters.
+"""
+
+import logging
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+# model label -> counter columns
+COUNTED_FIELDS = {
+    'api.CompanyPolicy': ('view_count', 'download_count'),
+    'api.CompanyProcedure': ('view_count', 'download_count'),
+    'api.Document': ('view_count', 'download_count'),
+    'api.CompanyNews': ('view_count',),
+}
+
+# Buffered rows folded per pass
+FLUSH_BATCH_SIZE = 5000
+
+# Objects per UPDATE (one CASE branch each)
+UPDATE_CHUNK_SIZE = 500
+
+
+def record_increment(instance, field):
+    """
+    Buffer +1 on instance.field. The in-memory value becomes the stored count
+    plus everything still buffered for it, so responses show the live count.
+    """
+    from .models import CounterIncrement
+
+    target = instance._meta.label
+    if field not in COUNTED_FIELDS.get(target, ()):
+        raise ValueError(f"{target}.{field} is not a buffered counter")
+
+    # Value as loaded, before any increment recorded through this instance
+    stored = instance.__dict__.setdefault('_stored_counters', {}).setdefault(field, getattr(instance, field) or 0)
+
+    object_id = str(instance.pk)
+    CounterIncrement.objects.create(target=target, object_id=object_id, field=field)
+    pending = CounterIncrement.objects.filter(target=target, object_id=object_id, field=field).count()
+    setattr(instance, field, stored + pending)
+
+
+def _apply_increments(target, field, counts):
+    """counts: {object_id: increment} - one UPDATE per chunk of objects"""
+    fields = COUNTED_FIELDS.get(target, ())
+    if field not in fields:
+        logger.warning(f"⚠️ Dropping buffered increments for unknown counter {target}.{field}")
+        return 0
+
+    model = apps.get_model(target)
+    pk_field = model._meta.pk
+    increments = {}
+    for object_id, count in counts.items():
+        try:
+            increments[pk_field.to_python(object_id)] = count
+        except Exception:
+            logger.warning(f"⚠️ Dropping buffered increments for invalid id {target}:{object_id}")
+
+    pks = list(increments)
+    updated = 0
+    for start in range(0, len(pks), UPDATE_CHUNK_SIZE):
+        chunk = pks[start:start + UPDATE_CHUNK_SIZE]
+        increment = Case(
+            *[When(pk=pk, then=Value(increments[pk])) for pk in chunk],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+        updated += model._base_manager.filter(pk__in=chunk).update(**{field: F(field) + increment})
+    return updated
+
+
+def flush_counter_increments(batch_size=FLUSH_BATCH_SIZE):
+    """
+    Fold every buffered increment into the counter columns.
+    Concurrent flushes skip each other's locked rows (PostgreSQL), so no
+    increment is applied twice. Returns the number of increments applied.
+    """
+    from .models import CounterIncrement
+
+    applied = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                CounterIncrement.objects.select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', 'target', 'field', 'object_id')[:batch_size]
+            )
+            if not rows:
+                break
+
+            grouped = defaultdict(Counter)
+            for _, target, field, object_id in rows:
+                grouped[(target, field)][object_id] += 1
+
+            for (target, field), counts in grouped.items():
+                _apply_increments(target, field, counts)
+
+            CounterIncrement.objects.filter(id__in=[row[0] for row in rows]).delete()
+            applied += len(rows)
+
+        if len(rows) < batch_size:
+            break
+
+    return applied
@@ -1,11 +1,13 @@
 from django.utils import timezone
 from rest_framework import status, viewsets
-from django.db.models import Q, Count
+from django.db.models import Q, Count, F, Value, Subquery, OuterRef
+from django.db.models.functions import Lower, Coalesce
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status, viewsets, filters
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.fields import DateTimeField
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -20,9 +22,16 @@ from django.db import transaction
 from django.http import HttpResponse
 import csv
 import io
+import uuid
+from django.core.files.storage import default_storage
 import pandas as pd
 from django.contrib.auth.models import User
 from .headcount_permissions import get_headcount_access, filter_headcount_queryset
+from .employee_import import EmployeeImportEngine, estimate_row_count
+from .export_service import (
+    ExportDocument, ExportSheet, iter_values, iter_chunks,
+    export_response, wants_background, start_background_export
+)
 
 from rest_framework.exceptions import AuthenticationFailed  # For 401 errors
 
@@ -50,6 +59,9 @@ from .serializers import (
 )
 
 from .auth import MicrosoftTokenValidator
+from .org_hierarchy import OrgHierarchy
+from .search_index import SearchDocumentFilter, apply_search, search_q
+from .status_management import EmployeeStatusManager, StatusLookup
 from drf_yasg.inspectors import SwaggerAutoSchema
 logger = logging.getLogger(__name__)
 
@@ -374,17 +386,8 @@ class ComprehensiveEmployeeFilter:
         # Search
         search = self.params.get('search')
         if search:
- 
-            queryset = queryset.filter(
-                Q(full_name__icontains=search) |
-                Q(employee_id__icontains=search) |
-                Q(user__email__icontains=search) |
-                Q(job_title__icontains=search) |
-                Q(department__name__icontains=search) |
-                Q(father_name__icontains=search) |
-                Q(job_function__name__icontains=search) | 
-                Q(phone__icontains=search)
-            )
+            # Trigram-indexed search document (annotates search_rank)
+            queryset = apply_search(queryset, search)
       
         
         # Departments
@@ -587,6 +590,411 @@ class AdvancedEmployeeSorter:
             return self.queryset.order_by(*order_fields)
         
         return self.queryset.order_by('employee_id')
+
+
+# ==================== EMPLOYEE EXPORT ====================
+
+EMPLOYEE_EXPORT_FIELDS = {
+    # Basic Information
+    'employee_id': 'Employee ID',
+    'name': 'Full Name',
+    'email': 'Email',
+    'father_name': 'Father Name',
+    'date_of_birth': 'Date of Birth',
+    'gender': 'Gender',
+    'phone': 'Phone',
+    'address': 'Address',
+    'emergency_contact': 'Emergency Contact',
+    
+    # Job Information
+    'job_title': 'Job Title',
+    'business_function_name': 'Business Function',
+    'business_function_code': 'Business Function Code',
+    'business_function_id': 'Business Function ID',
+    'department_name': 'Department',
+    'department_id': 'Department ID',
+    'unit_name': 'Unit',
+    'unit_id': 'Unit ID',
+    'job_function_name': 'Job Function',
+    'job_function_id': 'Job Function ID',
+    
+    # Position & Grading
+    'position_group_name': 'Position Group',
+    'position_group_level': 'Position Level',
+    'position_group_id': 'Position Group ID',
+    'grading_level': 'Grade Level',
+    
+    # Management
+    'line_manager_name': 'Line Manager',
+    'line_manager_hc_number': 'Manager Employee ID',
+    'direct_reports_count': 'Direct Reports Count',
+    
+    # Contract & Employment
+    'contract_duration': 'Contract Duration',
+    'contract_duration_display': 'Contract Duration Display',
+    'contract_start_date': 'Contract Start Date',
+    'contract_end_date': 'Contract End Date',
+    'start_date': 'Start Date',
+    'end_date': 'End Date',
+    'years_of_service': 'Years of Service',
+    
+    # Status
+    'status_name': 'Employment Status',
+    'status_color': 'Status Color',
+    'current_status_display': 'Current Status Display',
+    'status_needs_update': 'Status Needs Update',
+    'is_visible_in_org_chart': 'Visible in Org Chart',
+    
+    # Tags
+    'tag_names': 'Tags',
+    
+    # Dates & Metadata
+    'created_at': 'Created Date',
+    'updated_at': 'Last Updated',
+    'is_deleted': 'Is Deleted',
+}
+
+DEFAULT_EMPLOYEE_EXPORT_FIELDS = [
+    'employee_id', 'name', 'email', 'job_title', 'business_function_name',
+    'department_name', 'unit_name', 'position_group_name', 'grading_level',
+    'status_name', 'line_manager_name', 'start_date', 'contract_duration_display',
+    'phone', 'father_name', 'years_of_service'
+]
+
+# Export field -> values() columns it is computed from (default: the field itself)
+EMPLOYEE_EXPORT_SOURCES = {
+    'name': ('full_name', 'first_name', 'last_name'),
+    'email': ('email', 'user__email'),
+    'business_function_name': ('business_function__name',),
+    'business_function_code': ('business_function__code',),
+    'department_name': ('department__name',),
+    'unit_name': ('unit__name',),
+    'job_function_name': ('job_function__name',),
+    'position_group_name': ('position_group__name',),
+    'position_group_level': ('position_group__hierarchy_level',),
+    'line_manager_name': ('line_manager__full_name',),
+    'line_manager_hc_number': ('line_manager__employee_id',),
+    'direct_reports_count': (),
+    'contract_duration_display': ('contract_duration',),
+    'years_of_service': ('start_date', 'end_date'),
+    'status_name': ('status__name',),
+    'status_color': ('status__color',),
+    'current_status_display': ('status__name',),
+    'status_needs_update': ('status_id', 'start_date', 'contract_end_date', 'contract_duration'),
+    'tag_names': (),
+}
+
+# Same title casing as EmployeeListSerializer
+EMPLOYEE_EXPORT_TITLE_CASE = {
+    'name', 'father_name', 'business_function_name', 'department_name', 'unit_name',
+    'job_function_name', 'job_title', 'position_group_name', 'line_manager_name'
+}
+
+EMPLOYEE_EXPORT_YES_NO = {'status_needs_update', 'is_visible_in_org_chart', 'is_deleted'}
+
+
+class _EmployeeExportRows:
+    """
+    Employee export rows from values() chunks.
+    Per-employee lookups (tags, direct reports, required status) are
+    resolved with one query per chunk instead of one per employee.
+    """
+    
+    def __init__(self, queryset, fields):
+        self.queryset = queryset
+        self.fields = fields
+        self.today = date.today()
+        self.position_labels = dict(PositionGroup._meta.get_field('name').flatchoices)
+        self.datetime_field = DateTimeField()
+        
+        self.contract_configs = {}
+        if 'contract_duration_display' in fields:
+            self.contract_configs = {
+                config.contract_type: config for config in ContractTypeConfig.objects.all()
+            }
+        
+        # Statuses and contract configs of the status rules, loaded once
+        self.status_lookup = StatusLookup.preload() if 'status_needs_update' in fields else None
+    
+    def value_fields(self):
+        columns = {'id'}
+        for field in self.fields:
+            columns.update(EMPLOYEE_EXPORT_SOURCES.get(field, (field,)))
+        return sorted(columns)
+    
+    def __iter__(self):
+        rows = iter_values(self.queryset.prefetch_related(None), *self.value_fields())
+        
+        for chunk in iter_chunks(rows):
+            ids = [row['id'] for row in chunk]
+            tags = self._tags_for(ids) if 'tag_names' in self.fields else {}
+            reports = self._direct_reports_for(ids) if 'direct_reports_count' in self.fields else {}
+            
+            for row in chunk:
+                row['tag_names'] = tags.get(row['id'], [])
+                row['direct_reports_count'] = reports.get(row['id'], 0)
+                yield [self._format(field, self._value(field, row)) for field in self.fields]
+    
+    def _tags_for(self, ids):
+        tags = {}
+        for tag in EmployeeTag.objects.filter(
+            employees__id__in=ids, is_active=True
+        ).values('employees__id', 'name'):
+            tags.setdefault(tag['employees__id'], []).append(tag['name'])
+        return tags
+    
+    def _direct_reports_for(self, ids):
+        return dict(
+            Employee.objects.filter(
+                line_manager_id__in=ids,
+                status__affects_headcount=True,
+                is_deleted=False
+            ).values('line_manager_id').annotate(
+                count=Count('id')
+            ).values_list('line_manager_id', 'count')
+        )
+    
+    def _status_needs_update(self, row):
+        """Whether the status engine (resolve_required_status) would change this employee's status"""
+        # current_status=None: "no transition" and "status not found" both mean no change
+        required_status, _ = EmployeeStatusManager.resolve_required_status(
+            start_date=row['start_date'],
+            contract_end_date=row['contract_end_date'],
+            contract_duration=row['contract_duration'],
+            current_status=None,
+            lookup=self.status_lookup,
+            current_date=self.today
+        )
+        return required_status is not None and required_status.id != row['status_id']
+    
+    def _value(self, field, row):
+        if field == 'name':
+            return row['full_name'] or f"{row['first_name']} {row['last_name']}".strip()
+        if field == 'email':
+            return row['email'] or row['user__email']
+        if field == 'position_group_name':
+            name = row['position_group__name']
+            return self.position_labels.get(name, name)
+        if field == 'contract_duration_display':
+            config = self.contract_configs.get(row['contract_duration'])
+            return config.display_name if config else row['contract_duration']
+        if field == 'years_of_service':
+            if not row['start_date']:
+                return 0
+            return round(((row['end_date'] or self.today) - row['start_date']).days / 365.25, 1)
+        if field == 'current_status_display':
+            return row['status__name'] or 'No Status'
+        if field == 'status_needs_update':
+            return self._status_needs_update(row)
+        if field == 'tag_names':
+            return ', '.join(row['tag_names'])
+        
+        sources = EMPLOYEE_EXPORT_SOURCES.get(field, (field,))
+        return row[sources[0]] if sources else row.get(field)
+    
+    def _format(self, field, value):
+        if field in EMPLOYEE_EXPORT_YES_NO:
+            return 'Yes' if value else 'No'
+        if value is None:
+            return ''
+        if isinstance(value, datetime):
+            return self.datetime_field.to_representation(value)
+        if field in EMPLOYEE_EXPORT_TITLE_CASE and value:
+            return str(value).strip().title()
+        return str(value)
+
+
+def build_employee_export(user, query_params, data):
+    """Employee export: selected employee_ids, or everything matching the list filters"""
+    employee_ids = data.get('employee_ids') or []
+    include_fields = data.get('include_fields')
+    
+    if employee_ids:
+        # Selected employees export
+        queryset = Employee.objects.filter(id__in=employee_ids)
+    else:
+        # ✅ Apply ALL filters from query parameters
+        queryset = Employee.objects.all().order_by('full_name')
+        queryset = ComprehensiveEmployeeFilter(queryset, query_params).filter()
+    
+    # Apply sorting if specified
+    sort_params = query_params.get('ordering', '').split(',')
+    sort_params = [param.strip() for param in sort_params if param.strip()]
+    if sort_params:
+        queryset = AdvancedEmployeeSorter(queryset, sort_params).sort()
+    
+    # Determine fields to export
+    if include_fields and isinstance(include_fields, list):
+        fields_to_include = include_fields
+    else:
+        fields_to_include = DEFAULT_EMPLOYEE_EXPORT_FIELDS
+    
+    valid_fields = [field for field in fields_to_include if field in EMPLOYEE_EXPORT_FIELDS]
+    invalid_fields = [field for field in fields_to_include if field not in EMPLOYEE_EXPORT_FIELDS]
+    
+    if invalid_fields:
+        logger.warning(f"⚠️ Invalid fields ignored: {invalid_fields}")
+    
+    if not valid_fields:
+        # Fallback to basic fields if no valid fields
+        valid_fields = ['employee_id', 'name', 'email', 'job_title', 'department_name']
+        logger.warning("⚠️ No valid fields, using fallback basic fields")
+    
+    return ExportDocument(f'employees_export_{date.today()}', [
+        ExportSheet(
+            'Employees Export',
+            [EMPLOYEE_EXPORT_FIELDS[field] for field in valid_fields],
+            _EmployeeExportRows(queryset, valid_fields)
+        )
+    ])
+
+
+class UnifiedHeadcountQuery:
+    """
+    Employee + vacancy headcount list sorted and paged in the database.
+
+    Both querysets are projected to the same sort columns and combined with
+    UNION ALL, so ordering, counting and LIMIT/OFFSET happen in SQL and only
+    the visible page is loaded and serialized.
+    """
+    
+    # Sortable unified field -> (employee expression, vacancy expression, kind)
+    # kind: 'str' is compared case-insensitively, 'date' / 'num' / 'bool' as-is
+    SORTABLE_FIELDS = {
+        'name': ('full_name', Value('VACANT'), 'str'),
+        'employee_name': ('full_name', Value('VACANT'), 'str'),
+        'full_name': ('full_name', Value('VACANT'), 'str'),
+        'first_name': ('first_name', None, 'str'),
+        'last_name': ('last_name', None, 'str'),
+        'employee_id': ('employee_id', 'position_id', 'str'),
+        'email': ('email', None, 'str'),
+        'phone': ('phone', None, 'str'),
+        'father_name': ('father_name', None, 'str'),
+        'job_title': ('job_title', 'job_title', 'str'),
+        'business_function_name': ('business_function__name', 'business_function__name', 'str'),
+        'business_function_code': ('business_function__code', 'business_function__code', 'str'),
+        'department_name': ('department__name', 'department__name', 'str'),
+        'unit_name': ('unit__name', 'unit__name', 'str'),
+        'job_function_name': ('job_function__name', 'job_function__name', 'str'),
+        'position_group_name': ('position_group__name', 'position_group__name', 'str'),
+        'position_group_level': ('position_group__hierarchy_level', 'position_group__hierarchy_level', 'num'),
+        'grading_level': ('grading_level', 'grading_level', 'str'),
+        'line_manager_name': ('line_manager__full_name', 'reporting_to__full_name', 'str'),
+        'line_manager_hc_number': ('line_manager__employee_id', 'reporting_to__employee_id', 'str'),
+        'start_date': ('start_date', None, 'date'),
+        'end_date': ('end_date', None, 'date'),
+        'contract_start_date': ('contract_start_date', None, 'date'),
+        'contract_end_date': ('contract_end_date', None, 'date'),
+        'date_of_birth': ('date_of_birth', None, 'date'),
+        'contract_duration': ('contract_duration', Value('VACANT'), 'str'),
+        'contract_duration_display': ('contract_duration', Value('VACANT'), 'str'),
+        'status_name': ('status__name', 'vacancy_status__name', 'str'),
+        'status_color': ('status__color', 'vacancy_status__color', 'str'),
+        'current_status_display': ('status__name', 'vacancy_status__name', 'str'),
+        'gender': ('gender', None, 'str'),
+        'years_of_service': ('start_date', None, 'date'),  # Sorted by start_date, reversed
+        'direct_reports_count': ('direct_reports_count', Value(0), 'num'),
+        'created_at': ('created_at', 'created_at', 'datetime'),
+        'updated_at': ('updated_at', 'updated_at', 'datetime'),
+        'is_visible_in_org_chart': ('is_visible_in_org_chart', 'is_visible_in_org_chart', 'bool'),
+        'is_deleted': ('is_deleted', Value(False), 'bool'),
+    }
+    
+    OUTPUT_FIELDS = {
+        'str': models.CharField,
+        'date': models.DateField,
+        'datetime': models.DateTimeField,
+        'num': models.IntegerField,
+        'bool': models.BooleanField,
+    }
+    
+    def __init__(self, employee_queryset, vacancy_queryset, sorting_params):
+        self.employee_queryset = employee_queryset
+        self.vacancy_queryset = vacancy_queryset
+        self.sort_columns = self._parse_sorting(sorting_params)
+    
+    def _parse_sorting(self, sorting_params):
+        columns = []
+        for sort_param in sorting_params or []:
+            if isinstance(sort_param, dict):
+                field_name = sort_param.get('field', '')
+                direction = sort_param.get('direction', 'asc')
+            else:
+                field_name = str(sort_param).lstrip('-')
+                direction = 'desc' if str(sort_param).startswith('-') else 'asc'
+            
+            if field_name not in self.SORTABLE_FIELDS:
+                continue
+            
+            reverse = direction == 'desc'
+            if field_name == 'years_of_service':
+                # More years of service = earlier start date
+                reverse = not reverse
+            columns.append((field_name, reverse))
+        
+        if not columns:
+            columns.append(('name', False))
+        return columns
+    
+    def _project(self, queryset, record_type, side):
+        """Annotate the shared union columns on one side of the union"""
+        annotations = {
+            '_record_type': Value(record_type, output_field=models.CharField()),
+            '_record_pk': F('pk'),
+        }
+        
+        for index, (field_name, reverse) in enumerate(self.sort_columns):
+            employee_expr, vacancy_expr, kind = self.SORTABLE_FIELDS[field_name]
+            expr = employee_expr if side == 'employee' else vacancy_expr
+            output_field = self.OUTPUT_FIELDS[kind]()
+            
+            if expr is None:
+                expr = Value(None, output_field=output_field)
+            elif isinstance(expr, str):
+                if expr == 'direct_reports_count':
+                    expr = self._direct_reports_count()
+                else:
+                    expr = F(expr)
+            else:
+                expr = Value(expr.value, output_field=output_field)
+            
+            if kind == 'str':
+                expr = Lower(expr, output_field=output_field)
+            annotations[f'_sort_{index}'] = expr
+        
+        return queryset.order_by().prefetch_related(None).annotate(**annotations).values(*annotations.keys())
+    
+    def _direct_reports_count(self):
+        reports = Employee.objects.filter(
+            line_manager=OuterRef('pk'),
+            status__affects_headcount=True,
+            is_deleted=False
+        ).order_by().values('line_manager').annotate(total=Count('id')).values('total')
+        return Coalesce(Subquery(reports, output_field=models.IntegerField()), Value(0))
+    
+    def get_ordered_rows(self, start=None, end=None):
+        """Return [(record_type, pk), ...] for the requested slice in unified order"""
+        employee_rows = self._project(self.employee_queryset, 'employee', 'employee')
+        vacancy_rows = self._project(self.vacancy_queryset, 'vacancy', 'vacancy')
+        
+        ordering = []
+        for index, (field_name, reverse) in enumerate(self.sort_columns):
+            # Missing values always come first, as in the previous in-memory sort
+            column = F(f'_sort_{index}')
+            ordering.append(column.desc(nulls_first=True) if reverse else column.asc(nulls_first=True))
+        ordering.extend(['_record_type', '_record_pk'])
+        
+        combined = employee_rows.union(vacancy_rows, all=True).order_by(*ordering)
+        if start is not None:
+            combined = combined[start:end]
+        
+        return [(row['_record_type'], row['_record_pk']) for row in combined]
+    
+    def count(self):
+        employee_count = self.employee_queryset.count()
+        vacancy_count = self.vacancy_queryset.count()
+        return employee_count, vacancy_count
+
 class BusinessFunctionViewSet(viewsets.ModelViewSet):
     queryset = BusinessFunction.objects.all().order_by('name')
     serializer_class = BusinessFunctionSerializer
@@ -1056,11 +1464,10 @@ class ContractTypeConfigViewSet(viewsets.ModelViewSet):
 class VacantPositionViewSet(viewsets.ModelViewSet):
     """FIXED: Vacant Position ViewSet with proper field validation"""
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, SearchDocumentFilter]
     filterset_fields = [
         'business_function', 'department', 'position_group', 'is_filled', 'include_in_headcount'
     ]
-    search_fields = ['job_title', 'position_id']
     ordering = ['-created_at']
     
     def get_queryset(self):
@@ -2109,7 +2516,11 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             sorting_params = []
         
         if not sorting_params:
-            queryset = queryset.order_by('full_name')
+            # Best search matches first
+            if 'search_rank' in queryset.query.annotations:
+                queryset = queryset.order_by('-search_rank', 'full_name')
+            else:
+                queryset = queryset.order_by('full_name')
         else:
             employee_sorter = AdvancedEmployeeSorter(queryset, sorting_params)
             queryset = employee_sorter.sort()
@@ -2288,47 +2699,39 @@ class EmployeeViewSet(viewsets.ModelViewSet):
            
         
         # ====== BUILD UNIFIED DATA ======
-        unified_data = []
-        
-        # Add employees
-        if filtered_employees.exists():
-            employee_serializer = EmployeeListSerializer(filtered_employees, many=True, context={'request': request})
-            for emp_data in employee_serializer.data:
-                emp_data['is_vacancy'] = False
-                emp_data['record_type'] = 'employee'
-                unified_data.append(emp_data)
-            
-        
-        # Add vacancies
-        if filtered_vacancies.exists():
-            for vacancy in filtered_vacancies:
-                vacancy_data = self._convert_vacancy_to_employee_format(vacancy, request)
-                unified_data.append(vacancy_data)
-            
-        
-        
+        # Sorting, counting and paging run in the database; only the visible
+        # rows are loaded and serialized
+        unified_query = UnifiedHeadcountQuery(
+            filtered_employees, filtered_vacancies,
+            self._get_sorting_params_from_request(request)
+        )
+        employee_count, vacancy_count = unified_query.count()
+        total_count = employee_count + vacancy_count
         
-        # Apply sorting
-        sorting_params = self._get_sorting_params_from_request(request)
-        if sorting_params:
-            unified_data = self._sort_unified_data(unified_data, sorting_params)
-            
+        if should_paginate:
+            page_size = int(request.query_params.get('page_size', 20))
+            page = int(request.query_params.get('page', 1))
+            start_index = (page - 1) * page_size
+            rows = unified_query.get_ordered_rows(start_index, start_index + page_size)
         else:
-            unified_data.sort(key=lambda x: x.get('name', ''))
-            
+            rows = unified_query.get_ordered_rows()
+        
+        unified_data = self._serialize_unified_rows(rows, request)
         
         # Return response
         if should_paginate:
-            return self._paginate_unified_data(unified_data, request)
+            return self._paginate_unified_data(
+                unified_data, request, total_count, employee_count, vacancy_count
+            )
         else:
             return Response({
-                'count': len(unified_data),
+                'count': total_count,
                 'pagination_used': False,
                 'results': unified_data,
                 'summary': {
-                    'total_records': len(unified_data),
-                    'employee_records': filtered_employees.count() if include_employees else 0,
-                    'vacancy_records': filtered_vacancies.count() if include_vacancies else 0,
+                    'total_records': total_count,
+                    'employee_records': employee_count if include_employees else 0,
+                    'vacancy_records': vacancy_count if include_vacancies else 0,
                     'includes_vacancies': include_vacancies,
                     'includes_employees': include_employees,
                     'status_filter': status_values,
@@ -2345,6 +2748,37 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                     'vacancy_access_applied': not access['can_view_all']
                 }
             })
+    
+    def _serialize_unified_rows(self, rows, request):
+        """Load and serialize only the given (record_type, pk) rows, keeping their order"""
+        employee_pks = [pk for record_type, pk in rows if record_type == 'employee']
+        vacancy_pks = [pk for record_type, pk in rows if record_type == 'vacancy']
+        
+        employees = self.get_queryset().in_bulk(employee_pks) if employee_pks else {}
+        vacancies = VacantPosition.objects.select_related(
+            'business_function', 'department', 'unit', 'job_function',
+            'position_group', 'vacancy_status', 'reporting_to', 'reporting_to__user'
+        ).in_bulk(vacancy_pks) if vacancy_pks else {}
+        
+        ordered_employees = [employees[pk] for pk in employee_pks if pk in employees]
+        employee_data = iter(
+            EmployeeListSerializer(ordered_employees, many=True, context={'request': request}).data
+        )
+        
+        unified_data = []
+        for record_type, pk in rows:
+            if record_type == 'employee':
+                if pk not in employees:
+                    continue
+                emp_data = next(employee_data)
+                emp_data['is_vacancy'] = False
+                emp_data['record_type'] = 'employee'
+                unified_data.append(emp_data)
+            elif pk in vacancies:
+                unified_data.append(self._convert_vacancy_to_employee_format(vacancies[pk], request))
+        
+        return unified_data
+    
     def _get_vacancy_filter_from_employee_params(self, params):
         """Convert employee filter parameters to vacancy filters where applicable"""
         filters = Q()
@@ -2396,13 +2830,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         # General search
         search = params.get('search')
         if search:
-            filters &= (
-                Q(job_title__icontains=search) |
-                Q(position_id__icontains=search) |
-                Q(business_function__name__icontains=search) |
-                Q(department__name__icontains=search) |
-                Q(notes__icontains=search)
-            )
+            filters &= search_q(search)
            
         
         # Job title search
@@ -2564,90 +2992,14 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         
         return []
     
-    def _sort_unified_data(self, data, sorting_params):
-        """Sort unified employee and vacancy data - FIXED for date fields"""
-        from datetime import datetime, date
-        
-        def parse_date_value(value):
-            """Parse date value safely"""
-            if value is None:
-                return None
-            
-            # Already a date/datetime object
-            if isinstance(value, (datetime, date)):
-                return value
-            
-            # String date
-            if isinstance(value, str):
-                try:
-                    # Try ISO format
-                    return datetime.fromisoformat(value.replace('Z', '+00:00'))
-                except:
-                    try:
-                        # Try date-only format
-                        return datetime.strptime(value, '%Y-%m-%d')
-                    except:
-                        return None
-            
-            return None
-            
-        def get_sort_key(item, field, direction):
-            value = item.get(field, '')
-            
-            # ✅ CRITICAL: Handle date fields specially
-            if field in ['start_date', 'end_date', 'created_at', 'updated_at', 
-                         'contract_start_date', 'contract_end_date', 'date_of_birth']:
-                parsed_date = parse_date_value(value)
-                if parsed_date:
-                    return parsed_date
-                # Return min/max datetime for None values
-                return datetime.min if direction == 'asc' else datetime.max
-            
-            # Handle None values for other fields
-            if value is None:
-                return '' if direction == 'asc' else 'z' * 100
-            
-            # Handle numbers
-            if field in ['years_of_service', 'direct_reports_count', 'position_group_level']:
-                try:
-                    return float(value) if value else 0
-                except:
-                    return 0
-            
-            # Handle strings (case-insensitive)
-            return str(value).lower()
-        
-        # Apply multi-level sorting
-        for sort_param in reversed(sorting_params):
-            field = sort_param.get('field', '')
-            direction = sort_param.get('direction', 'asc')
-            
-            if field:
-                try:
-                    data.sort(
-                        key=lambda x: get_sort_key(x, field, direction),
-                        reverse=(direction == 'desc')
-                    )
-                   
-                except Exception as e:
-                    logger.error(f"Error sorting by {field}: {e}")
-                    # Skip this sort field if it fails
-                    continue
-        
-        return data
-    
-    def _paginate_unified_data(self, data, request):
-        """Apply pagination to unified data"""
+    def _paginate_unified_data(self, paginated_data, request, total_count, employee_count, vacancy_count):
+        """Build the paginated response for an already sliced unified page"""
         page_size = int(request.query_params.get('page_size', 20))
         page = int(request.query_params.get('page', 1))
         
-        # Calculate pagination
-        total_count = len(data)
         start_index = (page - 1) * page_size
         end_index = start_index + page_size
         
-        paginated_data = data[start_index:end_index]
-        
         # Calculate pagination info
         total_pages = (total_count + page_size - 1) // page_size
         has_next = page < total_pages
@@ -2669,10 +3021,6 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         start_item = start_index + 1 if paginated_data else 0
         end_item = min(end_index, total_count)
         
-        # Count records by type
-        employee_count = len([item for item in data if not item.get('is_vacancy', False)])
-        vacancy_count = len([item for item in data if item.get('is_vacancy', False)])
-        
         return Response({
             'count': total_count,
             'total_pages': total_pages,
@@ -4070,137 +4418,19 @@ class EmployeeViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def export_selected(self, request):
-        """✅ COMPLETELY FIXED: Export selected employees to Excel or CSV with proper field handling and filtering"""
+        """✅ Export selected employees to Excel or CSV - streamed, or as a background job with background=true"""
         try:
-            # Extract data from request
             export_format = request.data.get('export_format', 'excel')
-            employee_ids = request.data.get('employee_ids', [])
-            include_fields = request.data.get('include_fields', None)
-            
-         
-            if employee_ids:
-                # Selected employees export
-                queryset = Employee.objects.filter(id__in=employee_ids)
-               
-            else:
-                # ✅ FIX: Apply ALL filters from query parameters
-                queryset = self.get_queryset()
-                
-                # ✅ CRITICAL: Apply comprehensive filtering
-                employee_filter = ComprehensiveEmployeeFilter(queryset, request.query_params)
-                queryset = employee_filter.filter()
-                
-         
-            
-            # Apply sorting if specified
-            sort_params = request.query_params.get('ordering', '').split(',')
-            sort_params = [param.strip() for param in sort_params if param.strip()]
-            if sort_params:
-                employee_sorter = AdvancedEmployeeSorter(queryset, sort_params)
-                queryset = employee_sorter.sort()
-            
-            
-            # Enhanced field mapping for export
-            complete_field_mappings = {
-                # Basic Information
-                'employee_id': 'Employee ID',
-                'name': 'Full Name',
-                'email': 'Email',
-                'father_name': 'Father Name',
-                'date_of_birth': 'Date of Birth',
-                'gender': 'Gender',
-                'phone': 'Phone',
-                'address': 'Address',
-                'emergency_contact': 'Emergency Contact',
-                
-                # Job Information
-                'job_title': 'Job Title',
-                'business_function_name': 'Business Function',
-                'business_function_code': 'Business Function Code',
-                'business_function_id': 'Business Function ID',
-                'department_name': 'Department',
-                'department_id': 'Department ID',
-                'unit_name': 'Unit',
-                'unit_id': 'Unit ID',
-                'job_function_name': 'Job Function',
-                'job_function_id': 'Job Function ID',
-                
-                # Position & Grading
-                'position_group_name': 'Position Group',
-                'position_group_level': 'Position Level',
-                'position_group_id': 'Position Group ID',
-                'grading_level': 'Grade Level',
-                
-                # Management
-                'line_manager_name': 'Line Manager',
-                'line_manager_hc_number': 'Manager Employee ID',
-                'direct_reports_count': 'Direct Reports Count',
-                
-                # Contract & Employment
-                'contract_duration': 'Contract Duration',
-                'contract_duration_display': 'Contract Duration Display',
-                'contract_start_date': 'Contract Start Date',
-                'contract_end_date': 'Contract End Date',
-           
-                'start_date': 'Start Date',
-                'end_date': 'End Date',
-                'years_of_service': 'Years of Service',
-                
-                # Status
-                'status_name': 'Employment Status',
-                'status_color': 'Status Color',
-                'current_status_display': 'Current Status Display',
-                'status_needs_update': 'Status Needs Update',
-                'is_visible_in_org_chart': 'Visible in Org Chart',
-                
-                # Tags
-                'tag_names': 'Tags',
-                
-                # Dates & Metadata
-                'created_at': 'Created Date',
-                'updated_at': 'Last Updated',
-                'is_deleted': 'Is Deleted',
+            data = {
+                'employee_ids': request.data.get('employee_ids', []),
+                'include_fields': request.data.get('include_fields', None),
             }
             
-            # Determine fields to export
-            if include_fields and isinstance(include_fields, list) and len(include_fields) > 0:
-                fields_to_include = include_fields
-        
-            else:
-                # Use default essential fields
-                fields_to_include = [
-                    'employee_id', 'name', 'email', 'job_title', 'business_function_name',
-                    'department_name', 'unit_name', 'position_group_name', 'grading_level',
-                    'status_name', 'line_manager_name', 'start_date', 'contract_duration_display',
-                    'phone', 'father_name', 'years_of_service'
-                ]
-              
-            
-            # Filter out invalid fields
-            valid_fields = []
-            invalid_fields = []
-            
-            for field in fields_to_include:
-                if field in complete_field_mappings:
-                    valid_fields.append(field)
-                else:
-                    invalid_fields.append(field)
-            
-            if invalid_fields:
-                logger.warning(f"⚠️ Invalid fields ignored: {invalid_fields}")
-            
-            if not valid_fields:
-                # Fallback to basic fields if no valid fields
-                valid_fields = ['employee_id', 'name', 'email', 'job_title', 'department_name']
-                logger.warning("⚠️ No valid fields, using fallback basic fields")
+            if wants_background(request):
+                return start_background_export(request, 'employees', export_format, data)
             
-     
-            
-            # Export based on format
-            if export_format == 'csv':
-                return self._export_to_csv_fixed(queryset, valid_fields, complete_field_mappings)
-            else:
-                return self._export_to_excel_fixed(queryset, valid_fields, complete_field_mappings)
+            document = build_employee_export(request.user, request.query_params, data)
+            return export_response(document, export_format)
                 
         except Exception as e:
             logger.error(f"❌ Export failed: {str(e)}")
@@ -4209,589 +4439,10 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 {'error': f'Export failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    def _export_to_excel_fixed(self, queryset, fields, field_mappings):
-        """COMPLETELY FIXED: Export employees to Excel with proper field handling"""
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Alignment
-        
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Employees Export"
-        
-        # Write headers using field mappings
-        headers = [field_mappings.get(field, field.replace('_', ' ').title()) for field in fields]
-        ws.append(headers)
-        
-        # Style headers
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        # Write data
-        serializer = EmployeeListSerializer(queryset, many=True, context={'request': self.request})
-        
-        for employee_data in serializer.data:
-            row_data = []
-            for field in fields:
-                value = employee_data.get(field, '')
-                
-                # Handle special field processing
-                if field == 'tag_names':
-                    # Convert tag objects to comma-separated names
-                    if isinstance(value, list):
-                        tag_names = []
-                        for tag in value:
-                            if isinstance(tag, dict) and 'name' in tag:
-                                tag_names.append(tag['name'])
-                            elif isinstance(tag, str):
-                                tag_names.append(tag)
-                        value = ', '.join(tag_names)
-                    elif not value:
-                        value = ''
-                elif field == 'status_needs_update':
-                    # Convert boolean to Yes/No
-                    value = 'Yes' if value else 'No'
-                elif field == 'is_visible_in_org_chart':
-                    # Convert boolean to Yes/No
-                    value = 'Yes' if value else 'No'
-                elif field == 'is_deleted':
-                    # Convert boolean to Yes/No
-                    value = 'Yes' if value else 'No'
-                elif value is None:
-                    value = ''
-                
-                row_data.append(str(value))
-            ws.append(row_data)
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save to BytesIO
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        # Prepare response
-        response = HttpResponse(
-            output.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="employees_export_{date.today()}.xlsx"'
-        
-       
-        return response
-    
-    def _export_to_csv_fixed(self, queryset, fields, field_mappings):
-        """COMPLETELY FIXED: Export employees to CSV with proper field handling"""
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = f'attachment; filename="employees_export_{date.today()}.csv"'
-        
-        # Add BOM for proper UTF-8 handling in Excel
-        response.write('\ufeff')
-        
-        writer = csv.writer(response)
-        
-        # Write headers using field mappings
-        headers = [field_mappings.get(field, field.replace('_', ' ').title()) for field in fields]
-        writer.writerow(headers)
-        
-        # Write data
-        serializer = EmployeeListSerializer(queryset, many=True, context={'request': self.request})
-        
-        for employee_data in serializer.data:
-            row_data = []
-            for field in fields:
-                value = employee_data.get(field, '')
-                
-                # Handle special field processing (same as Excel)
-                if field == 'tag_names':
-                    if isinstance(value, list):
-                        tag_names = []
-                        for tag in value:
-                            if isinstance(tag, dict) and 'name' in tag:
-                                tag_names.append(tag['name'])
-                            elif isinstance(tag, str):
-                                tag_names.append(tag)
-                        value = ', '.join(tag_names)
-                    elif not value:
-                        value = ''
-                elif field == 'status_needs_update':
-                    value = 'Yes' if value else 'No'
-                elif field == 'is_visible_in_org_chart':
-                    value = 'Yes' if value else 'No'
-                elif field == 'is_deleted':
-                    value = 'Yes' if value else 'No'
-                elif value is None:
-                    value = ''
-                
-                row_data.append(str(value))
-            writer.writerow(row_data)
-        
-        
-        return response
     
     def _process_bulk_employee_data_from_excel(self, df, user):
         """Excel data-sını process et və employee-lar yarat"""
-        results = {
-            'total_rows': len(df),
-            'successful': 0,
-            'failed': 0,
-            'errors': [],
-            'created_employees': []
-        }
-        
-        try:
-           
-            
-            # Convert all columns to string to avoid Series object issues
-            df_str = df.astype(str)
-            
-            # Enhanced column mappings - more flexible matching
-            column_mappings = {
-                'employee_id': ['Employee ID (optional - auto-generated)', 'Employee ID', 'employee_id'],  # ✅ UPDATED
-                'first_name': ['First Name*', 'First Name', 'first_name'],
-                'last_name': ['Last Name*', 'Last Name', 'last_name'],
-                'email': ['Email*', 'Email', 'email'],
-                'date_of_birth': ['Date of Birth', 'date_of_birth'],
-                'gender': ['Gender', 'gender'],
-                'father_name': ['Father Name', 'father_name'],
-                'phone': ['Phone', 'phone'],
-                'address': ['Address', 'address'],
-                'emergency_contact': ['Emergency Contact', 'emergency_contact'],
-                'business_function': ['Business Function*', 'Business Function', 'business_function'],
-                'department': ['Department*', 'Department', 'department'],
-                'unit': ['Unit', 'unit'],
-                'job_function': ['Job Function*', 'Job Function', 'job_function'],
-                'job_title': ['Job Title*', 'Job Title', 'job_title'],
-                'position_group': ['Position Group*', 'Position Group', 'position_group'],
-                'grading_level': ['Grading Level', 'grading_level'],
-                'start_date': ['Start Date*', 'Start Date', 'start_date'],
-                'contract_duration': ['Contract Duration*', 'Contract Duration', 'contract_duration'],
-                'contract_start_date': ['Contract Start Date', 'contract_start_date'],
-                'line_manager_id': ['Line Manager Employee ID', 'Line Manager ID', 'line_manager_id'],
-                'is_visible_in_org_chart': ['Is Visible in Org Chart', 'Org Chart Visible'],
-                'tags': ['Tag Names (comma separated)', 'Tags', 'tags'],
-                'notes': ['Notes', 'notes']
-            }
-            
-            # Find actual column names - exact matching first
-            actual_columns = {}
-            df_columns = [str(col).strip() for col in df_str.columns]
-            
-            
-            
-            # Map columns with exact matching
-            for field, possible_names in column_mappings.items():
-                found_column = None
-                for possible_name in possible_names:
-                    for df_col in df_columns:
-                        if df_col.strip() == possible_name.strip():
-                            found_column = df_col
-                            break
-                    if found_column:
-                        break
-                
-                if found_column:
-                    actual_columns[field] = found_column
-               
-            
-            
-            
-            # ✅ UPDATED: Check required fields - employee_id ARTIQ REQUIRED DEYIL!
-            required_fields = ['first_name', 'last_name', 'email', 
-                              'business_function', 'department', 'job_function', 
-                              'job_title', 'position_group', 'start_date', 'contract_duration']
-            
-            missing_required = []
-            for req_field in required_fields:
-                if req_field not in actual_columns:
-                    missing_required.append(req_field)
-            
-            if missing_required:
-                error_msg = f"Missing required columns: {', '.join(missing_required)}"
-                logger.error(error_msg)
-                results['errors'].append(error_msg)
-                results['failed'] = len(df_str)
-                return results
-            
-            # ✅ UPDATED: Remove sample data row (daha flexible)
-            df_clean = df_str.copy()
-            
-            # Remove rows with sample data if employee_id column exists
-            if 'employee_id' in actual_columns:
-                employee_id_col = actual_columns['employee_id']
-                sample_ids = ['HC001', 'HC002', 'EMP001', 'TEST001']
-                
-                for sample_id in sample_ids:
-                    df_clean = df_clean[df_clean[employee_id_col].str.strip() != sample_id]
-            
-            # Remove rows with sample names
-            first_name_col = actual_columns['first_name']
-            sample_names = ['John', 'Jane', 'Test', 'Sample']
-            for sample_name in sample_names:
-                df_clean = df_clean[df_clean[first_name_col].str.strip() != sample_name]
-            
-            # Remove completely empty rows
-            df_clean = df_clean.dropna(how='all')
-            
-            # ✅ CRITICAL FIX: Employee ID validation - boş ola bilər
-            # YALNIZ first_name və email-i yoxlayırıq
-            df_clean = df_clean[df_clean[first_name_col].notna()]
-            df_clean = df_clean[df_clean[first_name_col].str.strip() != '']
-            df_clean = df_clean[df_clean[first_name_col].str.strip() != 'nan']
-            
-            
-            
-            if df_clean.empty:
-                results['errors'].append("No valid data rows found. Please add employee data after removing sample rows.")
-                results['failed'] = len(df_str)
-                return results
-            
-            # Update total_rows
-            results['total_rows'] = len(df_clean)
-            
-            # Prepare lookup dictionaries
-            business_functions = {}
-            for bf in BusinessFunction.objects.filter(is_active=True):
-                business_functions[bf.name.lower()] = bf
-            
-            departments = {}
-            for dept in Department.objects.select_related('business_function').filter(is_active=True):
-                departments[dept.name.lower()] = dept
-            
-            job_functions = {}
-            for jf in JobFunction.objects.filter(is_active=True):
-                job_functions[jf.name.lower()] = jf
-            
-            position_groups = {}
-            for pg in PositionGroup.objects.filter(is_active=True):
-                position_groups[pg.get_name_display().lower()] = pg
-            
-            employee_lookup = {}
-            for emp in Employee.objects.all():
-                employee_lookup[emp.employee_id] = emp
-            
-            # Get default status
-            default_status = EmployeeStatus.objects.filter(is_default_for_new_employees=True).first()
-            if not default_status:
-                default_status = EmployeeStatus.objects.filter(is_active=True).first()
-            
-            if not default_status:
-                results['errors'].append("No employee status found. Please create default status first.")
-                results['failed'] = len(df_clean)
-                return results
-            
-            # ✅ HƏR ROW ÜÇÜN AYRI TRANSACTION - BÖYÜK TRANSACTION YOX!
-            for index, row in df_clean.iterrows():
-                try:
-                    # ✅ HƏR EMPLOYEE ÜÇÜN AYRI TRANSACTION
-                    with transaction.atomic():
-                        # Extract required fields with safe string conversion
-                        def safe_get(col_name, default=''):
-                            """Safely get value from row, handling lists and various data types"""
-                            if col_name not in actual_columns:
-                                return default
-                            
-                            value = row.get(actual_columns[col_name], default)
-                            
-                            # Handle None values
-                            if value is None:
-                                return default
-                            
-                            # Handle list values (pandas sometimes returns lists for cells)
-                            if isinstance(value, list):
-                                if len(value) > 0:
-                                    value = value[0]  # Take first element
-                                else:
-                                    return default
-                            
-                            # Handle pandas Series (can happen with duplicate columns)
-                            if hasattr(value, 'iloc'):
-                                try:
-                                    value = value.iloc[0] if len(value) > 0 else default
-                                except:
-                                    value = default
-                            
-                            # Convert to string and check for empty/nan values
-                            str_value = str(value).strip()
-                            
-                            # Check for various empty representations
-                            if str_value.lower() in ['nan', 'none', 'nat', '', 'null']:
-                                return default
-                            
-                            return str_value
-                        
-                        # ✅ CRITICAL CHANGE: Employee ID is now OPTIONAL
-                        employee_id_from_excel = safe_get('employee_id')
-                        
-                        first_name = safe_get('first_name')
-                        last_name = safe_get('last_name')
-                        email = safe_get('email')
-                        business_function_name = safe_get('business_function')
-                        department_name = safe_get('department')
-                        job_function_name = safe_get('job_function')
-                        job_title = safe_get('job_title')
-                        position_group_name = safe_get('position_group')
-                        start_date_str = safe_get('start_date')
-                        contract_duration = safe_get('contract_duration', 'PERMANENT')
-                        
-                       
-                        
-                        # ✅ UPDATED: Validate required fields - employee_id ARTIQ YOXLANMIR
-                        if not all([first_name, last_name, email, business_function_name, 
-                                   department_name, job_function_name, job_title, position_group_name, start_date_str]):
-                            results['errors'].append(f"Row {index + 2}: Missing required data")
-                            results['failed'] += 1
-                            continue
-                        
-                        # ✅ CRITICAL: Business function validation - ALWAYS needed
-                        business_function = business_functions.get(business_function_name.lower())
-                        if not business_function:
-                            results['errors'].append(f"Row {index + 2}: Business Function '{business_function_name}' not found")
-                            results['failed'] += 1
-                            continue
-                        
-                        # ✅ UPDATED: Employee ID handling
-                        validated_employee_id = None
-                        if employee_id_from_excel:
-                            # User provided employee_id - check for duplicates
-                            if Employee.objects.filter(employee_id=employee_id_from_excel).exists():
-                                results['errors'].append(f"Row {index + 2}: Employee ID {employee_id_from_excel} already exists")
-                                results['failed'] += 1
-                                continue
-                            validated_employee_id = employee_id_from_excel
-                            
-                        else:
-                            # No employee_id provided - will be auto-generated by Employee.save()
-                            logger.info(f"Row {index + 2}: No employee_id provided, will be auto-generated for {first_name} {last_name} in {business_function.name}")
-                        
-                        # Check email duplicates
-                        if User.objects.filter(email=email).exists():
-                            results['errors'].append(f"Row {index + 2}: Email {email} already exists")
-                            results['failed'] += 1
-                            continue
-                        
-                        # Validate department
-                        department = departments.get(department_name.lower())
-                        if not department:
-                            results['errors'].append(f"Row {index + 2}: Department '{department_name}' not found")
-                            results['failed'] += 1
-                            continue
-                        
-                        # Validate job function
-                        job_function = job_functions.get(job_function_name.lower())
-                        if not job_function:
-                            results['errors'].append(f"Row {index + 2}: Job Function '{job_function_name}' not found")
-                            results['failed'] += 1
-                            continue
-                        
-                        # Validate position group
-                        position_group = position_groups.get(position_group_name.lower())
-                        if not position_group:
-                            results['errors'].append(f"Row {index + 2}: Position Group '{position_group_name}' not found")
-                            results['failed'] += 1
-                            continue
-                        
-                        # Parse start date
-                        try:
-                            start_date = pd.to_datetime(start_date_str).date()
-                        except:
-                            results['errors'].append(f"Row {index + 2}: Invalid start date '{start_date_str}'")
-                            results['failed'] += 1
-                            continue
-                        
-                        # Validate contract duration
-                        try:
-                            if not ContractTypeConfig.objects.filter(contract_type=contract_duration, is_active=True).exists():
-                                available_durations = list(ContractTypeConfig.objects.filter(is_active=True).values_list('contract_type', flat=True))
-              
-                                
-                                if not available_durations:
-                                    available_durations = ['3_MONTHS', '6_MONTHS', '1_YEAR', '2_YEARS', '3_YEARS', 'PERMANENT']
-                                
-                                if contract_duration not in available_durations:
-                                    results['errors'].append(f"Row {index + 2}: Invalid contract duration '{contract_duration}'. Available: {', '.join(available_durations)}")
-                                    results['failed'] += 1
-                                    continue
-                        except Exception as e:
-                            logger.error(f"Error validating contract duration for row {index + 2}: {e}")
-                            default_durations = ['3_MONTHS', '6_MONTHS', '1_YEAR', '2_YEARS', '3_YEARS', 'PERMANENT']
-                            if contract_duration not in default_durations:
-                                contract_duration = 'PERMANENT'
-                        
-                        # Optional fields
-                        date_of_birth = None
-                        dob_str = safe_get('date_of_birth')
-                        if dob_str:
-                            try:
-                                date_of_birth = pd.to_datetime(dob_str).date()
-                            except:
-                                pass
-                        
-                        gender = safe_get('gender').upper()
-                        if gender not in ['MALE', 'FEMALE']:
-                            gender = None
-                        
-                        father_name = safe_get('father_name')
-                        
-                        # ✅ PHONE FIELD VALIDATION - TRUNCATE IF TOO LONG
-                        phone = safe_get('phone')
-                        if phone and len(phone) > 15:
-                            phone = phone[:15]
-                            logger.warning(f"Row {index + 2}: Phone number truncated to 15 characters")
-                        
-                        address = safe_get('address')
-                        emergency_contact = safe_get('emergency_contact')
-                        
-                        # Unit (optional)
-                        unit = None
-                        unit_name = safe_get('unit')
-                        if unit_name:
-                            unit = Unit.objects.filter(name__iexact=unit_name, department=department).first()
-                        
-                        # Grading level
-                        grading_level = safe_get('grading_level')
-                        if not grading_level:
-                            grading_level = f"{position_group.grading_shorthand}_M"
-                        
-                        # Contract start date
-                        contract_start_date = start_date
-                        csd_str = safe_get('contract_start_date')
-                        if csd_str:
-                            try:
-                                contract_start_date = pd.to_datetime(csd_str).date()
-                            except:
-                                pass
-                        
-                        # Line manager
-                        line_manager = None
-                        line_manager_id = safe_get('line_manager_id')
-                        if line_manager_id:
-                            line_manager = employee_lookup.get(line_manager_id)
-                        
-                        # Org chart visibility
-                        is_visible_str = safe_get('is_visible_in_org_chart', 'TRUE').upper()
-                        is_visible_in_org_chart = is_visible_str in ['TRUE', '1', 'YES']
-                        
-                        notes = safe_get('notes')
-                        
-                        # ✅ CRITICAL: Create employee - employee_id conditional
-                        employee_data = {
-                            'first_name': first_name,
-                            'last_name': last_name,
-                            'email': email,
-                            'date_of_birth': date_of_birth,
-                            'gender': gender,
-                            'father_name': father_name,
-                            'address': address,
-                            'phone': phone,
-                            'emergency_contact': emergency_contact,
-                            'business_function': business_function,
-                            'department': department,
-                            'unit': unit,
-                            'job_function': job_function,
-                            'job_title': job_title,
-                            'position_group': position_group,
-                            'grading_level': grading_level,
-                            'start_date': start_date,
-                            'contract_duration': contract_duration,
-                            'contract_start_date': contract_start_date,
-                            'line_manager': line_manager,
-                            'status': default_status,
-                            'is_visible_in_org_chart': is_visible_in_org_chart,
-                            'notes': notes,
-                            'created_by': user
-                        }
-                        
-                        # ✅ ONLY add employee_id if user provided it
-                        if validated_employee_id:
-                            employee_data['employee_id'] = validated_employee_id
-                        
-                        # Create employee - save() will auto-generate employee_id if not provided
-                        employee = Employee.objects.create(**employee_data)
-                        
-                        # Process tags
-                        tags_str = safe_get('tags')
-                        if tags_str:
-                            tags = []
-                            for tag_spec in tags_str.split(','):
-                                tag_spec = tag_spec.strip()
-                                if ':' in tag_spec:
-                                    tag_parts = tag_spec.split(':', 1)
-                                    if len(tag_parts) >= 2:
-                                        tag_name = tag_parts[1].strip()
-                                    else:
-                                        tag_name = tag_spec.strip()
-                                else:
-                                    tag_name = tag_spec.strip()
-                                
-                                if tag_name:
-                                    tag, created = EmployeeTag.objects.get_or_create(
-                                        name=tag_name,
-                                        defaults={'is_active': True}
-                                    )
-                                    tags.append(tag)
-                            
-                            if tags:
-                                employee.tags.set(tags)
-                        
-                        # Log activity
-                        EmployeeActivity.objects.create(
-                            employee=employee,
-                            activity_type='BULK_CREATED',
-                            description=f"Employee {employee.full_name} created via bulk upload" + 
-                                      (f" with provided ID {validated_employee_id}" if validated_employee_id else " with auto-generated ID"),
-                            performed_by=user,
-                            metadata={
-                                'bulk_creation': True, 
-                                'row_number': index + 2,
-                                'employee_id_auto_generated': not bool(validated_employee_id)
-                            }
-                        )
-                        
-                        results['successful'] += 1
-                        results['created_employees'].append({
-                            'employee_id': employee.employee_id,
-                            'name': employee.full_name,
-                            'email': employee.email,
-                            'id_auto_generated': not bool(validated_employee_id)
-                        })
-                        
-                        
-                    
-                except Exception as e:
-                    # ✅ Bu row fail oldu, amma digərləri davam edər
-                    error_msg = f"Row {index + 2}: {str(e)}"
-                    results['errors'].append(error_msg)
-                    results['failed'] += 1
-                    logger.error(f"❌ Error creating employee from row {index + 2}: {e}")
-                    logger.error(f"Traceback: {traceback.format_exc()}")
-                    continue  # Növbəti row-a keç
-            
-            
-            return results
-            
-        except Exception as e:
-            logger.error(f"❌ Bulk processing failed: {str(e)}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            results['errors'].append(f"Processing failed: {str(e)}")
-            results['failed'] = results['total_rows']
-            return results
+        return EmployeeImportEngine(user).run_dataframe(df)
     
 
     @swagger_auto_schema(
@@ -5592,98 +5243,100 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             if restore_to_active:
                 active_status = EmployeeStatus.objects.filter(status_type='ACTIVE', is_active=True).first()
             
-            # Process each employee individually
-            for employee in employees:
-                try:
-                    # Store info before restore
-                    employee_info = {
-                        'id': employee.id,
-                        'employee_id': employee.employee_id,
-                        'name': employee.full_name,
-                        'was_deleted_at': employee.deleted_at
-                    }
+            # Process each employee individually - one outer transaction so
+            # Employee post_save work runs once for the whole batch on commit
+            with transaction.atomic():
+                for employee in employees:
+                    try:
+                        # Store info before restore
+                        employee_info = {
+                            'id': employee.id,
+                            'employee_id': employee.employee_id,
+                            'name': employee.full_name,
+                            'was_deleted_at': employee.deleted_at
+                        }
                     
-                    with transaction.atomic():
-                        # FIXED: Find and remove vacancies using original_employee_pk
-                        related_vacancies = VacantPosition.objects.filter(
-                            original_employee_pk=employee.pk,  # Use PK for exact match
-                            is_filled=False
-                        )
+                        with transaction.atomic():
+                            # FIXED: Find and remove vacancies using original_employee_pk
+                            related_vacancies = VacantPosition.objects.filter(
+                                original_employee_pk=employee.pk,  # Use PK for exact match
+                                is_filled=False
+                            )
                         
-                        vacancy_info = []
-                        for vacancy in related_vacancies:
-                            vacancy_info.append({
-                                'id': vacancy.id,
-                                'position_id': vacancy.position_id,
-                                'job_title': vacancy.job_title
-                            })
-                            vacancy.delete()  # Remove the vacancy
-                            vacancies_removed.append(vacancy_info[-1])
+                            vacancy_info = []
+                            for vacancy in related_vacancies:
+                                vacancy_info.append({
+                                    'id': vacancy.id,
+                                    'position_id': vacancy.position_id,
+                                    'job_title': vacancy.job_title
+                                })
+                                vacancy.delete()  # Remove the vacancy
+                                vacancies_removed.append(vacancy_info[-1])
                         
-                        # FIXED: Find and DELETE the soft delete archive record
-                        soft_delete_archives = EmployeeArchive.objects.filter(
-                            original_employee_id=employee.employee_id,
+                            # FIXED: Find and DELETE the soft delete archive record
+                            soft_delete_archives = EmployeeArchive.objects.filter(
+                                original_employee_id=employee.employee_id,
                       
-                            employee_still_exists=True  # Only soft delete archives
-                        ).order_by('-deleted_at')
+                                employee_still_exists=True  # Only soft delete archives
+                            ).order_by('-deleted_at')
                         
-                        archive_info = []
-                        for archive in soft_delete_archives:
-                            archive_data = {
-                                'id': archive.id,
-                                'reference': archive.get_archive_reference(),
-                                'deleted_at': archive.deleted_at.isoformat() if archive.deleted_at else None
-                            }
-                            archive_info.append(archive_data)
-                            archive.delete()  # DELETE the archive since employee is restored
-                            archives_deleted.append(archive_data)
+                            archive_info = []
+                            for archive in soft_delete_archives:
+                                archive_data = {
+                                    'id': archive.id,
+                                    'reference': archive.get_archive_reference(),
+                                    'deleted_at': archive.deleted_at.isoformat() if archive.deleted_at else None
+                                }
+                                archive_info.append(archive_data)
+                                archive.delete()  # DELETE the archive since employee is restored
+                                archives_deleted.append(archive_data)
                            
                         
-                        # Restore the employee
-                        employee.restore()
+                            # Restore the employee
+                            employee.restore()
                         
-                        # Set to active if requested
-                        if restore_to_active and active_status:
-                            employee.status = active_status
-                            employee.save()
+                            # Set to active if requested
+                            if restore_to_active and active_status:
+                                employee.status = active_status
+                                employee.save()
                         
-                        # Log activity
-                        EmployeeActivity.objects.create(
-                            employee=employee,
-                            activity_type='RESTORED',
-                            description=f"Employee {employee.full_name} bulk restored from soft deletion. {len(vacancy_info)} vacancies removed. {len(archive_info)} archives deleted.",
-                            performed_by=request.user,
-                            metadata={
-                                'bulk_restoration': True,
-                                'restored_from_deletion': True,
-                                'originally_deleted_at': employee_info['was_deleted_at'].isoformat() if employee_info['was_deleted_at'] else None,
-                                'restored_to_active': restore_to_active,
-                                'restoration_method': 'bulk_restore',
-                                'vacancies_removed': vacancy_info,
-                                'archives_deleted': archive_info,  # FIXED: Include deleted archives
-                                'archive_updated': len(archive_info) > 0,
-                                'original_employee_pk_restored': employee.pk
-                            }
-                        )
+                            # Log activity
+                            EmployeeActivity.objects.create(
+                                employee=employee,
+                                activity_type='RESTORED',
+                                description=f"Employee {employee.full_name} bulk restored from soft deletion. {len(vacancy_info)} vacancies removed. {len(archive_info)} archives deleted.",
+                                performed_by=request.user,
+                                metadata={
+                                    'bulk_restoration': True,
+                                    'restored_from_deletion': True,
+                                    'originally_deleted_at': employee_info['was_deleted_at'].isoformat() if employee_info['was_deleted_at'] else None,
+                                    'restored_to_active': restore_to_active,
+                                    'restoration_method': 'bulk_restore',
+                                    'vacancies_removed': vacancy_info,
+                                    'archives_deleted': archive_info,  # FIXED: Include deleted archives
+                                    'archive_updated': len(archive_info) > 0,
+                                    'original_employee_pk_restored': employee.pk
+                                }
+                            )
                     
-                    results.append({
-                        'employee_id': employee_info['id'],
-                        'employee_name': employee_info['name'],
-                        'status': 'success',
-                        'original_employee_id': employee_info['employee_id'],
-                        'was_deleted_at': employee_info['was_deleted_at'],
-                        'restored_to_active': restore_to_active,
-                        'vacancies_removed': len(vacancy_info),
-                        'archives_deleted': len(archive_info)  # FIXED: Include in results
-                    })
+                        results.append({
+                            'employee_id': employee_info['id'],
+                            'employee_name': employee_info['name'],
+                            'status': 'success',
+                            'original_employee_id': employee_info['employee_id'],
+                            'was_deleted_at': employee_info['was_deleted_at'],
+                            'restored_to_active': restore_to_active,
+                            'vacancies_removed': len(vacancy_info),
+                            'archives_deleted': len(archive_info)  # FIXED: Include in results
+                        })
                     
-                except Exception as e:
-                    results.append({
-                        'employee_id': employee.id,
-                        'employee_name': employee.full_name,
-                        'status': 'failed',
-                        'error': str(e)
-                    })
+                    except Exception as e:
+                        results.append({
+                            'employee_id': employee.id,
+                            'employee_name': employee.full_name,
+                            'status': 'failed',
+                            'error': str(e)
+                        })
             
             successful_count = len([r for r in results if r['status'] == 'success'])
             failed_count = len([r for r in results if r['status'] == 'failed'])
@@ -6163,131 +5816,13 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """✅ COMPLETE: Get comprehensive employee statistics with vacant positions"""
-        queryset = self.get_queryset()
-        
-        # Apply filtering
-        employee_filter = ComprehensiveEmployeeFilter(queryset, request.query_params)
-        queryset = employee_filter.filter()
-        
-        total_employees = queryset.count()
-        active_employees = queryset.filter(status__affects_headcount=True).count()
-        
-        # By status
-        status_stats = {}
-        for emp_status in EmployeeStatus.objects.filter(is_active=True):
-            count = queryset.filter(status=emp_status).count()
-            if count > 0:
-                status_stats[emp_status.name] = {
-                    'count': count,
-                    'color': emp_status.color,
-                    'affects_headcount': emp_status.affects_headcount
-                }
+        from .headcount_statistics import get_headcount_statistics
         
-        # ✅ By business function with ALL info
-        function_stats = {}
-        for func in BusinessFunction.objects.filter(is_active=True):
-            emp_count = queryset.filter(business_function=func).count()
-            active_count = queryset.filter(
-                business_function=func, 
-                status__affects_headcount=True
-            ).count()
-            
-            # Recent hires in this function
-            recent_hires = queryset.filter(
-                business_function=func,
-                start_date__gte=date.today() - timedelta(days=30)
-            ).count()
-            
-            function_stats[func.name] = {
-                'count': emp_count,
-                'active': active_count,
-                'recent_hires': recent_hires
-            }
-        
-        # ✅ Vacant positions by business function
-        vacant_by_function = {}
-        vacant_positions = VacantPosition.objects.filter(
-            is_filled=False,
-            is_deleted=False,
-            include_in_headcount=True
-        ).select_related('business_function')
-        
-        for func in BusinessFunction.objects.filter(is_active=True):
-            vacant_count = vacant_positions.filter(business_function=func).count()
-            vacant_by_function[func.name] = vacant_count
-        
-        # By position group
-        position_stats = {}
-        for pos in PositionGroup.objects.filter(is_active=True):
-            count = queryset.filter(position_group=pos).count()
-            if count > 0:
-                position_stats[pos.get_name_display()] = count
-        
-        # Contract duration statistics
-        contract_stats = {}
-        try:
-            contract_types = queryset.values_list('contract_duration', flat=True).distinct()
-            for contract_type in contract_types:
-                if contract_type:
-                    count = queryset.filter(contract_duration=contract_type).count()
-                    if count > 0:
-                        try:
-                            config = ContractTypeConfig.objects.get(
-                                contract_type=contract_type, 
-                                is_active=True
-                            )
-                            display_name = config.display_name
-                        except ContractTypeConfig.DoesNotExist:
-                            display_name = contract_type.replace('_', ' ').title()
-                        contract_stats[display_name] = count
-        except Exception as e:
-            logger.error(f"Error calculating contract statistics: {e}")
-            contract_stats = {}
-        
-        # Recent activity
-        recent_hires = queryset.filter(
-            start_date__gte=date.today() - timedelta(days=30)
-        ).count()
-        
-  
-        
-        # Status update analysis
-        try:
-            from .status_management import EmployeeStatusManager
-            employees_needing_updates = EmployeeStatusManager.get_employees_needing_update()
-            status_update_stats = {
-                'employees_needing_updates': len(employees_needing_updates),
-                'status_transitions': {}
-            }
-            
-            for update_info in employees_needing_updates:
-                transition = f"{update_info['current_status']} → {update_info['required_status']}"
-                status_update_stats['status_transitions'][transition] = \
-                    status_update_stats['status_transitions'].get(transition, 0) + 1
-        except Exception as e:
-            status_update_stats = {
-                'employees_needing_updates': 0,
-                'status_transitions': {},
-                'error': str(e)
-            }
-        
-        # ✅ Total vacant positions
-        total_vacant = vacant_positions.count()
-        
-        return Response({
-            'total_employees': total_employees,
-            'active_employees': active_employees,
-            'inactive_employees': total_employees - active_employees,
-            'total_vacant_positions': total_vacant,  # ✅ NEW
-            'by_status': status_stats,
-            'by_business_function': function_stats,
-            'vacant_positions_by_business_function': vacant_by_function,  # ✅ NEW
-            'by_position_group': position_stats,
-            'by_contract_duration': contract_stats,
-            'recent_hires_30_days': recent_hires,
-         
-            'status_update_analysis': status_update_stats
-        })
+        # Grouped aggregates, cached per filter combination
+        return Response(get_headcount_statistics(
+            self.get_queryset(), request.query_params, ComprehensiveEmployeeFilter
+        ))
+    
     @action(detail=True, methods=['get'])
     def activities(self, request, pk=None):
         """Get employee activity history"""
@@ -6334,6 +5869,9 @@ class BulkEmployeeUploadViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]  # Yalnız file upload
     
+    # Uploads with more rows than this are imported by a Celery job
+    BACKGROUND_ROW_THRESHOLD = 500
+    
     @swagger_auto_schema(
         operation_description="Bulk create employees from uploaded Excel file",
         manual_parameters=[
@@ -6419,19 +5957,29 @@ class BulkEmployeeUploadViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Read Excel file with better error handling
-            try:
-                # Try multiple engines
-                try:
-                    df = pd.read_excel(file, sheet_name=0, engine='openpyxl')
-                except:
-                    try:
-                        df = pd.read_excel(file, sheet_name=0, engine='xlrd')
-                    except:
-                        df = pd.read_excel(file, sheet_name=0)
+            # ✅ Large files run as a background job - poll import_status with task_id
+            row_estimate = estimate_row_count(file)
+            run_in_background = (
+                str(request.data.get('background', '')).lower() in ['true', '1', 'yes'] or
+                row_estimate > self.BACKGROUND_ROW_THRESHOLD
+            )
+            
+            if run_in_background:
+                from .tasks import import_employees_from_excel
                 
-             
+                file_path = default_storage.save(f"bulk_imports/{uuid.uuid4().hex}_{file.name}", file)
+                task = import_employees_from_excel.delay(file_path, request.user.id, row_estimate)
                 
+                return Response({
+                    'message': 'File accepted. Import is running in the background.',
+                    'task_id': task.id,
+                    'estimated_rows': row_estimate,
+                    'filename': file.name
+                }, status=status.HTTP_202_ACCEPTED)
+            
+            # Small files - stream the workbook inline
+            try:
+                result = EmployeeImportEngine(request.user).run_file(file, row_estimate)
             except Exception as e:
                 logger.error(f"Failed to read Excel file: {str(e)}")
                 return Response(
@@ -6439,34 +5987,12 @@ class BulkEmployeeUploadViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Remove completely empty rows
-            df = df.dropna(how='all')
-            
-            # Check if file has data
-            if df.empty:
-                logger.warning("Excel file is empty after removing empty rows")
+            if result['total_rows'] == 0 and not result['errors']:
                 return Response(
                     {'error': 'Excel file is empty or has no valid data'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-          
-            
-            # Process the data - call EmployeeViewSet method
-            employee_viewset = EmployeeViewSet()
-            
-            # Make sure the viewset has the method
-            if not hasattr(employee_viewset, '_process_bulk_employee_data_from_excel'):
-                logger.error("EmployeeViewSet missing _process_bulk_employee_data_from_excel method")
-                return Response(
-                    {'error': 'Server configuration error. Please contact administrator.'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            result = employee_viewset._process_bulk_employee_data_from_excel(df, request.user)
-            
-         
-            
             return Response({
                 'message': f'File processed successfully. {result["successful"]} employees created, {result["failed"]} failed.',
                 'total_rows': result['total_rows'],
@@ -6484,6 +6010,36 @@ class BulkEmployeeUploadViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @swagger_auto_schema(
+        operation_description="Progress / result of a background bulk import",
+        manual_parameters=[
+            openapi.Parameter('task_id', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True)
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def import_status(self, request):
+        """Background import progress"""
+        from celery.result import AsyncResult
+        
+        task_id = request.query_params.get('task_id')
+        if not task_id:
+            return Response({'error': 'task_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        task = AsyncResult(task_id)
+        response = {'task_id': task_id, 'state': task.state}
+        
+        # ✅ Progress / result carry the uploader's id - only they may read them
+        if task.state in ('PROGRESS', 'SUCCESS'):
+            data = task.info if isinstance(task.info, dict) else {}
+            if data.get('user_id') != request.user.id:
+                return Response({'error': 'Import not found'}, status=status.HTTP_404_NOT_FOUND)
+            response['progress' if task.state == 'PROGRESS' else 'result'] = data
+        elif task.state == 'FAILURE':
+            # Worker crash - no owner recorded, so no details either
+            response['error'] = 'Import failed'
+        
+        return Response(response)
+    
     @swagger_auto_schema(
         operation_description="Download Excel template for bulk employee creation",
         responses={
@@ -6594,18 +6150,7 @@ class OrgChartFilter:
         # General search across multiple fields
         search = self.params.get('search')
         if search:
-  
-            queryset = queryset.filter(
-                Q(full_name__icontains=search) |
-                Q(employee_id__icontains=search) |  # ✅ Employee ID də search-ə daxildir
-                Q(user__email__icontains=search) |
-                Q(job_title__icontains=search) |
-                Q(business_function__name__icontains=search) |
-                Q(department__name__icontains=search) |
-                Q(unit__name__icontains=search) |
-                Q(father_name__icontains=search) |
-                Q(phone__icontains=search)
-            )
+            queryset = apply_search(queryset, search)
         
         # Job title search
         job_title_search = self.params.get('job_title_search')
@@ -6916,20 +6461,8 @@ class OrgChartViewSet(viewsets.ViewSet):
             
             # ✅ Apply search filter to both
             if search:
-                employees = employees.filter(
-                    Q(full_name__icontains=search) |
-                    Q(employee_id__icontains=search) |
-                    Q(job_title__icontains=search) |
-                    Q(user__email__icontains=search) |
-                    Q(department__name__icontains=search) |
-                    Q(business_function__name__icontains=search)
-                )
-                vacancies = vacancies.filter(
-                    Q(job_title__icontains=search) |
-                    Q(position_id__icontains=search) |
-                    Q(department__name__icontains=search) |
-                    Q(business_function__name__icontains=search)
-                )
+                employees = apply_search(employees, search)
+                vacancies = apply_search(vacancies, search)
            
             
             # ✅ Apply employee ID search
@@ -6965,7 +6498,11 @@ class OrgChartViewSet(viewsets.ViewSet):
             # ========================================
             # STEP 5: SERIALIZE EMPLOYEES
             # ========================================
-            serializer = OrgChartNodeSerializer(employees, many=True, context={'request': request})
+            # Hierarchy metrics for every node come from one in-memory manager tree
+            serializer = OrgChartNodeSerializer(
+                employees, many=True,
+                context={'request': request, 'org_hierarchy': OrgHierarchy.build()}
+            )
             employee_data = serializer.data
      
             vacancy_data = []
@@ -7110,8 +6647,12 @@ class OrgChartViewSet(viewsets.ViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
+            hierarchy = OrgHierarchy.build()
+            
             # Serialize main employee data
-            serializer = OrgChartNodeSerializer(employee, context={'request': request})
+            serializer = OrgChartNodeSerializer(
+                employee, context={'request': request, 'org_hierarchy': hierarchy}
+            )
             employee_data = serializer.data
             
             # Get organizational context
@@ -7180,24 +6721,6 @@ class OrgChartViewSet(viewsets.ViewSet):
                     is_deleted=False
                 ).exclude(id=employee.id).count()
             
-            # Calculate hierarchy metrics
-            def count_total_subordinates(emp, visited=None):
-                if visited is None:
-                    visited = set()
-                if emp.id in visited:
-                    return 0
-                visited.add(emp.id)
-                
-                reports = Employee.objects.filter(
-                    line_manager=emp,
-                    status__allows_org_chart=True,
-                    is_deleted=False
-                )
-                total = reports.count()
-                for report in reports:
-                    total += count_total_subordinates(report, visited.copy())
-                return total
-            
             return Response({
                 'employee': employee_data,
                 'org_context': {
@@ -7217,7 +6740,7 @@ class OrgChartViewSet(viewsets.ViewSet):
                 },
                 'hierarchy': {
                     'level_to_ceo': len(manager_chain),
-                    'total_subordinates': count_total_subordinates(employee),
+                    'total_subordinates': hierarchy.get_total_subordinates(employee.id),
                     'direct_reports_count': len(team_data),
                     'has_team': len(team_data) > 0,
                     'is_top_level': employee.line_manager is None
@@ -202,72 +202,21 @@ class SalaryCalculationManager:
     
     @staticmethod
     def calculate_scenario_grades(base_value, input_rates, position_groups=None):
-        """Calculate scenario grades with enhanced validation"""
-   
+        """Calculate scenario grades with the compiled scenario model"""
+        from .scenario_model import CompiledScenarioModel, get_scenario_model
         
         if position_groups is None:
-            position_groups = SalaryCalculationManager.get_position_groups_from_db()
-        
-        calculated_grades = {}
-        
-        # Convert queryset to list
-        positions_list = list(position_groups)
-        logger.info(f"Positions order: {[(p.get_name_display(), p.hierarchy_level) for p in positions_list]}")
+            model = get_scenario_model()
+        else:
+            model = CompiledScenarioModel(
+                (p.id, p.name, p.get_name_display()) for p in position_groups
+            )
         
-        if not positions_list:
+        if not model.size:
             logger.error("No positions to calculate")
-            return calculated_grades
+            return {}
         
-        # Process all positions from bottom (highest index) to top (index 0)
-        for i in range(len(positions_list) - 1, -1, -1):
-            position = positions_list[i]
-            position_name = position.get_name_display()
-            position_inputs = input_rates.get(position_name, {})
-            
-            
-            
-            # Determine this position's LD
-            if i == len(positions_list) - 1:
-                # This is the base position - use base_value directly
-                position_ld = Decimal(str(base_value))
-                
-            else:
-                # This is NOT the base position - calculate based on vertical rate
-                vertical_input = position_inputs.get('vertical', 0)
-                
-                # Get the LD of the position below (higher index)
-                lower_position = positions_list[i + 1]
-                lower_position_name = lower_position.get_name_display()
-                lower_position_ld = calculated_grades[lower_position_name]['LD']
-                
-                # Safe vertical conversion
-                if vertical_input == '' or vertical_input is None:
-                    vertical_rate = Decimal('0')
-                    logger.info(f"No vertical input for {position_name}, using 0%")
-                else:
-                    try:
-                        vertical_rate = Decimal(str(vertical_input))
-                        logger.info(f"Vertical rate for {position_name}: {vertical_rate}%")
-                    except (ValueError, TypeError):
-                        logger.warning(f"Invalid vertical input for {position_name}: {vertical_input}, using 0")
-                        vertical_rate = Decimal('0')
-                
-                # Calculate this position's LD based on the position below + vertical rate
-                position_ld = Decimal(str(lower_position_ld)) * (Decimal('1') + vertical_rate / Decimal('100'))
-                
-              
-            
-            # Get horizontal intervals for this position
-            horizontal_intervals = position_inputs.get('horizontal_intervals', {})
-            
-            # Calculate horizontal grades for this position
-            grades = SalaryCalculationManager._calculate_horizontal_grades_with_intervals(
-                position_ld, horizontal_intervals
-            )
-            calculated_grades[position_name] = grades
-            
-            
-        return calculated_grades
+        return model.to_grades(model.calculate(base_value, input_rates))
     
     @staticmethod
     def _calculate_horizontal_grades_with_intervals(lower_decile, horizontal_intervals):
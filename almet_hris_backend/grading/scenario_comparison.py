@@ -0,0 +1,363 @@
+# grading/scenario_comparison.py - Vectorized scenario comparison engine
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GRADE_LEVELS = ('LD', 'LQ', 'M', 'UQ', 'UD')
+
+# 2% tolerance for over / at / under classification
+TOLERANCE = 0.02
+
+# Mapping for all possible grade level variations
+LEVEL_MAPPINGS = {
+    'LD': ['LD', 'LOWERDECILE', 'LOWER_DECILE', 'L_D', 'LOWER-DECILE'],
+    'LQ': ['LQ', 'LOWERQUARTILE', 'LOWER_QUARTILE', 'L_Q', 'LOWER-QUARTILE'],
+    'M': ['M', 'MEDIAN', 'MED'],
+    'UQ': ['UQ', 'UPPERQUARTILE', 'UPPER_QUARTILE', 'U_Q', 'UPPER-QUARTILE'],
+    'UD': ['UD', 'UPPERDECILE', 'UPPER_DECILE', 'U_D', 'UPPER-DECILE']
+}
+
+
+def normalize_grade_level(grade_level):
+    """
+    Normalize grade level - convert all variations to standard format
+    Examples:
+      - MGR_M, MGR_m, MGR_Median -> M
+      - MGR_UQ, MGR_uq, MGR_UpperQuartile -> UQ
+      - DIRECTOR_LD -> LD
+    """
+    if not grade_level:
+        return None
+
+    grade_upper = grade_level.upper()
+
+    # Split by underscore to get level part
+    parts = grade_upper.split('_')
+
+    if len(parts) >= 2:
+        level_part = parts[-1]  # Last part is the level
+
+        for standard_level, variations in LEVEL_MAPPINGS.items():
+            if level_part in variations or any(v in level_part for v in variations):
+                return standard_level
+
+    # If no underscore, check if entire string matches
+    for standard_level, variations in LEVEL_MAPPINGS.items():
+        if grade_upper in variations:
+            return standard_level
+
+    logger.warning(f"⚠️ Could not normalize grade level: {grade_level}")
+    return None
+
+
+def positions_match(emp_position, scenario_position):
+    """Check if employee position matches scenario position"""
+    if not emp_position or not scenario_position:
+        return False
+
+    emp_pos_upper = emp_position.upper().replace(' ', '_').replace('-', '_')
+    scen_pos_upper = scenario_position.upper().replace(' ', '_').replace('-', '_')
+
+    # Direct or partial match
+    return (
+        emp_pos_upper == scen_pos_upper or
+        emp_pos_upper in scen_pos_upper or
+        scen_pos_upper in emp_pos_upper
+    )
+
+
+def _grade_value(grades, level):
+    return float(grades.get(level, 0) or 0)
+
+
+class ScenarioComparisonEngine:
+    """
+    Compares salary scenarios against the CURRENT scenario for a set of employees.
+
+    Every employee is mapped once to integer (position, grade) indices and every
+    scenario is resolved once into a dense positions x grades salary matrix
+    (the fuzzy position match runs per unique position, not per employee).
+    Cost totals, over/at/under counts and differences are then plain array ops.
+    """
+
+    def __init__(self, current_scenario, scenarios, employees):
+        self.current_scenario = current_scenario
+        self.scenarios = list(scenarios)
+        self.employees = list(employees)
+
+        # Unique employee positions in first-appearance order
+        self.positions = []
+        position_index = {}
+        # Grades seen per position, in first-appearance order
+        self.position_grades = []
+
+        count = len(self.employees)
+        self.position_idx = np.zeros(count, dtype=np.intp)
+        self.grade_idx = np.full(count, -1, dtype=np.intp)
+
+        normalized_cache = {}
+        for i, emp in enumerate(self.employees):
+            position = emp['position_group__name']
+            p = position_index.get(position)
+            if p is None:
+                p = position_index[position] = len(self.positions)
+                self.positions.append(position)
+                self.position_grades.append([])
+            self.position_idx[i] = p
+
+            grading_level = emp['grading_level']
+            if grading_level not in normalized_cache:
+                normalized_cache[grading_level] = normalize_grade_level(grading_level)
+            level = normalized_cache[grading_level]
+            if level:
+                g = GRADE_LEVELS.index(level)
+                self.grade_idx[i] = g
+                if g not in self.position_grades[p]:
+                    self.position_grades[p].append(g)
+
+        self.graded = self.grade_idx >= 0
+        # Flat (position, grade) cell per employee - only meaningful where graded
+        self.cell_idx = self.position_idx * len(GRADE_LEVELS) + np.maximum(self.grade_idx, 0)
+        self.cell_count = len(self.positions) * len(GRADE_LEVELS)
+
+        # Employee's current salary comes from the CURRENT scenario + their grading
+        self.current_salaries = self._employee_salaries(self._salary_matrix(current_scenario))
+        self.scenario_salaries = [
+            self._employee_salaries(self._salary_matrix(scenario))
+            for scenario in self.scenarios
+        ]
+
+    def _salary_matrix(self, scenario):
+        """Dense positions x grades salary lookup for one scenario"""
+        matrix = np.zeros((len(self.positions), len(GRADE_LEVELS)))
+        calculated_grades = scenario.calculated_grades
+
+        if not calculated_grades or not isinstance(calculated_grades, dict):
+            return matrix
+
+        for p, position in enumerate(self.positions):
+            # First matching position wins, same as the per-employee lookup
+            for pos_name, grades in calculated_grades.items():
+                if isinstance(grades, dict) and positions_match(position, pos_name):
+                    matrix[p] = [_grade_value(grades, level) for level in GRADE_LEVELS]
+                    break
+
+        return matrix
+
+    def _employee_salaries(self, matrix):
+        """Per-employee salary from a scenario matrix, 0 where grade is unknown"""
+        salaries = np.zeros(len(self.employees))
+        graded = self.graded
+        salaries[graded] = matrix[self.position_idx[graded], self.grade_idx[graded]]
+        return salaries
+
+    def _per_position(self, weights):
+        return np.bincount(self.position_idx, weights=weights, minlength=len(self.positions))
+
+    def _per_cell(self, mask):
+        return np.bincount(self.cell_idx[mask], minlength=self.cell_count)
+
+    def build_total_cost_comparison(self):
+        """
+        Figure 1: Total Cost Comparison Table
+        Total salary cost per position for current vs scenarios
+        """
+        current_costs = self._per_position(self.current_salaries)
+
+        scenario_costs = {}
+        for scenario, salaries in zip(self.scenarios, self.scenario_salaries):
+            costs = self._per_position(salaries)
+            if scenario.name in scenario_costs:
+                costs = scenario_costs[scenario.name] + costs
+            scenario_costs[scenario.name] = costs
+
+        result = {
+            'positions': {},
+            'totals': {
+                'current': round(float(current_costs.sum())),
+                'scenarios': {}
+            }
+        }
+
+        for p, position in enumerate(self.positions):
+            result['positions'][position] = {
+                'current': round(float(current_costs[p])),
+                'scenarios': {
+                    name: round(float(costs[p]))
+                    for name, costs in scenario_costs.items()
+                }
+            }
+
+        if self.positions:
+            result['totals']['scenarios'] = {
+                name: round(float(costs.sum()))
+                for name, costs in scenario_costs.items()
+            }
+
+        for name, value in result['totals']['scenarios'].items():
+            logger.info(f"💰 Total Cost - {name}: {value}")
+
+        return result
+
+    def _grade_distribution(self, reference_salaries):
+        """Count / over / at / under per (position, grade) cell against reference salaries"""
+        current = self.current_salaries
+        compared = self.graded & (reference_salaries != 0)
+
+        over = compared & (current > reference_salaries * (1 + TOLERANCE))
+        under = compared & ~over & (current < reference_salaries * (1 - TOLERANCE))
+        at = compared & ~over & ~under
+
+        counts = self._per_cell(self.graded)
+        over_counts = self._per_cell(over)
+        at_counts = self._per_cell(at)
+        under_counts = self._per_cell(under)
+
+        distribution = []
+        for p in range(len(self.positions)):
+            position_data = {}
+            for g in self.position_grades[p]:
+                cell = p * len(GRADE_LEVELS) + g
+                position_data[GRADE_LEVELS[g]] = {
+                    'count': int(counts[cell]),
+                    'over': int(over_counts[cell]),
+                    'at': int(at_counts[cell]),
+                    'under': int(under_counts[cell])
+                }
+            distribution.append(position_data)
+        return distribution
+
+    def build_employee_analysis(self):
+        """
+        Figure 2: Employee Analysis - Headcount by Grade
+        Shows distribution: how many employees are over/under/at their grade
+        """
+        headcounts = np.bincount(self.position_idx, minlength=len(self.positions))
+
+        # Current grading compares against the grade salary of the current scenario
+        current_distribution = self._grade_distribution(self.current_salaries)
+        scenario_distributions = [
+            (scenario.name, self._grade_distribution(salaries))
+            for scenario, salaries in zip(self.scenarios, self.scenario_salaries)
+        ]
+
+        analysis = {}
+        for p, position in enumerate(self.positions):
+            analysis[position] = {
+                'total_employees': int(headcounts[p]),
+                'current_grading': current_distribution[p],
+                'scenarios': {
+                    name: distribution[p]
+                    for name, distribution in scenario_distributions
+                }
+            }
+
+        return analysis
+
+    def build_underpaid_overpaid_lists(self):
+        """
+        Underpaid and Overpaid employee lists
+        Compares employee's current salary vs what scenario says it should be
+        """
+        result = {}
+        current = self.current_salaries
+
+        for scenario, salaries in zip(self.scenarios, self.scenario_salaries):
+            compared = self.graded & (current != 0) & (salaries != 0)
+            differences = salaries - current
+
+            # Scenario suggests lower salary - OVERPAID, higher salary - UNDERPAID
+            overpaid_idx = np.flatnonzero(compared & (salaries < current * (1 - TOLERANCE)))
+            underpaid_idx = np.flatnonzero(compared & (salaries > current * (1 + TOLERANCE)))
+
+            underpaid = [self._employee_info(i, salaries, differences) for i in underpaid_idx]
+            overpaid = [self._employee_info(i, salaries, differences) for i in overpaid_idx]
+
+            # Sort by absolute difference
+            underpaid.sort(key=lambda x: x['difference'], reverse=True)
+            overpaid.sort(key=lambda x: abs(x['difference']), reverse=True)
+
+            result[scenario.name] = {
+                'underpaid': underpaid,
+                'overpaid': overpaid
+            }
+
+        return result
+
+    def _employee_info(self, i, salaries, differences):
+        emp = self.employees[i]
+        current_salary = float(self.current_salaries[i])
+        difference = float(differences[i])
+        diff_percent = (difference / current_salary * 100) if current_salary > 0 else 0
+
+        return {
+            'employee_id': emp['employee_id'],
+            'employee_name': emp['full_name'],
+            'position': emp['position_group__name'],
+            'department': emp['department__name'] or 'N/A',
+            'start_date': str(emp['start_date']) if emp['start_date'] else 'N/A',
+            'current_salary': round(current_salary),
+            'scenario_salary': round(float(salaries[i])),
+            'difference': round(difference),
+            'difference_percent': round(diff_percent, 1),
+            'grading_level': GRADE_LEVELS[self.grade_idx[i]]
+        }
+
+    def build_scenarios_percentage_comparison(self):
+        """
+        Figure 3: Scenarios Comparison - Percentage Differences
+        Shows percentage difference of each grade level from current to scenarios
+        """
+        result = {}
+        current_grades_map = self.current_scenario.calculated_grades
+
+        if not current_grades_map:
+            return result
+
+        for position_name in self.current_scenario.grade_order or []:
+            current_grades = current_grades_map.get(position_name, {})
+
+            if not isinstance(current_grades, dict):
+                continue
+
+            current_values = np.array([_grade_value(current_grades, level) for level in GRADE_LEVELS])
+
+            result[position_name] = {
+                'current': dict(zip(GRADE_LEVELS, current_values.tolist())),
+                'scenarios': {}
+            }
+
+            for scenario in self.scenarios:
+                scenario_grades = (scenario.calculated_grades or {}).get(position_name, {})
+
+                if not isinstance(scenario_grades, dict):
+                    continue
+
+                scenario_values = np.array([_grade_value(scenario_grades, level) for level in GRADE_LEVELS])
+                diff_amounts = scenario_values - current_values
+                diff_percents = np.divide(
+                    diff_amounts, current_values,
+                    out=np.zeros(len(GRADE_LEVELS)), where=current_values > 0
+                ) * 100
+
+                result[position_name]['scenarios'][scenario.name] = {
+                    level: {
+                        'value': round(float(scenario_values[g])),
+                        'diff_percent': round(float(diff_percents[g]), 1),
+                        'diff_amount': round(float(diff_amounts[g]))
+                    }
+                    for g, level in enumerate(GRADE_LEVELS)
+                }
+
+        return result
+
+    def build(self):
+        return {
+            'total_cost_comparison': self.build_total_cost_comparison(),
+            'employee_analysis': self.build_employee_analysis(),
+            'underpaid_overpaid_lists': self.build_underpaid_overpaid_lists(),
+            'scenarios_comparison': self.build_scenarios_percentage_comparison()
+        }
@@ -0,0 +1,348 @@
+# grading/scenario_model.py - Compiled in-memory scenario calculator
+
+"""
+Grading scenario arithmetic without database access per call.
+
+The active position groups are compiled once into a CompiledScenarioModel
+(ordered names + index). It is rebuilt when a PositionGroup changes in any
+process, via a shared version token in the cache.
+
+Rates are parsed once into arrays. Like the manager, each position's LD is
+the rounded LD below times (1 + vertical / 100), evaluated exactly: rates are
+held as integer steps of 0.0001% and the chain runs in int64. Results
+therefore match the old Decimal loop digit for digit, and a partial
+recompute matches a full one:
+- when one position's vertical rate changes, only that position and the
+  positions above it are recomputed from the unchanged LD below;
+- many candidate rate vectors (a grid sweep) are evaluated together, one
+  array operation per position.
+"""
+
+from itertools import product
+import logging
+import math
+import threading
+import time
+import uuid
+
+import numpy as np
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+GRADE_LEVELS = ('LD', 'LQ', 'M', 'UQ', 'UD')
+INTERVAL_NAMES = ('LD_to_LQ', 'LQ_to_M', 'M_to_UQ', 'UQ_to_UD')
+
+# Replaced by a new random token on every save/delete of PositionGroup - tokens
+# never repeat, so a culled and re-added key can not match an old compiled model
+POSITION_ORDER_VERSION_KEY = 'grading:position_order:version'
+
+# How often a process re-reads the shared version (seconds)
+VERSION_CHECK_INTERVAL = 5
+
+# Upper bound of candidates evaluated by one what-if request
+MAX_BATCH_CANDIDATES = 5000
+
+# Vertical rate resolution: 1 + rate / 100 == (VERTICAL_SCALE + rate * 10^4) / VERTICAL_SCALE
+RATE_PRECISION = 10 ** 4
+VERTICAL_SCALE = 100 * RATE_PRECISION
+
+_model_lock = threading.Lock()
+_model_state = {'model': None, 'version': None, 'checked_at': 0.0}
+
+
+def _to_float(value, default=0.0):
+    """Same tolerance as the manager: '', None and junk count as default"""
+    if value is None or value == '' or value == 'None':
+        return default
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def _rate_units(value):
+    """Vertical rate in 0.0001% units"""
+    return int(round(_to_float(value) * RATE_PRECISION))
+
+
+def _round_half_even(numerators, denominator):
+    """round(numerators / denominator) for int64 arrays, ties to even like round()"""
+    quotient, remainder = np.divmod(numerators, denominator)
+    twice = 2 * remainder
+    return quotient + ((twice > denominator) | ((twice == denominator) & (quotient % 2 == 1)))
+
+
+class ScenarioResult:
+    """Calculated grades of one rate vector, kept for incremental recomputation"""
+
+    def __init__(self, base_value, steps, interval_factors, grades, lower_deciles):
+        self.base_value = base_value
+        # VERTICAL_SCALE * (1 + vertical / 100) per position (base position: VERTICAL_SCALE)
+        self.steps = steps
+        # (positions, 4) - 1 + interval / 100
+        self.interval_factors = interval_factors
+        # (positions, 5) unrounded LD, LQ, M, UQ, UD
+        self.grades = grades
+        # Rounded LD per position - the next position up builds on it
+        self.lower_deciles = lower_deciles
+
+    def rounded(self):
+        # np.round is half-to-even like round()
+        return np.round(self.grades).astype(np.int64)
+
+
+class CompiledScenarioModel:
+    """
+    Active position groups in hierarchy order (index 0 = top, last = base position)
+    """
+
+    def __init__(self, positions):
+        # (id, name, display name) ordered by hierarchy_level
+        self.positions = list(positions)
+        self.names = [display for _, _, display in self.positions]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.size = len(self.names)
+        self.base_index = self.size - 1
+
+    @classmethod
+    def compile(cls):
+        from api.models import PositionGroup
+
+        groups = PositionGroup.objects.filter(is_active=True).order_by('hierarchy_level')
+        return cls((group.id, group.name, group.get_name_display()) for group in groups)
+
+    # ==================== INPUT PARSING ====================
+
+    def vertical_steps(self, input_rates):
+        """Vertical step per position in VERTICAL_SCALE units; the base position has none"""
+        steps = np.full(self.size, VERTICAL_SCALE, dtype=np.int64)
+        for name, rates in (input_rates or {}).items():
+            i = self.index.get(name)
+            if i is None or i == self.base_index or not isinstance(rates, dict):
+                continue
+            steps[i] = VERTICAL_SCALE + _rate_units(rates.get('vertical'))
+        return steps
+
+    def interval_factors(self, input_rates):
+        factors = np.ones((self.size, len(INTERVAL_NAMES)))
+        for name, rates in (input_rates or {}).items():
+            i = self.index.get(name)
+            if i is None or not isinstance(rates, dict):
+                continue
+            intervals = rates.get('horizontal_intervals')
+            if not isinstance(intervals, dict):
+                continue
+            for j, interval_name in enumerate(INTERVAL_NAMES):
+                factors[i, j] = 1 + _to_float(intervals.get(interval_name, 0)) / 100
+        return factors
+
+    # ==================== CALCULATION ====================
+
+    def _chain(self, lower_deciles, steps, top, grades, rounded):
+        """
+        LD of positions top..0 from the rounded LD at top + 1, written into
+        grades[..., :top + 1, 0] and rounded[..., :top + 1].
+        Works for one rate vector or a (candidates, positions) batch.
+        """
+        for i in range(top, -1, -1):
+            product = lower_deciles * steps[..., i]
+            grades[..., i, 0] = product / VERTICAL_SCALE
+            lower_deciles = _round_half_even(product, VERTICAL_SCALE)
+            rounded[..., i] = lower_deciles
+
+    def _horizontal(self, lower_deciles, interval_factors):
+        """LQ = LD * (1 + LD_to_LQ / 100), M = LQ * ... - same float steps as the manager"""
+        return np.multiply.accumulate(
+            np.concatenate((lower_deciles[..., None], interval_factors), axis=-1), axis=-1
+        )
+
+    def calculate(self, base_value, input_rates, previous=None):
+        """
+        Grades of one rate vector. With previous (the result of an earlier call on
+        this model), only the rows whose inputs changed are recomputed.
+        """
+        base_value = float(base_value)
+        steps = self.vertical_steps(input_rates)
+        interval_factors = self.interval_factors(input_rates)
+
+        if (
+            previous is None or previous.base_value != base_value or
+            previous.grades.shape != (self.size, len(GRADE_LEVELS))
+        ):
+            grades = np.zeros((self.size, len(GRADE_LEVELS)))
+            rounded = np.zeros(self.size, dtype=np.int64)
+            if self.size:
+                grades[self.base_index, 0] = base_value
+                rounded[self.base_index] = round(base_value)
+                self._chain(rounded[self.base_index], steps, self.base_index - 1, grades, rounded)
+            grades = self._horizontal(grades[:, 0], interval_factors)
+            return ScenarioResult(base_value, steps, interval_factors, grades, rounded)
+
+        grades = previous.grades.copy()
+        rounded = previous.lower_deciles.copy()
+
+        # Lowest position whose vertical rate changed - it and everything above move
+        changed = np.flatnonzero(steps != previous.steps)
+        rows = np.zeros(self.size, dtype=bool)
+        if changed.size:
+            lowest = changed.max()
+            self._chain(rounded[lowest + 1], steps, lowest, grades, rounded)
+            rows[:lowest + 1] = True
+
+        rows |= (interval_factors != previous.interval_factors).any(axis=1)
+        if rows.any():
+            grades[rows] = self._horizontal(grades[rows, 0], interval_factors[rows])
+
+        return ScenarioResult(base_value, steps, interval_factors, grades, rounded)
+
+    def calculate_batch(self, base_values, steps_matrix, interval_factors):
+        """
+        Grades of many candidates at once.
+        base_values: (k,), steps_matrix: (k, positions), interval_factors: (positions, 4)
+        Returns (k, positions, 5) unrounded grades.
+        """
+        count = len(base_values)
+        grades = np.zeros((count, self.size, len(GRADE_LEVELS)))
+        rounded = np.zeros((count, self.size), dtype=np.int64)
+        if self.size:
+            grades[:, self.base_index, 0] = base_values
+            rounded[:, self.base_index] = np.round(base_values).astype(np.int64)
+            self._chain(rounded[:, self.base_index], steps_matrix, self.base_index - 1, grades, rounded)
+        return self._horizontal(grades[:, :, 0], interval_factors[None, :, :].repeat(count, axis=0))
+
+    def to_grades(self, result):
+        """{position name: {LD, LQ, M, UQ, UD}} - the manager's output shape"""
+        rounded = result.rounded().tolist()
+        return {
+            name: dict(zip(GRADE_LEVELS, rounded[i]))
+            for i, name in enumerate(self.names)
+        }
+
+    # ==================== WHAT-IF CANDIDATES ====================
+
+    def build_candidates(self, base_value, input_rates, candidates=None, grid=None):
+        """
+        Vertical steps of the what-if candidates on top of the base inputs:
+        - candidates: [{'baseValue1': optional, 'verticals': {position: rate}}]
+        - grid: {position: [rate, ...]} - every combination (cartesian product)
+        Returns (base_values, steps_matrix, overrides per candidate)
+        """
+        base_steps = self.vertical_steps(input_rates)
+        overrides = []
+
+        if grid:
+            unknown = [name for name in grid if name not in self.index]
+            if unknown:
+                raise ValueError(f"Unknown positions: {', '.join(unknown)}")
+            names = list(grid)
+            not_lists = [name for name in names if not isinstance(grid[name], list)]
+            if not_lists:
+                raise ValueError(f"Grid values must be lists of rates: {', '.join(not_lists)}")
+            # Python ints - a numpy product wraps around on large grids
+            combination_count = math.prod(len(grid[name]) for name in names)
+            if combination_count + len(candidates or []) > MAX_BATCH_CANDIDATES:
+                raise ValueError(f"Grid has {combination_count} combinations (max {MAX_BATCH_CANDIDATES})")
+            for values in product(*(grid[name] for name in names)):
+                overrides.append({'verticals': dict(zip(names, values))})
+
+        for candidate in candidates or []:
+            overrides.append(candidate if isinstance(candidate, dict) else {})
+
+        if len(overrides) > MAX_BATCH_CANDIDATES:
+            raise ValueError(f"Too many candidates: {len(overrides)} (max {MAX_BATCH_CANDIDATES})")
+
+        base_values = np.full(len(overrides), float(base_value))
+        steps_matrix = np.tile(base_steps, (len(overrides), 1))
+
+        for k, override in enumerate(overrides):
+            if override.get('baseValue1') not in (None, ''):
+                base_values[k] = _to_float(override['baseValue1'])
+            for name, rate in (override.get('verticals') or {}).items():
+                i = self.index.get(name)
+                if i is None:
+                    raise ValueError(f"Unknown position: {name}")
+                if i != self.base_index:
+                    steps_matrix[k, i] = VERTICAL_SCALE + _rate_units(rate)
+
+        rate_units = steps_matrix - VERTICAL_SCALE
+        if (base_values <= 0).any():
+            raise ValueError("Base value must be greater than 0")
+        if ((rate_units < 0) | (rate_units > 100 * RATE_PRECISION)).any():
+            raise ValueError("Vertical rates must be between 0-100")
+
+        return base_values, steps_matrix, overrides
+
+
+# ==================== COMPILED MODEL CACHE ====================
+
+def _shared_version():
+    now = time.monotonic()
+    if _model_state['version'] is not None and now - _model_state['checked_at'] < VERSION_CHECK_INTERVAL:
+        return _model_state['version']
+
+    try:
+        version = cache.get(POSITION_ORDER_VERSION_KEY)
+        if version is None:
+            # Missing or culled - every process rebuilds once and agrees on the first token added
+            cache.add(POSITION_ORDER_VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(POSITION_ORDER_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Position order version unavailable: {e}")
+        version = _model_state['version']
+    if version is None:
+        version = uuid.uuid4().hex
+
+    _model_state['version'] = version
+    _model_state['checked_at'] = now
+    return version
+
+
+def get_scenario_model():
+    """Compiled model of the active position groups - rebuilt after a PositionGroup change"""
+    version = _shared_version()
+    model = _model_state['model']
+    if model is None or model[0] != version:
+        with _model_lock:
+            model = _model_state['model']
+            if model is None or model[0] != version:
+                model = (version, CompiledScenarioModel.compile())
+                _model_state['model'] = model
+    return model[1]
+
+
+def invalidate_scenario_model():
+    """Drop the compiled model here and, through the shared version, in every other process"""
+    try:
+        cache.set(POSITION_ORDER_VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f"Could not invalidate scenario model: {e}")
+
+    with _model_lock:
+        _model_state['model'] = None
+    _model_state['version'] = None
+
+
+# ==================== PER-USER LAST RESULT ====================
+
+# Last calculate_dynamic result per user in this process, so a slider change
+# only recomputes the positions it moves. Bounded, oldest user dropped first.
+MAX_REMEMBERED_RESULTS = 256
+
+_last_results = {}
+_last_results_lock = threading.Lock()
+
+
+def remembered_result(user_id, model):
+    entry = _last_results.get(user_id)
+    if entry and entry[0] is model:
+        return entry[1]
+    return None
+
+
+def remember_result(user_id, model, result):
+    with _last_results_lock:
+        _last_results.pop(user_id, None)
+        if len(_last_results) >= MAX_REMEMBERED_RESULTS:
+            _last_results.pop(next(iter(_last_results)))
+        _last_results[user_id] = (model, result)
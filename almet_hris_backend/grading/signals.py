@@ -0,0 +1,11 @@
+# grading/signals.py - Compiled scenario model invalidation
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender='api.PositionGroup')
+@receiver(post_delete, sender='api.PositionGroup')
+def invalidate_scenario_model_on_change(sender, instance, **kwargs):
+    from .scenario_model import invalidate_scenario_model
+    invalidate_scenario_model()